@@ -0,0 +1,4 @@
+# Does no work, so a run measures only the engine: loading, resolution and scheduling
+
+def run(params, context):
+    return {'status': 'success', 'value': f'{context.job_name}:{len(params)}'}
@@ -0,0 +1,41 @@
+import os
+import sys
+import time
+import hashlib
+
+# Stand-in for `npx hardhat ...`: sleeps for FAKE_HARDHAT_LATENCY_MS, then prints what the real
+# compile and deploy script print, so the executor's streaming and event parsing do real work.
+#   FAKE_HARDHAT_LATENCY_MS   time per invocation (default: 50)
+#   FAKE_HARDHAT_OUTPUT_LINES extra log lines, for noisy compilers (default: 0)
+#   FAKE_HARDHAT_CONTRACT     name in the "deployed to" line (default: MyContract)
+
+def install(bin_dir):
+    # Writes an `npx` shim into bin_dir; put bin_dir first on PATH to use it
+    os.makedirs(bin_dir, exist_ok=True)
+    path = os.path.join(bin_dir, 'npx')
+    with open(path, 'w') as f:
+        f.write(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.abspath(__file__)}" "$@"\n')
+    os.chmod(path, 0o755)
+    return path
+
+def main(argv):
+    time.sleep(int(os.environ.get('FAKE_HARDHAT_LATENCY_MS', '50')) / 1000)
+    for index in range(int(os.environ.get('FAKE_HARDHAT_OUTPUT_LINES', '0'))):
+        print(f'[fake-hardhat] log line {index}')
+    args = argv[1:] if argv[:1] == ['hardhat'] else argv
+    if args[:1] == ['compile']:
+        print('Compiled 1 Solidity file successfully (evm target: paris).')
+    elif args[:1] == ['run']:
+        seed = hashlib.sha256(f'{os.getpid()}:{time.time_ns()}'.encode()).hexdigest()
+        contract = os.environ.get('FAKE_HARDHAT_CONTRACT', 'MyContract')
+        print('Deploying contracts with the account: 0xf39Fd6e51aad88F6F4ce6aB8827279cffFb92266')
+        print(f'{contract} deployed to 0x{seed[:40]}')
+        print(f'Deployment transaction: 0x{hashlib.sha256(seed.encode()).hexdigest()}')
+        print('Gas used: 123456')
+    else:
+        print(f"fake hardhat: unsupported command {' '.join(argv)}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
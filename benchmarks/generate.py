@@ -0,0 +1,119 @@
+import os
+import json
+import hashlib
+import random
+import argparse
+import yaml
+
+# Synthetic pipelines for the benchmarks. A pipeline has `jobs` jobs of one action kind
+# (or a mix), wired up in one of SHAPES; `density` is the fraction of jobs whose params
+# reference their dependencies' outputs through ${{ }} expressions.
+
+SHAPES = ('chain', 'fanout', 'layered', 'random')
+ACTIONS = ('noop', 'hardhat', 'rpc', 'mixed')
+
+# action kind -> (uses, output field other jobs reference)
+ACTION_KINDS = {
+    'noop': ('bench/noop@v1', 'value'),
+    'hardhat': ('bench/hardhat@v1', 'address'),
+    'rpc': ('actions/deploy@v1', 'address'),
+}
+
+CONTRACT = 'BenchContract'
+# Contract creation code that returns an empty runtime; only its size matters to the fake node
+BYTECODE = '0x6080604052348015600f57600080fd5b50603f80601d6000396000f3fe6080604052600080fdfea2646970667358'
+
+# Native deploys on one sender race for nonces, so rpc jobs spread over this many networks,
+# each with its own unlocked account on the fake node
+SENDER_LANES = 32
+
+def lane_account(lane):
+    return '0x' + hashlib.sha256(f'bench-sender-{lane}'.encode()).hexdigest()[:40]
+
+def job_name(index):
+    return f'job-{index:05d}'
+
+def dependency_lists(jobs, shape, rng):
+    # Indexes of the jobs each job depends on; always earlier jobs, so the graph is acyclic
+    width = max(1, int(jobs ** 0.5))
+    deps = []
+    for index in range(jobs):
+        if index == 0:
+            deps.append([])
+        elif shape == 'chain':
+            deps.append([index - 1])
+        elif shape == 'fanout':
+            deps.append([0])
+        elif shape == 'layered':
+            # Layers of ~sqrt(jobs) jobs, each needing up to three jobs of the previous layer
+            layer = index // width
+            previous = range((layer - 1) * width, layer * width) if layer else range(0)
+            deps.append(sorted(rng.sample(previous, min(len(previous), rng.randint(1, 3)))))
+        else:
+            deps.append(sorted(rng.sample(range(index), min(index, rng.randint(1, 3)))))
+    return deps
+
+def generate_pipeline(jobs, shape='layered', density=0.5, action='noop', seed=0):
+    if shape not in SHAPES:
+        raise ValueError(f"Unknown shape '{shape}', expected one of: {', '.join(SHAPES)}")
+    if action not in ACTIONS:
+        raise ValueError(f"Unknown action '{action}', expected one of: {', '.join(ACTIONS)}")
+    if jobs < 1:
+        raise ValueError("A pipeline needs at least one job")
+    rng = random.Random(seed)
+    kinds = [action if action != 'mixed' else rng.choice(sorted(ACTION_KINDS)) for _ in range(jobs)]
+    all_deps = dependency_lists(jobs, shape, rng)
+
+    pipeline_jobs = []
+    for index in range(jobs):
+        deps = all_deps[index]
+        uses, _ = ACTION_KINDS[kinds[index]]
+        params = {'network': 'localhost'}
+        if kinds[index] == 'rpc':
+            params.update({'network': f'lane-{index % SENDER_LANES}', 'contract': CONTRACT, 'engine': 'native', 'poll_interval': 0.01})
+        job = {'name': job_name(index), 'uses': uses, 'with': params}
+        if deps and rng.random() < density:
+            # Referenced dependencies become implicit `needs`; a plain and an interpolated expression
+            references = [f'jobs.{job_name(dep)}.output.{ACTION_KINDS[kinds[dep]][1]}' for dep in deps]
+            params['inputs'] = ['${{ %s }}' % reference for reference in references]
+            params['label'] = f'{job_name(index)} after ${{{{ {references[0]} }}}}'
+        elif deps:
+            job['needs'] = [job_name(dep) for dep in deps]
+        pipeline_jobs.append(job)
+    return {'name': f'Benchmark {shape} x{jobs}', 'jobs': pipeline_jobs}
+
+def write_project(root, pipeline, rpc_url='http://127.0.0.1:8545'):
+    # Lays out pipelines/, config/ and artifacts/ as the runner expects; returns the pipeline path
+    artifacts_dir = os.path.join(root, 'artifacts')
+    os.makedirs(os.path.join(root, 'pipelines'), exist_ok=True)
+    os.makedirs(os.path.join(root, 'config'), exist_ok=True)
+    os.makedirs(os.path.join(artifacts_dir, f'{CONTRACT}.sol'), exist_ok=True)
+    with open(os.path.join(artifacts_dir, f'{CONTRACT}.sol', f'{CONTRACT}.json'), 'w') as f:
+        json.dump({'contractName': CONTRACT, 'abi': [], 'bytecode': BYTECODE}, f)
+    with open(os.path.join(root, 'config', 'networks.json'), 'w') as f:
+        networks = {'localhost': {'rpc_url': rpc_url, 'chain_id': 31337}}
+        for lane in range(SENDER_LANES):
+            networks[f'lane-{lane}'] = {'rpc_url': rpc_url, 'chain_id': 31337, 'from': lane_account(lane)}
+        json.dump(networks, f)
+    for job in pipeline['jobs']:
+        if job['uses'] == ACTION_KINDS['rpc'][0]:
+            job['with']['artifacts_dir'] = artifacts_dir
+    pipeline_path = os.path.join(root, 'pipelines', 'bench.yaml')
+    with open(pipeline_path, 'w') as f:
+        yaml.safe_dump(pipeline, f, sort_keys=False)
+    return pipeline_path
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic benchmark pipeline")
+    parser.add_argument("--jobs", type=int, default=100)
+    parser.add_argument("--shape", choices=SHAPES, default='layered')
+    parser.add_argument("--density", type=float, default=0.5, help="Fraction of jobs using ${{ }} references (default: 0.5)")
+    parser.add_argument("--action", choices=ACTIONS, default='noop')
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", required=True, help="Project directory to write")
+    args = parser.parse_args()
+    pipeline = generate_pipeline(args.jobs, args.shape, args.density, args.action, args.seed)
+    print(write_project(args.output, pipeline))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+from contextlib import contextmanager, redirect_stdout
+
+from src.config import clear_config_cache
+from src.pipeline_runner import PipelineRunner
+from src.registry import ActionRegistry
+from src.rpc import close_clients
+from tests.fake_rpc import FakeRpcNode
+
+from .fake_hardhat import install as install_fake_npx
+from .generate import SHAPES, SENDER_LANES, generate_pipeline, lane_account, write_project
+
+# Runs synthetic pipelines through PipelineRunner and records, per scenario:
+#   load_s               PipelineRunner construction: YAML parse, networks.json, expression compile, job graph
+#   resolve_s            resolving every job's ${{ }} params against the finished run's outputs
+#   run_s                PipelineRunner.run() wall time
+#   jobs_per_s           jobs / run_s
+#   overhead_us_per_job  run_s / jobs for no-op jobs: what the engine costs per job
+#   peak_memory_mb       peak traced Python allocations over load + run (a separate, traced pass)
+#
+#   python -m benchmarks.run --output results.json
+#   python -m benchmarks.run --output new.json --compare results.json
+
+PLUGIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'actions')
+DEFAULT_SIZES = (1, 10, 100, 1000, 10000)
+DEFAULT_IO_SIZES = (10, 100) # Jobs that spawn processes or talk to the node are slower to run
+DEFAULT_SHAPES = ('chain', 'layered', 'random')
+DEFAULT_THRESHOLD = 0.2
+
+# metric -> whether a larger value is better
+METRICS = {
+    'load_s': False,
+    'resolve_s': False,
+    'run_s': False,
+    'jobs_per_s': True,
+    'overhead_us_per_job': False,
+    'peak_memory_mb': False,
+}
+SCENARIO_KEYS = ('action', 'shape', 'jobs', 'density', 'max_parallel')
+
+def default_scenarios(sizes=DEFAULT_SIZES, io_sizes=DEFAULT_IO_SIZES, shapes=DEFAULT_SHAPES, density=0.5, max_parallel=8):
+    scenarios = []
+    for shape in shapes:
+        for jobs in sizes:
+            scenarios.append({'action': 'noop', 'shape': shape, 'jobs': jobs, 'density': density, 'max_parallel': max_parallel})
+    for action in ('hardhat', 'rpc'):
+        for jobs in io_sizes:
+            scenarios.append({'action': action, 'shape': 'layered', 'jobs': jobs, 'density': density, 'max_parallel': max_parallel})
+    return scenarios
+
+def scenario_key(result):
+    return tuple(result[key] for key in SCENARIO_KEYS)
+
+@contextmanager
+def _quiet():
+    # The runner prints a few lines per job; keep them out of the timings and the report
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        yield
+
+@contextmanager
+def _environment(**values):
+    previous = {name: os.environ.get(name) for name in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+def _run_pipeline(pipeline_path, registry, max_parallel):
+    started = time.perf_counter()
+    runner = PipelineRunner(pipeline_path, max_parallel=max_parallel, use_cache=False, registry=registry)
+    loaded = time.perf_counter()
+    runner.run()
+    return runner, loaded - started, time.perf_counter() - loaded
+
+def measure(scenario, workdir, registry, rpc_url, memory=True):
+    pipeline = generate_pipeline(scenario['jobs'], scenario['shape'], scenario['density'], scenario['action'])
+    pipeline_path = write_project(workdir, pipeline, rpc_url)
+    with _quiet():
+        runner, load_s, run_s = _run_pipeline(pipeline_path, registry, scenario['max_parallel'])
+    context = runner._resolve_context()
+    started = time.perf_counter()
+    for name in runner.job_order:
+        runner.compiled_params[name].resolve(context)
+    resolve_s = time.perf_counter() - started
+
+    result = dict(scenario)
+    result.update({
+        'load_s': round(load_s, 6),
+        'resolve_s': round(resolve_s, 6),
+        'run_s': round(run_s, 6),
+        'jobs_per_s': round(scenario['jobs'] / run_s, 2) if run_s else None,
+        'failed_jobs': sum(1 for output in runner.job_outputs.values() if (output or {}).get('status') != 'success'),
+    })
+    if scenario['action'] == 'noop':
+        result['overhead_us_per_job'] = round(run_s / scenario['jobs'] * 1e6, 2)
+    if memory:
+        clear_config_cache()
+        tracemalloc.start()
+        try:
+            with _quiet():
+                _run_pipeline(pipeline_path, registry, scenario['max_parallel'])
+            result['peak_memory_mb'] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 3)
+        finally:
+            tracemalloc.stop()
+    close_clients()
+    return result
+
+def run_benchmarks(scenarios, hardhat_latency_ms=50, rpc_latency_ms=0, memory=True, progress=None):
+    registry = ActionRegistry([PLUGIN_DIR], use_entry_points=False)
+    node = FakeRpcNode(accounts=[lane_account(lane) for lane in range(SENDER_LANES)], latency=rpc_latency_ms / 1000)
+    results = []
+    with tempfile.TemporaryDirectory(prefix='pipeline-bench-') as tmp, node:
+        bin_dir = os.path.join(tmp, 'bin')
+        install_fake_npx(bin_dir)
+        with _environment(PATH=bin_dir + os.pathsep + os.environ.get('PATH', ''), FAKE_HARDHAT_LATENCY_MS=str(hardhat_latency_ms)):
+            for index, scenario in enumerate(scenarios):
+                result = measure(scenario, os.path.join(tmp, f'scenario-{index}'), registry, node.url, memory=memory)
+                results.append(result)
+                if progress:
+                    progress(result)
+    return results
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    # Returns (scenario, metric, old, new, relative change) for every metric that got worse by more than threshold
+    previous = {scenario_key(result): result for result in baseline.get('results', [])}
+    regressions = []
+    for result in current.get('results', []):
+        old_result = previous.get(scenario_key(result))
+        if old_result is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = old_result.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append((scenario_key(result), metric, old, new, change))
+    return regressions
+
+def format_result(result):
+    parts = [f"{result['action']:>7} {result['shape']:>7} {result['jobs']:>6} jobs"]
+    parts.append(f"load {result['load_s'] * 1000:9.1f} ms")
+    parts.append(f"resolve {result['resolve_s'] * 1000:8.1f} ms")
+    parts.append(f"run {result['run_s'] * 1000:9.1f} ms")
+    parts.append(f"{result['jobs_per_s'] or 0:9.1f} jobs/s")
+    if 'overhead_us_per_job' in result:
+        parts.append(f"{result['overhead_us_per_job']:8.1f} us/job")
+    if 'peak_memory_mb' in result:
+        parts.append(f"peak {result['peak_memory_mb']:7.2f} MB")
+    if result['failed_jobs']:
+        parts.append(f"{result['failed_jobs']} FAILED")
+    return '  '.join(parts)
+
+def _int_list(value):
+    return [int(item) for item in value.split(',') if item]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline engine with synthetic pipelines")
+    parser.add_argument("--sizes", type=_int_list, default=list(DEFAULT_SIZES), help="Job counts for no-op pipelines (default: 1,10,100,1000,10000)")
+    parser.add_argument("--io-sizes", type=_int_list, default=list(DEFAULT_IO_SIZES), help="Job counts for fake Hardhat and fake RPC pipelines (default: 10,100)")
+    parser.add_argument("--shapes", default=','.join(DEFAULT_SHAPES), help=f"Dependency shapes, from {', '.join(SHAPES)}")
+    parser.add_argument("--density", type=float, default=0.5, help="Fraction of jobs with ${{ }} references (default: 0.5)")
+    parser.add_argument("--max-parallel", type=int, default=8)
+    parser.add_argument("--hardhat-latency-ms", type=int, default=50, help="Time each fake npx call takes (default: 50)")
+    parser.add_argument("--rpc-latency-ms", type=int, default=0, help="Delay the fake node adds per HTTP request (default: 0)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the traced pass that measures peak memory")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="Report metrics that regressed against an earlier results file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Relative change counted as a regression (default: 0.2)")
+    args = parser.parse_args()
+
+    shapes = [shape for shape in args.shapes.split(',') if shape]
+    unknown = set(shapes) - set(SHAPES)
+    if unknown:
+        parser.error(f"unknown shape(s): {', '.join(sorted(unknown))}")
+    scenarios = default_scenarios(args.sizes, args.io_sizes, shapes, args.density, args.max_parallel)
+    results = run_benchmarks(
+        scenarios,
+        hardhat_latency_ms=args.hardhat_latency_ms,
+        rpc_latency_ms=args.rpc_latency_ms,
+        memory=not args.no_memory,
+        progress=lambda result: print(format_result(result), flush=True)
+    )
+    report = {
+        'commit': _git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {'hardhat_latency_ms': args.hardhat_latency_ms, 'rpc_latency_ms': args.rpc_latency_ms},
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold)
+        for key, metric, old, new, change in regressions:
+            print(f"REGRESSION {dict(zip(SCENARIO_KEYS, key))} {metric}: {old} -> {new} ({change:+.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions over {args.threshold:.0%} against {args.compare} ({baseline.get('commit')})")
+
+if __name__ == '__main__':
+    main()
@@ -5,3 +5,12 @@ import os
 # Add the project root and src directory to sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), 'src')))
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path_factory, monkeypatch):
+    # Keep parsed pipelines and compile caches out of the user's ~/.cache
+    from src.pipeline_loader import clear_pipeline_cache
+    monkeypatch.setenv('WEB3_DEVOPS_CACHE_DIR', str(tmp_path_factory.mktemp('cache')))
+    clear_pipeline_cache()
+    yield
+    clear_pipeline_cache()
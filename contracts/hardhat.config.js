@@ -1,17 +1,38 @@
 require("@nomicfoundation/hardhat-toolbox");
+const fs = require("fs");
+const path = require("path");
+const { subtask } = require("hardhat/config");
+const { TASK_COMPILE_SOLIDITY_GET_SOURCE_PATHS } = require("hardhat/builtin-tasks/task-names");
+
+// Sharded compiles (actions/compile@v1 with max_parallel) list the shard's source files here
+subtask(TASK_COMPILE_SOLIDITY_GET_SOURCE_PATHS).setAction(async (args, hre, runSuper) => {
+  const paths = await runSuper(args);
+  if (!process.env.HARDHAT_SHARD_SOURCES) {
+    return paths;
+  }
+  const shard = new Set(
+    JSON.parse(fs.readFileSync(process.env.HARDHAT_SHARD_SOURCES, "utf8"))
+      .map((source) => path.resolve(hre.config.paths.sources, source))
+  );
+  return paths.filter((source) => shard.has(path.resolve(source)));
+});
 
 /** @type import('hardhat/config').HardhatUserConfig */
 module.exports = {
   solidity: "0.8.20",
   paths: {
     sources: "./",
-    artifacts: "../artifacts",
-    cache: "../cache"
+    artifacts: process.env.HARDHAT_ARTIFACTS_DIR || "../artifacts",
+    cache: process.env.HARDHAT_CACHE_DIR || "../cache"
   },
   networks: {
     localhost: {
       url: "http://127.0.0.1:8545",
     },
+    // Local node leased from an ephemeral network's pool; set by the deploy action
+    ephemeral: {
+      url: process.env.EPHEMERAL_RPC_URL || "http://127.0.0.1:8545",
+    },
     goerli: {
       url: process.env.GOERLI_RPC_URL || "",
       accounts: process.env.PRIVATE_KEY ? [process.env.PRIVATE_KEY] : [],
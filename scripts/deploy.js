@@ -1,13 +1,15 @@
 const hre = require("hardhat");
+const { deployContract } = require("./tasks");
 
 async function main() {
   const initialGreeting = process.env.INITIAL_GREETING || "Hello, Hardhat!";
-  const MyContract = await hre.ethers.getContractFactory("MyContract");
-  const myContract = await MyContract.deploy(initialGreeting);
+  const wait = process.env.DEPLOY_WAIT !== "0";
+  const { address, txHash, gasUsed } = await deployContract(hre, "MyContract", [initialGreeting], { wait });
 
-  await myContract.waitForDeployment();
-
-  console.log(`MyContract deployed to ${myContract.target}`);
+  // deploy_contract picks these lines up as the output streams
+  if (txHash) console.log(`Deployment transaction: ${txHash}`);
+  if (gasUsed) console.log(`Gas used: ${gasUsed}`);
+  console.log(`MyContract deployed to ${address}`);
 }
 
 main().catch((error) => {
@@ -0,0 +1,27 @@
+// Deployment logic shared by scripts/deploy.js (one-shot) and scripts/worker.js (persistent)
+
+// With wait: false the transaction is only sent; the Python runner confirms it together with
+// every other pending deployment on the network, so the Hardhat process does not sit polling.
+async function deployContract(hre, contractName, args, { wait = true } = {}) {
+  const factory = await hre.ethers.getContractFactory(contractName);
+  const contract = await factory.deploy(...args);
+  if (!wait) {
+    const deploymentTx = contract.deploymentTransaction();
+    return {
+      address: await contract.getAddress(),
+      txHash: deploymentTx ? deploymentTx.hash : null,
+      gasUsed: null,
+    };
+  }
+  await contract.waitForDeployment();
+
+  const deploymentTx = contract.deploymentTransaction();
+  const receipt = deploymentTx ? await deploymentTx.wait() : null;
+  return {
+    address: contract.target,
+    txHash: deploymentTx ? deploymentTx.hash : null,
+    gasUsed: receipt ? receipt.gasUsed.toString() : null,
+  };
+}
+
+module.exports = { deployContract };
@@ -0,0 +1,75 @@
+// Long-lived Hardhat helper. Started once per network by src/hardhat_worker.py and driven with
+// newline-delimited JSON-RPC 2.0 messages on stdin/stdout.
+// stdout carries protocol messages only; route Hardhat/plugin logging to stderr.
+// Anything printed before this point is skipped by the Python side.
+const writeMessage = process.stdout.write.bind(process.stdout);
+console.log = (...args) => console.error(...args);
+console.info = (...args) => console.error(...args);
+
+const hre = require("hardhat");
+const readline = require("readline");
+const { deployContract } = require("./tasks");
+
+function reply(message) {
+  writeMessage(JSON.stringify({ jsonrpc: "2.0", ...message }) + "\n");
+}
+
+const methods = {
+  async ping() {
+    return { network: hre.network.name };
+  },
+  async compile({ force }) {
+    await hre.run("compile", { force: Boolean(force) });
+    return {};
+  },
+  async deploy({ contract, args, wait }) {
+    return deployContract(hre, contract, args || [], { wait: wait !== false });
+  },
+  async verify({ address, constructorArguments, apiKey }) {
+    // hardhat.config.js read ETHERSCAN_API_KEY when the worker started, so apply the per-network key here
+    if (apiKey) {
+      hre.config.etherscan.apiKey = apiKey;
+    }
+    await hre.run("verify:verify", { address, constructorArguments: constructorArguments || [] });
+    return {};
+  },
+  async shutdown() {
+    setImmediate(() => process.exit(0));
+    return {};
+  },
+};
+
+async function main() {
+  const lines = readline.createInterface({ input: process.stdin });
+  reply({ method: "ready", params: { network: hre.network.name } });
+
+  // Requests are handled one at a time; the Python side serializes calls per worker
+  for await (const line of lines) {
+    if (!line.trim()) {
+      continue;
+    }
+    let request;
+    try {
+      request = JSON.parse(line);
+    } catch (error) {
+      reply({ id: null, error: { code: -32700, message: "Parse error" } });
+      continue;
+    }
+    const method = methods[request.method];
+    if (!method) {
+      reply({ id: request.id, error: { code: -32601, message: `Method not found: ${request.method}` } });
+      continue;
+    }
+    try {
+      const result = await method(request.params || {});
+      reply({ id: request.id, result });
+    } catch (error) {
+      reply({ id: request.id, error: { code: -32000, message: error.message || String(error) } });
+    }
+  }
+}
+
+main().catch((error) => {
+  console.error(error);
+  process.exitCode = 1;
+});
@@ -0,0 +1,143 @@
+import re
+
+from eth_utils import keccak
+
+# Solidity ABI encoding for constructor and function arguments of elementary types and arrays of them.
+# Tuples/structs are not supported.
+
+_ARRAY_PATTERN = re.compile(r'^(.*)\[(\d*)\]$')
+
+def _to_int(value):
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        return int(value, 16) if value.lower().startswith('0x') else int(value)
+    raise ValueError(f"Cannot encode {value!r} as an integer")
+
+def _to_bytes(value):
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    if isinstance(value, str) and value.startswith('0x'):
+        return bytes.fromhex(value[2:])
+    raise ValueError(f"Cannot encode {value!r} as bytes (expected 0x-prefixed hex)")
+
+def _pad_right(data):
+    return data + b'\0' * (-len(data) % 32)
+
+def _is_dynamic(abi_type):
+    if abi_type in ('string', 'bytes'):
+        return True
+    match = _ARRAY_PATTERN.match(abi_type)
+    if match:
+        return match.group(2) == '' or _is_dynamic(match.group(1))
+    return False
+
+def _encode_single(abi_type, value):
+    match = _ARRAY_PATTERN.match(abi_type)
+    if match:
+        item_type, length = match.group(1), match.group(2)
+        values = list(value)
+        if length and len(values) != int(length):
+            raise ValueError(f"Expected {length} values for {abi_type}, got {len(values)}")
+        encoded = encode_values([item_type] * len(values), values)
+        if not length:
+            return len(values).to_bytes(32, 'big') + encoded
+        return encoded
+
+    if abi_type.startswith('uint'):
+        bits = int(abi_type[4:] or 256)
+        number = _to_int(value)
+        if number < 0 or number >= 2 ** bits:
+            raise ValueError(f"Value {value!r} out of range for {abi_type}")
+        return number.to_bytes(32, 'big')
+    if abi_type.startswith('int'):
+        bits = int(abi_type[3:] or 256)
+        number = _to_int(value)
+        if not -(2 ** (bits - 1)) <= number < 2 ** (bits - 1):
+            raise ValueError(f"Value {value!r} out of range for {abi_type}")
+        return (number % 2 ** 256).to_bytes(32, 'big')
+    if abi_type == 'address':
+        data = _to_bytes(value)
+        if len(data) != 20:
+            raise ValueError(f"Invalid address: {value!r}")
+        return data.rjust(32, b'\0')
+    if abi_type == 'bool':
+        if isinstance(value, str):
+            value = value.lower() == 'true'
+        return int(bool(value)).to_bytes(32, 'big')
+    if abi_type == 'string':
+        data = str(value).encode('utf-8')
+        return len(data).to_bytes(32, 'big') + _pad_right(data)
+    if abi_type == 'bytes':
+        data = _to_bytes(value)
+        return len(data).to_bytes(32, 'big') + _pad_right(data)
+    if abi_type.startswith('bytes'):
+        size = int(abi_type[5:])
+        data = _to_bytes(value)
+        if len(data) > size:
+            raise ValueError(f"Value {value!r} too long for {abi_type}")
+        return _pad_right(data)
+    raise ValueError(f"Unsupported ABI type: {abi_type}")
+
+def encode_values(types, values):
+    if len(types) != len(values):
+        raise ValueError(f"Expected {len(types)} arguments, got {len(values)}")
+    encodings = [_encode_single(abi_type, value) for abi_type, value in zip(types, values)]
+    # Dynamic values take one offset word in the head; static ones (incl. fixed arrays) are inlined
+    head_size = sum(32 if _is_dynamic(t) else len(e) for t, e in zip(types, encodings))
+    heads, tails = [], []
+    for abi_type, encoded in zip(types, encodings):
+        if _is_dynamic(abi_type):
+            heads.append((head_size + sum(len(tail) for tail in tails)).to_bytes(32, 'big'))
+            tails.append(encoded)
+        else:
+            heads.append(encoded)
+    return b''.join(heads) + b''.join(tails)
+
+def constructor_types(abi):
+    for entry in abi:
+        if entry.get('type') == 'constructor':
+            types = [item['type'] for item in entry.get('inputs', [])]
+            if any(t.startswith('tuple') for t in types):
+                raise ValueError("Tuple constructor arguments are not supported")
+            return types
+    return []
+
+def encode_constructor_args(abi, args):
+    return encode_values(constructor_types(abi), list(args or [])).hex()
+
+def _input_types(entry):
+    types = [item['type'] for item in entry.get('inputs', [])]
+    if any(t.startswith('tuple') for t in types):
+        raise ValueError(f"Tuple arguments of {entry.get('name')} are not supported")
+    return types
+
+def find_function(abi, function, arg_count=None):
+    # function is a name, or a full signature like transfer(address,uint256) for overloaded functions.
+    # Returns (signature, argument types).
+    candidates = []
+    for entry in abi:
+        if entry.get('type') != 'function':
+            continue
+        types = [item['type'] for item in entry.get('inputs', [])]
+        signature = f"{entry['name']}({','.join(types)})"
+        if function in (entry['name'], signature):
+            candidates.append((signature, entry))
+    if arg_count is not None and len(candidates) > 1:
+        candidates = [(signature, entry) for signature, entry in candidates if len(entry.get('inputs', [])) == arg_count]
+    if not candidates:
+        raise ValueError(f"No function {function} in the ABI")
+    if len(candidates) > 1:
+        raise ValueError(f"{function} is overloaded; use one of {', '.join(signature for signature, _ in candidates)}")
+    signature, entry = candidates[0]
+    return signature, _input_types(entry)
+
+def function_selector(signature):
+    return keccak(text=signature)[:4].hex()
+
+def encode_function_call(abi, function, args):
+    args = list(args or [])
+    signature, types = find_function(abi, function, len(args))
+    return '0x' + function_selector(signature) + encode_values(types, args).hex()
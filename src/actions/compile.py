@@ -1,29 +1,162 @@
+import os
+import hashlib
 import subprocess
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 
-def compile_contracts(params):
+from ..artifacts import artifacts_lock, invalidate_artifacts
+from ..cache import DirectoryCache, cache_root
+from ..compile_shards import (
+    compilation_units, import_graph, merge_artifacts, plan_shards, prune_shard_dirs, shard_dirs, write_shard_sources
+)
+from ..executor import ProcessInterrupted, run_streaming
+from ..hardhat_worker import HardhatWorkerError
+from ..project import CONTRACTS_DIR, artifacts_dir_for, clean_env as _clean_env, shard_work_dir_for
+from ..tracing import span
+
+DEFAULT_CACHE_MAX_SIZE_MB = 512
+
+# Files outside the .sol sources that change what solc produces
+COMPILE_SETTINGS_FILES = ['hardhat.config.js', 'package-lock.json']
+
+def compute_cache_key(contracts_dir):
+    # Hash of every contract source plus the Hardhat config (solc version, optimizer) and lockfile
+    if not os.path.isdir(contracts_dir):
+        return None
+    digest = hashlib.sha256()
+    sources = []
+    for dirpath, dirnames, filenames in os.walk(contracts_dir):
+        dirnames[:] = sorted(d for d in dirnames if d != 'node_modules' and not d.startswith('.'))
+        sources.extend(os.path.join(dirpath, f) for f in filenames if f.endswith('.sol'))
+    for path in sorted(sources) + [os.path.join(contracts_dir, f) for f in COMPILE_SETTINGS_FILES]:
+        digest.update(os.path.relpath(path, contracts_dir).encode())
+        digest.update(b'\0')
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+def _compile_cache(params):
+    max_size_mb = params.get('cache_max_size_mb', DEFAULT_CACHE_MAX_SIZE_MB)
+    try:
+        max_size_mb = float(max_size_mb)
+    except (TypeError, ValueError):
+        raise ValueError(f"cache_max_size_mb must be a number, got {max_size_mb!r}")
+    if max_size_mb < 0:
+        raise ValueError(f"cache_max_size_mb must not be negative, got {max_size_mb!r}")
+    return DirectoryCache(os.path.join(cache_root(), 'compile'), int(max_size_mb * 1024 * 1024))
+
+def _compile_shards(shards):
+    # Raises the first shard's error after every shard has finished; artifacts are only merged
+    # when all of them compiled
+    work_dir = shard_work_dir_for(CONTRACTS_DIR)
+    def compile_shard(index, shard):
+        artifacts_dir, cache_dir = shard_dirs(work_dir, shard)
+        env = _clean_env(os.environ.copy())
+        env['HARDHAT_SHARD_SOURCES'] = write_shard_sources(work_dir, shard)
+        env['HARDHAT_ARTIFACTS_DIR'] = artifacts_dir
+        env['HARDHAT_CACHE_DIR'] = cache_dir
+        run_streaming(
+            ["npx", "hardhat", "compile"], cwd=CONTRACTS_DIR, env=env,
+            prefix=f"compile {index + 1}/{len(shards)}", name='compile.shard'
+        )
+
+    print(f"  [🧩] Compiling {sum(len(shard.files) for shard in shards)} source files in {len(shards)} shards...")
+    with ThreadPoolExecutor(max_workers=len(shards)) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, compile_shard, index, shard) for index, shard in enumerate(shards)]
+        errors = [future.exception() for future in futures]
+    for error in errors:
+        if error is not None:
+            raise error
+    with span('compile.merge_artifacts', 'compile', shards=len(shards)):
+        merge_artifacts(work_dir, shards, artifacts_dir_for(CONTRACTS_DIR))
+    prune_shard_dirs(work_dir, shards)
+
+def _compile_hardhat(params, use_cache, workers):
+    cache = None
+    cache_key = None
+    if use_cache and params.get('cache', True):
+        with span('compile.cache_key', 'cache'):
+            cache_key = compute_cache_key(CONTRACTS_DIR)
+        if cache_key:
+            try:
+                cache = _compile_cache(params)
+            except ValueError as e:
+                print(f"  [❌] Invalid compile cache settings: {e}")
+                return {'status': 'failure', 'error': str(e)}
+            with span('compile.cache_restore', 'cache') as restore_span:
+                restored = cache.restore(cache_key, artifacts_dir_for(CONTRACTS_DIR))
+                restore_span.set(hit=restored)
+            if restored:
+                invalidate_artifacts(artifacts_dir_for(CONTRACTS_DIR))
+                print(f"  [✅] Compile cache hit ({cache_key[:12]}). Restored artifacts without running Hardhat.")
+                return {'status': 'success', 'cache_hit': True, 'cache_key': cache_key}
+
+    max_parallel = params.get('max_parallel', 1)
+    if not isinstance(max_parallel, int) or isinstance(max_parallel, bool) or max_parallel < 1:
+        print(f"  [❌] max_parallel must be a positive integer, got {max_parallel!r}")
+        return {'status': 'failure', 'error': f'Invalid max_parallel: {max_parallel!r}'}
+    shards = None
+    if max_parallel > 1:
+        with span('compile.plan_shards', 'compile') as plan_span:
+            shards = plan_shards(compilation_units(import_graph(CONTRACTS_DIR)), max_parallel)
+            plan_span.set(shards=len(shards))
+
+    print("  [⚙️] Compiling contracts with Hardhat...")
+    try:
+        if shards is not None and len(shards) > 1:
+            # Independent parts of the import graph, each in its own Hardhat process
+            _compile_shards(shards)
+        elif workers is not None:
+            # Reuse the pipeline's long-lived Hardhat process
+            with span('compile.worker', 'worker'):
+                workers.get().call('compile')
+        else:
+            # Run npx hardhat compile in the contracts directory
+            run_streaming(["npx", "hardhat", "compile"], cwd=CONTRACTS_DIR, name='compile.subprocess')
+        print("  [✅] Compilation successful.")
+        invalidate_artifacts(artifacts_dir_for(CONTRACTS_DIR))
+        output = {'status': 'success', 'cache_hit': False}
+        if cache is not None:
+            with span('compile.cache_store', 'cache'):
+                cache.store(cache_key, artifacts_dir_for(CONTRACTS_DIR))
+            output['cache_key'] = cache_key
+        if shards is not None and len(shards) > 1:
+            output['shards'] = len(shards)
+        return output
+    except subprocess.CalledProcessError as e:
+        print(f"  [❌] Hardhat compilation failed.")
+        return {'status': 'failure', 'error': e.stderr}
+    except (HardhatWorkerError, ProcessInterrupted) as e:
+        print(f"  [❌] Hardhat compilation failed: {e}")
+        return {'status': 'failure', 'error': str(e)}
+    except FileNotFoundError:
+        print("  [❌] npx or hardhat command not found. Make sure Hardhat is installed.")
+        return {'status': 'failure', 'error': 'npx/hardhat not found'}
+
+def compile_contracts(params, use_cache=True, workers=None):
     tool = params.get('tool')
     if tool == 'hardhat':
-        print("  [⚙️] Compiling contracts with Hardhat...")
-        try:
-            # Run npx hardhat compile in the contracts directory
-            result = subprocess.run(
-                ["npx", "hardhat", "compile"],
-                cwd="/Users/dw2022/web3-devops-toolkit/contracts",
-                capture_output=True,
-                text=True,
-                check=True  # Raise an exception for non-zero exit codes
-            )
-            print(result.stdout)
-            print("  [✅] Compilation successful.")
-            return {'status': 'success'}
-        except subprocess.CalledProcessError as e:
-            print(f"  [❌] Hardhat compilation failed.")
-            print(f"  Stderr: {e.stderr}")
-            print(f"  Stdout: {e.stdout}")
-            return {'status': 'failure', 'error': e.stderr}
-        except FileNotFoundError:
-            print("  [❌] npx or hardhat command not found. Make sure Hardhat is installed.")
-            return {'status': 'failure', 'error': 'npx/hardhat not found'}
+        with artifacts_lock(artifacts_dir_for(CONTRACTS_DIR)):
+            return _compile_hardhat(params, use_cache, workers)
     else:
         print(f"  [❌] Unsupported compilation tool: {tool}")
         return {'status': 'failure', 'error': f'Unsupported tool: {tool}'}
+
+def run(params, context):
+    return compile_contracts(params, use_cache=context.use_cache, workers=context.workers)
+
+def fingerprint(params):
+    # Compile output depends on the sources rather than on the job's params
+    return compute_cache_key(CONTRACTS_DIR)
+
+def cache_hit(params):
+    # Whether compiling now would restore the artifacts from the compile cache
+    if not params.get('cache', True):
+        return False
+    cache_key = compute_cache_key(CONTRACTS_DIR)
+    try:
+        return bool(cache_key) and _compile_cache(params).contains(cache_key)
+    except ValueError:
+        return False
@@ -1,90 +1,235 @@
 import os
 import json
 import subprocess
-import re
-
-def _clean_env(env):
-    # Remove pytest-specific and other volatile environment variables
-    keys_to_remove = [
-        k for k in env if k.startswith('PYTEST_') or k.startswith('TERM_') or k.startswith('SHLVL') or
-        k.startswith('OLDPWD') or k.startswith('PWD') or k.startswith('_') or k.startswith('CONDA_') or
-        k.startswith('HOMEBREW_') or k.startswith('INFOPATH') or k.startswith('DISPLAY') or
-        k.startswith('npm_') or k.startswith('XPC_') or k.startswith('__CF_') or k.startswith('SSH_') or
-        k.startswith('LOGNAME') or k.startswith('USER') or k.startswith('TMPDIR') or k.startswith('SHELL') or
-        k.startswith('INIT_CWD') or k.startswith('NODE') or k.startswith('COLOR') or k.startswith('LANG') or
-        k.startswith('EDITOR') or k.startswith('__CFBundleIdentifier') or
-        k.startswith('OBJC_DISABLE_INITIALIZE_FORK_SAFETY') or k.startswith('__PYVENV_LAUNCHER__') or
-        k.startswith('__VIRTUAL_ENV__') or k.startswith('VIRTUAL_ENV')
-    ]
-    for key in keys_to_remove:
-        env.pop(key, None)
-    return env
-
-def deploy_contract(params, pipeline_path, deployed_contracts, networks_config=None):
+
+from ..artifacts import load_artifact
+from ..chain_pool import ChainPoolError, is_ephemeral, lease_network
+from ..config import load_networks_config, networks_config_path
+from ..deployments import creation_code_hash
+from ..executor import ProcessInterrupted, run_streaming
+from ..hardhat_worker import HardhatWorkerError
+from ..project import CONTRACTS_DIR, clean_env as _clean_env
+from ..rpc import JsonRpcError, network_client, rpc_endpoints
+from ..tracing import span
+from ..transactions import (
+    TransactionError, deploy_data, fetch_deploy_context, resolve_sender,
+    send_deploy_transaction, wait_for_receipt
+)
+
+def deploy_contract(params, pipeline_path, deployed_contracts, networks_config=None, workers=None,
+                    deployments=None, run_id=None, job_name=None):
     network = params.get('network')
     contract = params.get('contract')
     args = params.get('args', [])
+    engine = params.get('engine', 'hardhat')
 
     print(f"  [⚙️] Deploying {contract} to {network}...")
 
+    if engine not in ('hardhat', 'native'):
+        print(f"  [❌] Unsupported deploy engine: {engine}")
+        return {'status': 'failure', 'error': f'Unsupported engine: {engine}'}
+
     # Load network configuration
     if networks_config is None:
-        networks_config_path = os.path.join(os.path.dirname(pipeline_path), '..', 'config', 'networks.json')
-        networks_config_path = os.path.abspath(networks_config_path)
-
-        if not os.path.exists(networks_config_path):
-            print(f"  [❌] Network configuration file not found: {networks_config_path}")
+        config_path = networks_config_path(pipeline_path)
+        try:
+            networks_config = load_networks_config(config_path)
+        except FileNotFoundError:
+            print(f"  [❌] Network configuration file not found: {config_path}")
             return {'status': 'failure', 'error': 'Network config not found'}
-
-        with open(networks_config_path, 'r') as f:
-            networks_config = json.load(f)
+        except json.JSONDecodeError:
+            print(f"  [❌] Error parsing networks.json: {config_path}")
+            return {'status': 'failure', 'error': 'Invalid networks.json'}
 
     network_details = networks_config.get(network)
     if network_details is None:
         print(f"  [❌] Network '{network}' not found in networks.json")
         return {'status': 'failure', 'error': f'Network {network} not found'}
 
-    rpc_url = network_details.get('rpc_url')
-    if not rpc_url:
+    ephemeral = is_ephemeral(network_details)
+    if ephemeral:
+        # A local node leased for this run (or matrix instance) from the network's pool
+        try:
+            network_details = lease_network(network, network_details)
+        except ChainPoolError as e:
+            print(f"  [❌] {e}")
+            return {'status': 'failure', 'error': str(e)}
+        print(f"  [🔗] Using local node {network_details['rpc_url']} for '{network}'")
+
+    # Native deploys and receipt polling use every endpoint in rpc_urls; Hardhat uses its own config
+    if not rpc_endpoints(network_details):
         print(f"  [❌] RPC URL not configured for network '{network}'")
         return {'status': 'failure', 'error': 'RPC URL not configured'}
 
+    # Blocks the deployment must be buried under before the job succeeds (default: just mined)
+    confirmations = params.get('confirmations', network_details.get('confirmations', 1))
+
+    # The registry skips ephemeral chains, which are reverted when the run ends
+    registry = deployments if not ephemeral else None
+    code_hash = creation_code_hash(contract, args, params.get('artifacts_dir')) if registry is not None else None
+    if params.get('reuse') and code_hash:
+        reused = _find_reusable(registry, code_hash, network, network_details)
+        if reused is not None:
+            print(f"  [♻️] {contract} with the same bytecode and args is already deployed at {reused['address']}, skipping.")
+            deployed_contracts[contract] = reused['address']
+            return {'status': 'success', 'address': reused['address'], 'tx_hash': reused['tx_hash'], 'reused': True}
+
+    if engine == 'native':
+        output = _deploy_native(params, network_details, contract, args, deployed_contracts, confirmations)
+    elif workers is not None and not ephemeral:
+        output = _deploy_with_worker(workers, network, contract, args, deployed_contracts, params, network_details, confirmations)
+    else:
+        output = _deploy_with_hardhat(network, contract, args, deployed_contracts, params, network_details, confirmations, ephemeral)
+
+    if registry is not None and output.get('status') == 'success':
+        registry.record(
+            network, contract, output['address'], code_hash=code_hash, tx_hash=output.get('tx_hash'),
+            block_number=output.get('block_number'), chain_id=network_details.get('chain_id'),
+            run_id=run_id, job=job_name
+        )
+    return output
+
+def _find_reusable(deployments, code_hash, network, network_details):
+    # The latest deployment of this creation code, if the network still has code at its address
+    existing = deployments.find_code(code_hash, network)
+    if existing is None:
+        return None
+    try:
+        code = network_client(network_details).call('eth_getCode', [existing['address'], 'latest'])
+    except JsonRpcError as e:
+        print(f"  [⚠️] Could not check the earlier deployment at {existing['address']}, deploying again: {e}")
+        return None
+    return existing if code not in (None, '', '0x', '0x0') else None
+
+def _deploy_with_hardhat(network, contract, args, deployed_contracts, params, network_details, confirmations, ephemeral):
     try:
         # Pass arguments as environment variables for now
         env = os.environ.copy()
         env = _clean_env(env) # Clean the environment
         if args:
             env["INITIAL_GREETING"] = args[0] # Assuming first arg is initial greeting
+        env["DEPLOY_WAIT"] = "0" # Exit once the transaction is sent; confirmation happens here
+        hardhat_network = network
+        if ephemeral:
+            # hardhat.config.js reads the leased node's URL for its "ephemeral" network
+            env["EPHEMERAL_RPC_URL"] = network_details['rpc_url']
+            hardhat_network = "ephemeral"
 
         # Run npx hardhat run scripts/deploy.js --network <network>
-        result = subprocess.run(
-            ["npx", "hardhat", "run", "scripts/deploy.js", "--network", network],
-            cwd="/Users/dw2022/web3-devops-toolkit/contracts",
-            capture_output=True,
-            text=True,
-            check=True,
-            env=env
+        result = run_streaming(
+            ["npx", "hardhat", "run", "scripts/deploy.js", "--network", hardhat_network],
+            cwd=CONTRACTS_DIR,
+            env=env,
+            name='deploy.subprocess'
         )
-        print(result.stdout)
-        # Extract deployed address (simple regex for now)
-        match = re.search(r'MyContract deployed to (0x[a-fA-F0-9]{40})', result.stdout)
-        if match:
-            deployed_address = match.group(1)
-            print(f"  [✅] Deployment successful. Address: {deployed_address}")
-            deployed_contracts[contract] = deployed_address # Keep for internal tracking
-            return {'status': 'success', 'address': deployed_address}
+        # Address, tx hash and gas were picked out of the output as it streamed by
+        deployed = result.first('deployed', contract=contract) or result.first('deployed')
+        if deployed:
+            output = {'status': 'success', 'address': deployed['address']}
+            transaction = result.first('transaction')
+            if transaction:
+                output['tx_hash'] = transaction['tx_hash']
+            gas_used = result.first('gas_used')
+            if gas_used:
+                output['gas_used'] = gas_used['gas_used']
+            return _confirm_hardhat_deployment(output, params, network_details, confirmations, contract, deployed_contracts)
         else:
             print("  [❌] Deployment successful, but could not extract contract address.")
             return {'status': 'failure', 'error': 'Could not extract address'}
 
     except subprocess.CalledProcessError as e:
         print(f"  [❌] Hardhat deployment failed.")
-        print(f"  Stderr: {e.stderr}")
-        print(f"  Stdout: {e.stdout}")
         return {'status': 'failure', 'error': e.stderr}
+    except ProcessInterrupted as e:
+        print(f"  [❌] Hardhat deployment failed: {e}")
+        return {'status': 'failure', 'error': str(e)}
+    except FileNotFoundError:
+        print("  [❌] npx or hardhat command not found. Make sure Hardhat is installed.")
+        return {'status': 'failure', 'error': 'npx/hardhat not found'}
+
+def _confirm_hardhat_deployment(output, params, network_details, confirmations, contract, deployed_contracts):
+    # Hardhat sent the transaction without waiting for it (DEPLOY_WAIT=0). Confirm it on the endpoint's
+    # shared tracker, unless the script already waited and reported gas and no deeper depth is asked for.
+    if output.get('tx_hash') and ('gas_used' not in output or confirmations > 1):
+        try:
+            with span('deploy.wait_for_receipt', 'rpc', tx_hash=output['tx_hash']):
+                receipt = wait_for_receipt(
+                    network_client(network_details), output['tx_hash'],
+                    timeout=params.get('receipt_timeout', 300),
+                    poll_interval=params.get('poll_interval', 1.0),
+                    confirmations=confirmations
+                )
+        except (JsonRpcError, TransactionError, ValueError) as e:
+            print(f"  [❌] Deployment transaction {output['tx_hash']} was not confirmed: {e}")
+            return {'status': 'failure', 'error': str(e), 'tx_hash': output['tx_hash']}
+        output['gas_used'] = int(receipt.get('gasUsed', '0x0'), 16)
+        output['block_number'] = int(receipt.get('blockNumber', '0x0'), 16)
+    print(f"  [✅] Deployment successful. Address: {output['address']}")
+    deployed_contracts[contract] = output['address'] # Keep for internal tracking
+    return output
+
+def _deploy_with_worker(workers, network, contract, args, deployed_contracts, params, network_details, confirmations):
+    # The persistent worker takes the contract name and constructor args directly
+    try:
+        result = workers.get(network).call('deploy', {'contract': contract, 'args': list(args), 'wait': False})
+    except HardhatWorkerError as e:
+        print(f"  [❌] Hardhat deployment failed: {e}")
+        return {'status': 'failure', 'error': str(e)}
     except FileNotFoundError:
         print("  [❌] npx or hardhat command not found. Make sure Hardhat is installed.")
         return {'status': 'failure', 'error': 'npx/hardhat not found'}
-    except json.JSONDecodeError:
-        print(f"  [❌] Error parsing networks.json: {networks_config_path}")
-        return {'status': 'failure', 'error': 'Invalid networks.json'}
\ No newline at end of file
+
+    deployed_address = result.get('address')
+    if not deployed_address:
+        print("  [❌] Deployment successful, but could not extract contract address.")
+        return {'status': 'failure', 'error': 'Could not extract address'}
+    output = {'status': 'success', 'address': deployed_address}
+    if result.get('txHash'):
+        output['tx_hash'] = result['txHash']
+    if result.get('gasUsed'):
+        output['gas_used'] = int(result['gasUsed'])
+    return _confirm_hardhat_deployment(output, params, network_details, confirmations, contract, deployed_contracts)
+
+def _deploy_native(params, network_details, contract, args, deployed_contracts, confirmations=1):
+    # Send the deployment straight to the network's JSON-RPC endpoint, no Node process involved
+    try:
+        artifact = load_artifact(contract, params.get('artifacts_dir'))
+        client = network_client(network_details)
+        data = deploy_data(artifact, args)
+        sender, private_key = resolve_sender(client, network_details)
+        context = fetch_deploy_context(client, sender, data)
+        tx_hash = send_deploy_transaction(client, sender, private_key, data, context)
+        print(f"  [⏳] Deployment transaction sent: {tx_hash}")
+        with span('deploy.wait_for_receipt', 'rpc', tx_hash=tx_hash):
+            receipt = wait_for_receipt(
+                client, tx_hash,
+                timeout=params.get('receipt_timeout', 300),
+                poll_interval=params.get('poll_interval', 1.0),
+                confirmations=confirmations
+            )
+    except FileNotFoundError as e:
+        print(f"  [❌] {e}. Run actions/compile@v1 first.")
+        return {'status': 'failure', 'error': 'Artifact not found'}
+    except (JsonRpcError, TransactionError, ValueError) as e:
+        print(f"  [❌] Native deployment failed: {e}")
+        return {'status': 'failure', 'error': str(e)}
+
+    deployed_address = receipt.get('contractAddress')
+    if not deployed_address:
+        print("  [❌] Deployment successful, but could not extract contract address.")
+        return {'status': 'failure', 'error': 'Could not extract address'}
+    print(f"  [✅] Deployment successful. Address: {deployed_address}")
+    deployed_contracts[contract] = deployed_address # Keep for internal tracking
+    return {
+        'status': 'success',
+        'address': deployed_address,
+        'tx_hash': tx_hash,
+        'gas_used': int(receipt.get('gasUsed', '0x0'), 16),
+        'block_number': int(receipt.get('blockNumber', '0x0'), 16),
+    }
+
+def run(params, context):
+    return deploy_contract(
+        params, context.pipeline_path, context.deployed_contracts, networks_config=context.networks_config,
+        workers=context.workers, deployments=context.deployments, run_id=context.run_id, job_name=context.job_name
+    )
@@ -0,0 +1,144 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from ..artifacts import load_artifact
+from ..chain_pool import ChainPoolError, is_ephemeral, lease_network
+from ..deployments import creation_code_hash
+from ..rpc import JsonRpcError, network_client, rpc_endpoints
+from ..tracing import span
+from ..transactions import (
+    TransactionError, deploy_data, fetch_batch_deploy_context, resolve_sender,
+    send_deploy_transaction, wait_for_receipts
+)
+
+def _contract_specs(contracts):
+    # Accepts plain contract names or {contract: ..., args: [...]} entries
+    specs = []
+    for entry in contracts or []:
+        if isinstance(entry, str):
+            specs.append({'contract': entry, 'args': []})
+        elif isinstance(entry, dict) and entry.get('contract'):
+            specs.append({'contract': entry['contract'], 'args': list(entry.get('args', []))})
+        else:
+            raise ValueError(f"Invalid contract entry in deploy batch: {entry!r}")
+    return specs
+
+def _deploy_to_network(network, network_details, specs, params):
+    # Assigns consecutive nonces locally, submits every deployment back to back, then waits for
+    # all receipts with one batched poll loop. Returns ({contract: address}, {contract: tx_hash}, {contract: error}).
+    addresses, tx_hashes, errors = {}, {}, {}
+    client = network_client(network_details)
+    artifacts_dir = params.get('artifacts_dir')
+    datas = [deploy_data(load_artifact(spec['contract'], artifacts_dir), spec['args']) for spec in specs]
+    sender, private_key = resolve_sender(client, network_details)
+    context = fetch_batch_deploy_context(client, sender, datas)
+
+    sent = {}
+    for offset, (spec, data, gas) in enumerate(zip(specs, datas, context['gas_limits'])):
+        contract = spec['contract']
+        try:
+            tx_hash = send_deploy_transaction(client, sender, private_key, data, context, nonce=context['nonce'] + offset, gas=gas)
+        except (JsonRpcError, TransactionError) as e:
+            # Later nonces would leave a gap, so stop submitting on this network
+            errors[contract] = str(e)
+            for skipped in specs[offset + 1:]:
+                errors[skipped['contract']] = f"Not submitted after {contract} failed"
+            break
+        sent[tx_hash] = contract
+        tx_hashes[contract] = tx_hash
+    print(f"  [⏳] {network}: submitted {len(sent)} deployment(s) from nonce {context['nonce']}")
+
+    with span('deploy_batch.wait_for_receipts', 'rpc', network=network, transactions=len(sent)):
+        receipts = wait_for_receipts(
+            client, list(sent),
+            timeout=params.get('receipt_timeout', 300),
+            poll_interval=params.get('poll_interval', 1.0),
+            confirmations=params.get('confirmations', network_details.get('confirmations', 1))
+        )
+    for tx_hash, contract in sent.items():
+        receipt = receipts.get(tx_hash)
+        if receipt is None:
+            errors[contract] = f"Timed out waiting for receipt of {tx_hash}"
+        elif receipt.get('status') == '0x0':
+            errors[contract] = f"Transaction {tx_hash} reverted"
+        elif not receipt.get('contractAddress'):
+            errors[contract] = 'Could not extract address'
+        else:
+            addresses[contract] = receipt['contractAddress']
+    return addresses, tx_hashes, errors
+
+def deploy_batch(params, deployed_contracts, networks_config=None, deployments=None, run_id=None, job_name=None):
+    networks = params.get('networks') or []
+    if isinstance(networks, str):
+        networks = [networks]
+    try:
+        specs = _contract_specs(params.get('contracts'))
+    except ValueError as e:
+        print(f"  [❌] {e}")
+        return {'status': 'failure', 'error': str(e)}
+    if not specs or not networks:
+        print("  [❌] deploy-batch needs at least one contract and one network")
+        return {'status': 'failure', 'error': 'No contracts or networks to deploy'}
+
+    print(f"  [⚙️] Deploying {len(specs)} contract(s) to {len(networks)} network(s)...")
+
+    networks_config = dict(networks_config or {})
+    for network in networks:
+        network_details = networks_config.get(network)
+        if network_details is None:
+            print(f"  [❌] Network '{network}' not found in networks.json")
+            return {'status': 'failure', 'error': f'Network {network} not found'}
+        if is_ephemeral(network_details):
+            try:
+                network_details = networks_config[network] = lease_network(network, network_details)
+            except ChainPoolError as e:
+                print(f"  [❌] {e}")
+                return {'status': 'failure', 'error': str(e)}
+        if not rpc_endpoints(network_details):
+            print(f"  [❌] RPC URL not configured for network '{network}'")
+            return {'status': 'failure', 'error': 'RPC URL not configured'}
+
+    addresses, tx_hashes, errors = {}, {}, {}
+    # Networks are independent, so each one submits and waits on its own thread
+    with ThreadPoolExecutor(max_workers=len(networks)) as pool:
+        futures = {
+            network: pool.submit(contextvars.copy_context().run, _deploy_to_network, network, networks_config[network], specs, params)
+            for network in networks
+        }
+        for network, future in futures.items():
+            try:
+                addresses[network], tx_hashes[network], network_errors = future.result()
+            except FileNotFoundError as e:
+                addresses[network], tx_hashes[network], network_errors = {}, {}, {'*': str(e)}
+            except (JsonRpcError, TransactionError, ValueError) as e:
+                addresses[network], tx_hashes[network], network_errors = {}, {}, {'*': str(e)}
+            if network_errors:
+                errors[network] = network_errors
+
+    code_hashes = {}
+    for network in networks:
+        record = deployments is not None and not is_ephemeral(networks_config[network])
+        for contract, address in addresses[network].items():
+            print(f"  [✅] {network}: {contract} deployed to {address}")
+            deployed_contracts[contract] = address # Keep for internal tracking
+            if record:
+                if contract not in code_hashes:
+                    spec = next(spec for spec in specs if spec['contract'] == contract)
+                    code_hashes[contract] = creation_code_hash(contract, spec['args'], params.get('artifacts_dir'))
+                deployments.record(
+                    network, contract, address, code_hash=code_hashes[contract], tx_hash=tx_hashes[network].get(contract),
+                    chain_id=networks_config[network].get('chain_id'), run_id=run_id, job=job_name
+                )
+        for contract, error in errors.get(network, {}).items():
+            print(f"  [❌] {network}: {contract if contract != '*' else 'batch'} failed: {error}")
+
+    output = {'status': 'failure' if errors else 'success', 'addresses': addresses, 'tx_hashes': tx_hashes}
+    if errors:
+        output['errors'] = errors
+    return output
+
+def run(params, context):
+    return deploy_batch(
+        params, context.deployed_contracts, networks_config=context.networks_config,
+        deployments=context.deployments, run_id=context.run_id, job_name=context.job_name
+    )
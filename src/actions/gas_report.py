@@ -0,0 +1,240 @@
+import os
+import json
+import time
+import tempfile
+import statistics
+from urllib.parse import urlsplit
+
+from ..abi import encode_function_call
+from ..artifacts import load_artifact
+from ..chain_pool import ChainPoolError, is_ephemeral, lease_network
+from ..deployments import creation_code_hash
+from ..rpc import JsonRpcError, network_client, rpc_endpoints
+from ..run_state import default_state_dir
+from ..tracing import span
+from ..transactions import (
+    TransactionError, deploy_data, estimate_gas, fetch_deploy_context, resolve_sender,
+    send_transaction, wait_for_receipts
+)
+
+# Gas gate: deploys each contract to a local dev chain, sends the declared calls and reports the gas
+# used by the deployment and by each function (min/median/max over its inputs). The job fails when
+# a figure grows by more than max_regression percent over the baseline.
+#
+# Every measurement is stored under <state dir>/gas-reports/<code hash>.json, keyed like the deployment
+# registry by the creation code (bytecode plus constructor args). The baseline is a JSON file,
+# <state dir>/gas-baseline.json unless `baseline:` names another (relative to the project root, so
+# it can be committed). It is created by the first run and rewritten by runs with update_baseline: true.
+
+DEFAULT_MAX_REGRESSION = 5.0
+BASELINE_FILE = 'gas-baseline.json'
+REPORTS_DIR = 'gas-reports'
+LOCAL_HOSTS = {'127.0.0.1', 'localhost', '::1'}
+
+def _is_local(network_details):
+    urls = rpc_endpoints(network_details)
+    return bool(urls) and all(urlsplit(url).hostname in LOCAL_HOSTS for url in urls)
+
+def _contract_specs(contracts):
+    # [{contract, args, calls: [{function, inputs: [args, ...]}]}]; a call's `args` is a single input
+    specs = []
+    for entry in contracts or []:
+        if isinstance(entry, str):
+            entry = {'contract': entry}
+        if not isinstance(entry, dict) or not isinstance(entry.get('contract'), str):
+            raise ValueError(f"Invalid contract entry in gas report: {entry!r}")
+        calls = []
+        for call in entry.get('calls') or []:
+            if not isinstance(call, dict) or not isinstance(call.get('function'), str):
+                raise ValueError(f"Invalid call for {entry['contract']}: {call!r} (expected a mapping with 'function')")
+            inputs = call.get('inputs')
+            if inputs is None:
+                inputs = [call.get('args') or []]
+            if not isinstance(inputs, list) or not all(isinstance(args, list) for args in inputs):
+                raise ValueError(f"{entry['contract']}.{call['function']}: 'inputs' must be a list of argument lists")
+            calls.append({'function': call['function'], 'inputs': inputs})
+        specs.append({'contract': entry['contract'], 'args': list(entry.get('args') or []), 'calls': calls})
+    return specs
+
+def gas_stats(values):
+    return {'min': min(values), 'median': int(statistics.median(values)), 'max': max(values), 'calls': len(values)}
+
+def measure_contract(client, sender, private_key, spec, artifacts_dir=None, timeout=300, poll_interval=1.0):
+    # Returns {'deployment': gas, 'functions': {function: gas_stats}}
+    artifact = load_artifact(spec['contract'], artifacts_dir)
+    data = deploy_data(artifact, spec['args'])
+    context = fetch_deploy_context(client, sender, data)
+    tx_hash = send_transaction(client, sender, private_key, data, context)
+    receipt = wait_for_receipts(client, [tx_hash], timeout, poll_interval).get(tx_hash)
+    if receipt is None or receipt.get('status') == '0x0' or not receipt.get('contractAddress'):
+        raise TransactionError(f"Deployment of {spec['contract']} failed ({tx_hash})")
+    address = receipt['contractAddress']
+
+    # Dev chains mine every transaction as it arrives, so each estimate sees the previous calls' state;
+    # the receipts are then collected in one batched wait
+    sent = []
+    nonce = context['nonce'] + 1
+    for call in spec['calls']:
+        for inputs in call['inputs']:
+            call_data = encode_function_call(artifact.get('abi', []), call['function'], inputs)
+            gas = estimate_gas(client, sender, call_data, to=address)
+            sent.append((call['function'], send_transaction(client, sender, private_key, call_data, context, to=address, nonce=nonce, gas=gas)))
+            nonce += 1
+    receipts = wait_for_receipts(client, [call_hash for _, call_hash in sent], timeout, poll_interval)
+    used = {}
+    for function, call_hash in sent:
+        call_receipt = receipts.get(call_hash)
+        if call_receipt is None:
+            raise TransactionError(f"Timed out waiting for {spec['contract']}.{function} ({call_hash})")
+        if call_receipt.get('status') == '0x0':
+            raise TransactionError(f"{spec['contract']}.{function} reverted ({call_hash})")
+        used.setdefault(function, []).append(int(call_receipt['gasUsed'], 16))
+    return {
+        'deployment': int(receipt['gasUsed'], 16),
+        'functions': {function: gas_stats(values) for function, values in used.items()},
+    }
+
+def _metrics(entry):
+    # {metric name: gas} compared against the baseline
+    metrics = {'deployment': entry.get('deployment')}
+    for function, stats in (entry.get('functions') or {}).items():
+        metrics[f'{function}.median'] = stats.get('median')
+        metrics[f'{function}.max'] = stats.get('max')
+    return {name: value for name, value in metrics.items() if isinstance(value, int)}
+
+def compare_gas(baseline, report, max_regression=DEFAULT_MAX_REGRESSION):
+    # Returns (regressions, improvements) as [{contract, metric, baseline, current, change_pct}].
+    # Contracts and functions missing from the baseline are new, not regressions.
+    regressions, improvements = [], []
+    for contract, entry in report.items():
+        before = _metrics(baseline.get(contract) or {})
+        for metric, current in _metrics(entry).items():
+            previous = before.get(metric)
+            if previous is None or previous == current:
+                continue
+            change = {
+                'contract': contract, 'metric': metric, 'baseline': previous, 'current': current,
+                'change_pct': round((current - previous) * 100 / previous, 2) if previous else None,
+            }
+            if current < previous:
+                improvements.append(change)
+            elif change['change_pct'] is None or change['change_pct'] > max_regression:
+                regressions.append(change)
+    return regressions, improvements
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not isinstance(data.get('contracts'), dict):
+        raise ValueError(f"Invalid gas baseline: {path}")
+    return data['contracts']
+
+def _print_report(report):
+    for contract, entry in report.items():
+        print(f"  [⛽] {contract}: deployment {entry['deployment']:,} gas")
+        for function, stats in entry['functions'].items():
+            print(f"        {function}: min {stats['min']:,} / median {stats['median']:,} / max {stats['max']:,} ({stats['calls']} call(s))")
+
+def _baseline_path(params, pipeline_path, state_dir):
+    if params.get('baseline'):
+        project_root = os.path.join(os.path.dirname(pipeline_path), '..')
+        return os.path.abspath(os.path.join(project_root, params['baseline']))
+    return os.path.join(state_dir, BASELINE_FILE)
+
+def gas_report(params, pipeline_path, networks_config, state_dir=None, run_id=None):
+    network = params.get('network')
+    print(f"  [⚙️] Measuring gas on {network}...")
+    try:
+        specs = _contract_specs(params.get('contracts'))
+        max_regression = float(params.get('max_regression', DEFAULT_MAX_REGRESSION))
+    except (TypeError, ValueError) as e:
+        print(f"  [❌] {e}")
+        return {'status': 'failure', 'error': str(e)}
+    if not specs:
+        print("  [❌] No contracts to measure")
+        return {'status': 'failure', 'error': 'No contracts to measure'}
+
+    network_details = (networks_config or {}).get(network)
+    if network_details is None:
+        print(f"  [❌] Network '{network}' not found in networks.json")
+        return {'status': 'failure', 'error': f'Network {network} not found'}
+    if is_ephemeral(network_details):
+        try:
+            network_details = lease_network(network, network_details)
+        except ChainPoolError as e:
+            print(f"  [❌] {e}")
+            return {'status': 'failure', 'error': str(e)}
+    elif not _is_local(network_details):
+        # The calls are real transactions: never spend gas on a live network
+        print(f"  [❌] '{network}' is not a local dev chain; use an ephemeral network or a localhost RPC URL")
+        return {'status': 'failure', 'error': f'Network {network} is not a local dev chain'}
+
+    state_dir = state_dir or default_state_dir(pipeline_path)
+    artifacts_dir = params.get('artifacts_dir')
+    report = {}
+    try:
+        client = network_client(network_details)
+        sender, private_key = resolve_sender(client, network_details)
+        for spec in specs:
+            with span('gas.measure', 'rpc', contract=spec['contract']):
+                entry = measure_contract(
+                    client, sender, private_key, spec, artifacts_dir,
+                    timeout=params.get('receipt_timeout', 300), poll_interval=params.get('poll_interval', 1.0)
+                )
+            entry['code_hash'] = creation_code_hash(spec['contract'], spec['args'], artifacts_dir)
+            report[spec['contract']] = entry
+            if entry['code_hash']:
+                _write_json(os.path.join(state_dir, REPORTS_DIR, f"{entry['code_hash']}.json"), dict(
+                    entry, contract=spec['contract'], args=spec['args'], calls=spec['calls'],
+                    run_id=run_id, measured_at=time.time()
+                ))
+    except FileNotFoundError as e:
+        print(f"  [❌] {e}. Run actions/compile@v1 first.")
+        return {'status': 'failure', 'error': 'Artifact not found'}
+    except (JsonRpcError, TransactionError, ValueError) as e:
+        print(f"  [❌] Gas measurement failed: {e}")
+        return {'status': 'failure', 'error': str(e), 'report': report}
+    _print_report(report)
+
+    baseline_path = _baseline_path(params, pipeline_path, state_dir)
+    try:
+        baseline = load_baseline(baseline_path)
+    except (OSError, ValueError) as e:
+        print(f"  [❌] {e}")
+        return {'status': 'failure', 'error': str(e), 'report': report}
+    output = {'status': 'success', 'report': report, 'baseline': baseline_path}
+    if baseline is not None:
+        regressions, improvements = compare_gas(baseline, report, max_regression)
+        for change in improvements:
+            print(f"  [📉] {change['contract']}.{change['metric']}: {change['baseline']:,} -> {change['current']:,} ({change['change_pct']}%)")
+        for change in regressions:
+            print(f"  [❌] {change['contract']}.{change['metric']}: {change['baseline']:,} -> {change['current']:,} "
+                  f"(+{change['change_pct']}%, limit {max_regression}%)")
+        output['regressions'] = regressions
+        output['improvements'] = improvements
+        if regressions and not params.get('update_baseline'):
+            output['status'] = 'failure'
+            output['error'] = f"Gas regressed past {max_regression}% in {len(regressions)} measurement(s)"
+            return output
+
+    if baseline is None or params.get('update_baseline'):
+        contracts = dict(baseline or {})
+        contracts.update({contract: {key: entry[key] for key in ('code_hash', 'deployment', 'functions')} for contract, entry in report.items()})
+        _write_json(baseline_path, {'version': 1, 'contracts': contracts})
+        print(f"  [📝] Gas baseline {'updated' if baseline is not None else 'created'}: {baseline_path}")
+        output['baseline_updated'] = True
+    else:
+        print(f"  [✅] Gas within {max_regression}% of the baseline.")
+    return output
+
+def run(params, context):
+    return gas_report(params, context.pipeline_path, context.networks_config, state_dir=context.state_dir, run_id=context.run_id)
@@ -2,30 +2,22 @@ import os
 import json
 import subprocess
 
-def _clean_env(env):
-    # Remove pytest-specific and other volatile environment variables
-    keys_to_remove = [
-        k for k in env if k.startswith('PYTEST_') or k.startswith('TERM_') or k.startswith('SHLVL') or
-        k.startswith('OLDPWD') or k.startswith('PWD') or k.startswith('_') or k.startswith('CONDA_') or
-        k.startswith('HOMEBREW_') or k.startswith('INFOPATH') or k.startswith('DISPLAY') or
-        k.startswith('npm_') or k.startswith('XPC_') or k.startswith('__CF_') or k.startswith('SSH_') or
-        k.startswith('LOGNAME') or k.startswith('USER') or k.startswith('TMPDIR') or k.startswith('SHELL') or
-        k.startswith('INIT_CWD') or k.startswith('NODE') or k.startswith('COLOR') or k.startswith('LANG') or
-        k.startswith('EDITOR') or k.startswith('__CFBundleIdentifier') or
-        k.startswith('OBJC_DISABLE_INITIALIZE_FORK_SAFETY') or k.startswith('__PYVENV_LAUNCHER__') or
-        k.startswith('__VIRTUAL_ENV__') or k.startswith('VIRTUAL_ENV')
-    ]
-    for key in keys_to_remove:
-        env.pop(key, None)
-    return env
+from ..config import load_networks_config, networks_config_path
+from ..executor import ProcessInterrupted, run_streaming
+from ..hardhat_worker import HardhatWorkerError
+from ..project import CONTRACTS_DIR, clean_env as _clean_env
 
-def verify_contract(params, pipeline_path, deployed_contracts, networks_config=None):
+def verify_contract(params, pipeline_path, deployed_contracts, networks_config=None, workers=None, deployments=None):
     network = params.get('network')
     contract = params.get('contract')
     address = params.get('address') # This will come from the pipeline output or direct param
 
     print(f"  [⚙️] Verifying {contract} on {network}...")
 
+    if not address and deployments is not None and contract and network:
+        # The latest deployment of the contract on this network, from this run or an earlier one
+        latest = deployments.latest(contract, network)
+        address = latest['address'] if latest else None
     if not address:
         # Try to get the address from previously deployed contracts
         address = deployed_contracts.get(contract)
@@ -35,15 +27,15 @@ def verify_contract(params, pipeline_path, deployed_contracts, networks_config=N
 
     # Load network configuration
     if networks_config is None:
-        networks_config_path = os.path.join(os.path.dirname(pipeline_path), '..', 'config', 'networks.json')
-        networks_config_path = os.path.abspath(networks_config_path)
-
-        if not os.path.exists(networks_config_path):
-            print(f"  [❌] Network configuration file not found: {networks_config_path}")
+        config_path = networks_config_path(pipeline_path)
+        try:
+            networks_config = load_networks_config(config_path)
+        except FileNotFoundError:
+            print(f"  [❌] Network configuration file not found: {config_path}")
             return {'status': 'failure', 'error': 'Network config not found'}
-
-        with open(networks_config_path, 'r') as f:
-            networks_config = json.load(f)
+        except json.JSONDecodeError:
+            print(f"  [❌] Error parsing networks.json: {config_path}")
+            return {'status': 'failure', 'error': 'Invalid networks.json'}
 
     network_details = networks_config.get(network)
     if not network_details:
@@ -55,6 +47,18 @@ def verify_contract(params, pipeline_path, deployed_contracts, networks_config=N
         print(f"  [❌] Etherscan API key not configured for network '{network}'. Cannot verify.")
         return {'status': 'failure', 'error': 'Etherscan API key missing'}
 
+    if workers is not None:
+        try:
+            workers.get(network).call('verify', {'address': address, 'apiKey': etherscan_api_key})
+        except HardhatWorkerError as e:
+            print(f"  [❌] Hardhat verification failed: {e}")
+            return {'status': 'failure', 'error': str(e)}
+        except FileNotFoundError:
+            print("  [❌] npx or hardhat command not found. Make sure Hardhat is installed.")
+            return {'status': 'failure', 'error': 'npx/hardhat not found'}
+        print("  [✅] Verification successful.")
+        return {'status': 'success'}
+
     try:
         # Set Etherscan API key as environment variable for Hardhat
         env = os.environ.copy()
@@ -62,26 +66,27 @@ def verify_contract(params, pipeline_path, deployed_contracts, networks_config=N
         env["ETHERSCAN_API_KEY"] = etherscan_api_key
 
         # Run npx hardhat verify --network <network> <address>
-        result = subprocess.run(
+        run_streaming(
             ["npx", "hardhat", "verify", "--network", network, address],
-            cwd="/Users/dw2022/web3-devops-toolkit/contracts",
-            capture_output=True,
-            text=True,
-            check=True,
-            env=env
+            cwd=CONTRACTS_DIR,
+            env=env,
+            name='verify.subprocess'
         )
-        print(result.stdout)
         print("  [✅] Verification successful.")
         return {'status': 'success'}
 
     except subprocess.CalledProcessError as e:
         print(f"  [❌] Hardhat verification failed.")
-        print(f"  Stderr: {e.stderr}")
-        print(f"  Stdout: {e.stdout}")
         return {'status': 'failure', 'error': e.stderr}
+    except ProcessInterrupted as e:
+        print(f"  [❌] Hardhat verification failed: {e}")
+        return {'status': 'failure', 'error': str(e)}
     except FileNotFoundError:
         print("  [❌] npx or hardhat command not found. Make sure Hardhat is installed.")
         return {'status': 'failure', 'error': 'npx/hardhat not found'}
-    except json.JSONDecodeError:
-        print(f"  [❌] Error parsing networks.json: {networks_config_path}")
-        return {'status': 'failure', 'error': 'Invalid networks.json'}
+
+def run(params, context):
+    return verify_contract(
+        params, context.pipeline_path, context.deployed_contracts, networks_config=context.networks_config,
+        workers=context.workers, deployments=context.deployments
+    )
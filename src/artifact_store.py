@@ -0,0 +1,110 @@
+import os
+import hashlib
+import tempfile
+import threading
+
+from .artifacts import invalidate_artifacts
+from .cache import cache_root
+
+# Content-addressed blobs for moving build outputs between the coordinator and workers of a distributed
+# run. A directory tree is described by a manifest, {relative path: sha256 of the file}; only blobs the
+# other side does not have yet are transferred, so an unchanged artifact is never sent twice and a
+# contract compiled by one worker is sent to every other worker at most once.
+#
+# Blobs live under <cache root>/blobs/<first two hex digits>/<sha256>.
+
+def blob_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+class ArtifactStore:
+    def __init__(self, root=None):
+        self.root = root or os.path.join(cache_root(), 'blobs')
+
+    def _path(self, digest):
+        if len(digest) != 64 or any(c not in '0123456789abcdef' for c in digest):
+            raise ValueError(f"Invalid blob digest: {digest!r}")
+        return os.path.join(self.root, digest[:2], digest)
+
+    def has(self, digest):
+        return os.path.exists(self._path(digest))
+
+    def missing(self, digests):
+        return sorted({digest for digest in digests if not self.has(digest)})
+
+    def get(self, digest):
+        with open(self._path(digest), 'rb') as f:
+            return f.read()
+
+    def put(self, data, digest=None):
+        # Returns the blob's digest; raises ValueError when data does not match the expected digest
+        actual = blob_digest(data)
+        if digest is not None and digest != actual:
+            raise ValueError(f"Blob content does not match its digest {digest}")
+        path = self._path(actual)
+        if os.path.exists(path):
+            return actual
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        return actual
+
+class ManifestScanner:
+    # Manifests of a directory, re-hashing only files whose mtime or size changed since the last scan
+
+    def __init__(self):
+        self._hashes = {} # path -> ((mtime_ns, size), sha256)
+        self._lock = threading.Lock()
+
+    def manifest(self, directory):
+        manifest = {}
+        if not os.path.isdir(directory):
+            return manifest
+        for dirpath, dirnames, filenames in os.walk(directory):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                signature = (stat.st_mtime_ns, stat.st_size)
+                with self._lock:
+                    cached = self._hashes.get(path)
+                if cached is None or cached[0] != signature:
+                    with open(path, 'rb') as f:
+                        cached = (signature, blob_digest(f.read()))
+                    with self._lock:
+                        self._hashes[path] = cached
+                manifest[os.path.relpath(path, directory).replace(os.sep, '/')] = cached[1]
+        return manifest
+
+def materialize(manifest, directory, fetch, current=None):
+    # Makes directory contain exactly the manifest's files. fetch(digest) returns a blob's bytes;
+    # current is the directory's manifest if the caller already has it. Returns the number of files written.
+    current = current if current is not None else ManifestScanner().manifest(directory)
+    written = 0
+    for relative, digest in manifest.items():
+        if current.get(relative) == digest:
+            continue
+        path = os.path.join(directory, *relative.split('/'))
+        if os.path.commonpath([os.path.abspath(path), os.path.abspath(directory)]) != os.path.abspath(directory):
+            raise ValueError(f"Manifest path escapes the target directory: {relative}")
+        data = fetch(digest)
+        if blob_digest(data) != digest:
+            raise ValueError(f"Blob for {relative} does not match its digest {digest}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        written += 1
+    for relative in set(current) - set(manifest):
+        try:
+            os.remove(os.path.join(directory, *relative.split('/')))
+        except OSError:
+            pass
+    if written or set(current) - set(manifest):
+        invalidate_artifacts(directory)
+    return written
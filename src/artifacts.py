@@ -0,0 +1,126 @@
+import os
+import json
+import hashlib
+import threading
+
+from .project import CONTRACTS_DIR, artifacts_dir_for
+
+def default_artifacts_dir():
+    return artifacts_dir_for(CONTRACTS_DIR)
+
+class ArtifactEntry:
+    def __init__(self, name, path, artifact, file_hash, signature):
+        self.name = name
+        self.path = path
+        self.artifact = artifact
+        self.abi = artifact.get('abi', [])
+        self.bytecode = artifact.get('bytecode')
+        self.hash = file_hash # sha256 of the artifact file
+        self.signature = signature
+
+class ArtifactIndex:
+    # Contract name -> artifact for one Hardhat artifacts/ tree. The tree is walked once; an entry is
+    # parsed on first lookup and re-read only when its file's mtime or size changes.
+
+    def __init__(self, artifacts_dir):
+        self.artifacts_dir = artifacts_dir
+        self._paths = None
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _scan(self):
+        # Hardhat writes artifacts/<source path>/<ContractName>.json; prefer the conventional <ContractName>.sol
+        paths = {}
+        for dirpath, dirnames, filenames in os.walk(self.artifacts_dir):
+            dirnames[:] = sorted(d for d in dirnames if d != 'build-info')
+            for filename in sorted(filenames):
+                if not filename.endswith('.json') or filename.endswith('.dbg.json'):
+                    continue
+                name = filename[:-len('.json')]
+                conventional = os.path.basename(dirpath) == f'{name}.sol'
+                if name not in paths or conventional:
+                    paths[name] = os.path.join(dirpath, filename)
+        self._paths = paths
+
+    def names(self):
+        with self._lock:
+            if self._paths is None:
+                self._scan()
+            return sorted(self._paths)
+
+    def find(self, contract):
+        entry = self.get(contract)
+        return entry.path if entry else None
+
+    def get(self, contract):
+        with self._lock:
+            if self._paths is None:
+                self._scan()
+            entry = self._load(contract)
+            if entry is None:
+                # New or moved artifact since the last walk
+                self._scan()
+                entry = self._load(contract)
+            return entry
+
+    def _load(self, contract):
+        path = self._paths.get(contract)
+        if path is None:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self._entries.pop(contract, None)
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        entry = self._entries.get(contract)
+        if entry is not None and entry.path == path and entry.signature == signature:
+            return entry
+        with open(path, 'rb') as f:
+            data = f.read()
+        entry = ArtifactEntry(contract, path, json.loads(data), hashlib.sha256(data).hexdigest(), signature)
+        self._entries[contract] = entry
+        return entry
+
+    def invalidate(self):
+        with self._lock:
+            self._paths = None
+            self._entries = {}
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def artifact_index(artifacts_dir=None):
+    # Process-wide index per artifacts directory
+    artifacts_dir = os.path.abspath(artifacts_dir or default_artifacts_dir())
+    with _indexes_lock:
+        index = _indexes.get(artifacts_dir)
+        if index is None:
+            index = ArtifactIndex(artifacts_dir)
+            _indexes[artifacts_dir] = index
+        return index
+
+_write_locks = {}
+
+def artifacts_lock(artifacts_dir=None):
+    # Process-wide lock per artifacts directory, held while a compile restores or rewrites the tree.
+    # Daemon runs share the directory; without it two compiles could interleave rmtree and copytree.
+    artifacts_dir = os.path.abspath(artifacts_dir or default_artifacts_dir())
+    with _indexes_lock:
+        return _write_locks.setdefault(artifacts_dir, threading.Lock())
+
+def invalidate_artifacts(artifacts_dir=None):
+    # Called after a compile rewrote the tree, so removed or renamed contracts are not served from the index
+    artifact_index(artifacts_dir).invalidate()
+
+def find_artifact_path(contract, artifacts_dir):
+    return artifact_index(artifacts_dir).find(contract)
+
+def load_artifact(contract, artifacts_dir=None):
+    artifacts_dir = artifacts_dir or default_artifacts_dir()
+    entry = artifact_index(artifacts_dir).get(contract)
+    if entry is None:
+        raise FileNotFoundError(f"No compiled artifact for {contract} in {artifacts_dir}")
+    artifact = dict(entry.artifact)
+    artifact['path'] = entry.path
+    return artifact
@@ -0,0 +1,95 @@
+import os
+import shutil
+import tempfile
+import time
+
+DEFAULT_CACHE_ROOT = os.path.join(os.path.expanduser('~'), '.cache', 'web3-devops-toolkit')
+
+def cache_root():
+    return os.environ.get('WEB3_DEVOPS_CACHE_DIR', DEFAULT_CACHE_ROOT)
+
+def _tree_size(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, filename))
+            except OSError:
+                pass
+    return total
+
+class DirectoryCache:
+    # Stores directory trees under <root>/<key>/tree and evicts least recently used entries by size.
+    # Recency is the mtime of <root>/<key>/last_used, touched on every hit.
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def _entry(self, key):
+        return os.path.join(self.root, key)
+
+    def contains(self, key):
+        return os.path.isdir(os.path.join(self._entry(key), 'tree'))
+
+    def restore(self, key, destination):
+        tree = os.path.join(self._entry(key), 'tree')
+        if not os.path.isdir(tree):
+            return False
+        # Copy next to the destination and swap it in, so readers never see a half-restored tree
+        parent = os.path.dirname(os.path.abspath(destination))
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='.restore-', dir=parent)
+        try:
+            shutil.copytree(tree, os.path.join(staging, 'tree'))
+            if os.path.isdir(destination):
+                os.rename(destination, os.path.join(staging, 'previous'))
+            os.rename(os.path.join(staging, 'tree'), destination)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        self._touch(key)
+        return True
+
+    def store(self, key, source):
+        if not os.path.isdir(source):
+            return False
+        os.makedirs(self.root, exist_ok=True)
+        # Build the entry next to its final location and rename it in, so readers never see half an entry
+        staging = tempfile.mkdtemp(prefix=f'.{key}-', dir=self.root)
+        try:
+            shutil.copytree(source, os.path.join(staging, 'tree'))
+            os.rename(staging, self._entry(key))
+        except OSError:
+            # Another job stored the same key first
+            shutil.rmtree(staging, ignore_errors=True)
+            return self.contains(key)
+        self._touch(key)
+        self.evict()
+        return True
+
+    def _touch(self, key):
+        with open(os.path.join(self._entry(key), 'last_used'), 'w') as f:
+            f.write(str(time.time()))
+
+    def entries(self):
+        # [(key, last_used, size)] for every complete entry
+        if not os.path.isdir(self.root):
+            return []
+        entries = []
+        for key in os.listdir(self.root):
+            marker = os.path.join(self.root, key, 'last_used')
+            if key.startswith('.') or not os.path.exists(marker):
+                continue
+            entries.append((key, os.path.getmtime(marker), _tree_size(self._entry(key))))
+        return entries
+
+    def evict(self):
+        entries = sorted(self.entries(), key=lambda entry: entry[1])
+        total = sum(size for _, _, size in entries)
+        evicted = []
+        while entries and total > self.max_bytes:
+            key, _, size = entries.pop(0)
+            shutil.rmtree(self._entry(key), ignore_errors=True)
+            total -= size
+            evicted.append(key)
+        return evicted
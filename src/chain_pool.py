@@ -0,0 +1,304 @@
+import os
+import time
+import socket
+import threading
+import contextvars
+import subprocess
+from contextlib import contextmanager
+from concurrent.futures import Future
+
+from .project import CONTRACTS_DIR, clean_env
+from .rpc import JsonRpcClient, JsonRpcError
+from .tracing import span
+
+# Networks with "type": "ephemeral" in networks.json are served by a pool of local dev nodes
+# instead of a fixed rpc_url:
+#
+#   "devchain": {"type": "ephemeral", "node": "anvil", "pool_size": 4, "chain_id": 31337}
+#
+# A pipeline run (or each matrix instance) leases one node per ephemeral network the first time a
+# job deploys to it, and keeps it until the run or instance ends. Returning a node reverts it to
+# the evm_snapshot taken right after it started, so the next lease sees a clean chain without a
+# node restart. Nodes are started on demand, up to pool_size; further leases wait for a release.
+#
+# Optional keys: "node" (anvil or hardhat, default anvil), "command" (argument list; "{port}" and
+# "{chain_id}" are substituted), "base_port" (ports base_port, base_port + 1, ...; default: free
+# ports), "fork_url", "startup_timeout" and "lease_timeout" (seconds).
+
+EPHEMERAL = 'ephemeral'
+DEFAULT_POOL_SIZE = 2
+DEFAULT_CHAIN_ID = 31337
+DEFAULT_STARTUP_TIMEOUT = 60
+DEFAULT_LEASE_TIMEOUT = 600
+STARTUP_POLL_INTERVAL = 0.1
+
+class ChainPoolError(Exception):
+    pass
+
+def is_ephemeral(network_details):
+    return isinstance(network_details, dict) and network_details.get('type') == EPHEMERAL
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def node_command(details, port):
+    chain_id = details.get('chain_id', DEFAULT_CHAIN_ID)
+    if details.get('command'):
+        return [str(arg).format(port=port, chain_id=chain_id) for arg in details['command']]
+    kind = details.get('node', 'anvil')
+    if kind == 'anvil':
+        command = ['anvil', '--host', '127.0.0.1', '--port', str(port), '--chain-id', str(chain_id), '--silent']
+        if details.get('fork_url'):
+            command += ['--fork-url', details['fork_url']]
+        return command
+    if kind == 'hardhat':
+        # hardhat node takes its chain id from hardhat.config.js (31337 by default)
+        command = ['npx', 'hardhat', 'node', '--hostname', '127.0.0.1', '--port', str(port)]
+        if details.get('fork_url'):
+            command += ['--fork', details['fork_url']]
+        return command
+    raise ChainPoolError(f"Unknown ephemeral node type '{kind}' (expected anvil or hardhat)")
+
+class EphemeralNode:
+    def __init__(self, command, port, cwd=None, env=None):
+        self.command = command
+        self.port = port
+        self.cwd = cwd
+        self.env = env
+        self.url = f'http://127.0.0.1:{port}'
+        self.client = JsonRpcClient(self.url, pool_size=2, timeout=10)
+        self.snapshot_id = None
+        self.leases = 0
+        self._process = None
+
+    @property
+    def running(self):
+        return self._process is not None and self._process.poll() is None
+
+    def start(self, timeout=DEFAULT_STARTUP_TIMEOUT):
+        with span('chain.start', 'subprocess', command=' '.join(self.command), port=self.port):
+            try:
+                self._process = subprocess.Popen(
+                    self.command, cwd=self.cwd, env=self.env,
+                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                    start_new_session=True
+                )
+            except FileNotFoundError:
+                raise ChainPoolError(f"Cannot start local node: {self.command[0]} not found")
+            deadline = time.monotonic() + timeout
+            while True:
+                if self._process.poll() is not None:
+                    raise ChainPoolError(f"Local node exited with code {self._process.returncode}: {' '.join(self.command)}")
+                try:
+                    self.client.call('eth_chainId')
+                    break
+                except JsonRpcError:
+                    if time.monotonic() >= deadline:
+                        self.stop()
+                        raise ChainPoolError(f"Local node on port {self.port} did not answer within {timeout}s")
+                    time.sleep(STARTUP_POLL_INTERVAL)
+            self.snapshot_id = self.client.call('evm_snapshot')
+
+    def reset(self):
+        # Back to the state right after start. A snapshot is used up by reverting to it, so take a new one.
+        with span('chain.revert', 'rpc', port=self.port):
+            if not self.client.call('evm_revert', [self.snapshot_id]):
+                raise ChainPoolError(f"Local node on port {self.port} could not revert to snapshot {self.snapshot_id}")
+            self.snapshot_id = self.client.call('evm_snapshot')
+
+    def stop(self):
+        process, self._process = self._process, None
+        self.client.close()
+        if process is None or process.poll() is not None:
+            return
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+class ChainPool:
+    def __init__(self, network, details, cwd=CONTRACTS_DIR, env=None):
+        self.network = network
+        self.details = details
+        self.size = int(details.get('pool_size', DEFAULT_POOL_SIZE))
+        if self.size < 1:
+            raise ChainPoolError(f"Network '{network}': pool_size must be at least 1")
+        self.cwd = cwd if os.path.isdir(cwd or '') else None
+        self.env = env if env is not None else clean_env(os.environ.copy())
+        self._idle = []
+        self._nodes = []
+        self._starting = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def _port(self):
+        base_port = self.details.get('base_port')
+        if base_port is None:
+            return _free_port()
+        used = {node.port for node in self._nodes}
+        for port in range(int(base_port), int(base_port) + self.size):
+            if port not in used:
+                return port
+        raise ChainPoolError(f"Network '{self.network}': no free port from {base_port}")
+
+    def acquire(self, timeout=None):
+        timeout = self.details.get('lease_timeout', DEFAULT_LEASE_TIMEOUT) if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise ChainPoolError(f"Chain pool for '{self.network}' is closed")
+                if self._idle:
+                    node = self._idle.pop()
+                    break
+                if len(self._nodes) + self._starting < self.size:
+                    self._starting += 1
+                    port = self._port()
+                    node = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise ChainPoolError(f"No local node for '{self.network}' became free within {timeout}s")
+                self._condition.wait(remaining)
+        if node is None:
+            # Start outside the lock, so other leases are not held up by a slow node
+            node = EphemeralNode(node_command(self.details, port), port, cwd=self.cwd, env=self.env)
+            try:
+                node.start(self.details.get('startup_timeout', DEFAULT_STARTUP_TIMEOUT))
+            finally:
+                with self._condition:
+                    self._starting -= 1
+                    if node.running:
+                        self._nodes.append(node)
+                    self._condition.notify_all()
+        node.leases += 1
+        return node
+
+    def release(self, node):
+        try:
+            node.reset()
+        except (ChainPoolError, JsonRpcError) as e:
+            # A node that cannot go back to a clean state is replaced on the next lease
+            print(f"  [⚠️] Discarding local node for '{self.network}' on port {node.port}: {e}")
+            node.stop()
+            with self._condition:
+                if node in self._nodes:
+                    self._nodes.remove(node)
+                self._condition.notify_all()
+            return
+        with self._condition:
+            if self._closed:
+                node.stop()
+            else:
+                self._idle.append(node)
+            self._condition.notify_all()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            nodes, self._nodes, self._idle = self._nodes, [], []
+            self._condition.notify_all()
+        for node in nodes:
+            node.stop()
+
+class ChainPools:
+    # One pool per ephemeral network. Owned by a pipeline run, or shared between runs by `serve`.
+    def __init__(self, cwd=CONTRACTS_DIR, env=None):
+        self.cwd = cwd
+        self.env = env
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def pool(self, network, details):
+        key = (network, repr(sorted(details.items())))
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = ChainPool(network, details, cwd=self.cwd, env=self.env)
+                self._pools[key] = pool
+            return pool
+
+    def close(self):
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.close()
+
+class ChainLeases:
+    # The nodes one pipeline run or matrix instance holds, at most one per ephemeral network
+    def __init__(self, pools):
+        self.pools = pools
+        self._leases = {} # network -> (pool, node)
+        self._pending = {} # network -> Future of the node another job is acquiring
+        self._lock = threading.Lock()
+
+    def node(self, network, details):
+        # Acquiring can block until the pool has a free node, so it happens outside the lock;
+        # jobs that need the same network meanwhile wait for that acquisition instead of starting another
+        with self._lock:
+            lease = self._leases.get(network)
+            if lease is not None:
+                return lease[1]
+            pending = self._pending.get(network)
+            if pending is None:
+                pending = self._pending[network] = Future()
+                acquiring = True
+            else:
+                acquiring = False
+        if not acquiring:
+            return pending.result()
+
+        try:
+            pool = self.pools.pool(network, details)
+            with span('chain.lease', 'chain', network=network):
+                node = pool.acquire()
+        except BaseException as e:
+            with self._lock:
+                del self._pending[network]
+            pending.set_exception(e)
+            raise
+        with self._lock:
+            self._leases[network] = (pool, node)
+            del self._pending[network]
+        pending.set_result(node)
+        return node
+
+    def release(self):
+        with self._lock:
+            leases, self._leases = list(self._leases.values()), {}
+        for pool, node in leases:
+            pool.release(node)
+
+_leases = contextvars.ContextVar('chain_leases', default=None)
+
+@contextmanager
+def chain_leases(pools):
+    # Ephemeral networks used inside the block get their own node, returned to the pool on exit
+    leases = ChainLeases(pools)
+    token = _leases.set(leases)
+    try:
+        yield leases
+    finally:
+        _leases.reset(token)
+        leases.release()
+
+def lease_network(network, details):
+    # Network details with rpc_url pointing at the node leased for the current run or matrix instance
+    leases = _leases.get()
+    if leases is None:
+        raise ChainPoolError(f"Network '{network}' is ephemeral and can only be used inside a pipeline run")
+    node = leases.node(network, details)
+    leased = dict(details)
+    leased['rpc_url'] = node.url
+    leased.setdefault('chain_id', DEFAULT_CHAIN_ID)
+    return leased
+
+def uses_ephemeral_network(params, networks_config):
+    networks = params.get('networks') or params.get('network') or []
+    if isinstance(networks, str):
+        networks = [networks]
+    return any(is_ephemeral(networks_config.get(network)) for network in networks if isinstance(network, str))
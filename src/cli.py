@@ -7,13 +7,41 @@ import yaml
 from dotenv import load_dotenv
 
 from .pipeline_runner import PipelineRunner
+from .run_state import default_state_dir
+from .tracing import Tracer, set_tracer
 
 def main():
     load_dotenv() # Load environment variables from .env file
 
     parser = argparse.ArgumentParser(description="Web3 DevOps Toolkit CLI")
-    parser.add_argument("command", help="Command to execute (e.g., 'run-pipeline')")
+    parser.add_argument("command", help="Command to execute: 'run-pipeline', 'plan', 'serve', 'worker' or 'deployments'")
     parser.add_argument("--pipeline", help="Path to the pipeline YAML file")
+    parser.add_argument("--max-parallel", type=int, default=1, help="Maximum number of jobs to run concurrently (default: 1); with recorded durations, the jobs heading the longest remaining chain start first")
+    parser.add_argument("--no-cache", action="store_true", help="Always run the compiler and parse the pipeline instead of using cached results")
+    parser.add_argument("--resume", metavar="RUN_ID", help="Resume a previous run, skipping jobs whose inputs have not changed")
+    parser.add_argument("--force", metavar="JOB", action="append", default=[], help="Re-run this job even if it could be skipped (repeatable)")
+    parser.add_argument("--state-dir", help="Where run state is recorded (default: .pipeline-state next to config/)")
+    parser.add_argument("--async-verify", action="store_true", help="Queue verifications in the background and report them when the pipeline ends")
+    parser.add_argument("--persistent-workers", action="store_true", help="Start one long-lived Hardhat process per network instead of one npx call per job")
+    parser.add_argument("--actions-dir", metavar="DIR", action="append", help="Directory with custom actions as <owner>/<name>@<version>.py (repeatable; default: actions/ next to config/)")
+    parser.add_argument("--trace", metavar="FILE", help="Write timing spans as a Chrome trace to FILE and as OpenTelemetry JSONL to FILE's .otel.jsonl sibling")
+    parser.add_argument("--distributed", action="store_true", help="run-pipeline: hand jobs to 'worker' processes through a coordinator listening on --host/--port")
+    parser.add_argument("--worker-wait", type=float, metavar="SECONDS", help="run-pipeline --distributed: fail a job that no worker picks up within this time (default: 300)")
+    parser.add_argument("--dry-run", action="store_true", help="run-pipeline: deploy to local forks of every network, reading remote state through a caching RPC proxy")
+    parser.add_argument("--rpc-cache-mb", type=int, default=512, help="run-pipeline --dry-run: size limit of the on-disk RPC response cache (default: 512)")
+    parser.add_argument("--host", default="127.0.0.1", help="serve, run-pipeline --distributed: address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, help="serve, run-pipeline --distributed: port to listen on (default: 8787 for serve, 8788 for the coordinator)")
+    parser.add_argument("--socket", metavar="PATH", help="serve: listen on this Unix socket instead of TCP")
+    parser.add_argument("--max-runs", type=int, default=4, help="serve: pipelines run at the same time, later submissions queue (default: 4)")
+    parser.add_argument("--prespawn", metavar="NETWORK", action="append", default=[], help="serve: start a Hardhat worker for this network at startup (repeatable)")
+    parser.add_argument("--no-workers", action="store_true", help="serve: use one npx call per job instead of shared Hardhat workers")
+    parser.add_argument("--coordinator", metavar="URL", help="worker: coordinator to pull jobs from, e.g. http://10.0.0.5:8788")
+    parser.add_argument("--capacity", type=int, default=1, help="worker: jobs to run at the same time (default: 1)")
+    parser.add_argument("--worker-name", help="worker: name shown in the coordinator's output (default: <host>-<pid>)")
+    parser.add_argument("--artifacts-dir", help="worker: artifacts directory to sync and pass to actions that take artifacts_dir (default: the Hardhat artifacts/ directory)")
+    parser.add_argument("--contract", help="deployments: show the latest address of this contract on every network")
+    parser.add_argument("--network", help="deployments: only show deployments on this network")
+    parser.add_argument("--limit", type=int, default=20, help="deployments: number of recent deployments to list (default: 20)")
 
     args = parser.parse_args()
 
@@ -25,8 +53,48 @@ def main():
         # Ensure the pipeline path is absolute
         pipeline_abs_path = os.path.abspath(args.pipeline)
 
+        if args.max_parallel < 1:
+            print("Error: --max-parallel must be at least 1.")
+            sys.exit(1)
+
+        if args.dry_run and args.distributed:
+            # Workers read their own networks.json and would deploy to the real networks
+            print("Error: --dry-run cannot be combined with --distributed.")
+            sys.exit(1)
+
+        rpc_proxy = None
+        if args.dry_run:
+            from .rpc_proxy import CachingRpcProxy, RpcResponseCache
+
+            rpc_proxy = CachingRpcProxy(cache=RpcResponseCache(max_bytes=args.rpc_cache_mb * 1024 * 1024)).start()
+            print(f"Dry run: networks are forked locally through the RPC cache on {rpc_proxy.url}")
+
+        coordinator = None
+        if args.distributed:
+            from .distributed import DEFAULT_COORDINATOR_PORT, WORKER_WAIT, Coordinator
+
+            coordinator = Coordinator(
+                host=args.host, port=args.port if args.port is not None else DEFAULT_COORDINATOR_PORT,
+                worker_wait=args.worker_wait if args.worker_wait is not None else WORKER_WAIT
+            ).start()
+            print(f"Coordinating workers on {coordinator.url} (start them with: worker --coordinator {coordinator.url})")
+
+        tracer = Tracer() if args.trace else None
+        set_tracer(tracer)
         try:
-            runner = PipelineRunner(pipeline_abs_path)
+            runner = PipelineRunner(
+                pipeline_abs_path,
+                max_parallel=args.max_parallel,
+                use_cache=not args.no_cache,
+                persistent_workers=args.persistent_workers,
+                state_dir=args.state_dir or default_state_dir(pipeline_abs_path),
+                resume_run_id=args.resume,
+                force_jobs=args.force,
+                async_verify=args.async_verify,
+                plugin_dirs=args.actions_dir,
+                coordinator=coordinator,
+                rpc_proxy=rpc_proxy
+            )
             runner.run()
         except FileNotFoundError as e:
             print(f"Error: {e}")
@@ -34,6 +102,130 @@ def main():
         except yaml.YAMLError as e:
             print(f"Error parsing YAML pipeline: {e}")
             sys.exit(1)
+        except ValueError as e:
+            print(f"Error in pipeline definition: {e}")
+            sys.exit(1)
+        finally:
+            if coordinator is not None:
+                coordinator.close()
+            if rpc_proxy is not None:
+                print(f"RPC cache: {rpc_proxy.hits} hit(s), {rpc_proxy.misses} request(s) forwarded")
+                rpc_proxy.close()
+            if tracer is not None:
+                set_tracer(None)
+                chrome_path, otel_path = tracer.export(args.trace)
+                print(f"Trace written to {chrome_path} and {otel_path}")
+
+    elif args.command == "plan":
+        from .deployments import DeploymentRegistry
+        from .planner import format_plan, plan_pipeline
+
+        if not args.pipeline:
+            print("Error: --pipeline argument is required for 'plan' command.")
+            sys.exit(1)
+        if args.max_parallel < 1:
+            print("Error: --max-parallel must be at least 1.")
+            sys.exit(1)
+        pipeline_abs_path = os.path.abspath(args.pipeline)
+        try:
+            runner = PipelineRunner(
+                pipeline_abs_path,
+                max_parallel=args.max_parallel,
+                use_cache=not args.no_cache,
+                state_dir=args.state_dir or default_state_dir(pipeline_abs_path),
+                resume_run_id=args.resume,
+                force_jobs=args.force,
+                plugin_dirs=args.actions_dir,
+                deployments=DeploymentRegistry() # Planning never records anything
+            )
+            print(format_plan(plan_pipeline(runner)))
+        except FileNotFoundError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        except yaml.YAMLError as e:
+            print(f"Error parsing YAML pipeline: {e}")
+            sys.exit(1)
+        except ValueError as e:
+            print(f"Error in pipeline definition: {e}")
+            sys.exit(1)
+
+    elif args.command == "serve":
+        from .daemon import DEFAULT_PORT, PipelineDaemon, create_server # Only the daemon needs the HTTP server
+
+        if args.max_runs < 1:
+            print("Error: --max-runs must be at least 1.")
+            sys.exit(1)
+        pipeline_daemon = PipelineDaemon(
+            max_runs=args.max_runs,
+            persistent_workers=not args.no_workers,
+            plugin_dirs=args.actions_dir,
+            state_dir=args.state_dir
+        )
+        try:
+            server = create_server(pipeline_daemon, host=args.host, port=args.port if args.port is not None else DEFAULT_PORT, socket_path=args.socket)
+        except OSError as e:
+            pipeline_daemon.close()
+            print(f"Error: {e}")
+            sys.exit(1)
+        pipeline_daemon.prespawn(args.prespawn)
+        print(f"Serving pipelines on {args.socket or f'http://{args.host}:{server.server_address[1]}'} (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nShutting down, waiting for running pipelines...")
+        finally:
+            server.server_close()
+            pipeline_daemon.close()
+
+    elif args.command == "worker":
+        from .distributed import CoordinatorError, Worker
+
+        if not args.coordinator:
+            print("Error: --coordinator URL is required for 'worker' command.")
+            sys.exit(1)
+        if args.capacity < 1:
+            print("Error: --capacity must be at least 1.")
+            sys.exit(1)
+        worker = Worker(
+            args.coordinator,
+            pipeline_path=args.pipeline,
+            capacity=args.capacity,
+            artifacts_dir=os.path.abspath(args.artifacts_dir) if args.artifacts_dir else None,
+            name=args.worker_name,
+            plugin_dirs=args.actions_dir
+        )
+        try:
+            worker.start()
+        except (OSError, CoordinatorError) as e:
+            print(f"Error: could not reach the coordinator at {args.coordinator}: {e}")
+            sys.exit(1)
+        print(f"Worker '{worker.name}' pulling jobs from {args.coordinator} (Ctrl+C to stop)")
+        try:
+            worker.wait()
+        except KeyboardInterrupt:
+            print("\nStopping after the running jobs...")
+            worker.stop()
+
+    elif args.command == "deployments":
+        from .deployments import DeploymentRegistry, default_deployments_path
+
+        if not args.state_dir and not args.pipeline:
+            print("Error: --pipeline or --state-dir is required for 'deployments' command.")
+            sys.exit(1)
+        path = default_deployments_path(args.state_dir or default_state_dir(os.path.abspath(args.pipeline)))
+        if not os.path.exists(path):
+            print(f"No deployments recorded in {path}")
+            return
+        registry = DeploymentRegistry(path)
+        if args.contract and not args.network:
+            rows = list(registry.latest_by_network(args.contract).values())
+        else:
+            rows = registry.history(contract=args.contract, network=args.network, limit=args.limit)
+        for row in rows:
+            print(f"{row['network']:<16} {row['contract']:<24} {row['address']}  run {row['run_id'] or '-'}  tx {row['tx_hash'] or '-'}")
+        if not rows:
+            print("No matching deployments.")
+        registry.close()
 
     else:
         print(f"Unknown command: {args.command}")
@@ -0,0 +1,151 @@
+import os
+import re
+import json
+import shutil
+import hashlib
+
+# Splits a Hardhat source tree into compilation units that can be built by separate `hardhat compile`
+# processes. Files that import each other (directly or through other project files) must be compiled
+# together, so a unit is a connected component of the project's import graph. Library imports
+# (node_modules, e.g. @openzeppelin/...) do not join components: every shard resolves them itself.
+#
+# Units are packed into at most N shards by source size, largest first, preferring shards whose files
+# already share the unit's `pragma solidity` constraints (so each process needs as few solc versions
+# as possible) as long as the shards stay balanced within one unit. Each shard compiles into its own
+# artifacts and cache directory, keyed by its file list so Hardhat's incremental cache survives
+# unchanged shards; the results are merged into the project's artifacts directory. hardhat.config.js limits a compile to the files listed in
+# HARDHAT_SHARD_SOURCES and writes to HARDHAT_ARTIFACTS_DIR / HARDHAT_CACHE_DIR.
+
+SKIP_DIRS = {'node_modules'}
+
+# Comments are dropped and string literals kept, so commented-out imports are ignored
+_TOKENS = re.compile(r'//[^\n]*|/\*.*?\*/|("(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\')', re.S)
+_IMPORT = re.compile(r'\bimport\s+(?:[^;"\']*?\bfrom\s+)?(["\'])([^"\']+)\1')
+_PRAGMA = re.compile(r'\bpragma\s+solidity\s+([^;]+);')
+
+class SourceFile:
+    def __init__(self, path, imports, pragma, size):
+        self.path = path # Relative to the source root, with forward slashes
+        self.imports = imports
+        self.pragma = pragma
+        self.size = size
+
+class CompilationUnit:
+    def __init__(self, files):
+        self.files = sorted(file.path for file in files)
+        self.pragmas = frozenset(file.pragma for file in files if file.pragma)
+        self.size = sum(file.size for file in files)
+
+class Shard:
+    def __init__(self):
+        self.files = []
+        self.pragmas = set()
+        self.size = 0
+
+    def add(self, unit):
+        self.files.extend(unit.files)
+        self.pragmas |= unit.pragmas
+        self.size += unit.size
+
+    @property
+    def key(self):
+        return hashlib.sha256('\n'.join(sorted(self.files)).encode()).hexdigest()[:16]
+
+def parse_source(text):
+    # Returns (import paths, pragma solidity constraint or None)
+    code = _TOKENS.sub(lambda match: match.group(1) or ' ', text)
+    pragma = _PRAGMA.search(code)
+    return [match.group(2) for match in _IMPORT.finditer(code)], pragma.group(1).strip() if pragma else None
+
+def find_sources(root):
+    sources = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS and not d.startswith('.'))
+        sources.extend(os.path.join(dirpath, f) for f in sorted(filenames) if f.endswith('.sol'))
+    return sources
+
+def _resolve(importer, target, root, known):
+    # Relative imports resolve against the importing file; other paths are project source names when
+    # such a file exists under the root, and libraries otherwise
+    if target.startswith('./') or target.startswith('../'):
+        candidate = os.path.normpath(os.path.join(os.path.dirname(importer), target)).replace(os.sep, '/')
+    else:
+        candidate = os.path.normpath(target).replace(os.sep, '/')
+    return candidate if candidate in known else None
+
+def import_graph(root):
+    # {relative path: SourceFile} with imports resolved to project files only
+    files = {}
+    for path in find_sources(root):
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            text = f.read()
+        imports, pragma = parse_source(text)
+        relative = os.path.relpath(path, root).replace(os.sep, '/')
+        files[relative] = SourceFile(relative, imports, pragma, len(text))
+    for file in files.values():
+        file.imports = sorted({resolved for resolved in (_resolve(file.path, target, root, files) for target in file.imports) if resolved})
+    return files
+
+def compilation_units(files):
+    parent = {path: path for path in files}
+    def find(path):
+        while parent[path] != path:
+            parent[path] = parent[parent[path]]
+            path = parent[path]
+        return path
+    for file in files.values():
+        for imported in file.imports:
+            parent[find(imported)] = find(file.path)
+    components = {}
+    for path in sorted(files):
+        components.setdefault(find(path), []).append(files[path])
+    return [CompilationUnit(members) for members in components.values()]
+
+def plan_shards(units, max_shards):
+    shards = [Shard() for _ in range(max(1, min(max_shards, len(units))))]
+    for unit in sorted(units, key=lambda unit: (-unit.size, unit.files)):
+        lightest = min(shards, key=lambda shard: shard.size)
+        # A shard with the same pragmas may take the unit if that leaves it at most one unit heavier
+        matching = [shard for shard in shards if shard.files and unit.pragmas <= shard.pragmas
+                    and shard.size <= lightest.size + unit.size]
+        min(matching or [lightest], key=lambda shard: shard.size).add(unit)
+    return [shard for shard in shards if shard.files]
+
+def shard_dirs(work_dir, shard):
+    base = os.path.join(work_dir, shard.key)
+    return os.path.join(base, 'artifacts'), os.path.join(base, 'cache')
+
+def write_shard_sources(work_dir, shard):
+    base = os.path.join(work_dir, shard.key)
+    os.makedirs(base, exist_ok=True)
+    path = os.path.join(base, 'sources.json')
+    with open(path, 'w') as f:
+        json.dump(shard.files, f)
+    return path
+
+def merge_artifacts(work_dir, shards, destination):
+    # The union of the shards' artifacts replaces destination in one rename, like a full compile
+    # would (artifacts of deleted sources disappear)
+    staging = f'{destination}.merge-{os.getpid()}'
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    for shard in shards:
+        artifacts_dir, _ = shard_dirs(work_dir, shard)
+        if os.path.isdir(artifacts_dir):
+            shutil.copytree(artifacts_dir, staging, dirs_exist_ok=True)
+    if os.path.isdir(destination):
+        previous = f'{destination}.old-{os.getpid()}'
+        os.rename(destination, previous)
+        os.rename(staging, destination)
+        shutil.rmtree(previous, ignore_errors=True)
+    else:
+        os.rename(staging, destination)
+
+def prune_shard_dirs(work_dir, shards):
+    # Shards that no longer exist (their file set changed) only take up space
+    keep = {shard.key for shard in shards}
+    if not os.path.isdir(work_dir):
+        return
+    for name in os.listdir(work_dir):
+        if name not in keep:
+            shutil.rmtree(os.path.join(work_dir, name), ignore_errors=True)
@@ -0,0 +1,85 @@
+import os
+import re
+import json
+import threading
+
+# Process-wide cache of config/networks.json. Entries are revalidated with a stat() per lookup and
+# re-parsed only when the file's mtime or size changed.
+#
+# Environment variables override per-network settings: <NETWORK>_RPC_URL, <NETWORK>_CHAIN_ID,
+# <NETWORK>_ETHERSCAN_API_KEY, <NETWORK>_EXPLORER_URL and <NETWORK>_PRIVATE_KEY, where <NETWORK> is
+# the network name upper-cased with non-alphanumerics replaced by '_' (e.g. GOERLI_RPC_URL).
+
+ENV_OVERRIDES = {
+    'RPC_URL': ('rpc_url', str),
+    'RPC_URLS': ('rpc_urls', lambda value: [url.strip() for url in value.split(',') if url.strip()]),
+    'CHAIN_ID': ('chain_id', int),
+    'ETHERSCAN_API_KEY': ('etherscan_api_key', str),
+    'EXPLORER_URL': ('explorer_url', str),
+    'PRIVATE_KEY': ('private_key', str),
+}
+
+_cache = {} # path -> (file signature, parsed file, overlaid config, env signature)
+_cache_lock = threading.Lock()
+
+def networks_config_path(pipeline_path):
+    # config/ sits next to pipelines/
+    return os.path.abspath(os.path.join(os.path.dirname(pipeline_path), '..', 'config', 'networks.json'))
+
+def env_prefix(network):
+    return re.sub(r'[^A-Za-z0-9]', '_', network).upper()
+
+def _env_signature(config, environ):
+    names = [f'{env_prefix(network)}_{suffix}' for network in config for suffix in ENV_OVERRIDES]
+    return tuple((name, environ[name]) for name in names if name in environ)
+
+def apply_env_overlay(config, environ=None):
+    # Returns a copy of config with environment overrides applied; config itself is not modified
+    environ = os.environ if environ is None else environ
+    overlaid = {}
+    for network, details in config.items():
+        details = dict(details or {})
+        prefix = env_prefix(network)
+        for suffix, (key, convert) in ENV_OVERRIDES.items():
+            value = environ.get(f'{prefix}_{suffix}')
+            if value:
+                try:
+                    details[key] = convert(value)
+                except ValueError:
+                    raise ValueError(f"Invalid {prefix}_{suffix} value: {value!r}")
+        overlaid[network] = details
+    return overlaid
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def load_networks_config(path, environ=None):
+    # Raises FileNotFoundError when the file is missing and json.JSONDecodeError when it is invalid.
+    # The returned dict is shared between callers and must not be modified.
+    environ = os.environ if environ is None else environ
+    signature = _file_signature(path)
+    with _cache_lock:
+        cached = _cache.get(path)
+    if cached is not None and signature is not None and cached[0] == signature:
+        raw, overlaid, env_signature = cached[1], cached[2], cached[3]
+        if _env_signature(raw, environ) == env_signature:
+            return overlaid
+        overlaid = apply_env_overlay(raw, environ)
+    else:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Network configuration file not found: {path}")
+        with open(path, 'r') as f:
+            raw = json.load(f)
+        overlaid = apply_env_overlay(raw, environ)
+    if signature is not None:
+        with _cache_lock:
+            _cache[path] = (signature, raw, overlaid, _env_signature(raw, environ))
+    return overlaid
+
+def clear_config_cache():
+    with _cache_lock:
+        _cache.clear()
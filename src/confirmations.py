@@ -0,0 +1,134 @@
+import time
+import threading
+
+from .rpc import JsonRpcError
+from .tracing import span
+
+# Confirms transactions for every in-flight deploy job on an endpoint with one poll loop: each
+# round trip is a single batch of eth_blockNumber plus eth_getTransactionReceipt for the hashes
+# that still lack a receipt, so polling cost does not grow with the number of waiting jobs.
+# Once a receipt is known only the block number is polled until the requested depth is reached;
+# deeper confirmations re-fetch the receipt at that point, in case a reorg moved or dropped it.
+#
+# The JSON-RPC client speaks HTTP only, so there is no newHeads subscription; nodes are polled.
+
+DEFAULT_POLL_INTERVAL = 1.0
+
+class _Pending:
+    def __init__(self, tx_hash, confirmations, poll_interval):
+        self.tx_hash = tx_hash
+        self.confirmations = confirmations
+        self.poll_interval = poll_interval
+        self.receipt = None
+        self.recheck = False # Depth reached on an older receipt; confirm it is still there
+        self.waiters = 0
+        self.error = None
+        self.done = threading.Event()
+
+    def depth(self, head):
+        return head - int(self.receipt.get('blockNumber', '0x0'), 16) + 1
+
+class ConfirmationTracker:
+    def __init__(self, client):
+        self.client = client
+        self.head = None
+        self.polls = 0
+        self._pending = {} # (tx_hash, confirmations) -> _Pending
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def wait(self, tx_hashes, confirmations=1, timeout=300, poll_interval=DEFAULT_POLL_INTERVAL):
+        # Returns {tx_hash: receipt} for every hash confirmed `confirmations` blocks deep within timeout;
+        # reverted receipts are included, hashes still pending at the deadline are not.
+        # Raises JsonRpcError when the endpoint fails.
+        if confirmations < 1:
+            raise ValueError(f"confirmations must be at least 1, got {confirmations!r}")
+        entries = []
+        with self._condition:
+            for tx_hash in dict.fromkeys(tx_hashes):
+                entry = self._pending.get((tx_hash, confirmations))
+                if entry is None:
+                    entry = _Pending(tx_hash, confirmations, poll_interval)
+                    self._pending[(tx_hash, confirmations)] = entry
+                entry.waiters += 1
+                entry.poll_interval = min(entry.poll_interval, poll_interval)
+                entries.append(entry)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='confirmations', daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+
+        deadline = time.monotonic() + timeout
+        with span('confirmations.wait', 'rpc', transactions=len(entries), confirmations=confirmations):
+            for entry in entries:
+                entry.done.wait(max(0, deadline - time.monotonic()))
+
+        receipts = {}
+        with self._condition:
+            for entry in entries:
+                entry.waiters -= 1
+                if entry.waiters == 0 and not entry.done.is_set():
+                    self._pending.pop((entry.tx_hash, entry.confirmations), None)
+        for entry in entries:
+            if entry.error is not None:
+                raise entry.error
+            if entry.done.is_set():
+                receipts[entry.tx_hash] = entry.receipt
+        return receipts
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._pending:
+                    self._thread = None
+                    return
+                entries = list(self._pending.values())
+            try:
+                self._poll(entries)
+            except (JsonRpcError, ValueError, TypeError, AttributeError) as e:
+                # Fail the current waiters like a direct call would, instead of retrying until they time out
+                if not isinstance(e, JsonRpcError):
+                    e = JsonRpcError(f"Invalid response from {self.client.url} while polling receipts: {e}")
+                for entry in entries:
+                    entry.error = e
+                    self._finish(entry)
+            with self._condition:
+                if self._pending:
+                    self._condition.wait(min(entry.poll_interval for entry in self._pending.values()))
+
+    def _poll(self, entries):
+        fetch = [entry for entry in entries if entry.receipt is None or entry.recheck]
+        calls = [('eth_blockNumber', [])] + [('eth_getTransactionReceipt', [entry.tx_hash]) for entry in fetch]
+        with span('confirmations.poll', 'rpc', receipts=len(fetch)):
+            results = self.client.batch(calls)
+        self.polls += 1
+        self.head = int(results[0], 16)
+        fetched = set()
+        for entry, receipt in zip(fetch, results[1:]):
+            entry.receipt = receipt
+            entry.recheck = False
+            fetched.add(id(entry))
+        for entry in entries:
+            if entry.receipt is None or entry.depth(self.head) < entry.confirmations:
+                continue
+            if entry.confirmations > 1 and id(entry) not in fetched:
+                entry.recheck = True
+                continue
+            self._finish(entry)
+
+    def _finish(self, entry):
+        with self._condition:
+            self._pending.pop((entry.tx_hash, entry.confirmations), None)
+        entry.done.set()
+
+_trackers = {}
+_trackers_lock = threading.Lock()
+
+def confirmation_tracker(client):
+    # One tracker per endpoint, so deploy jobs running in parallel share its poll loop
+    with _trackers_lock:
+        tracker = _trackers.get(client.url)
+        if tracker is None or tracker.client is not client:
+            tracker = ConfirmationTracker(client)
+            _trackers[client.url] = tracker
+        return tracker
@@ -0,0 +1,393 @@
+import os
+import sys
+import json
+import stat
+import time
+import threading
+import contextvars
+import socketserver
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import yaml
+
+from .chain_pool import ChainPools
+from .hardhat_worker import HardhatWorkerPool
+from .pipeline_runner import PipelineRunner
+from .registry import ActionRegistry, default_plugin_dirs
+from .rpc import close_clients
+from .run_state import default_state_dir, new_run_id
+
+# `serve`: a long-lived process that runs submitted pipelines against warm state - parsed configs and
+# artifact index, imported actions, pooled RPC connections, running Hardhat workers and local nodes
+# for ephemeral networks - instead of paying Python, YAML and Node startup on every CI trigger.
+#
+# HTTP API (over TCP or a Unix socket):
+#   POST /runs                  {"pipeline": path, "max_parallel", "force", "resume", "async_verify", "no_cache"}
+#   GET  /runs                  all runs, newest first
+#   GET  /runs/<id>             status and job outputs
+#   GET  /runs/<id>/log         printed output; ?offset=N to skip lines, ?follow=1 to stream until the run ends
+#   GET  /health
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8787
+DEFAULT_MAX_RUNS = 4
+MAX_LOG_LINES = 20000
+MAX_FINISHED_RUNS = 200
+FOLLOW_POLL_INTERVAL = 1.0
+
+_run_log = contextvars.ContextVar('run_log', default=None)
+
+class _RoutedStream:
+    # Stands in for sys.stdout: output printed while serving a run goes to that run's log,
+    # everything else to the real stream. Job threads inherit the run's context from the scheduler.
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        log = _run_log.get()
+        if log is None:
+            return self.stream.write(text)
+        log.write(text)
+        return len(text)
+
+    def flush(self):
+        if _run_log.get() is None:
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+def _route_stdout():
+    # Installed when a run starts rather than once at startup, since other code (test runners,
+    # IDE consoles) may swap sys.stdout in between
+    if not isinstance(sys.stdout, _RoutedStream):
+        sys.stdout = _RoutedStream(sys.stdout)
+
+def _unroute_stdout():
+    if isinstance(sys.stdout, _RoutedStream):
+        sys.stdout = sys.stdout.stream
+
+@contextmanager
+def capture_output(log):
+    # Output printed inside the block, and by threads started from its context, goes to log
+    _route_stdout()
+    token = _run_log.set(log)
+    try:
+        yield log
+    finally:
+        _run_log.reset(token)
+
+class RunLog:
+    def __init__(self, max_lines=MAX_LOG_LINES):
+        self.max_lines = max_lines
+        self.dropped = 0 # Lines discarded from the front once max_lines is reached
+        self.closed = False
+        self._lines = []
+        self._partial = ''
+        self._condition = threading.Condition()
+
+    def write(self, text):
+        with self._condition:
+            *complete, self._partial = (self._partial + text).split('\n')
+            self._lines.extend(complete)
+            overflow = len(self._lines) - self.max_lines
+            if overflow > 0:
+                del self._lines[:overflow]
+                self.dropped += overflow
+            self._condition.notify_all()
+
+    def close(self):
+        with self._condition:
+            if self._partial:
+                self._lines.append(self._partial)
+                self._partial = ''
+            self.closed = True
+            self._condition.notify_all()
+
+    def read(self, offset=0, wait=None):
+        # Returns (lines from offset, next offset, closed); waits up to `wait` seconds for new lines
+        with self._condition:
+            if wait and offset >= self.dropped + len(self._lines) and not self.closed:
+                self._condition.wait(wait)
+            start = max(offset - self.dropped, 0)
+            return self._lines[start:], self.dropped + len(self._lines), self.closed
+
+class PipelineRun:
+    def __init__(self, run_id, pipeline_path, options):
+        self.id = run_id
+        self.pipeline_path = pipeline_path
+        self.options = options
+        self.status = 'queued'
+        self.error = None
+        self.job_outputs = {}
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.log = RunLog()
+
+    @property
+    def finished(self):
+        return self.status in ('succeeded', 'failed')
+
+    def to_dict(self, include_outputs=False):
+        data = {
+            'id': self.id,
+            'pipeline': self.pipeline_path,
+            'status': self.status,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+        if self.error:
+            data['error'] = self.error
+        if include_outputs:
+            data['options'] = self.options
+            data['jobs'] = self.job_outputs
+        return data
+
+class PipelineDaemon:
+    def __init__(self, max_runs=DEFAULT_MAX_RUNS, persistent_workers=True, plugin_dirs=None,
+                 state_dir=None, workers=None):
+        self.plugin_dirs = plugin_dirs
+        self.state_dir = state_dir
+        self.workers = workers if workers is not None else (HardhatWorkerPool() if persistent_workers else None)
+        self.chains = ChainPools() # Ephemeral network nodes, reverted and reused across runs
+        self.runs = OrderedDict()
+        self._registries = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_runs)
+
+    def prespawn(self, networks):
+        # Start Hardhat workers in the background so the first run does not wait for Node
+        if self.workers is None:
+            return
+        def start(network):
+            try:
+                self.workers.get(network).start()
+                print(f"[serve] Hardhat worker for '{network}' is ready")
+            except Exception as e:
+                print(f"[serve] Could not start Hardhat worker for '{network}': {e}")
+        for network in networks:
+            threading.Thread(target=start, args=(network,), daemon=True).start()
+
+    def _registry(self, pipeline_path):
+        # One registry per plugin directory set, so imported actions stay loaded between runs
+        dirs = tuple(self.plugin_dirs if self.plugin_dirs is not None else default_plugin_dirs(pipeline_path))
+        with self._lock:
+            registry = self._registries.get(dirs)
+            if registry is None:
+                registry = ActionRegistry(dirs)
+                self._registries[dirs] = registry
+            return registry
+
+    def submit(self, pipeline_path, max_parallel=1, force_jobs=(), resume_run_id=None, async_verify=False, use_cache=True):
+        # Loads and validates the pipeline right away, so a bad submission fails the request
+        # (FileNotFoundError, ValueError, yaml.YAMLError) instead of a queued run
+        pipeline_path = os.path.abspath(pipeline_path)
+        options = {
+            'max_parallel': max_parallel, 'force': list(force_jobs), 'resume': resume_run_id,
+            'async_verify': async_verify, 'use_cache': use_cache,
+        }
+        log = RunLog()
+        with capture_output(log):
+            runner = PipelineRunner(
+                pipeline_path,
+                max_parallel=max_parallel,
+                use_cache=use_cache,
+                state_dir=self.state_dir or default_state_dir(pipeline_path),
+                resume_run_id=resume_run_id,
+                force_jobs=force_jobs,
+                async_verify=async_verify,
+                registry=self._registry(pipeline_path),
+                shared_workers=self.workers,
+                shared_chains=self.chains,
+                keep_connections=True
+            )
+        run_id = runner.run_state.run_id if runner.run_state is not None else new_run_id()
+        run = PipelineRun(run_id, pipeline_path, options)
+        run.log = log
+        with self._lock:
+            self.runs[run.id] = run
+            self._trim()
+        self._executor.submit(self._execute, run, runner)
+        return run
+
+    def _trim(self):
+        finished = [run_id for run_id, run in self.runs.items() if run.finished]
+        for run_id in finished[:max(0, len(finished) - MAX_FINISHED_RUNS)]:
+            del self.runs[run_id]
+
+    def _execute(self, run, runner):
+        _route_stdout()
+        token = _run_log.set(run.log)
+        run.status = 'running'
+        run.started_at = time.time()
+        try:
+            runner.run()
+            run.job_outputs = runner.job_outputs
+            failed = [name for name, output in runner.job_outputs.items() if (output or {}).get('status') == 'failure']
+            run.status = 'failed' if failed else 'succeeded'
+            if failed:
+                run.error = f"Failed jobs: {', '.join(failed)}"
+        except Exception as e:
+            run.job_outputs = runner.job_outputs
+            run.status = 'failed'
+            run.error = f"{type(e).__name__}: {e}"
+            print(f"[❌] Run failed: {run.error}")
+        finally:
+            run.finished_at = time.time()
+            _run_log.reset(token)
+            run.log.close()
+
+    def get(self, run_id):
+        with self._lock:
+            return self.runs.get(run_id)
+
+    def list(self):
+        with self._lock:
+            return list(reversed(self.runs.values()))
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        if self.workers is not None:
+            self.workers.close()
+        self.chains.close()
+        close_clients()
+        _unroute_stdout()
+
+class DaemonRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    @property
+    def pipelines(self):
+        return self.server.pipeline_daemon
+
+    def log_message(self, format, *args):
+        pass # Request lines would interleave with run output on the terminal
+
+    def _send_json(self, status, data):
+        body = json.dumps(data, default=str).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self):
+        parts = urlsplit(self.path)
+        return [part for part in parts.path.split('/') if part], parse_qs(parts.query)
+
+    def do_GET(self):
+        path, query = self._route()
+        if path == ['health']:
+            runs = self.pipelines.list()
+            return self._send_json(200, {
+                'status': 'ok',
+                'running': sum(1 for run in runs if run.status == 'running'),
+                'queued': sum(1 for run in runs if run.status == 'queued'),
+            })
+        if path == ['runs']:
+            return self._send_json(200, {'runs': [run.to_dict() for run in self.pipelines.list()]})
+        if len(path) in (2, 3) and path[0] == 'runs':
+            run = self.pipelines.get(path[1])
+            if run is None:
+                return self._send_json(404, {'error': f"Unknown run '{path[1]}'"})
+            if len(path) == 2:
+                return self._send_json(200, run.to_dict(include_outputs=True))
+            if path[2] == 'log':
+                offset = int(query.get('offset', ['0'])[0])
+                if query.get('follow', ['0'])[0] in ('1', 'true'):
+                    return self._stream_log(run, offset)
+                lines, next_offset, _ = run.log.read(offset)
+                body = ''.join(line + '\n' for line in lines).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('X-Log-Offset', str(next_offset))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+        self._send_json(404, {'error': 'Not found'})
+
+    def _stream_log(self, run, offset):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            while True:
+                lines, offset, closed = run.log.read(offset, wait=FOLLOW_POLL_INTERVAL)
+                if lines:
+                    chunk = ''.join(line + '\n' for line in lines).encode()
+                    self.wfile.write(f'{len(chunk):x}\r\n'.encode() + chunk + b'\r\n')
+                    self.wfile.flush()
+                elif closed:
+                    break
+            self.wfile.write(b'0\r\n\r\n')
+        except (BrokenPipeError, ConnectionResetError):
+            pass # Client stopped following
+
+    def do_POST(self):
+        path, _ = self._route()
+        if path != ['runs']:
+            return self._send_json(404, {'error': 'Not found'})
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(request, dict) or not request.get('pipeline'):
+                raise ValueError("Request needs a 'pipeline' path")
+            force = request.get('force') or []
+            if not isinstance(force, (str, list)):
+                raise ValueError("'force' must be a job name or a list of job names")
+            try:
+                max_parallel = int(request.get('max_parallel', 1))
+            except TypeError:
+                raise ValueError("'max_parallel' must be a number")
+            if max_parallel < 1:
+                raise ValueError("'max_parallel' must be at least 1")
+            run = self.pipelines.submit(
+                request['pipeline'],
+                max_parallel=max_parallel,
+                force_jobs=[force] if isinstance(force, str) else force,
+                resume_run_id=request.get('resume'),
+                async_verify=bool(request.get('async_verify', False)),
+                use_cache=not request.get('no_cache', False)
+            )
+        except FileNotFoundError as e:
+            return self._send_json(404, {'error': str(e)})
+        except (ValueError, yaml.YAMLError, json.JSONDecodeError) as e:
+            # The submission itself is bad
+            return self._send_json(400, {'error': str(e)})
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            print(f"[❌] Submitting a run failed: {error}")
+            return self._send_json(500, {'error': error})
+        self._send_json(202, run.to_dict())
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ('unix', 0) # BaseHTTPRequestHandler expects a (host, port) client address
+
+def create_server(pipeline_daemon, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None):
+    if socket_path:
+        try:
+            mode = os.lstat(socket_path).st_mode
+        except FileNotFoundError:
+            mode = None
+        if mode is not None:
+            if not stat.S_ISSOCK(mode):
+                raise FileExistsError(f"{socket_path} exists and is not a socket; refusing to replace it")
+            os.unlink(socket_path) # Left behind by a previous daemon
+        server = UnixHTTPServer(socket_path, DaemonRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), DaemonRequestHandler)
+        server.daemon_threads = True
+    server.pipeline_daemon = pipeline_daemon
+    return server
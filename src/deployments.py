@@ -0,0 +1,132 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+
+from .artifacts import load_artifact
+
+# Persistent record of every deployment, shared by all runs of a project: <state_dir>/deployments.sqlite
+# next to the run logs. Deploy actions write to it and other actions read from it, so it answers
+# "latest address of X on every network" or "is this bytecode already deployed on goerli" with an
+# indexed lookup instead of a scan of run logs.
+#
+# code_hash is the sha256 of the creation data (bytecode plus encoded constructor args), so the
+# same contract deployed with different args is a different code hash. Addresses are stored lower-case.
+# Deployments to ephemeral networks are not recorded: their chains are reverted after each run.
+
+DEPLOYMENTS_DB = 'deployments.sqlite'
+BUSY_TIMEOUT = 30 # Seconds to wait for another process (e.g. a second run) holding the write lock
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS deployments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    network TEXT NOT NULL,
+    contract TEXT NOT NULL,
+    address TEXT NOT NULL,
+    code_hash TEXT,
+    tx_hash TEXT,
+    block_number INTEGER,
+    chain_id INTEGER,
+    run_id TEXT,
+    job TEXT,
+    deployed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS deployments_contract ON deployments (contract, network, id);
+CREATE INDEX IF NOT EXISTS deployments_network ON deployments (network, id);
+CREATE INDEX IF NOT EXISTS deployments_code_hash ON deployments (code_hash, network, id);
+CREATE INDEX IF NOT EXISTS deployments_address ON deployments (address);
+"""
+
+COLUMNS = ['id', 'network', 'contract', 'address', 'code_hash', 'tx_hash', 'block_number', 'chain_id', 'run_id', 'job', 'deployed_at']
+
+def default_deployments_path(state_dir):
+    return os.path.join(state_dir, DEPLOYMENTS_DB)
+
+def creation_code_hash(contract, args=(), artifacts_dir=None):
+    # None when the contract has no usable artifact, e.g. a Hardhat deploy without local artifacts.
+    # transactions pulls in eth_account, so it is only imported once a code hash is needed.
+    from .transactions import TransactionError, deploy_data
+
+    try:
+        data = deploy_data(load_artifact(contract, artifacts_dir), list(args or []))
+    except (FileNotFoundError, TransactionError, ValueError, TypeError):
+        return None
+    return hashlib.sha256(data.encode()).hexdigest()
+
+class DeploymentRegistry:
+    # One connection shared by the run's job threads. path=None keeps the registry in memory,
+    # for runs without a state directory.
+
+    def __init__(self, path=None):
+        self.path = path
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path or ':memory:', timeout=BUSY_TIMEOUT, check_same_thread=False)
+        with self._lock, self._connection:
+            if path:
+                self._connection.execute('PRAGMA journal_mode=WAL') # Readers do not block the writer
+            self._connection.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            rows = self._connection.execute(sql, params).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def record(self, network, contract, address, code_hash=None, tx_hash=None, block_number=None,
+               chain_id=None, run_id=None, job=None, deployed_at=None):
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                f"INSERT INTO deployments ({', '.join(COLUMNS[1:])}) VALUES ({', '.join('?' * (len(COLUMNS) - 1))})",
+                (network, contract, address.lower(), code_hash, tx_hash, block_number, chain_id,
+                 run_id, job, deployed_at or time.time())
+            )
+        return cursor.lastrowid
+
+    def latest(self, contract, network):
+        rows = self._query(
+            f"SELECT {', '.join(COLUMNS)} FROM deployments WHERE contract = ? AND network = ? ORDER BY id DESC LIMIT 1",
+            (contract, network)
+        )
+        return rows[0] if rows else None
+
+    def latest_by_network(self, contract):
+        # {network: latest deployment of contract there}
+        rows = self._query(
+            f"SELECT {', '.join(COLUMNS)} FROM deployments WHERE id IN "
+            "(SELECT MAX(id) FROM deployments WHERE contract = ? GROUP BY network) ORDER BY network",
+            (contract,)
+        )
+        return {row['network']: row for row in rows}
+
+    def find_code(self, code_hash, network):
+        # Latest deployment of exactly this creation code on network, or None
+        rows = self._query(
+            f"SELECT {', '.join(COLUMNS)} FROM deployments WHERE code_hash = ? AND network = ? ORDER BY id DESC LIMIT 1",
+            (code_hash, network)
+        )
+        return rows[0] if rows else None
+
+    def find_address(self, address, network=None):
+        sql = f"SELECT {', '.join(COLUMNS)} FROM deployments WHERE address = ?"
+        params = [address.lower()]
+        if network is not None:
+            sql += " AND network = ?"
+            params.append(network)
+        return self._query(sql + " ORDER BY id DESC", params)
+
+    def history(self, contract=None, network=None, limit=100):
+        clauses, params = [], []
+        if contract is not None:
+            clauses.append("contract = ?")
+            params.append(contract)
+        if network is not None:
+            clauses.append("network = ?")
+            params.append(network)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+        return self._query(f"SELECT {', '.join(COLUMNS)} FROM deployments{where} ORDER BY id DESC LIMIT ?", params + [limit])
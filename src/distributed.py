@@ -0,0 +1,510 @@
+import os
+import json
+import hmac
+import time
+import socket
+import itertools
+import threading
+import http.client
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from .artifact_store import ArtifactStore, ManifestScanner, materialize
+from .artifacts import default_artifacts_dir
+from .config import load_networks_config, networks_config_path
+from .daemon import RunLog, capture_output
+from .executor import job_context
+from .registry import ActionContext, ActionRegistry, default_plugin_dirs
+
+# Distributed runs: `run-pipeline --distributed` starts a coordinator next to the usual runner, and
+# `worker` processes (on this or other machines) pull jobs from it. The coordinator still loads the
+# pipeline, schedules the job graph and resolves ${{ }} params; instead of calling the action itself
+# it queues the job and waits until a worker reports the output.
+#
+# Workers run the same actions against their own checkout of the project: networks.json, .env
+# secrets and plugin actions are read locally, never sent over the wire. Compiled artifacts move
+# through a content-addressed blob store (see artifact_store.py). After a job changes the worker's
+# artifacts directory, the worker uploads the blobs the coordinator is missing and reports the tree's
+# manifest; before each job, workers bring their artifacts directory in line with the latest manifest.
+#
+# Deployment registry lookups and records made on a worker are forwarded to the coordinator's registry.
+# Jobs on ephemeral networks run on the coordinator, since their chains live in its process.
+#
+# HTTP API of the coordinator (JSON bodies):
+#   POST /workers                      {"name", "capacity"} -> {"worker_id"}
+#   POST /lease                        {"worker_id", "wait"} -> 200 job, or 204 when none arrived in time
+#   POST /jobs/<id>/heartbeat
+#   POST /jobs/<id>/result             {"output", "log", "deployed_contracts", "artifacts"}
+#   POST /jobs/<id>/deployments        {"method", "args", "kwargs"} -> {"result"}
+#   POST /blobs/missing                {"digests"} -> {"missing"}
+#   GET|PUT /blobs/<sha256>
+#   GET  /health
+# With WEB3_DEVOPS_CLUSTER_TOKEN set, both sides send and require it as a bearer token.
+
+DEFAULT_COORDINATOR_PORT = 8788
+TOKEN_ENV = 'WEB3_DEVOPS_CLUSTER_TOKEN'
+LEASE_WAIT = 10 # Seconds a worker's lease request waits for a job before asking again
+HEARTBEAT_INTERVAL = 5
+LEASE_TIMEOUT = 30 # A job whose worker has not sent a heartbeat for this long fails
+WORKER_WAIT = 300 # A job that no worker has leased for this long (or for its own timeout, if shorter) fails
+RECONNECT_DELAY = 2
+DEPLOYMENT_METHODS = {'record', 'latest', 'latest_by_network', 'find_code', 'find_address', 'history'}
+
+class RemoteJob:
+    def __init__(self, job_id, payload, context):
+        self.id = job_id
+        self.payload = payload
+        self.context = context
+        self.worker = None
+        self.heartbeat_at = None
+        self.result = None
+        self.done = threading.Event()
+
+class Coordinator:
+    def __init__(self, host='127.0.0.1', port=DEFAULT_COORDINATOR_PORT, store=None, lease_timeout=LEASE_TIMEOUT, token=None,
+                 worker_wait=WORKER_WAIT):
+        self.store = store or ArtifactStore()
+        self.lease_timeout = lease_timeout
+        self.worker_wait = worker_wait # None waits for a worker indefinitely
+        self.token = token if token is not None else os.environ.get(TOKEN_ENV)
+        self.manifest = {} # Artifacts tree most recently reported by a worker
+        self.workers = {} # worker_id -> {'name', 'capacity', 'last_seen'}
+        self.completed = {} # job name -> name of the worker that ran it
+        self._pending = deque()
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._condition = threading.Condition()
+        self._scanner = ManifestScanner()
+        self._sync_lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), CoordinatorRequestHandler)
+        self.server.daemon_threads = True
+        self.server.coordinator = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name='coordinator', daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        if self._thread is not None:
+            self.server.shutdown()
+            self._thread = None
+        self.server.server_close()
+        with self._condition:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            self._finish(job, {'output': {'status': 'failure', 'error': 'Coordinator shut down'}})
+
+    def register(self, name, capacity):
+        worker_id = f'w{next(self._ids)}'
+        with self._condition:
+            self.workers[worker_id] = {'name': name or worker_id, 'capacity': capacity, 'last_seen': time.time()}
+        return worker_id
+
+    def dispatch(self, uses, params, context, timeout=None):
+        # Runs the job on a worker and returns its output; blocks the calling job thread until then
+        payload = {
+            'job': context.job_name, 'uses': uses, 'params': params, 'timeout': timeout,
+            'pipeline': context.pipeline_path, 'run_id': context.run_id, 'use_cache': context.use_cache,
+            'deployed_contracts': dict(context.deployed_contracts),
+        }
+        with self._condition:
+            job = RemoteJob(str(next(self._ids)), payload, context)
+            self._jobs[job.id] = job
+            self._pending.append(job)
+            self._condition.notify_all()
+        if not self.workers:
+            print("  [⏳] Waiting for a worker to connect...")
+        waits = [wait for wait in (timeout, self.worker_wait) if wait is not None]
+        unleased_deadline = time.monotonic() + min(waits) if waits else None
+        interval = min(HEARTBEAT_INTERVAL, self.lease_timeout, *waits)
+        while not job.done.wait(interval):
+            with self._condition:
+                now = time.monotonic()
+                if job.worker is None:
+                    if unleased_deadline is not None and now >= unleased_deadline:
+                        # Still queued, so no worker can be running it; the check and removal are atomic with lease()
+                        error = f"No worker picked up the job within {min(waits):g}s"
+                        print(f"  [❌] {error}")
+                        self._finish(job, {'output': {'status': 'failure', 'error': error}})
+                    continue
+                expired = job.heartbeat_at is not None and now - job.heartbeat_at > self.lease_timeout
+            if expired:
+                name = self.workers[job.worker]['name']
+                self._finish(job, {'output': {'status': 'failure', 'error': f"Worker '{name}' stopped responding"}})
+
+        result = job.result
+        for line in result.get('log') or []:
+            print(line)
+        if job.worker is not None:
+            print(f"  [🖥️] Ran on worker '{self.workers[job.worker]['name']}'")
+            self.completed[context.job_name] = self.workers[job.worker]['name']
+        context.deployed_contracts.update(result.get('deployed_contracts') or {})
+        return result.get('output')
+
+    def _finish(self, job, result):
+        with self._condition:
+            if job.done.is_set():
+                return False # A late result after the job already failed, or the reverse
+            job.result = result
+            self._jobs.pop(job.id, None)
+            if job in self._pending:
+                self._pending.remove(job)
+            job.done.set()
+            return True
+
+    def lease(self, worker_id, wait):
+        deadline = time.monotonic() + wait
+        with self._condition:
+            if worker_id not in self.workers:
+                raise KeyError(worker_id)
+            self.workers[worker_id]['last_seen'] = time.time()
+            while not self._pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+            job = self._pending.popleft()
+            job.worker = worker_id
+            job.heartbeat_at = time.monotonic()
+            return dict(job.payload, id=job.id, artifacts=self.manifest)
+
+    def _job(self, job_id, worker_id=None):
+        with self._condition:
+            job = self._jobs.get(job_id)
+        if job is None or (worker_id is not None and job.worker != worker_id):
+            raise KeyError(job_id)
+        return job
+
+    def heartbeat(self, job_id):
+        job = self._job(job_id)
+        with self._condition:
+            job.heartbeat_at = time.monotonic()
+
+    def complete(self, job_id, worker_id, result):
+        job = self._job(job_id, worker_id)
+        artifacts = result.get('artifacts')
+        if artifacts is not None:
+            missing = self.store.missing(artifacts.values())
+            if missing:
+                raise ValueError(f"Artifacts reference {len(missing)} blob(s) that were not uploaded")
+            with self._condition:
+                self.manifest = artifacts
+        self._finish(job, result)
+
+    def deployments_call(self, job_id, method, args, kwargs):
+        if method not in DEPLOYMENT_METHODS:
+            raise ValueError(f"Unknown deployment registry method '{method}'")
+        deployments = self._job(job_id).context.deployments
+        if deployments is None:
+            return None
+        return getattr(deployments, method)(*args, **kwargs)
+
+    def sync_artifacts(self, directory=None):
+        # Jobs that run on the coordinator itself see the artifacts the workers produced
+        with self._condition:
+            manifest = self.manifest
+        if manifest:
+            directory = directory or default_artifacts_dir()
+            with self._sync_lock:
+                materialize(manifest, directory, self.store.get, current=self._scanner.manifest(directory))
+
+    def authorized(self, header):
+        return not self.token or hmac.compare_digest(header or '', f'Bearer {self.token}')
+
+class CoordinatorRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    @property
+    def coordinator(self):
+        return self.server.coordinator
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b'', content_type='application/json'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, data):
+        self._send(status, json.dumps(data, default=str).encode())
+
+    def _body(self):
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def _path(self):
+        return [part for part in urlsplit(self.path).path.split('/') if part]
+
+    def _handle(self, method):
+        body = self._body()
+        if not self.coordinator.authorized(self.headers.get('Authorization')):
+            return self._send_json(401, {'error': 'Missing or invalid cluster token'})
+        path = self._path()
+        try:
+            if method == 'GET' and path == ['health']:
+                return self._send_json(200, {'status': 'ok', 'workers': len(self.coordinator.workers)})
+            if len(path) == 2 and path[0] == 'blobs' and path[1] != 'missing':
+                if method == 'GET':
+                    return self._send(200, self.coordinator.store.get(path[1]), 'application/octet-stream')
+                if method == 'PUT':
+                    self.coordinator.store.put(body, path[1])
+                    return self._send_json(201, {'digest': path[1]})
+            if method != 'POST':
+                return self._send_json(404, {'error': 'Not found'})
+            request = json.loads(body or b'{}')
+            if path == ['workers']:
+                return self._send_json(200, {'worker_id': self.coordinator.register(request.get('name'), int(request.get('capacity', 1)))})
+            if path == ['lease']:
+                job = self.coordinator.lease(request.get('worker_id'), min(float(request.get('wait', LEASE_WAIT)), 60))
+                return self._send_json(200, job) if job is not None else self._send(204)
+            if path == ['blobs', 'missing']:
+                return self._send_json(200, {'missing': self.coordinator.store.missing(request.get('digests') or [])})
+            if len(path) == 3 and path[0] == 'jobs':
+                if path[2] == 'heartbeat':
+                    self.coordinator.heartbeat(path[1])
+                    return self._send_json(200, {})
+                if path[2] == 'result':
+                    self.coordinator.complete(path[1], request.get('worker_id'), request)
+                    return self._send_json(200, {})
+                if path[2] == 'deployments':
+                    result = self.coordinator.deployments_call(path[1], request.get('method'), request.get('args') or [], request.get('kwargs') or {})
+                    return self._send_json(200, {'result': result})
+            self._send_json(404, {'error': 'Not found'})
+        except (KeyError, FileNotFoundError) as e:
+            self._send_json(404, {'error': f'Unknown {e}'})
+        except (ValueError, TypeError) as e:
+            self._send_json(400, {'error': str(e)})
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+    def do_POST(self):
+        self._handle('POST')
+
+class CoordinatorError(Exception):
+    pass
+
+class CoordinatorClient:
+    def __init__(self, url, token=None, timeout=LEASE_WAIT + 30):
+        parts = urlsplit(url)
+        if parts.scheme != 'http':
+            raise ValueError(f"Unsupported coordinator URL: {url}")
+        self.url = url
+        self.token = token if token is not None else os.environ.get(TOKEN_ENV)
+        self._host, self._port = parts.hostname, parts.port
+        self.timeout = timeout
+
+    def request(self, method, path, body=None, content_type='application/json'):
+        # Returns (status, response bytes); raises CoordinatorError for error responses
+        headers = {'Content-Type': content_type}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        connection = http.client.HTTPConnection(self._host, self._port, timeout=self.timeout)
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+        finally:
+            connection.close()
+        if response.status >= 400:
+            try:
+                message = json.loads(data).get('error')
+            except (ValueError, AttributeError):
+                message = data.decode(errors='replace')
+            raise CoordinatorError(f"{method} {path} failed with HTTP {response.status}: {message}")
+        return response.status, data
+
+    def json(self, method, path, body=None):
+        status, data = self.request(method, path, json.dumps(body or {}).encode())
+        return json.loads(data) if status != 204 else None
+
+class RemoteDeploymentRegistry:
+    # Stands in for the coordinator's DeploymentRegistry inside a job running on a worker
+
+    def __init__(self, client, job_id):
+        self._client = client
+        self._job_id = job_id
+
+    def _call(self, method, *args, **kwargs):
+        return self._client.json('POST', f'/jobs/{self._job_id}/deployments', {'method': method, 'args': args, 'kwargs': kwargs})['result']
+
+    def record(self, *args, **kwargs):
+        return self._call('record', *args, **kwargs)
+
+    def latest(self, contract, network):
+        return self._call('latest', contract, network)
+
+    def latest_by_network(self, contract):
+        return self._call('latest_by_network', contract)
+
+    def find_code(self, code_hash, network):
+        return self._call('find_code', code_hash, network)
+
+    def find_address(self, address, network=None):
+        return self._call('find_address', address, network)
+
+    def history(self, contract=None, network=None, limit=100):
+        return self._call('history', contract, network, limit)
+
+class Worker:
+    def __init__(self, coordinator_url, pipeline_path=None, capacity=1, artifacts_dir=None, name=None,
+                 plugin_dirs=None, token=None, store=None, lease_wait=LEASE_WAIT):
+        self.client = CoordinatorClient(coordinator_url, token=token)
+        self.pipeline_path = os.path.abspath(pipeline_path) if pipeline_path else None # Local checkout; default: the coordinator's path
+        self.capacity = capacity
+        self.artifacts_dir = artifacts_dir
+        self.name = name or f'{socket.gethostname()}-{os.getpid()}'
+        self.plugin_dirs = plugin_dirs
+        self.store = store or ArtifactStore()
+        self.lease_wait = lease_wait
+        self.worker_id = None
+        self.jobs_run = 0
+        self._registries = {}
+        self._scanner = ManifestScanner()
+        self._artifacts_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        self.worker_id = self.client.json('POST', '/workers', {'name': self.name, 'capacity': self.capacity})['worker_id']
+        for index in range(self.capacity):
+            thread = threading.Thread(target=self._loop, name=f'worker-{index + 1}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, wait=True):
+        self._stop.set()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def wait(self):
+        while any(thread.is_alive() for thread in self._threads):
+            for thread in self._threads:
+                thread.join(1)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                job = self.client.json('POST', '/lease', {'worker_id': self.worker_id, 'wait': self.lease_wait})
+            except CoordinatorError as e:
+                if 'HTTP 404' in str(e):
+                    # The coordinator restarted and forgot this worker
+                    self._reregister()
+                else:
+                    print(f"[worker] {e}")
+                    self._stop.wait(RECONNECT_DELAY)
+                continue
+            except (OSError, http.client.HTTPException):
+                self._stop.wait(RECONNECT_DELAY) # Coordinator not up (yet)
+                continue
+            if job is not None:
+                self._run(job)
+
+    def _reregister(self):
+        try:
+            self.worker_id = self.client.json('POST', '/workers', {'name': self.name, 'capacity': self.capacity})['worker_id']
+        except (CoordinatorError, OSError, http.client.HTTPException):
+            self._stop.wait(RECONNECT_DELAY)
+
+    def _registry(self, pipeline_path):
+        dirs = tuple(self.plugin_dirs if self.plugin_dirs is not None else default_plugin_dirs(pipeline_path))
+        if dirs not in self._registries:
+            self._registries[dirs] = ActionRegistry(dirs)
+        return self._registries[dirs]
+
+    def _heartbeat(self, job_id, done):
+        while not done.wait(HEARTBEAT_INTERVAL):
+            try:
+                self.client.json('POST', f'/jobs/{job_id}/heartbeat')
+            except (CoordinatorError, OSError, http.client.HTTPException):
+                pass
+
+    def _run(self, job):
+        print(f"[worker] Running {job['job']} ({job['uses']})")
+        done = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(job['id'], done), daemon=True).start()
+        try:
+            result = self._execute(job)
+            self._upload(result.get('artifacts'))
+            self.client.json('POST', f"/jobs/{job['id']}/result", dict(result, worker_id=self.worker_id))
+            self.jobs_run += 1
+        except (CoordinatorError, OSError, http.client.HTTPException) as e:
+            print(f"[worker] Could not report {job['job']}: {e}")
+        finally:
+            done.set()
+
+    def _execute(self, job):
+        artifacts_dir = self.artifacts_dir or default_artifacts_dir()
+        pipeline_path = self.pipeline_path or job['pipeline']
+        with self._artifacts_lock:
+            current = self._scanner.manifest(artifacts_dir)
+            if job.get('artifacts') and job['artifacts'] != current:
+                materialize(job['artifacts'], artifacts_dir, self._fetch, current=current)
+                current = self._scanner.manifest(artifacts_dir)
+
+        log = RunLog()
+        context = None
+        with capture_output(log):
+            try:
+                try:
+                    networks_config = load_networks_config(networks_config_path(pipeline_path))
+                except FileNotFoundError:
+                    networks_config = {}
+                registry = self._registry(pipeline_path)
+                params = dict(job['params'])
+                if self.artifacts_dir and 'artifacts_dir' in (registry.params_schema(job['uses']) or {}):
+                    params.setdefault('artifacts_dir', self.artifacts_dir)
+                context = ActionContext(
+                    job['job'], pipeline_path, dict(job.get('deployed_contracts') or {}), networks_config,
+                    use_cache=job.get('use_cache', True), deployments=RemoteDeploymentRegistry(self.client, job['id']),
+                    run_id=job.get('run_id')
+                )
+                with job_context(job['job'], timeout=job.get('timeout')):
+                    output = registry.get(job['uses']).run(params, context)
+            except Exception as e:
+                print(f"  [❌] {type(e).__name__}: {e}")
+                output = {'status': 'failure', 'error': str(e)}
+        log.close()
+
+        with self._artifacts_lock:
+            after = self._scanner.manifest(artifacts_dir)
+        lines, _, _ = log.read()
+        return {
+            'output': output,
+            'log': lines,
+            'deployed_contracts': context.deployed_contracts if context is not None else {},
+            'artifacts': after if after != current else None,
+        }
+
+    def _fetch(self, digest):
+        if self.store.has(digest):
+            return self.store.get(digest)
+        _, data = self.client.request('GET', f'/blobs/{digest}')
+        self.store.put(data, digest)
+        return data
+
+    def _upload(self, manifest):
+        if not manifest:
+            return
+        artifacts_dir = self.artifacts_dir or default_artifacts_dir()
+        paths = {digest: relative for relative, digest in manifest.items()}
+        missing = self.client.json('POST', '/blobs/missing', {'digests': sorted(paths)})['missing']
+        for digest in missing:
+            with open(os.path.join(artifacts_dir, *paths[digest].split('/')), 'rb') as f:
+                data = f.read()
+            self.client.request('PUT', f'/blobs/{digest}', data, content_type='application/octet-stream')
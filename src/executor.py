@@ -0,0 +1,170 @@
+import os
+import re
+import time
+import signal
+import asyncio
+import contextvars
+import subprocess
+from collections import deque
+from contextlib import contextmanager
+
+from .tracing import span
+
+# Runs the Hardhat CLI for the actions: output is read line by line while the process runs,
+# forwarded live with the job's name as prefix, scanned for structured events, and only the
+# last TAIL_LINES lines per stream are kept for error messages.
+
+TAIL_LINES = 200
+LINE_LIMIT = 4 * 1024 * 1024 # asyncio's default 64 KiB line limit is too small for some solc errors
+POLL_INTERVAL = 0.1
+
+# (event type, pattern, fields) - fields name the pattern's groups in order
+EVENT_PATTERNS = [
+    ('deployed', re.compile(r'(\w+) deployed to (0x[a-fA-F0-9]{40})'), ('contract', 'address')),
+    ('transaction', re.compile(r'\b(?:deployment )?(?:transaction|tx)(?: hash)?:?\s+(0x[a-fA-F0-9]{64})\b', re.IGNORECASE), ('tx_hash',)),
+    ('gas_used', re.compile(r'\bgas used:?\s+(\d+)', re.IGNORECASE), ('gas_used',)),
+]
+
+class ProcessInterrupted(Exception):
+    # The process was killed because the job timed out or was cancelled
+    pass
+
+class StreamResult:
+    def __init__(self, returncode, stdout, stderr, events, stdout_bytes=0, stderr_bytes=0):
+        self.returncode = returncode
+        self.stdout = stdout # Last TAIL_LINES lines only
+        self.stderr = stderr
+        self.events = events
+        self.stdout_bytes = stdout_bytes
+        self.stderr_bytes = stderr_bytes
+
+    def first(self, event_type, **match):
+        for event in self.events:
+            if event['type'] == event_type and all(event.get(key) == value for key, value in match.items()):
+                return event
+        return None
+
+class JobContext:
+    def __init__(self, name, timeout=None, cancel_event=None):
+        self.name = name
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.cancel_event = cancel_event
+
+_job_context = contextvars.ContextVar('job_context', default=None)
+
+@contextmanager
+def job_context(name, timeout=None, cancel_event=None):
+    # Every run_streaming() call inside the block is prefixed with the job name and killed when
+    # the job's timeout passes or cancel_event is set
+    token = _job_context.set(JobContext(name, timeout, cancel_event))
+    try:
+        yield
+    finally:
+        _job_context.reset(token)
+
+def parse_timeout(job, name):
+    # Job-level `timeout-minutes`, as in GitHub Actions. Returns seconds or None.
+    minutes = job.get('timeout-minutes')
+    if minutes is None:
+        return None
+    if isinstance(minutes, bool) or not isinstance(minutes, (int, float)) or minutes <= 0:
+        raise ValueError(f"Job '{name}': timeout-minutes must be a positive number, got {minutes!r}")
+    return minutes * 60
+
+def extract_events(line):
+    events = []
+    for event_type, pattern, fields in EVENT_PATTERNS:
+        for match in pattern.finditer(line):
+            event = {'type': event_type}
+            event.update(zip(fields, match.groups()))
+            if event_type == 'gas_used':
+                event['gas_used'] = int(event['gas_used'])
+            events.append(event)
+    return events
+
+async def _read_lines(stream, tail, counter, on_line):
+    while True:
+        try:
+            line = await stream.readline()
+        except ValueError:
+            # Longer than LINE_LIMIT: asyncio discards it, note that and keep reading
+            tail.append('<line too long, skipped>')
+            continue
+        if not line:
+            return
+        counter[0] += len(line)
+        text = line.decode(errors='replace').rstrip('\r\n')
+        tail.append(text)
+        on_line(text)
+
+def _kill_group(process):
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        process.kill()
+
+async def _run(command, cwd, env, prefix, echo, timeout, job, process_span):
+    deadline = time.monotonic() + timeout if timeout else None
+    if job is not None and job.deadline is not None:
+        deadline = job.deadline if deadline is None else min(deadline, job.deadline)
+    cancel_event = job.cancel_event if job is not None else None
+
+    started = time.monotonic()
+    process = await asyncio.create_subprocess_exec(
+        *command, cwd=cwd, env=env,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        limit=LINE_LIMIT,
+        start_new_session=True # npx forks node; killing the group stops both
+    )
+    process_span.set(spawn_ms=(time.monotonic() - started) * 1000, pid=process.pid)
+
+    events = []
+    first_output = []
+    def on_line(text):
+        if not first_output:
+            first_output.append(time.monotonic())
+        if echo:
+            print(f"  [{prefix}] {text}")
+        events.extend(extract_events(text))
+
+    stdout_tail, stderr_tail = deque(maxlen=TAIL_LINES), deque(maxlen=TAIL_LINES)
+    stdout_bytes, stderr_bytes = [0], [0]
+    finished = asyncio.ensure_future(asyncio.gather(
+        _read_lines(process.stdout, stdout_tail, stdout_bytes, on_line),
+        _read_lines(process.stderr, stderr_tail, stderr_bytes, on_line),
+        process.wait()
+    ))
+
+    reason = None
+    while not finished.done():
+        await asyncio.wait({finished}, timeout=POLL_INTERVAL)
+        if finished.done():
+            break
+        if cancel_event is not None and cancel_event.is_set():
+            reason = f"Cancelled: {' '.join(command)}"
+        elif deadline is not None and time.monotonic() >= deadline:
+            reason = f"Timed out: {' '.join(command)}"
+        if reason:
+            _kill_group(process)
+            await finished
+
+    if first_output:
+        process_span.set(first_output_ms=(first_output[0] - started) * 1000)
+    process_span.set(stdout_bytes=stdout_bytes[0], stderr_bytes=stderr_bytes[0], returncode=process.returncode)
+    if reason:
+        raise ProcessInterrupted(reason)
+    return StreamResult(
+        process.returncode, '\n'.join(stdout_tail), '\n'.join(stderr_tail), events,
+        stdout_bytes=stdout_bytes[0], stderr_bytes=stderr_bytes[0]
+    )
+
+def run_streaming(command, cwd=None, env=None, timeout=None, prefix=None, echo=True, name='subprocess'):
+    # Like subprocess.run(..., check=True), but streaming: raises CalledProcessError on a non-zero
+    # exit, FileNotFoundError when the executable is missing and ProcessInterrupted on timeout/cancel
+    job = _job_context.get()
+    prefix = prefix or (job.name if job is not None else command[0])
+    with span(name, 'subprocess', command=' '.join(command)) as process_span:
+        result = asyncio.run(_run(command, cwd, env, prefix, echo, timeout, job, process_span))
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode, command, output=result.stdout, stderr=result.stderr)
+    return result
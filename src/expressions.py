@@ -0,0 +1,146 @@
+import os
+import re
+
+# ${{ ... }} templating for job parameters. Every template is compiled once, when the pipeline is
+# loaded, into a tree of accessors; resolving a job's params then only walks that tree.
+#
+# Supported expressions:
+#   ${{ jobs.<job name>.output.<key>[.<nested key>...] }}
+#   ${{ env.<NAME> }}
+#   ${{ matrix.<key> }}
+# A string that is exactly one expression resolves to the raw value (dict, list, number, ...);
+# expressions embedded in a longer string are interpolated as text.
+
+EXPRESSION_PATTERN = re.compile(r'\$\{\{\s*(.*?)\s*\}\}')
+
+class ExpressionError(ValueError):
+    pass
+
+class ResolveContext:
+    def __init__(self, job_outputs, env=None, matrix=None):
+        self.job_outputs = job_outputs
+        self.env = os.environ if env is None else env
+        self.matrix = matrix or {}
+
+_MISSING = object()
+
+def _lookup(value, path):
+    for key in path:
+        if isinstance(value, dict) and key in value:
+            value = value[key]
+        elif isinstance(value, list) and key.isdigit() and int(key) < len(value):
+            value = value[int(key)]
+        else:
+            return _MISSING
+    return value
+
+class Reference:
+    def __init__(self, source, scope, name, path):
+        self.source = source
+        self.scope = scope
+        self.name = name # job name, env variable or matrix key
+        self.path = path # output key path below jobs.<name>.output
+
+    def resolve(self, context):
+        if self.scope == 'jobs':
+            outputs = context.job_outputs.get(self.name)
+            value = _MISSING if outputs is None else _lookup(outputs, self.path)
+        elif self.scope == 'env':
+            value = context.env.get(self.name, _MISSING)
+        else:
+            value = _lookup(context.matrix, [self.name] + self.path)
+        if value is _MISSING:
+            print(f"  [⚠️] Warning: Could not resolve dynamic parameter '${{{{ {self.source} }}}}'. Value not found.")
+            return None
+        return value
+
+def parse_expression(source):
+    scope, _, rest = source.partition('.')
+    if scope == 'jobs':
+        # Job names may contain spaces and dots, so split on the '.output.' marker
+        name, marker, key_path = rest.partition('.output.')
+        if not marker or not name or not key_path:
+            raise ExpressionError(f"Invalid job reference '${{{{ {source} }}}}', expected jobs.<job>.output.<key>")
+        return Reference(source, 'jobs', name, key_path.split('.'))
+    if scope in ('env', 'matrix'):
+        parts = rest.split('.') if rest else []
+        if not parts or not parts[0]:
+            raise ExpressionError(f"Invalid expression '${{{{ {source} }}}}', expected {scope}.<name>")
+        return Reference(source, scope, parts[0], parts[1:])
+    raise ExpressionError(f"Unsupported expression '${{{{ {source} }}}}' (expected jobs., env. or matrix.)")
+
+class Constant:
+    references = frozenset()
+    def __init__(self, value):
+        self.value = value
+    def resolve(self, context):
+        return self.value
+
+class Single:
+    def __init__(self, reference):
+        self.reference = reference
+        self.references = frozenset([reference])
+    def resolve(self, context):
+        return self.reference.resolve(context)
+
+class Interpolated:
+    def __init__(self, parts):
+        self.parts = parts # str literals and References
+        self.references = frozenset(part for part in parts if isinstance(part, Reference))
+    def resolve(self, context):
+        pieces = []
+        for part in self.parts:
+            if isinstance(part, Reference):
+                value = part.resolve(context)
+                pieces.append('' if value is None else str(value))
+            else:
+                pieces.append(part)
+        return ''.join(pieces)
+
+class Mapping:
+    def __init__(self, items):
+        self.items = items
+        self.references = frozenset().union(*(template.references for _, template in items))
+    def resolve(self, context):
+        return {key: template.resolve(context) for key, template in self.items}
+
+class Sequence:
+    def __init__(self, items):
+        self.items = items
+        self.references = frozenset().union(*(template.references for template in items))
+    def resolve(self, context):
+        return [template.resolve(context) for template in self.items]
+
+def _compile_string(value):
+    matches = list(EXPRESSION_PATTERN.finditer(value))
+    if not matches:
+        return Constant(value)
+    if len(matches) == 1 and matches[0].span() == (0, len(value)):
+        return Single(parse_expression(matches[0].group(1)))
+    parts, position = [], 0
+    for match in matches:
+        if match.start() > position:
+            parts.append(value[position:match.start()])
+        parts.append(parse_expression(match.group(1)))
+        position = match.end()
+    if position < len(value):
+        parts.append(value[position:])
+    return Interpolated(parts)
+
+def compile_template(value):
+    if isinstance(value, str):
+        return _compile_string(value)
+    if isinstance(value, dict):
+        items = [(key, compile_template(item)) for key, item in value.items()]
+        if all(isinstance(template, Constant) for _, template in items):
+            return Constant(value)
+        return Mapping(items)
+    if isinstance(value, list):
+        items = [compile_template(item) for item in value]
+        if all(isinstance(template, Constant) for template in items):
+            return Constant(value)
+        return Sequence(items)
+    return Constant(value)
+
+def job_references(template):
+    return {reference.name for reference in template.references if reference.scope == 'jobs'}
@@ -0,0 +1,147 @@
+import os
+import json
+import time
+import queue
+import subprocess
+import threading
+import itertools
+
+from .project import CONTRACTS_DIR, clean_env
+from .tracing import span
+
+# Hardhat binds a process to one network, so the pool keeps one worker per network.
+# Compilation does not touch a network and runs on the in-process "hardhat" network worker.
+COMPILE_NETWORK = 'hardhat'
+DEFAULT_STARTUP_TIMEOUT = 120
+DEFAULT_CALL_TIMEOUT = 600
+
+class HardhatWorkerError(Exception):
+    pass
+
+class HardhatWorker:
+    def __init__(self, network, cwd, env=None, command=None):
+        self.network = network
+        self.cwd = cwd
+        self.env = env
+        self.command = command or ["npx", "hardhat", "run", "--no-compile", "scripts/worker.js", "--network", network]
+        self._process = None
+        self._lines = queue.Queue()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    @property
+    def running(self):
+        return self._process is not None and self._process.poll() is None
+
+    def start(self, timeout=DEFAULT_STARTUP_TIMEOUT):
+        if self.running:
+            return
+        self._lines = queue.Queue()
+        with span('worker.start', 'subprocess', network=self.network, command=' '.join(self.command)) as start_span:
+            spawn_started = time.monotonic()
+            self._process = subprocess.Popen(
+                self.command,
+                cwd=self.cwd,
+                env=self.env,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                text=True,
+                bufsize=1
+            )
+            start_span.set(spawn_ms=(time.monotonic() - spawn_started) * 1000)
+            threading.Thread(target=self._read_stdout, args=(self._process, self._lines), daemon=True).start()
+            message = None
+            while message is None:
+                message = self._next_message(timeout)
+        if message.get('method') != 'ready':
+            self.close()
+            raise HardhatWorkerError(f"Unexpected first message from Hardhat worker: {message}")
+
+    def _read_stdout(self, process, lines):
+        for line in process.stdout:
+            lines.put(line)
+        lines.put(None)  # EOF
+
+    def _next_message(self, timeout):
+        try:
+            line = self._lines.get(timeout=timeout)
+        except queue.Empty:
+            raise HardhatWorkerError(f"Hardhat worker for '{self.network}' did not respond within {timeout}s")
+        if line is None:
+            raise HardhatWorkerError(f"Hardhat worker for '{self.network}' exited unexpectedly")
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError:
+            message = None
+        if not isinstance(message, dict) or message.get('jsonrpc') != '2.0':
+            # Output written before worker.js redirected console.log, or by plugins writing to stdout directly
+            print(f"  [hardhat:{self.network}] {line.rstrip()}")
+            return None
+        return message
+
+    def call(self, method, params=None, timeout=DEFAULT_CALL_TIMEOUT):
+        with span(f'worker {method}', 'worker', network=self.network):
+            return self._call(method, params, timeout)
+
+    def _call(self, method, params, timeout):
+        with self._lock:
+            if not self.running:
+                self.start()
+            request_id = next(self._ids)
+            request = {'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params or {}}
+            try:
+                self._process.stdin.write(json.dumps(request) + "\n")
+                self._process.stdin.flush()
+            except (BrokenPipeError, OSError) as e:
+                raise HardhatWorkerError(f"Could not send request to Hardhat worker: {e}")
+
+            while True:
+                message = self._next_message(timeout)
+                if message is not None and message.get('id') == request_id:
+                    break
+
+        if 'error' in message:
+            raise HardhatWorkerError(message['error'].get('message', 'Unknown Hardhat worker error'))
+        return message.get('result', {})
+
+    def close(self, timeout=10):
+        process, self._process = self._process, None
+        if process is None:
+            return
+        if process.poll() is None:
+            try:
+                process.stdin.write(json.dumps({'jsonrpc': '2.0', 'id': 0, 'method': 'shutdown'}) + "\n")
+                process.stdin.flush()
+                process.wait(timeout=timeout)
+            except (OSError, subprocess.TimeoutExpired):
+                process.kill()
+                process.wait()
+
+class HardhatWorkerPool:
+    def __init__(self, cwd=CONTRACTS_DIR, env=None, command_factory=None):
+        self.cwd = cwd
+        self.env = env if env is not None else clean_env(os.environ.copy())
+        self.command_factory = command_factory
+        self._workers = {}
+        self._lock = threading.Lock()
+
+    def get(self, network=COMPILE_NETWORK):
+        with self._lock:
+            worker = self._workers.get(network)
+            if worker is None:
+                command = self.command_factory(network) if self.command_factory else None
+                worker = HardhatWorker(network, cwd=self.cwd, env=self.env, command=command)
+                self._workers[network] = worker
+        return worker
+
+    def close(self):
+        with self._lock:
+            workers, self._workers = list(self._workers.values()), {}
+        for worker in workers:
+            worker.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,92 @@
+import itertools
+
+# strategy.matrix support: one job definition fans out into an instance per combination of matrix
+# values, e.g.
+#
+#   strategy:
+#     matrix:
+#       network: [goerli, sepolia]
+#       contract: [Token, Vault]
+#       exclude:
+#         - {network: goerli, contract: Vault}
+#     max-parallel: 4
+#     fail-fast: true
+
+class Strategy:
+    def __init__(self, matrix, max_parallel=None, fail_fast=True):
+        self.matrix = matrix # Raw matrix block; may contain ${{ }} expressions resolved at run time
+        self.max_parallel = max_parallel
+        self.fail_fast = fail_fast
+
+def parse_strategy(job, name):
+    # Returns a Strategy for jobs with a strategy.matrix block, None otherwise.
+    # Raises ValueError for malformed blocks so they fail when the pipeline is loaded.
+    strategy = job.get('strategy')
+    if strategy is None:
+        return None
+    if not isinstance(strategy, dict) or not isinstance(strategy.get('matrix'), (dict, str)):
+        raise ValueError(f"Job '{name}': strategy needs a 'matrix' mapping")
+    max_parallel = strategy.get('max-parallel')
+    if max_parallel is not None and (isinstance(max_parallel, bool) or not isinstance(max_parallel, int) or max_parallel < 1):
+        raise ValueError(f"Job '{name}': strategy max-parallel must be a positive integer, got {max_parallel!r}")
+    fail_fast = strategy.get('fail-fast', True)
+    if not isinstance(fail_fast, bool):
+        raise ValueError(f"Job '{name}': strategy fail-fast must be true or false, got {fail_fast!r}")
+    return Strategy(strategy['matrix'], max_parallel, fail_fast)
+
+def matrix_axes(matrix):
+    return [key for key in matrix if key not in ('include', 'exclude')]
+
+def _matches(combination, pattern):
+    return all(key in combination and combination[key] == value for key, value in pattern.items())
+
+def expand_matrix(matrix):
+    # Cartesian product of the axes, minus `exclude` patterns, plus `include` entries. An include entry
+    # that matches existing combinations on their axis values adds its extra keys to them; otherwise
+    # it becomes a combination of its own.
+    if not isinstance(matrix, dict):
+        raise ValueError(f"Matrix must be a mapping, got {matrix!r}")
+    axes = matrix_axes(matrix)
+    values = []
+    for axis in axes:
+        axis_values = matrix[axis]
+        if not isinstance(axis_values, list):
+            axis_values = [axis_values]
+        values.append(axis_values)
+    combinations = [dict(zip(axes, product)) for product in itertools.product(*values)] if axes else []
+
+    for pattern in matrix.get('exclude') or []:
+        combinations = [combination for combination in combinations if not _matches(combination, pattern)]
+
+    for entry in matrix.get('include') or []:
+        axis_values = {key: value for key, value in entry.items() if key in axes}
+        extended = False
+        if axis_values:
+            for combination in combinations:
+                if _matches(combination, axis_values):
+                    combination.update(entry)
+                    extended = True
+        if not extended:
+            combinations.append(dict(entry))
+
+    if not combinations:
+        raise ValueError("Matrix expands to no combinations")
+    return combinations
+
+def instance_name(job_name, combination):
+    return f"{job_name} ({', '.join(f'{key}={value}' for key, value in combination.items())})"
+
+def aggregate_outputs(axes, instances):
+    # Fan-in: instances is [(combination, output)]. Every output key becomes a map nested by the
+    # matrix axis values, e.g. {'address': {'goerli': '0x..', 'sepolia': '0x..'}} for a network axis.
+    aggregated = {}
+    for combination, output in instances:
+        path = [str(combination[axis]) for axis in axes if axis in combination]
+        for key, value in (output or {}).items():
+            if key == 'status' or not path:
+                continue
+            node = aggregated.setdefault(key, {})
+            for part in path[:-1]:
+                node = node.setdefault(part, {})
+            node[path[-1]] = value
+    return aggregated
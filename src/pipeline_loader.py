@@ -0,0 +1,162 @@
+import os
+import pickle
+import hashlib
+import tempfile
+import threading
+import yaml
+
+from .cache import cache_root
+
+# Loads pipeline YAML with the libyaml C loader when PyYAML was built with it, and caches the parsed
+# document so large generated pipelines are parsed once:
+#   - in process, revalidated with a stat() of the pipeline and every included file, like networks.json
+#   - on disk under <cache root>/pipelines/<sha256>.pickle, keyed by the file's path and content, so a
+#     new process (or `serve` after a restart) skips parsing unchanged files. Included files are
+#     re-hashed on every disk hit.
+#
+# A pipeline can pull in shared job fragments with a top-level `include:` (a path or a list of paths,
+# relative to the including file). A fragment is either a list of jobs or a mapping with `jobs:`
+# and, optionally, its own `include:`. Included jobs come before the file's own jobs.
+
+CACHE_VERSION = 1
+MAX_CACHE_ENTRIES = 64
+
+_memory_cache = {} # abspath -> (file signatures, pickled document)
+_memory_lock = threading.Lock()
+
+def yaml_loader():
+    return getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _parse(content, path):
+    try:
+        return yaml.load(content, Loader=yaml_loader())
+    except yaml.YAMLError as e:
+        raise ValueError(f"Invalid YAML in {path}: {e}")
+
+def _include_paths(data, path):
+    includes = data.get('include') if isinstance(data, dict) else None
+    if includes is None:
+        return []
+    if isinstance(includes, str):
+        includes = [includes]
+    if not isinstance(includes, list) or not all(isinstance(include, str) for include in includes):
+        raise ValueError(f"{path}: 'include' must be a path or a list of paths")
+    base = os.path.dirname(path)
+    return [os.path.abspath(os.path.join(base, include)) for include in includes]
+
+def _read(path):
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Pipeline file not found: {path}")
+    with open(path, 'rb') as f:
+        return f.read()
+
+def _expand_includes(data, path, files, stack):
+    # Replaces `include:` with the included jobs; files collects {path: sha256} of every file read
+    jobs = []
+    for include in _include_paths(data, path):
+        if include in stack:
+            raise ValueError(f"Include cycle: {' -> '.join(stack + [include])}")
+        content = _read(include)
+        files[include] = hashlib.sha256(content).hexdigest()
+        fragment = _parse(content, include)
+        if isinstance(fragment, dict):
+            fragment = _expand_includes(fragment, include, files, stack + [include])
+            fragment_jobs = fragment.get('jobs') or []
+        else:
+            fragment_jobs = fragment or []
+        if not isinstance(fragment_jobs, list):
+            raise ValueError(f"{include}: an included file must be a list of jobs or a mapping with a 'jobs' list")
+        jobs.extend(fragment_jobs)
+    if not isinstance(data, dict) or 'include' not in data:
+        return data
+    data = dict(data)
+    del data['include']
+    own_jobs = data.get('jobs') or []
+    data['jobs'] = jobs + own_jobs if isinstance(own_jobs, list) else own_jobs
+    return data
+
+def _cache_dir():
+    return os.path.join(cache_root(), 'pipelines')
+
+def _read_disk_cache(key):
+    try:
+        with open(os.path.join(_cache_dir(), f'{key}.pickle'), 'rb') as f:
+            entry = pickle.load(f)
+        if entry.get('version') != CACHE_VERSION:
+            return None
+        for include, digest in entry['includes'].items():
+            with open(include, 'rb') as f:
+                if hashlib.sha256(f.read()).hexdigest() != digest:
+                    return None
+        return entry['document'], entry['includes']
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, KeyError, TypeError, ImportError):
+        return None # Missing, corrupt or stale entries are parsed again
+
+def _write_disk_cache(key, includes, document):
+    directory = _cache_dir()
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump({'version': CACHE_VERSION, 'includes': includes, 'document': document}, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, os.path.join(directory, f'{key}.pickle'))
+        _prune_disk_cache(directory)
+    except OSError as e:
+        print(f"Warning: could not cache parsed pipeline: {e}")
+
+def _prune_disk_cache(directory):
+    entries = []
+    for filename in os.listdir(directory):
+        path = os.path.join(directory, filename)
+        try:
+            entries.append((os.path.getmtime(path), path))
+        except OSError:
+            pass
+    for _, path in sorted(entries, reverse=True)[MAX_CACHE_ENTRIES:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def load_pipeline(path, use_cache=True):
+    # Returns the parsed pipeline with includes expanded, as a fresh object the caller may modify.
+    # Raises FileNotFoundError for a missing pipeline or include and ValueError for invalid YAML.
+    path = os.path.abspath(path)
+    if not use_cache:
+        return _expand_includes(_parse(_read(path), path), path, {}, [path])
+
+    with _memory_lock:
+        cached = _memory_cache.get(path)
+    if cached is not None:
+        try:
+            if all(_file_signature(file) == signature for file, signature in cached[0]):
+                return pickle.loads(cached[1])
+        except OSError:
+            pass
+
+    signatures = [(path, _file_signature(path))] if os.path.exists(path) else [] # Before reading, so a concurrent edit is noticed
+    content = _read(path)
+    key = hashlib.sha256(path.encode() + b'\0' + content).hexdigest()
+    cached = _read_disk_cache(key)
+    if cached is None:
+        includes = {}
+        document = _expand_includes(_parse(content, path), path, includes, [path])
+        _write_disk_cache(key, includes, document)
+    else:
+        document, includes = cached
+    try:
+        signatures += [(include, _file_signature(include)) for include in includes]
+    except OSError:
+        return document # An include changed under us; parse again next time
+    pickled = pickle.dumps(document, pickle.HIGHEST_PROTOCOL)
+    with _memory_lock:
+        _memory_cache[path] = (signatures, pickled)
+    return pickle.loads(pickled)
+
+def clear_pipeline_cache():
+    with _memory_lock:
+        _memory_cache.clear()
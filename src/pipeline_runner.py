@@ -1,91 +1,345 @@
 import os
+import time
+import threading
 import yaml
 import json
 import subprocess
 import re
 
-from .actions.compile import compile_contracts
-from .actions.deploy import deploy_contract
-from .actions.verify import verify_contract
+from .chain_pool import ChainPools, chain_leases, uses_ephemeral_network
+from .hardhat_worker import HardhatWorkerPool
+from .config import load_networks_config, networks_config_path
+from .deployments import DeploymentRegistry, default_deployments_path
+from .executor import job_context, parse_timeout
+from .expressions import ResolveContext, compile_template
+from .matrix import aggregate_outputs, expand_matrix, instance_name, matrix_axes, parse_strategy
+from .pipeline_loader import load_pipeline
+from .registry import ActionContext, ActionRegistry, default_plugin_dirs
+from .rpc import close_clients
+from .planner import estimate_duration, instance_history
+from .run_state import RunStateStore, job_fingerprint, job_history, new_run_id
+from .schema import validate_pipeline
+from .scheduler import build_job_graph, run_job_graph, simulate_job_graph, tail_lengths
+from .tracing import span
+from .verify_queue import DEFAULT_RATE_LIMIT, VerificationQueue
+
+# Queued in the background with --async-verify instead of running inline
+VERIFY_ACTION = 'actions/verify@v1'
 
 class PipelineRunner:
-    def __init__(self, pipeline_path):
+    def __init__(self, pipeline_path, max_parallel=1, use_cache=True, persistent_workers=False,
+                 state_dir=None, resume_run_id=None, force_jobs=(), async_verify=False,
+                 registry=None, plugin_dirs=None, shared_workers=None, keep_connections=False,
+                 shared_chains=None, deployments=None, coordinator=None, rpc_proxy=None):
         self.pipeline_path = pipeline_path
-        self.pipeline_data = self._load_pipeline()
+        if registry is None:
+            registry = ActionRegistry(default_plugin_dirs(pipeline_path) if plugin_dirs is None else plugin_dirs)
+        self.registry = registry
+        self.max_parallel = max_parallel
+        self.use_cache = use_cache
+        self.persistent_workers = persistent_workers
+        self.workers = None # Long-lived Hardhat processes, only while run() is active
+        self.shared_workers = shared_workers # Worker pool owned by the caller (serve), never closed here
+        self.keep_connections = keep_connections
+        self.chains = None # Pools of local nodes for ephemeral networks, only while run() is active
+        self.shared_chains = shared_chains # Chain pools owned by the caller (serve), never closed here
+        self.async_verify = async_verify
+        self.verify_queue = None # Background verifications, only while run() is active
+        self.coordinator = coordinator # Hands jobs to remote workers (distributed.Coordinator)
+        self.rpc_proxy = rpc_proxy # Dry run: networks are forked through this caching proxy (rpc_proxy.CachingRpcProxy)
+        self._queued_fingerprints = {}
+        with span('pipeline.load', path=pipeline_path):
+            self.pipeline_data = self._load_pipeline()
         self.deployed_contracts = {} # To store deployed contract addresses
         self.job_outputs = {} # To store outputs from each job
-        self.networks_config = self._load_networks_config()
+        with span('networks.load'):
+            self.networks_config = self._load_networks_config()
+            if rpc_proxy is not None:
+                self.networks_config = rpc_proxy.fork_networks(self.networks_config)
+
+        # Check the whole document and parse every ${{ }} expression once, before any job runs
+        with span('pipeline.validate'):
+            self.compiled_params = validate_pipeline(self.pipeline_data, self.registry)
+        with span('pipeline.compile'):
+            self.jobs = self.pipeline_data.get('jobs', []) or []
+            self.compiled_matrices = {}
+            self.job_order, self.job_dependencies = build_job_graph(self.jobs, self.compiled_params)
+            self.strategies = {}
+            self.job_timeouts = {}
+            for job, name in zip(self.jobs, self.job_order):
+                self.job_timeouts[name] = parse_timeout(job, name)
+                strategy = parse_strategy(job, name)
+                if strategy is not None:
+                    self.strategies[name] = strategy
+                    self.compiled_matrices[name] = compile_template(strategy.matrix)
+
+        # Durable per-run job log; resuming replays jobs whose inputs did not change
+        self.force_jobs = set(force_jobs)
+        self.run_state = None
+        self.previous_state = {}
+        if resume_run_id and not state_dir:
+            raise ValueError("Resuming a run requires a state directory")
+        if state_dir:
+            self.run_state = RunStateStore(state_dir, resume_run_id or new_run_id())
+            if resume_run_id:
+                if not self.run_state.exists():
+                    raise FileNotFoundError(f"No recorded state for run '{resume_run_id}' in {state_dir}")
+                self.previous_state = self.run_state.load()
+
+        # How long each job took in recent runs: with limited parallelism the jobs heading the longest
+        # remaining chain start first, and `plan` predicts the wall time from the same figures
+        self.history = job_history(state_dir) if state_dir else {}
+        self.job_priority = tail_lengths(self.job_order, self.job_dependencies, self.estimate_durations())
+
+        # Deployments of every run of the project; kept in memory when runs are not recorded
+        if deployments is None:
+            deployments = DeploymentRegistry(default_deployments_path(state_dir) if state_dir else None)
+        self.deployments = deployments
+
+    def estimate_durations(self):
+        # {job: expected seconds} for jobs with history; a matrix job takes as long as its instances
+        # scheduled on its max_parallel slots
+        durations = {}
+        for name in self.job_order:
+            if name in self.strategies:
+                instances = {instance: estimate_duration(records) for instance, records in instance_history(self.history, name).items()}
+                if instances:
+                    times = simulate_job_graph(list(instances), {instance: set() for instance in instances}, instances,
+                                               max_parallel=self.strategies[name].max_parallel or len(instances))
+                    durations[name] = max(finish for _, finish in times.values())
+            elif name in self.history:
+                durations[name] = estimate_duration(self.history[name])
+        return durations
 
     def _load_networks_config(self):
-        networks_config_path = os.path.join(os.path.dirname(self.pipeline_path), '..', 'config', 'networks.json')
-        networks_config_path = os.path.abspath(networks_config_path)
-        if not os.path.exists(networks_config_path):
-            print(f"Warning: Network configuration file not found: {networks_config_path}")
+        try:
+            return load_networks_config(networks_config_path(self.pipeline_path))
+        except FileNotFoundError as e:
+            print(f"Warning: {e}")
             return {}
-        with open(networks_config_path, 'r') as f:
-            return json.load(f)
 
     def _load_pipeline(self):
-        if not os.path.exists(self.pipeline_path):
-            raise FileNotFoundError(f"Pipeline file not found: {self.pipeline_path}")
-        with open(self.pipeline_path, 'r') as f:
-            return yaml.safe_load(f)
-
-    def _resolve_params(self, params):
-        resolved_params = {}
-        for key, value in params.items():
-            if isinstance(value, str) and value.startswith('${{') and value.endswith('}}'):
-                # Expected format: ${{ jobs.<job_name>.output.<key> }}
-                try:
-                    parts = value[3:-2].strip().split('.')
-                    if len(parts) == 4 and parts[0] == 'jobs' and parts[2] == 'output':
-                        job_name = parts[1]
-                        output_key = parts[3]
-                        if job_name in self.job_outputs and output_key in self.job_outputs[job_name]:
-                            resolved_params[key] = self.job_outputs[job_name][output_key]
-                        else:
-                            print(f"  [⚠️] Warning: Could not resolve dynamic parameter '{value}'. Job output not found.")
-                            resolved_params[key] = None # Or keep original value, depending on desired behavior
-                    else:
-                        resolved_params[key] = value # Not a recognized dynamic parameter format
-                except Exception as e:
-                    print(f"  [⚠️] Warning: Error resolving dynamic parameter '{value}': {e}")
-                    resolved_params[key] = value
-            else:
-                resolved_params[key] = value
-        return resolved_params
+        return load_pipeline(self.pipeline_path, use_cache=self.use_cache)
+
+    def _resolve_params(self, params, matrix=None):
+        return compile_template(params).resolve(self._resolve_context(matrix))
+
+    def _resolve_context(self, matrix=None):
+        return ResolveContext(self.job_outputs, matrix=matrix)
 
     def run(self):
         print(f"\n--- Running Pipeline: {self.pipeline_data.get('name', 'Unnamed Pipeline')} ---")
-        jobs = self.pipeline_data.get('jobs', [])
-        for job in jobs:
-            self._execute_job(job)
+        if self.run_state is not None:
+            print(f"Run ID: {self.run_state.run_id} (resume with --resume {self.run_state.run_id})")
+        jobs_by_name = dict(zip(self.job_order, self.jobs))
+        if self.shared_workers is not None:
+            self.workers = self.shared_workers
+        elif self.persistent_workers:
+            self.workers = HardhatWorkerPool()
+        if self.async_verify:
+            self.verify_queue = VerificationQueue(self._verify)
+        self.chains = self.shared_chains if self.shared_chains is not None else ChainPools()
+        try:
+            with span('pipeline.run', pipeline=self.pipeline_data.get('name', 'Unnamed Pipeline'), max_parallel=self.max_parallel), \
+                    chain_leases(self.chains):
+                run_job_graph(
+                    self.job_order, self.job_dependencies, lambda name: self._execute_job(jobs_by_name[name], name),
+                    max_parallel=self.max_parallel, priority=self.job_priority if self.max_parallel > 1 else None
+                )
+                if self.verify_queue is not None:
+                    with span('verify.wait'):
+                        self._finish_verifications()
+        finally:
+            if self.verify_queue is not None:
+                self.verify_queue.close()
+                self.verify_queue = None
+            if self.workers is not None and self.workers is not self.shared_workers:
+                self.workers.close()
+            self.workers = None
+            if self.chains is not self.shared_chains:
+                self.chains.close()
+            self.chains = None
+            if not self.keep_connections:
+                close_clients() # Pooled JSON-RPC connections from native deploys
         print("\n--- Pipeline Finished ---")
 
-    def _execute_job(self, job):
-        job_name = job.get('name', 'Unnamed Job')
+    def _execute_job(self, job, job_name=None):
+        job_name = job_name or job.get('name', 'Unnamed Job')
+        template = self.compiled_params.get(job_name)
+        if template is None:
+            template = compile_template(job.get('with', {}))
+        if job_name in self.strategies:
+            with span('job', 'job', job=job_name, action=job.get('uses'), matrix=True) as job_span:
+                self._execute_matrix_job(job, job_name, template)
+                job_span.set(status=(self.job_outputs.get(job_name) or {}).get('status'))
+        else:
+            self._execute_instance(job, job_name, template, timeout=self.job_timeouts.get(job_name))
+
+    def _execute_matrix_job(self, job, job_name, template):
+        # The matrix is expanded only now, so it can use outputs of the jobs this one depends on
+        strategy = self.strategies[job_name]
+        matrix = self.compiled_matrices[job_name].resolve(self._resolve_context())
+        try:
+            combinations = expand_matrix(matrix)
+        except ValueError as e:
+            print(f"\n>>> Job: {job_name} ({job.get('uses')}) <<<")
+            print(f"  [❌] Invalid matrix: {e}")
+            self.job_outputs[job_name] = {'status': 'failure', 'error': str(e)}
+            return
+
+        names = [instance_name(job_name, combination) for combination in combinations]
+        instances = dict(zip(names, combinations))
+        print(f"\n>>> Expanding Job: {job_name} into {len(names)} matrix instance(s) <<<")
+
+        # With fail-fast the first failure kills running instances and skips the ones not started yet
+        cancel = threading.Event()
+        def execute(name):
+            if cancel.is_set():
+                print(f"\n>>> Cancelling Job: {name} - an earlier matrix instance failed <<<")
+                self.job_outputs[name] = {'status': 'cancelled'}
+                return
+            output = self._execute_instance(
+                job, name, template, matrix=instances[name],
+                force=job_name in self.force_jobs, timeout=self.job_timeouts.get(job_name),
+                cancel_event=cancel if strategy.fail_fast else None
+            )
+            if strategy.fail_fast and (output is None or output.get('status') == 'failure'):
+                cancel.set()
+
+        max_parallel = strategy.max_parallel or len(names)
+        priority = None
+        if max_parallel < len(names):
+            priority = {name: estimate_duration(self.history[name]) for name in names if name in self.history}
+        run_job_graph(names, {name: set() for name in names}, execute, max_parallel=max_parallel, priority=priority)
+
+        outputs = {name: self.job_outputs.get(name) for name in names}
+        failed = [name for name, output in outputs.items() if not output or output.get('status') in ('failure', 'cancelled')]
+        aggregated = aggregate_outputs(matrix_axes(matrix), [(instances[name], outputs[name]) for name in names])
+        aggregated['status'] = 'failure' if failed else 'success'
+        aggregated['instances'] = outputs
+        if failed:
+            aggregated['failed'] = failed
+        self.job_outputs[job_name] = aggregated
+
+    def _execute_instance(self, job, job_name, template, matrix=None, force=False, timeout=None, cancel_event=None):
+        # Subprocesses started by the action are prefixed with the job name and bound by its timeout
+        with span('job', 'job', job=job_name, action=job.get('uses')) as job_span, \
+                job_context(job_name, timeout=timeout, cancel_event=cancel_event):
+            if matrix is not None and self.chains is not None:
+                # Each matrix instance deploys to its own local node for ephemeral networks
+                with chain_leases(self.chains):
+                    output = self._run_instance(job, job_name, template, matrix, force, timeout)
+            else:
+                output = self._run_instance(job, job_name, template, matrix, force, timeout)
+            job_span.set(status=(output or {}).get('status'))
+            return output
+
+    def _run_instance(self, job, job_name, template, matrix, force, timeout=None):
         uses_action = job.get('uses')
-        with_params = job.get('with', {})
-        resolved_params = self._resolve_params(with_params)
+        with span('params.resolve', job=job_name):
+            resolved_params = template.resolve(self._resolve_context(matrix))
+
+        fingerprint = None
+        if self.run_state is not None:
+            fingerprint = self.fingerprint(uses_action, resolved_params, matrix)
+            previous = self.reusable_output(job_name, resolved_params, fingerprint, force)
+            if previous is not None:
+                print(f"\n>>> Skipping Job: {job_name} ({uses_action}) - unchanged since the previous attempt <<<")
+                self.job_outputs[job_name] = previous
+                self._replay_deployments(resolved_params, previous)
+                return previous
 
         print(f"\n>>> Executing Job: {job_name} ({uses_action}) <<<")
 
-        job_output = None
-        if uses_action == "actions/compile@v1":
-            job_output = compile_contracts(resolved_params)
-        elif uses_action == "actions/deploy@v1":
-            job_output = deploy_contract(resolved_params, self.pipeline_path, self.deployed_contracts, networks_config=self.networks_config)
-        elif uses_action == "actions/verify@v1":
-            job_output = verify_contract(resolved_params, self.pipeline_path, self.deployed_contracts, networks_config=self.networks_config)
+        started_at = time.time()
+        if uses_action == VERIFY_ACTION and self.rpc_proxy is not None:
+            # Nothing was deployed to the real network, so there is nothing to verify on its explorer
+            print("  [⏭️] Verification skipped: dry run.")
+            job_output = {'status': 'skipped', 'reason': 'dry run'}
+        elif uses_action == VERIFY_ACTION and self.verify_queue is not None:
+            job_output = self._enqueue_verification(job_name, resolved_params, fingerprint)
+        elif self.coordinator is not None and not uses_ephemeral_network(resolved_params, self.networks_config):
+            job_output = self.coordinator.dispatch(uses_action, resolved_params, self._action_context(job_name), timeout=timeout)
         else:
-            print(f"  [❌] Unknown action: {uses_action}")
-            job_output = None
+            if self.coordinator is not None:
+                self.coordinator.sync_artifacts() # Ephemeral chains live here; build outputs come from the workers
+            job_output = self.registry.get(uses_action).run(resolved_params, self._action_context(job_name))
 
         if job_output is not None:
             self.job_outputs[job_name] = job_output
+            if self.run_state is not None:
+                self.run_state.record(job_name, fingerprint, job_output, started_at=started_at)
+        return job_output
 
-    
+    def fingerprint(self, uses_action, resolved_params, matrix=None):
+        # Actions may add inputs that are not in their params, e.g. compile's source hash
+        extra = self.registry.get(uses_action).fingerprint(resolved_params)
+        if matrix is not None:
+            extra = {'source': extra, 'matrix': matrix}
+        return job_fingerprint(uses_action, resolved_params, self.networks_config, extra)
 
-    
+    def reusable_output(self, job_name, resolved_params, fingerprint, force=False):
+        # The output the resumed run recorded for this job when it can be reused instead of running it
+        previous = self.previous_state.get(job_name)
+        # Deployments to an ephemeral chain were reverted when its node went back to the pool
+        if not previous or uses_ephemeral_network(resolved_params, self.networks_config):
+            return None
+        if (not force and job_name not in self.force_jobs and previous.get('status') == 'success'
+                and previous.get('fingerprint') == fingerprint):
+            return previous['output']
+        return None
 
-    
\ No newline at end of file
+    def _replay_deployments(self, params, output):
+        # Restore the addresses a skipped deploy job would have added to deployed_contracts
+        # and to the deployment registry, unless it already has them from the earlier attempt
+        if output.get('address') and params.get('contract'):
+            self.deployed_contracts[params['contract']] = output['address']
+            self._replay_deployment(params.get('network'), params['contract'], output['address'], output.get('tx_hash'))
+        for network, addresses in (output.get('addresses') or {}).items():
+            self.deployed_contracts.update(addresses)
+            for contract, address in addresses.items():
+                self._replay_deployment(network, contract, address, (output.get('tx_hashes') or {}).get(network, {}).get(contract))
+
+    def _replay_deployment(self, network, contract, address, tx_hash):
+        if network and not self.deployments.find_address(address, network):
+            self.deployments.record(network, contract, address, tx_hash=tx_hash, run_id=self.run_state.run_id)
+
+    def _action_context(self, job_name):
+        return ActionContext(
+            job_name, self.pipeline_path, self.deployed_contracts, self.networks_config,
+            workers=self.workers, use_cache=self.use_cache, deployments=self.deployments,
+            run_id=self.run_state.run_id if self.run_state is not None else None,
+            state_dir=self.run_state.state_dir if self.run_state is not None else None
+        )
+
+    def _verify(self, params, job_name=None):
+        if self.coordinator is not None:
+            self.coordinator.sync_artifacts()
+        return self.registry.get(VERIFY_ACTION).run(params, self._action_context(job_name))
+
+    def _enqueue_verification(self, job_name, params, fingerprint):
+        # Explorers are rate limited per API host, so networks sharing an explorer share a bucket
+        network_details = self.networks_config.get(params.get('network')) or {}
+        explorer = network_details.get('explorer_url') or params.get('network')
+        rate_limit = network_details.get('verify_rate_limit', DEFAULT_RATE_LIMIT)
+        self.verify_queue.enqueue(job_name, params, explorer, rate_limit=rate_limit)
+        self._queued_fingerprints[job_name] = fingerprint
+        print(f"  [⏳] Verification of {params.get('contract')} on {params.get('network')} queued.")
+        return {'status': 'queued'}
+
+    def _finish_verifications(self):
+        pending = self.verify_queue.pending
+        if pending:
+            print(f"\n--- Waiting for {len(pending)} queued verification(s) ---")
+        results = self.verify_queue.wait()
+        if not results:
+            return
+        print("\n--- Verification Results ---")
+        for job_name, result in results.items():
+            self.job_outputs[job_name] = result
+            if self.run_state is not None:
+                self.run_state.record(job_name, self._queued_fingerprints.get(job_name), result)
+            if result.get('status') == 'success':
+                print(f"  [✅] {job_name}: verified ({result.get('attempts')} attempt(s))")
+            else:
+                print(f"  [❌] {job_name}: {result.get('error')}")
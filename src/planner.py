@@ -0,0 +1,165 @@
+import statistics
+
+from .expressions import ResolveContext, job_references
+from .matrix import aggregate_outputs, expand_matrix, instance_name, matrix_axes
+from .scheduler import critical_path, simulate_job_graph
+
+# `plan`: what run-pipeline would do, without running anything. The pipeline is loaded and its job graph
+# built exactly as for a run; each job is then predicted to
+#   skip       - resuming (--resume) would reuse its recorded output, because its inputs are unchanged
+#   cache hit  - its action reports that the result would come from a cache (e.g. the compile cache)
+#   run        - otherwise
+# Params are resolved with the outputs of the jobs that would be skipped; a job whose params need the
+# output of a job that runs cannot be fingerprinted before the run and is predicted to run.
+#
+# Durations are the median of the job's successful executions in recent run logs (run_state.job_history).
+# The schedule is simulated with the runner's own ordering, giving the predicted wall time and the
+# critical path: the longest chain of dependent jobs, which no amount of parallelism can shorten.
+
+RUN = 'run'
+CACHE_HIT = 'cache hit'
+SKIP = 'skip'
+
+def estimate_duration(records, cache_hit=None):
+    # Median duration of the records; with cache_hit set, of those that did (or did not) hit a cache, if any
+    if cache_hit is not None:
+        records = [record for record in records if bool((record.get('output') or {}).get('cache_hit')) == cache_hit] or records
+    durations = [record['duration'] for record in records]
+    return statistics.median(durations) if durations else None
+
+def instance_history(history, job_name):
+    # {instance name: records} for the matrix instances of job_name
+    prefix = f'{job_name} ('
+    return {name: records for name, records in history.items() if name.startswith(prefix) and name.endswith(')')}
+
+def _topological(order, dependencies):
+    done, result = set(), []
+    remaining = list(order)
+    while remaining:
+        name = next(name for name in remaining if dependencies[name] <= done)
+        remaining.remove(name)
+        done.add(name)
+        result.append(name)
+    return result
+
+def _predict(runner, uses, name, template, outputs, matrix=None, force=False):
+    # (status, estimated seconds or None, reason, reused output or None) for one job or matrix instance
+    history = runner.history.get(name, [])
+    waiting_for = sorted(job_references(template) - set(outputs))
+    if waiting_for:
+        return RUN, estimate_duration(history), f"params use the output of {', '.join(waiting_for)}", None
+    params = template.resolve(ResolveContext(outputs, matrix=matrix))
+    if runner.run_state is not None and runner.previous_state:
+        previous = runner.reusable_output(name, params, runner.fingerprint(uses, params, matrix), force)
+        if previous is not None:
+            return SKIP, 0, None, previous
+    cache_hit = runner.registry.get(uses).cache_hit(params) if runner.use_cache else None
+    if cache_hit:
+        return CACHE_HIT, estimate_duration(history, cache_hit=True), None, None
+    return RUN, estimate_duration(history, cache_hit=False if cache_hit is False else None), None, None
+
+def _plan_matrix(runner, job, name, outputs, estimates):
+    uses = job.get('uses')
+    template = runner.compiled_params[name]
+    waiting_for = sorted(job_references(runner.compiled_matrices[name]) - set(outputs))
+    if waiting_for:
+        return {'status': RUN, 'estimate': estimates.get(name), 'reason': f"matrix uses the output of {', '.join(waiting_for)}"}
+    matrix = runner.compiled_matrices[name].resolve(ResolveContext(outputs))
+    try:
+        combinations = expand_matrix(matrix)
+    except ValueError as e:
+        return {'status': RUN, 'estimate': 0, 'reason': f"invalid matrix: {e}"}
+
+    names = [instance_name(name, combination) for combination in combinations]
+    predictions = {
+        instance: _predict(runner, uses, instance, template, outputs, matrix=combination, force=name in runner.force_jobs)
+        for instance, combination in zip(names, combinations)
+    }
+    durations = {instance: prediction[1] for instance, prediction in predictions.items()}
+    estimate = None
+    if any(duration is not None for duration in durations.values()):
+        times = simulate_job_graph(names, {instance: set() for instance in names}, durations,
+                                   max_parallel=runner.strategies[name].max_parallel or len(names))
+        estimate = max(finish for _, finish in times.values())
+    statuses = [prediction[0] for prediction in predictions.values()]
+    skipped = statuses.count(SKIP)
+    entry = {'status': RUN, 'estimate': estimate, 'reason': None, 'instances': len(names)}
+    if skipped == len(names):
+        entry['status'] = SKIP
+        reused = {instance: prediction[3] for instance, prediction in predictions.items()}
+        aggregated = aggregate_outputs(matrix_axes(matrix), [(combination, reused[instance]) for instance, combination in zip(names, combinations)])
+        aggregated['status'] = 'success'
+        aggregated['instances'] = reused
+        outputs[name] = aggregated
+    elif statuses.count(CACHE_HIT) == len(names):
+        entry['status'] = CACHE_HIT
+    elif skipped:
+        entry['reason'] = f"{skipped} of {len(names)} instances unchanged"
+    return entry
+
+def plan_pipeline(runner):
+    # The runner is only used for its loaded pipeline, history and resume state; nothing is executed
+    jobs_by_name = dict(zip(runner.job_order, runner.jobs))
+    estimates = runner.estimate_durations()
+    outputs = {} # Outputs the run would reuse instead of running the job, for resolving later params
+    entries = {}
+    for name in _topological(runner.job_order, runner.job_dependencies):
+        job = jobs_by_name[name]
+        if name in runner.strategies:
+            entry = _plan_matrix(runner, job, name, outputs, estimates)
+        else:
+            status, estimate, reason, reused = _predict(
+                runner, job.get('uses'), name, runner.compiled_params[name], outputs
+            )
+            entry = {'status': status, 'estimate': estimate, 'reason': reason}
+            if reused is not None:
+                outputs[name] = reused
+        entry.update(name=name, uses=job.get('uses'), needs=sorted(runner.job_dependencies[name]))
+        entries[name] = entry
+
+    durations = {name: entry['estimate'] for name, entry in entries.items()}
+    priority = runner.job_priority if runner.max_parallel > 1 else None
+    times = simulate_job_graph(runner.job_order, runner.job_dependencies, durations, runner.max_parallel, priority)
+    length, path = critical_path(runner.job_order, runner.job_dependencies, durations)
+    if not length:
+        path = [] # Nothing is known to take time
+    position = {name: index for index, name in enumerate(runner.job_order)}
+    for name, (start, finish) in times.items():
+        entries[name].update(start=start, finish=finish, critical=name in path)
+    return {
+        'pipeline': runner.pipeline_data.get('name', 'Unnamed Pipeline'),
+        'max_parallel': runner.max_parallel,
+        'jobs': sorted(entries.values(), key=lambda entry: (entry['start'], position[entry['name']])),
+        'wall_time': max((finish for _, finish in times.values()), default=0),
+        'critical_path': path,
+        'critical_path_length': length,
+        'without_history': [name for name in runner.job_order if entries[name]['estimate'] is None],
+    }
+
+def format_seconds(seconds):
+    if seconds is None:
+        return '?'
+    if seconds < 60:
+        return f'{seconds:.1f}s'
+    minutes, seconds = divmod(seconds, 60)
+    return f'{int(minutes)}m {seconds:04.1f}s'
+
+def format_plan(plan):
+    lines = [f"\n--- Plan: {plan['pipeline']} (max parallel {plan['max_parallel']}) ---"]
+    width = max((len(entry['name']) + len(entry['uses'] or '') + 3 for entry in plan['jobs']), default=0)
+    lines.append(f"  {'Start':>9}  {'Estimate':>8}    {'Job':<{width}}  Prediction")
+    for entry in plan['jobs']:
+        job = f"{entry['name']} ({entry['uses']})"
+        status = entry['status'] + (f" ({entry['reason']})" if entry.get('reason') else '')
+        if entry.get('instances'):
+            status += f" [{entry['instances']} instances]"
+        lines.append(
+            f"  {'+' + format_seconds(entry['start']):>9}  {format_seconds(entry['estimate']):>8}  "
+            f"{'*' if entry['critical'] else ' '} {job:<{width}}  {status}"
+        )
+    lines.append(f"\nPredicted wall time: {format_seconds(plan['wall_time'])} with --max-parallel {plan['max_parallel']}")
+    if plan['critical_path']:
+        lines.append(f"Critical path (*): {format_seconds(plan['critical_path_length'])} - {' -> '.join(plan['critical_path'])}")
+    if plan['without_history']:
+        lines.append(f"No recorded duration for: {', '.join(plan['without_history'])} (counted as 0s)")
+    return '\n'.join(lines)
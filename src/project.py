@@ -0,0 +1,29 @@
+import os
+
+# Layout of the Hardhat project the actions drive, shared by the actions and the Hardhat workers
+CONTRACTS_DIR = "/Users/dw2022/web3-devops-toolkit/contracts"
+
+def artifacts_dir_for(contracts_dir):
+    # Matches `paths.artifacts` in hardhat.config.js
+    return os.path.abspath(os.path.join(contracts_dir, '..', 'artifacts'))
+
+def shard_work_dir_for(contracts_dir):
+    # Per-shard artifacts and Hardhat caches of sharded compiles, inside `paths.cache`
+    return os.path.abspath(os.path.join(contracts_dir, '..', 'cache', 'shards'))
+
+def clean_env(env):
+    # Remove pytest-specific and other volatile environment variables
+    keys_to_remove = [
+        k for k in env if k.startswith('PYTEST_') or k.startswith('TERM_') or k.startswith('SHLVL') or
+        k.startswith('OLDPWD') or k.startswith('PWD') or k.startswith('_') or k.startswith('CONDA_') or
+        k.startswith('HOMEBREW_') or k.startswith('INFOPATH') or k.startswith('DISPLAY') or
+        k.startswith('npm_') or k.startswith('XPC_') or k.startswith('__CF_') or k.startswith('SSH_') or
+        k.startswith('LOGNAME') or k.startswith('USER') or k.startswith('TMPDIR') or k.startswith('SHELL') or
+        k.startswith('INIT_CWD') or k.startswith('NODE') or k.startswith('COLOR') or k.startswith('LANG') or
+        k.startswith('EDITOR') or k.startswith('__CFBundleIdentifier') or
+        k.startswith('OBJC_DISABLE_INITIALIZE_FORK_SAFETY') or k.startswith('__PYVENV_LAUNCHER__') or
+        k.startswith('__VIRTUAL_ENV__') or k.startswith('VIRTUAL_ENV')
+    ]
+    for key in keys_to_remove:
+        env.pop(key, None)
+    return env
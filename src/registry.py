@@ -0,0 +1,156 @@
+import os
+import re
+import importlib
+import importlib.util
+import threading
+from importlib.metadata import entry_points
+
+from .schema import BUILTIN_PARAMS
+
+# Actions are looked up by their `uses:` string (`<owner>/<name>@<version>`) and imported the first
+# time a job needs them, so startup cost does not grow with the number of installed actions.
+#
+# An action is a module with
+#   run(params, context) -> job output dict (or None when the job produced no output)
+#   fingerprint(params) -> optional extra input for --resume fingerprints (e.g. a source hash)
+#   cache_hit(params) -> optional; whether running now would be served from a cache, shown by `plan`
+#   PARAMS -> optional {param: (type, required)} schema, checked against `with:` when the pipeline loads
+# or, for entry points of the form "module:function", just the run function.
+#
+# Sources, later ones overriding earlier ones:
+#   1. the built-in actions below
+#   2. entry points in the ENTRY_POINT_GROUP group, named by their `uses:` string
+#   3. plugin directories: <dir>/<owner>/<name>@<version>.py
+
+ENTRY_POINT_GROUP = 'web3_devops_toolkit.actions'
+PLUGIN_PATH_ENV = 'WEB3_DEVOPS_ACTIONS_PATH'
+USES_PATTERN = re.compile(r'^[\w.-]+/[\w.-]+@[\w.-]+$')
+
+BUILTIN_ACTIONS = {
+    'actions/compile@v1': '.actions.compile',
+    'actions/deploy@v1': '.actions.deploy',
+    'actions/deploy-batch@v1': '.actions.deploy_batch',
+    'actions/verify@v1': '.actions.verify',
+    'actions/gas-report@v1': '.actions.gas_report',
+}
+
+class ActionContext:
+    # Everything a job gets from the runner besides its resolved `with:` params
+    def __init__(self, job_name, pipeline_path, deployed_contracts, networks_config, workers=None, use_cache=True,
+                 deployments=None, run_id=None, state_dir=None):
+        self.job_name = job_name
+        self.pipeline_path = pipeline_path
+        self.deployed_contracts = deployed_contracts
+        self.networks_config = networks_config
+        self.workers = workers
+        self.use_cache = use_cache
+        self.deployments = deployments # DeploymentRegistry shared by every run of the project
+        self.run_id = run_id
+        self.state_dir = state_dir # Where the run's state is recorded, or None when it is not
+
+class Action:
+    def __init__(self, uses, run, fingerprint=None, source=None, params=None, cache_hit=None):
+        self.uses = uses
+        self.run = run
+        self.fingerprint = fingerprint or (lambda params: None)
+        self.source = source
+        self.params = params
+        self.cache_hit = cache_hit or (lambda params: None)
+
+def default_plugin_dirs(pipeline_path):
+    # <project>/actions next to pipelines/ and config/, plus WEB3_DEVOPS_ACTIONS_PATH
+    dirs = [os.path.abspath(os.path.join(os.path.dirname(pipeline_path), '..', 'actions'))]
+    dirs.extend(path for path in os.environ.get(PLUGIN_PATH_ENV, '').split(os.pathsep) if path)
+    return dirs
+
+class ActionRegistry:
+    def __init__(self, plugin_dirs=(), use_entry_points=True):
+        self._targets = {} # uses -> (kind, target, source)
+        self._loaded = {}
+        self._lock = threading.Lock()
+        for uses, module in BUILTIN_ACTIONS.items():
+            self._targets[uses] = ('module', module, 'builtin')
+        if use_entry_points:
+            for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+                self._targets[entry_point.name] = ('entry_point', entry_point, f'entry point {entry_point.value}')
+        for directory in plugin_dirs:
+            self._scan_plugin_dir(directory)
+
+    def _scan_plugin_dir(self, directory):
+        # Only lists files; nothing is imported until a job uses the action
+        if not os.path.isdir(directory):
+            return
+        for owner in sorted(os.listdir(directory)):
+            owner_dir = os.path.join(directory, owner)
+            if not os.path.isdir(owner_dir):
+                continue
+            for filename in sorted(os.listdir(owner_dir)):
+                name, ext = os.path.splitext(filename)
+                uses = f'{owner}/{name}'
+                if ext == '.py' and USES_PATTERN.match(uses):
+                    path = os.path.join(owner_dir, filename)
+                    self._targets[uses] = ('file', path, path)
+
+    def register(self, uses, run, fingerprint=None):
+        with self._lock:
+            self._targets[uses] = ('action', Action(uses, run, fingerprint, 'registered'), 'registered')
+            self._loaded.pop(uses, None)
+
+    def __contains__(self, uses):
+        return uses in self._targets
+
+    def available(self):
+        return sorted(self._targets)
+
+    def validate(self, jobs, names):
+        # Fails before any job runs when a pipeline uses an action nobody provides
+        for job, name in zip(jobs, names):
+            uses = job.get('uses')
+            if not uses:
+                raise ValueError(f"Job '{name}' has no 'uses' action")
+            if uses not in self._targets:
+                hint = '' if USES_PATTERN.match(str(uses)) else " (expected <owner>/<name>@<version>)"
+                raise ValueError(f"Job '{name}' uses unknown action '{uses}'{hint}")
+
+    def params_schema(self, uses):
+        # Built-in schemas come from src.schema without importing the action; other actions are
+        # imported to read their PARAMS. None means the action's params are not checked.
+        kind, _, source = self._targets[uses]
+        if kind == 'module' and source == 'builtin':
+            return BUILTIN_PARAMS.get(uses)
+        return self.get(uses).params
+
+    def get(self, uses):
+        with self._lock:
+            action = self._loaded.get(uses)
+            if action is None:
+                if uses not in self._targets:
+                    raise KeyError(uses)
+                action = self._load(uses, *self._targets[uses])
+                self._loaded[uses] = action
+            return action
+
+    def _load(self, uses, kind, target, source):
+        if kind == 'action':
+            return target
+        if kind == 'module':
+            return _from_module(uses, importlib.import_module(target, package=__package__), source)
+        if kind == 'entry_point':
+            loaded = target.load()
+            if callable(loaded):
+                return Action(uses, loaded, source=source)
+            return _from_module(uses, loaded, source)
+        module_name = 'web3_devops_plugin_' + re.sub(r'\W', '_', uses)
+        spec = importlib.util.spec_from_file_location(module_name, target)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return _from_module(uses, module, source)
+
+def _from_module(uses, module, source):
+    run = getattr(module, 'run', None)
+    if not callable(run):
+        raise ValueError(f"Action '{uses}' ({source}) does not define run(params, context)")
+    return Action(
+        uses, run, getattr(module, 'fingerprint', None), source, getattr(module, 'PARAMS', None),
+        getattr(module, 'cache_hit', None)
+    )
@@ -0,0 +1,178 @@
+import json
+import queue
+import threading
+import itertools
+import http.client
+from urllib.parse import urlsplit
+
+from .tracing import span
+
+DEFAULT_POOL_SIZE = 8
+DEFAULT_TIMEOUT = 30
+
+class JsonRpcError(Exception):
+    def __init__(self, message, code=None, data=None):
+        super().__init__(message)
+        self.code = code
+        self.data = data
+
+class EndpointUnavailable(JsonRpcError):
+    # The endpoint refused the connection or answered HTTP 429/5xx: the request was not processed
+    pass
+
+class JsonRpcClient:
+    # JSON-RPC 2.0 over HTTP with a pool of keep-alive connections to a single endpoint
+
+    def __init__(self, url, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            raise ValueError(f"Unsupported RPC URL scheme: {url}")
+        self.url = url
+        self.timeout = timeout
+        self._connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self._host = parts.hostname
+        self._port = parts.port
+        self._path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        self._idle = queue.LifoQueue(maxsize=pool_size)
+        self._ids = itertools.count(1)
+        self._ids_lock = threading.Lock()
+        self.connections_opened = 0
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            self.connections_opened += 1
+            return self._connection_class(self._host, self._port, timeout=self.timeout)
+
+    def _release(self, connection):
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def _post(self, payload):
+        name = 'rpc batch' if isinstance(payload, list) else f"rpc {payload['method']}"
+        with span(name, 'rpc', url=self.url) as rpc_span:
+            response = self._send(payload)
+            rpc_span.set(request_bytes=response[1], response_bytes=response[2])
+            return response[0]
+
+    def _send(self, payload):
+        # Returns (decoded response, request bytes, response bytes)
+        body = json.dumps(payload).encode()
+        headers = {'Content-Type': 'application/json', 'Connection': 'keep-alive'}
+        # A pooled connection may have been closed by the server while idle; retry once on a fresh one
+        for attempt in range(2):
+            connection = self._acquire()
+            try:
+                connection.request('POST', self._path, body=body, headers=headers)
+                response = connection.getresponse()
+                data = response.read()
+            except (http.client.HTTPException, ConnectionError) as e:
+                connection.close()
+                if attempt == 0:
+                    continue
+                error = EndpointUnavailable if isinstance(e, ConnectionRefusedError) else JsonRpcError
+                raise error(f"RPC request to {self.url} failed: {e}")
+            except OSError as e:
+                connection.close()
+                raise JsonRpcError(f"RPC request to {self.url} failed: {e}")
+            if response.will_close:
+                connection.close()
+            else:
+                self._release(connection)
+            if response.status == 429 or response.status >= 500:
+                raise EndpointUnavailable(f"RPC endpoint {self.url} returned HTTP {response.status}")
+            if response.status != 200:
+                raise JsonRpcError(f"RPC endpoint {self.url} returned HTTP {response.status}")
+            try:
+                return json.loads(data), len(body), len(data)
+            except json.JSONDecodeError:
+                raise JsonRpcError(f"RPC endpoint {self.url} returned invalid JSON")
+
+    def _next_id(self):
+        with self._ids_lock:
+            return next(self._ids)
+
+    def _request(self, method, params):
+        return {'jsonrpc': '2.0', 'id': self._next_id(), 'method': method, 'params': list(params or [])}
+
+    @staticmethod
+    def _result(response):
+        if response.get('error'):
+            error = response['error']
+            raise JsonRpcError(error.get('message', 'Unknown JSON-RPC error'), error.get('code'), error.get('data'))
+        return response.get('result')
+
+    def call(self, method, params=None):
+        return self._result(self._post(self._request(method, params)))
+
+    def batch(self, calls):
+        # calls: [(method, params), ...] sent in one HTTP round trip; results come back in the same order
+        requests = [self._request(method, params) for method, params in calls]
+        if not requests:
+            return []
+        responses = self._post(requests)
+        if not isinstance(responses, list):
+            # Some nodes answer a failed batch with a single error object
+            self._result(responses)
+            raise JsonRpcError(f"RPC endpoint {self.url} does not support batch requests")
+        by_id = {response.get('id'): response for response in responses}
+        results = []
+        for request in requests:
+            if request['id'] not in by_id:
+                raise JsonRpcError(f"Missing response for {request['method']} in batch")
+            results.append(self._result(by_id[request['id']]))
+        return results
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_client(url):
+    # Process-wide client per endpoint so every job shares the same connection pool
+    with _clients_lock:
+        client = _clients.get(url)
+        if client is None:
+            client = JsonRpcClient(url)
+            _clients[url] = client
+        return client
+
+def rpc_endpoints(network_details):
+    # rpc_url first, then any other endpoints listed in rpc_urls
+    urls = [network_details.get('rpc_url')] + list(network_details.get('rpc_urls') or [])
+    return list(dict.fromkeys(url for url in urls if url))
+
+def network_client(network_details):
+    # A plain client for a network with one endpoint, a shared EndpointPool for several
+    urls = rpc_endpoints(network_details)
+    if not urls:
+        raise ValueError("Network has no RPC URL")
+    if len(urls) == 1:
+        return get_client(urls[0])
+    from .rpc_pool import DEFAULT_HEALTH_INTERVAL, DEFAULT_MAX_BLOCK_LAG, EndpointPool
+    with _clients_lock:
+        pool = _clients.get(tuple(urls))
+        if pool is None:
+            pool = EndpointPool(
+                urls,
+                hedge_after=network_details.get('rpc_hedge_after'),
+                health_interval=network_details.get('rpc_health_interval', DEFAULT_HEALTH_INTERVAL),
+                max_block_lag=network_details.get('rpc_max_block_lag', DEFAULT_MAX_BLOCK_LAG),
+            )
+            _clients[tuple(urls)] = pool
+        return pool
+
+def close_clients():
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
@@ -0,0 +1,218 @@
+import time
+import threading
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+
+from .rpc import DEFAULT_TIMEOUT, EndpointUnavailable, JsonRpcClient, JsonRpcError
+from .tracing import span
+
+# Several RPC endpoints for one network, used like a single JsonRpcClient. Each call goes to the
+# healthy endpoint with the lowest rolling (EWMA) latency, weighted by its recent error rate.
+#
+# - Failover: a call that fails in transport (connection refused, timeout, HTTP 429/5xx) moves on
+#   to the next endpoint. An error the node returned in the JSON-RPC response is the answer to the
+#   call and is raised as is. Transactions are only retried elsewhere when the first endpoint could
+#   not have received them, so a slow provider never causes a second submission.
+# - Hedging: a read that has not been answered after a few times the endpoint's usual latency (or
+#   `hedge_after` seconds) is also sent to the next endpoint; the first answer wins.
+# - Health checks: a background thread polls eth_blockNumber on every endpoint. Endpoints that fail
+#   repeatedly, or lag more than `max_block_lag` blocks behind the others, are skipped until they
+#   recover, with an exponential cooldown between retries.
+
+EWMA_ALPHA = 0.3
+ERROR_PENALTY = 10 # Score multiplier per unit of error rate
+FAILURE_THRESHOLD = 3 # Consecutive transport failures before an endpoint is skipped
+BASE_COOLDOWN = 1.0
+MAX_COOLDOWN = 60.0
+HEDGE_MULTIPLIER = 3
+MIN_HEDGE_DELAY = 0.05
+MAX_HEDGE_DELAY = 1.0
+DEFAULT_HEALTH_INTERVAL = 15.0
+DEFAULT_MAX_BLOCK_LAG = 5
+
+# Safe to send twice: hedged, and retried on another endpoint after any transport failure
+READ_METHODS = {
+    'eth_blockNumber', 'eth_chainId', 'eth_gasPrice', 'eth_maxPriorityFeePerGas', 'eth_feeHistory',
+    'eth_call', 'eth_estimateGas', 'eth_accounts', 'net_version', 'web3_clientVersion',
+}
+
+def is_read(method):
+    return method in READ_METHODS or method.startswith('eth_get')
+
+class Endpoint:
+    def __init__(self, url, client):
+        self.url = url
+        self.client = client
+        self.latency = None # EWMA of successful round trips, in seconds
+        self.error_rate = 0.0 # EWMA of transport failures
+        self.failures = 0 # Consecutive transport failures
+        self.down_until = 0.0
+        self.block_number = None
+        self._lock = threading.Lock()
+
+    def healthy(self, now):
+        return now >= self.down_until
+
+    def score(self):
+        return (self.latency or 0.0) * (1 + ERROR_PENALTY * self.error_rate)
+
+    def record_success(self, elapsed):
+        with self._lock:
+            self.latency = elapsed if self.latency is None else EWMA_ALPHA * elapsed + (1 - EWMA_ALPHA) * self.latency
+            self.error_rate *= 1 - EWMA_ALPHA
+            self.failures = 0
+            self.down_until = 0.0
+
+    def record_failure(self, unavailable):
+        with self._lock:
+            self.error_rate = EWMA_ALPHA + (1 - EWMA_ALPHA) * self.error_rate
+            self.failures += 1
+            if unavailable or self.failures >= FAILURE_THRESHOLD:
+                cooldown = min(MAX_COOLDOWN, BASE_COOLDOWN * 2 ** (self.failures - 1))
+                self.down_until = time.monotonic() + cooldown
+
+    def stats(self):
+        return {
+            'url': self.url,
+            'latency_ms': round(self.latency * 1000, 1) if self.latency is not None else None,
+            'error_rate': round(self.error_rate, 3),
+            'healthy': self.healthy(time.monotonic()),
+            'block_number': self.block_number,
+        }
+
+class EndpointPool:
+    def __init__(self, urls, timeout=DEFAULT_TIMEOUT, hedge_after=None, health_interval=DEFAULT_HEALTH_INTERVAL,
+                 max_block_lag=DEFAULT_MAX_BLOCK_LAG):
+        if not urls:
+            raise ValueError("An endpoint pool needs at least one RPC URL")
+        self.url = ','.join(urls) # Identifies the pool, e.g. for the shared confirmation tracker
+        self.endpoints = [Endpoint(url, JsonRpcClient(url, timeout=timeout)) for url in urls]
+        self.hedge_after = hedge_after
+        self.health_interval = health_interval
+        self.max_block_lag = max_block_lag
+        self.hedges = 0
+        self.failovers = 0
+        self._executor = ThreadPoolExecutor(max_workers=2 * len(urls) + 4, thread_name_prefix='rpc-pool')
+        self._closed = threading.Event()
+        self._health_thread = None
+        self._lock = threading.Lock()
+
+    def _ranked(self):
+        now = time.monotonic()
+        healthy = [endpoint for endpoint in self.endpoints if endpoint.healthy(now)]
+        if healthy:
+            ranked = sorted(healthy, key=lambda endpoint: (endpoint.score(), self.endpoints.index(endpoint)))
+            # Unhealthy endpoints still come last: better a slow answer than none
+            return ranked + sorted((e for e in self.endpoints if e not in healthy), key=lambda e: e.down_until)
+        return sorted(self.endpoints, key=lambda endpoint: endpoint.down_until)
+
+    def _start_health_checks(self):
+        if self.health_interval and self._health_thread is None:
+            with self._lock:
+                if self._health_thread is None and not self._closed.is_set():
+                    self._health_thread = threading.Thread(target=self._health_loop, name='rpc-health', daemon=True)
+                    self._health_thread.start()
+
+    def _health_loop(self):
+        while not self._closed.is_set():
+            self.check_health()
+            self._closed.wait(self.health_interval)
+
+    def _timed(self, endpoint, send):
+        started = time.monotonic()
+        try:
+            result = send(endpoint.client)
+        except JsonRpcError as e:
+            if e.code is None:
+                endpoint.record_failure(isinstance(e, EndpointUnavailable))
+            else:
+                endpoint.record_success(time.monotonic() - started) # The node answered
+            raise
+        endpoint.record_success(time.monotonic() - started)
+        return result
+
+    def _probe(self, endpoint):
+        try:
+            return int(self._timed(endpoint, lambda client: client.call('eth_blockNumber')), 16)
+        except (JsonRpcError, TypeError, ValueError):
+            return None
+
+    def check_health(self):
+        # Probes every endpoint at once; returns {url: block number or None}
+        with span('rpc.health_check', 'rpc', endpoints=len(self.endpoints)):
+            futures = [(endpoint, self._executor.submit(self._probe, endpoint)) for endpoint in self.endpoints]
+            heads = {endpoint: future.result() for endpoint, future in futures}
+        best = max((head for head in heads.values() if head is not None), default=None)
+        for endpoint, head in heads.items():
+            endpoint.block_number = head
+            if head is not None and best - head > self.max_block_lag:
+                # Answers, but serves stale state: skip it until a later check finds it caught up
+                endpoint.down_until = time.monotonic() + (self.health_interval or BASE_COOLDOWN)
+        return {endpoint.url: head for endpoint, head in heads.items()}
+
+    def _hedge_delay(self, endpoint):
+        if self.hedge_after is not None:
+            return self.hedge_after
+        if endpoint.latency is None:
+            return MAX_HEDGE_DELAY
+        return min(MAX_HEDGE_DELAY, max(MIN_HEDGE_DELAY, HEDGE_MULTIPLIER * endpoint.latency))
+
+    def _hedged(self, send, primary, backup):
+        run = contextvars.copy_context().run
+        first = self._executor.submit(run, self._timed, primary, send)
+        try:
+            return first.result(timeout=self._hedge_delay(primary))
+        except FutureTimeout:
+            self.hedges += 1
+        except JsonRpcError as e:
+            if e.code is not None:
+                raise
+            self.failovers += 1
+        pending = {self._executor.submit(contextvars.copy_context().run, self._timed, backup, send)}
+        if not first.done():
+            pending.add(first)
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result() # The slower request finishes in the background
+                error = future.exception()
+                if getattr(error, 'code', None) is not None:
+                    raise error
+        raise error
+
+    def _execute(self, send, read):
+        self._start_health_checks()
+        ranked = self._ranked()
+        errors = []
+        index = 0
+        while index < len(ranked):
+            endpoint = ranked[index]
+            try:
+                if read and index + 1 < len(ranked):
+                    index += 2
+                    return self._hedged(send, endpoint, ranked[index - 1])
+                index += 1
+                return self._timed(endpoint, send)
+            except JsonRpcError as e:
+                if e.code is not None or not (read or isinstance(e, EndpointUnavailable)):
+                    raise
+                errors.append(str(e))
+                self.failovers += 1
+        raise JsonRpcError(f"All RPC endpoints failed: {'; '.join(errors)}")
+
+    def call(self, method, params=None):
+        return self._execute(lambda client: client.call(method, params), is_read(method))
+
+    def batch(self, calls):
+        return self._execute(lambda client: client.batch(calls), all(is_read(method) for method, _ in calls))
+
+    def stats(self):
+        return [endpoint.stats() for endpoint in self.endpoints]
+
+    def close(self):
+        self._closed.set()
+        self._executor.shutdown(wait=False)
+        for endpoint in self.endpoints:
+            endpoint.client.close()
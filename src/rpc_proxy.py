@@ -0,0 +1,335 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote, urlsplit
+
+from .cache import cache_root
+from .chain_pool import DEFAULT_CHAIN_ID, EPHEMERAL, is_ephemeral
+from .rpc import JsonRpcError, network_client, rpc_endpoints
+from .tracing import span
+
+# Dry runs: `run-pipeline --dry-run` replaces every network in networks.json with an ephemeral network
+# forked from it (see chain_pool.py), so deployments land on local nodes instead of the real chains.
+# The forks read remote state through this proxy, one route per network: http://127.0.0.1:<port>/<network>.
+#
+# Each network is pinned to a block: eth_blockNumber answers the pinned number and the latest/pending/
+# safe/finalized tags in state reads are rewritten to it. Every read is then immutable, so responses are
+# kept in an on-disk SQLite store shared by all runs, <cache root>/rpc-cache.sqlite, and repeat requests
+# never leave the machine. The store is bounded by size; least recently used responses are evicted first.
+#
+# Pins are stored too and reused for PIN_TTL seconds (or indefinitely while the upstream is unreachable),
+# so rehearsing the same release again hits the same cache entries. Transactions are never forwarded.
+
+RPC_CACHE_DB = 'rpc-cache.sqlite'
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+PIN_TTL = 24 * 3600
+BUSY_TIMEOUT = 30
+
+# Method -> index of its block parameter (latest when omitted)
+BLOCK_PARAMS = {
+    'eth_getBalance': 1, 'eth_getCode': 1, 'eth_getTransactionCount': 1, 'eth_getStorageAt': 2,
+    'eth_call': 1, 'eth_getProof': 2, 'eth_feeHistory': 1, 'eth_getBlockByNumber': 0,
+    'eth_getBlockReceipts': 0, 'eth_getBlockTransactionCountByNumber': 0,
+    'eth_getTransactionByBlockNumberAndIndex': 0,
+}
+# Immutable once they return something
+HASH_METHODS = {
+    'eth_getBlockByHash', 'eth_getTransactionByHash', 'eth_getTransactionReceipt',
+    'eth_getBlockTransactionCountByHash', 'eth_getTransactionByBlockHashAndIndex',
+}
+CONSTANT_METHODS = {'eth_chainId', 'net_version'}
+# Not tied to a block, but answered once per pin so a rehearsal sees the fees of its pinned block
+PINNED_METHODS = {'eth_gasPrice', 'eth_maxPriorityFeePerGas', 'eth_blobBaseFee'}
+WRITE_METHODS = {'eth_sendRawTransaction', 'eth_sendTransaction'}
+MOVING_TAGS = {'latest', 'pending', 'safe', 'finalized'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+CREATE TABLE IF NOT EXISTS pins (
+    namespace TEXT PRIMARY KEY,
+    block_number INTEGER NOT NULL,
+    pinned_at REAL NOT NULL
+);
+"""
+
+def default_rpc_cache_path():
+    return os.path.join(cache_root(), RPC_CACHE_DB)
+
+class RpcResponseCache:
+    # JSON-RPC results by request key, evicted least recently used first once they exceed max_bytes
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path or default_rpc_cache_path()
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.executescript(SCHEMA)
+            self._size = self._connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    @property
+    def size(self):
+        return self._size
+
+    def get(self, key):
+        # The cached result, or None; results are only stored when not null
+        with self._lock, self._connection:
+            row = self._connection.execute('SELECT value FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            self._connection.execute('UPDATE responses SET last_used = ? WHERE key = ?', (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key, value):
+        data = json.dumps(value, separators=(',', ':'))
+        with self._lock, self._connection:
+            previous = self._connection.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            self._connection.execute(
+                'INSERT OR REPLACE INTO responses (key, value, size, last_used) VALUES (?, ?, ?, ?)',
+                (key, data, len(data), time.time())
+            )
+            self._size += len(data) - (previous[0] if previous else 0)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        rows = self._connection.execute('SELECT key, size FROM responses ORDER BY last_used').fetchall()
+        evicted = []
+        for key, size in rows:
+            if self._size <= self.max_bytes:
+                break
+            evicted.append((key,))
+            self._size -= size
+        self._connection.executemany('DELETE FROM responses WHERE key = ?', evicted)
+
+    def pin(self, namespace):
+        # (block_number, pinned_at) or None
+        with self._lock:
+            row = self._connection.execute('SELECT block_number, pinned_at FROM pins WHERE namespace = ?', (namespace,)).fetchone()
+        return tuple(row) if row else None
+
+    def set_pin(self, namespace, block_number):
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO pins (namespace, block_number, pinned_at) VALUES (?, ?, ?)',
+                (namespace, block_number, time.time())
+            )
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+def _pin_block(block, pinned):
+    # The block reference to send upstream, or None when it is not at or below the pinned block
+    if isinstance(block, dict): # EIP-1898
+        if 'blockHash' in block:
+            return block
+        number = _pin_block(block.get('blockNumber'), pinned)
+        return dict(block, blockNumber=number) if number is not None else None
+    if block is None or block in MOVING_TAGS:
+        return hex(pinned)
+    if block == 'earliest':
+        return '0x0'
+    if isinstance(block, str) and block.startswith('0x'):
+        try:
+            return block if int(block, 16) <= pinned else None
+        except ValueError:
+            return None
+    return None
+
+def pin_params(method, params, pinned):
+    # The params with every block reference pinned, or None when the request cannot be pinned
+    params = list(params)
+    if method == 'eth_getLogs':
+        if not params or not isinstance(params[0], dict):
+            return None
+        log_filter = dict(params[0])
+        if 'blockHash' not in log_filter:
+            for field in ('fromBlock', 'toBlock'):
+                block = _pin_block(log_filter.get(field), pinned)
+                if block is None:
+                    return None
+                log_filter[field] = block
+        return [log_filter] + params[1:]
+    index = BLOCK_PARAMS[method]
+    while len(params) <= index:
+        params.append('latest')
+    block = _pin_block(params[index], pinned)
+    if block is None:
+        return None
+    params[index] = block
+    return params
+
+class ProxyRoute:
+    def __init__(self, network, details):
+        self.network = network
+        self.details = details
+        self.client = network_client(details)
+        # Cache entries are shared by every network that points at the same chain
+        self.namespace = f"chain:{details['chain_id']}" if details.get('chain_id') else 'rpc:' + ','.join(rpc_endpoints(details))
+        self.pinned = None
+        self.lock = threading.Lock()
+
+class CachingRpcProxy:
+    def __init__(self, host='127.0.0.1', port=0, cache=None, pin_ttl=PIN_TTL):
+        self.cache = cache or RpcResponseCache()
+        self.pin_ttl = pin_ttl
+        self.routes = {}
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), ProxyRequestHandler)
+        self.server.daemon_threads = True
+        self.server.proxy = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name='rpc-proxy', daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        if self._thread is not None:
+            self.server.shutdown()
+            self._thread = None
+        self.server.server_close()
+        self.cache.close()
+
+    def add_network(self, network, details):
+        # Returns the URL that proxies this network
+        self.routes[network] = ProxyRoute(network, details)
+        return f'{self.url}/{quote(network, safe="")}'
+
+    def fork_networks(self, networks_config):
+        # networks.json with every network that has an RPC URL replaced by an ephemeral fork of it.
+        # Settings under a network's "dry_run" key (node, pool_size, command, ...) apply to its fork.
+        forked = {}
+        for network, details in networks_config.items():
+            details = details or {}
+            if is_ephemeral(details) or not rpc_endpoints(details):
+                forked[network] = details
+                continue
+            fork = {key: value for key, value in details.items() if key not in ('rpc_url', 'rpc_urls', 'dry_run')}
+            fork.update(type=EPHEMERAL, fork_url=self.add_network(network, details))
+            fork.setdefault('chain_id', DEFAULT_CHAIN_ID)
+            fork.update(details.get('dry_run') or {})
+            forked[network] = fork
+        return forked
+
+    def pinned_block(self, route):
+        with route.lock:
+            if route.pinned is None:
+                stored = self.cache.pin(route.namespace)
+                if stored is not None and time.time() - stored[1] < self.pin_ttl:
+                    route.pinned = stored[0]
+                else:
+                    try:
+                        route.pinned = int(route.client.call('eth_blockNumber'), 16)
+                    except JsonRpcError:
+                        if stored is None:
+                            raise
+                        route.pinned = stored[0] # Offline: keep rehearsing against the previous pin
+                    else:
+                        self.cache.set_pin(route.namespace, route.pinned)
+                    print(f"  [📌] Dry run: '{route.network}' pinned to block {route.pinned}")
+            return route.pinned
+
+    def _count(self, hit):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def call(self, network, method, params=None):
+        route = self.routes.get(network)
+        if route is None:
+            raise JsonRpcError(f"Unknown network '{network}'", -32602)
+        params = list(params or [])
+        if method in WRITE_METHODS:
+            raise JsonRpcError(f"{method} is not forwarded during a dry run", -32000)
+        if method == 'eth_blockNumber':
+            return hex(self.pinned_block(route))
+
+        key_params = None # None: forwarded without caching
+        if method in CONSTANT_METHODS or method in HASH_METHODS:
+            key_params = params
+        elif method in PINNED_METHODS:
+            key_params = params + [hex(self.pinned_block(route))]
+        elif method in BLOCK_PARAMS or method == 'eth_getLogs':
+            pinned = pin_params(method, params, self.pinned_block(route))
+            if pinned is not None:
+                params = key_params = pinned
+        if key_params is None:
+            self._count(False)
+            return route.client.call(method, params)
+
+        key = hashlib.sha256(json.dumps([route.namespace, method, key_params], sort_keys=True).encode()).hexdigest()
+        result = self.cache.get(key)
+        if result is not None:
+            self._count(True)
+            return result
+        self._count(False)
+        with span('rpc.proxy', 'rpc', network=network, method=method):
+            result = route.client.call(method, params)
+        if result is not None:
+            self.cache.put(key, result)
+        return result
+
+    def handle(self, network, request):
+        if not isinstance(request, dict):
+            return {'jsonrpc': '2.0', 'id': None, 'error': {'code': -32600, 'message': 'Invalid request'}}
+        try:
+            result = self.call(network, request.get('method'), request.get('params'))
+        except JsonRpcError as e:
+            error = {'code': e.code if e.code is not None else -32603, 'message': str(e)}
+            if e.data is not None:
+                error['data'] = e.data
+            return {'jsonrpc': '2.0', 'id': request.get('id'), 'error': error}
+        return {'jsonrpc': '2.0', 'id': request.get('id'), 'result': result}
+
+class ProxyRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' # keep-alive for the forks' many small requests
+
+    def do_POST(self):
+        proxy = self.server.proxy
+        network = unquote(urlsplit(self.path).path.strip('/'))
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if network not in proxy.routes:
+            return self._send(404, {'error': f"Unknown network '{network}'"})
+        try:
+            payload = json.loads(body)
+        except json.JSONDecodeError:
+            return self._send(400, {'jsonrpc': '2.0', 'id': None, 'error': {'code': -32700, 'message': 'Parse error'}})
+        if isinstance(payload, list):
+            self._send(200, [proxy.handle(network, request) for request in payload])
+        else:
+            self._send(200, proxy.handle(network, payload))
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
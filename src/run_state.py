@@ -0,0 +1,120 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import threading
+
+from .artifacts import artifact_index, default_artifacts_dir
+
+HISTORY_RUNS = 10 # Recent run logs that job duration estimates are drawn from
+
+def default_state_dir(pipeline_path):
+    # Next to config/, like networks.json: <project>/.pipeline-state
+    default = os.path.join(os.path.dirname(pipeline_path), '..', '.pipeline-state')
+    return os.path.abspath(os.environ.get('WEB3_DEVOPS_STATE_DIR', default))
+
+def new_run_id():
+    return time.strftime('%Y%m%d-%H%M%S') + '-' + uuid.uuid4().hex[:8]
+
+def _referenced_contracts(params):
+    names = []
+    if isinstance(params.get('contract'), str):
+        names.append(params['contract'])
+    for entry in params.get('contracts') or []:
+        name = entry if isinstance(entry, str) else (entry or {}).get('contract')
+        if isinstance(name, str):
+            names.append(name)
+    return names
+
+def job_fingerprint(uses, params, networks_config, extra=None):
+    # Everything that decides what a job does: action, resolved params, the network settings it
+    # targets and the compiled artifacts it deploys
+    artifacts_dir = params.get('artifacts_dir') or default_artifacts_dir()
+    artifacts = {}
+    for contract in _referenced_contracts(params):
+        entry = artifact_index(artifacts_dir).get(contract) if os.path.isdir(artifacts_dir) else None
+        artifacts[contract] = entry.hash if entry else None
+    networks = params.get('networks') or ([params['network']] if params.get('network') else [])
+    if isinstance(networks, str):
+        networks = [networks]
+    document = {
+        'uses': uses,
+        'params': params,
+        'networks': {network: (networks_config or {}).get(network) for network in networks},
+        'artifacts': artifacts,
+        'extra': extra,
+    }
+    return hashlib.sha256(json.dumps(document, sort_keys=True, default=str).encode()).hexdigest()
+
+class RunStateStore:
+    # Append-only JSONL log of finished jobs: <state_dir>/<run_id>.jsonl. The last record per job wins.
+
+    def __init__(self, state_dir, run_id):
+        self.state_dir = state_dir
+        self.run_id = run_id
+        self.path = os.path.join(state_dir, f'{run_id}.jsonl')
+        self._lock = threading.Lock()
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self):
+        records = {}
+        if not self.exists():
+            return records
+        with open(self.path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue # Torn write from an interrupted run
+                records[record['job']] = record
+        return records
+
+    def record(self, job, fingerprint, output, started_at=None, finished_at=None):
+        finished_at = finished_at or time.time()
+        record = {
+            'job': job,
+            'fingerprint': fingerprint,
+            'status': (output or {}).get('status'),
+            'output': output,
+            'started_at': started_at,
+            'finished_at': finished_at,
+            'duration': (finished_at - started_at) if started_at else None,
+        }
+        line = json.dumps(record, default=str)
+        with self._lock:
+            os.makedirs(self.state_dir, exist_ok=True)
+            with open(self.path, 'a') as f:
+                f.write(line + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+        return record
+
+def job_history(state_dir, runs=HISTORY_RUNS):
+    # {job: [record, ...]} of successful job executions in the most recent run logs, newest run first.
+    # Jobs a resumed run skipped are not in its log, so every record measures real work.
+    try:
+        names = [name for name in os.listdir(state_dir) if name.endswith('.jsonl') and not name.endswith('.otel.jsonl')]
+    except OSError:
+        return {}
+    logs = []
+    for name in names:
+        try:
+            logs.append((os.path.getmtime(os.path.join(state_dir, name)), name[:-len('.jsonl')]))
+        except OSError:
+            continue
+    history = {}
+    for _, run_id in sorted(logs, reverse=True)[:runs]:
+        try:
+            records = RunStateStore(state_dir, run_id).load()
+        except (OSError, KeyError, TypeError):
+            continue # Not a run log
+        for job, record in records.items():
+            if record.get('status') == 'success' and isinstance(record.get('duration'), (int, float)):
+                history.setdefault(job, []).append(record)
+    return history
@@ -0,0 +1,177 @@
+import heapq
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .expressions import compile_template, job_references
+
+# Deploy and verify read the artifacts compile writes, so they implicitly wait for earlier compile jobs
+ARTIFACT_PRODUCERS = {'actions/compile@v1'}
+ARTIFACT_CONSUMERS = {'actions/deploy@v1', 'actions/deploy-batch@v1', 'actions/verify@v1', 'actions/gas-report@v1'}
+
+def find_job_references(params):
+    # Every ${{ jobs.<name>.output... }} anywhere in the params, including nested and interpolated ones
+    return job_references(compile_template(params or {}))
+
+def _job_needs(job):
+    needs = job.get('needs', [])
+    if isinstance(needs, str):
+        return [needs]
+    return list(needs)
+
+def _job_matrix(job):
+    strategy = job.get('strategy')
+    return strategy.get('matrix') if isinstance(strategy, dict) else None
+
+def job_names(jobs):
+    # Jobs without a name get a positional one, so several unnamed jobs can coexist
+    names = []
+    for index, job in enumerate(jobs):
+        name = job.get('name') or f'Unnamed Job {index + 1}'
+        if name in names:
+            raise ValueError(f"Duplicate job name '{name}'")
+        names.append(name)
+    return names
+
+def build_job_graph(jobs, compiled_params=None):
+    # Returns (ordered job names, {job_name: set(dependency names)}).
+    # compiled_params ({job_name: template}) avoids re-parsing templates the runner already compiled.
+    order = job_names(jobs)
+    known = set(order)
+    dependencies = {}
+    producers = []
+    for job, name in zip(jobs, order):
+        if compiled_params is not None:
+            references = job_references(compiled_params[name])
+        else:
+            references = find_job_references(job.get('with', {}))
+        # A matrix may itself come from an earlier job, e.g. network: ${{ jobs.Plan.output.networks }}
+        references = references | find_job_references(_job_matrix(job))
+        deps = set(_job_needs(job)) | references
+        if job.get('uses') in ARTIFACT_CONSUMERS:
+            deps.update(producers)
+        if job.get('uses') in ARTIFACT_PRODUCERS:
+            producers.append(name)
+        unknown = deps - known
+        if unknown:
+            raise ValueError(f"Job '{name}' depends on unknown job(s): {', '.join(sorted(unknown))}")
+        if name in deps:
+            raise ValueError(f"Job '{name}' depends on itself")
+        dependencies[name] = deps
+
+    _check_for_cycles(order, dependencies)
+    return order, dependencies
+
+def _check_for_cycles(order, dependencies):
+    visiting, visited = set(), set()
+
+    def visit(name, path):
+        if name in visited:
+            return
+        if name in visiting:
+            cycle = path[path.index(name):] + [name]
+            raise ValueError(f"Dependency cycle between jobs: {' -> '.join(cycle)}")
+        visiting.add(name)
+        for dep in sorted(dependencies[name]):
+            visit(dep, path + [name])
+        visiting.discard(name)
+        visited.add(name)
+
+    for name in order:
+        visit(name, [])
+
+def _dependents(order, dependencies):
+    dependents = {name: [] for name in order}
+    for name in order:
+        for dep in dependencies[name]:
+            dependents[dep].append(name)
+    return dependents
+
+def tail_lengths(order, dependencies, durations):
+    # {job: its duration plus the longest chain of jobs waiting on it}; jobs without a duration count as 0
+    dependents = _dependents(order, dependencies)
+    tails = {}
+
+    def tail(name):
+        if name not in tails:
+            tails[name] = (durations.get(name) or 0) + max((tail(dependent) for dependent in dependents[name]), default=0)
+        return tails[name]
+
+    for name in order:
+        tail(name)
+    return tails
+
+def critical_path(order, dependencies, durations):
+    # (length, [job, ...]): the longest chain of dependent jobs, which bounds the wall time from below
+    if not order:
+        return 0, []
+    tails = tail_lengths(order, dependencies, durations)
+    dependents = _dependents(order, dependencies)
+    name = max(order, key=lambda job: tails[job]) # The first of equally long chains, in pipeline order
+    path = [name]
+    while dependents[name]:
+        name = max(dependents[name], key=lambda job: tails[job])
+        path.append(name)
+    return tails[path[0]], path
+
+def ready_order(order, priority=None):
+    # Sort key for ready jobs: longest tail first when priorities are known, then pipeline order
+    position = {name: index for index, name in enumerate(order)}
+    if not priority:
+        return position.get
+    return lambda name: (-(priority.get(name) or 0), position[name])
+
+def run_job_graph(order, dependencies, execute, max_parallel=1, priority=None):
+    # Runs execute(job_name) for every job once all of its dependencies finished.
+    # Ready jobs are started in pipeline order, so max_parallel=1 keeps the old serial behaviour.
+    # priority ({job: tail length}, see tail_lengths) starts the jobs with the longest remaining chain first.
+    if max_parallel < 1:
+        raise ValueError("max_parallel must be at least 1")
+
+    sort_key = ready_order(order, priority)
+    waiting_on = {name: set(deps) for name, deps in dependencies.items()}
+    dependents = _dependents(order, dependencies)
+
+    ready = sorted((name for name in order if not waiting_on[name]), key=sort_key)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_parallel) as pool:
+        while ready or running:
+            while ready and len(running) < max_parallel:
+                name = ready.pop(0)
+                # Jobs see the caller's context variables (trace span, job prefix, serve's log routing)
+                running[pool.submit(contextvars.copy_context().run, execute, name)] = name
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                future.result()  # Re-raise unexpected errors from the job
+                for dependent in dependents[name]:
+                    waiting_on[dependent].discard(name)
+                    if not waiting_on[dependent]:
+                        ready.append(dependent)
+            ready.sort(key=sort_key)
+
+def simulate_job_graph(order, dependencies, durations, max_parallel=1, priority=None):
+    # {job: (start, finish)} if every job took its duration (0 when unknown), scheduled like run_job_graph
+    if max_parallel < 1:
+        raise ValueError("max_parallel must be at least 1")
+    sort_key = ready_order(order, priority)
+    waiting_on = {name: set(dependencies[name]) for name in order}
+    dependents = _dependents(order, dependencies)
+    ready = sorted((name for name in order if not waiting_on[name]), key=sort_key)
+    running = [] # heap of (finish, started, job)
+    times = {}
+    now = 0.0
+    started = 0
+    while ready or running:
+        while ready and len(running) < max_parallel:
+            name = ready.pop(0)
+            times[name] = (now, now + (durations.get(name) or 0))
+            heapq.heappush(running, (times[name][1], started, name))
+            started += 1
+        now, _, name = heapq.heappop(running)
+        for dependent in dependents[name]:
+            waiting_on[dependent].discard(name)
+            if not waiting_on[dependent]:
+                ready.append(dependent)
+        ready.sort(key=sort_key)
+    return times
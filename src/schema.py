@@ -0,0 +1,172 @@
+import difflib
+
+from .expressions import EXPRESSION_PATTERN, ExpressionError, compile_template, job_references
+
+# Validation of a whole pipeline document, run when the pipeline is loaded so typos in keys, `uses:`,
+# `needs:`, `with:` params or ${{ }} references fail before the first job instead of halfway through
+# a deploy. Every problem is collected and reported at once.
+#
+# Action params are declared as {param: (type or tuple of types, required)}. Built-in actions are
+# described below, so validating does not import them; other actions may set PARAMS in their module.
+# Values that contain ${{ }} expressions are only type-checked once resolved, by the action itself.
+
+NUMBER = (int, float)
+
+BUILTIN_PARAMS = {
+    'actions/compile@v1': {
+        'tool': (str, False),
+        'cache': (bool, False),
+        'cache_max_size_mb': ((int, float, str), False), # Quoted numbers are accepted too
+        'max_parallel': (int, False),
+    },
+    'actions/deploy@v1': {
+        'network': (str, True),
+        'contract': (str, True),
+        'args': (list, False),
+        'engine': (str, False),
+        'artifacts_dir': (str, False),
+        'receipt_timeout': (NUMBER, False),
+        'poll_interval': (NUMBER, False),
+        'confirmations': (int, False),
+        'reuse': (bool, False),
+    },
+    'actions/deploy-batch@v1': {
+        'networks': ((list, str), True),
+        'contracts': (list, True),
+        'artifacts_dir': (str, False),
+        'receipt_timeout': (NUMBER, False),
+        'poll_interval': (NUMBER, False),
+        'confirmations': (int, False),
+    },
+    'actions/gas-report@v1': {
+        'network': (str, True),
+        'contracts': (list, True),
+        'baseline': (str, False),
+        'max_regression': (NUMBER, False), # Percent over the baseline
+        'update_baseline': (bool, False),
+        'artifacts_dir': (str, False),
+        'receipt_timeout': (NUMBER, False),
+        'poll_interval': (NUMBER, False),
+    },
+    'actions/verify@v1': {
+        'network': (str, True),
+        'contract': (str, False),
+        'address': (str, False), # Defaults to the address deployed earlier in the run
+    },
+}
+
+PIPELINE_KEYS = {'name', 'jobs', 'include'}
+JOB_KEYS = {'name', 'uses', 'with', 'needs', 'strategy', 'timeout-minutes'}
+STRATEGY_KEYS = {'matrix', 'max-parallel', 'fail-fast'}
+
+class PipelineValidationError(ValueError):
+    def __init__(self, errors):
+        super().__init__("Invalid pipeline:\n" + "\n".join(f"  - {error}" for error in errors))
+        self.errors = errors
+
+def _suggest(key, known):
+    matches = difflib.get_close_matches(str(key), sorted(known), n=1)
+    return f" (did you mean '{matches[0]}'?)" if matches else ''
+
+def _type_name(expected):
+    types = expected if isinstance(expected, tuple) else (expected,)
+    names = {int: 'integer', float: 'number', str: 'string', bool: 'boolean', list: 'list', dict: 'mapping'}
+    name = ' or '.join(dict.fromkeys(names.get(t, t.__name__) for t in types))
+    return ('an ' if name[0] in 'aeiou' else 'a ') + name
+
+def _has_expression(value):
+    return isinstance(value, str) and EXPRESSION_PATTERN.search(value) is not None
+
+def _matches_type(value, expected):
+    types = expected if isinstance(expected, tuple) else (expected,)
+    if isinstance(value, bool) and bool not in types:
+        return False # YAML true/false is not a number
+    return isinstance(value, types)
+
+def validate_params(label, uses, params, schema, errors):
+    if _has_expression(params):
+        return
+    if not isinstance(params, dict):
+        errors.append(f"{label}: 'with' must be a mapping")
+        return
+    for key, value in params.items():
+        if key not in schema:
+            errors.append(f"{label}: unknown parameter '{key}' for {uses}{_suggest(key, schema)}")
+        elif not _has_expression(value) and not _matches_type(value, schema[key][0]):
+            errors.append(f"{label}: parameter '{key}' must be {_type_name(schema[key][0])}, got {value!r}")
+    for key, (_, required) in schema.items():
+        if required and key not in params:
+            errors.append(f"{label}: missing required parameter '{key}' for {uses}")
+
+def validate_pipeline(data, registry=None):
+    # Returns {job_name: compiled `with:` template}, so the runner does not parse expressions twice.
+    # Raises PipelineValidationError listing every problem found.
+    errors = []
+    if not isinstance(data, dict):
+        raise PipelineValidationError(["the pipeline file must contain a mapping with a 'jobs' list"])
+    for key in data:
+        if key not in PIPELINE_KEYS:
+            errors.append(f"unknown top-level key '{key}'{_suggest(key, PIPELINE_KEYS)}")
+    jobs = data.get('jobs')
+    if jobs is None:
+        jobs = []
+    if not isinstance(jobs, list):
+        raise PipelineValidationError(errors + ["'jobs' must be a list"])
+
+    names = [job.get('name') or f'Unnamed Job {index + 1}' if isinstance(job, dict) else None for index, job in enumerate(jobs)]
+    known = set(names)
+    compiled = {}
+    schemas = {}
+    for index, (job, name) in enumerate(zip(jobs, names)):
+        label = f"jobs[{index}]" + (f" ({name})" if isinstance(job, dict) and job.get('name') else '')
+        if not isinstance(job, dict):
+            errors.append(f"{label}: a job must be a mapping, got {job!r}")
+            continue
+        for key in job:
+            if key not in JOB_KEYS:
+                errors.append(f"{label}: unknown key '{key}'{_suggest(key, JOB_KEYS)}")
+        if 'name' in job and not isinstance(job['name'], str):
+            errors.append(f"{label}: 'name' must be a string")
+        if name in compiled:
+            errors.append(f"{label}: duplicate job name '{name}'")
+
+        try:
+            compiled[name] = compile_template(job.get('with') or {})
+            unknown = job_references(compiled[name]) - known
+            if unknown:
+                errors.append(f"{label}: references unknown job(s): {', '.join(sorted(unknown))}")
+        except ExpressionError as e:
+            errors.append(f"{label}: {e}")
+
+        needs = job.get('needs', [])
+        for dependency in [needs] if isinstance(needs, str) else needs if isinstance(needs, list) else [None]:
+            if not isinstance(dependency, str):
+                errors.append(f"{label}: 'needs' must be a job name or a list of job names")
+            elif dependency not in known:
+                errors.append(f"{label}: needs unknown job '{dependency}'{_suggest(dependency, known - {None})}")
+
+        strategy = job.get('strategy')
+        if isinstance(strategy, dict):
+            for key in strategy:
+                if key not in STRATEGY_KEYS:
+                    errors.append(f"{label}: unknown strategy key '{key}'{_suggest(key, STRATEGY_KEYS)}")
+
+        uses = job.get('uses')
+        if not uses:
+            errors.append(f"{label}: missing 'uses'")
+            continue
+        if not isinstance(uses, str):
+            errors.append(f"{label}: 'uses' must be a string")
+            continue
+        if registry is not None and uses not in registry:
+            available = registry.available()
+            errors.append(f"{label}: uses unknown action '{uses}'{_suggest(uses, available)}")
+            continue
+        if uses not in schemas:
+            schemas[uses] = registry.params_schema(uses) if registry is not None else BUILTIN_PARAMS.get(uses)
+        if schemas[uses] is not None:
+            validate_params(label, uses, job.get('with') or {}, schemas[uses], errors)
+
+    if errors:
+        raise PipelineValidationError(errors)
+    return compiled
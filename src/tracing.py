@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import uuid
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Span recording for pipeline runs. Nothing is recorded unless a Tracer was installed with
+# set_tracer(); span() is then a cheap no-op, so actions can be instrumented unconditionally.
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+_tracer = None
+
+class Span:
+    def __init__(self, name, category, parent_id, attributes):
+        self.name = name
+        self.category = category
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.thread_id = threading.get_ident()
+        self.attributes = dict(attributes)
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    @property
+    def duration_ns(self):
+        return (self.end_ns or time.time_ns()) - self.start_ns
+
+class _NoSpan:
+    def set(self, **attributes):
+        pass
+
+_NO_SPAN = _NoSpan()
+
+class Tracer:
+    def __init__(self, service_name='web3-devops-toolkit'):
+        self.service_name = service_name
+        self.trace_id = uuid.uuid4().hex
+        self.spans = []
+        self._root = None # Parent for spans opened on threads that have no current span
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, category='pipeline', **attributes):
+        parent = _current_span.get() or self._root
+        span = Span(name, category, parent.span_id if parent else None, attributes)
+        if parent is None:
+            self._root = span
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current_span.reset(token)
+            if self._root is span:
+                self._root = None
+            with self._lock:
+                self.spans.append(span)
+
+    def chrome_trace(self):
+        # Chrome trace-event format (chrome://tracing, Perfetto): one complete ("X") event per span
+        pid = os.getpid()
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start_ns)
+        thread_numbers = {}
+        events = []
+        for span in spans:
+            tid = thread_numbers.setdefault(span.thread_id, len(thread_numbers) + 1)
+            args = dict(span.attributes)
+            if span.error:
+                args['error'] = span.error
+            events.append({
+                'name': span.name,
+                'cat': span.category,
+                'ph': 'X',
+                'ts': span.start_ns / 1000,
+                'dur': span.duration_ns / 1000,
+                'pid': pid,
+                'tid': tid,
+                'args': args,
+            })
+        for thread_id, tid in thread_numbers.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': f'thread-{tid}'}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def otel_spans(self):
+        # One OTLP/JSON span object per span, in the field naming of the OpenTelemetry JSON encoding
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start_ns)
+        records = []
+        for span in spans:
+            attributes = dict(span.attributes, category=span.category, **{'service.name': self.service_name})
+            record = {
+                'traceId': self.trace_id,
+                'spanId': span.span_id,
+                'parentSpanId': span.parent_id or '',
+                'name': span.name,
+                'kind': 1, # SPAN_KIND_INTERNAL
+                'startTimeUnixNano': str(span.start_ns),
+                'endTimeUnixNano': str(span.end_ns),
+                'attributes': [{'key': key, 'value': _otel_value(value)} for key, value in attributes.items()],
+                'status': {'code': 2, 'message': span.error} if span.error else {'code': 1},
+            }
+            records.append(record)
+        return records
+
+    def export(self, path):
+        # Writes <path> as a Chrome trace and <path without extension>.otel.jsonl next to it
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+        otel_path = os.path.splitext(path)[0] + '.otel.jsonl'
+        with open(otel_path, 'w') as f:
+            for record in self.otel_spans():
+                f.write(json.dumps(record) + '\n')
+        return path, otel_path
+
+def _otel_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': value if isinstance(value, str) else json.dumps(value, default=str)}
+
+def set_tracer(tracer):
+    # Installs the process-wide tracer (None disables tracing)
+    global _tracer
+    _tracer = tracer
+
+def get_tracer():
+    return _tracer
+
+@contextmanager
+def span(name, category='pipeline', **attributes):
+    tracer = _tracer
+    if tracer is None:
+        yield _NO_SPAN
+        return
+    with tracer.span(name, category, **attributes) as active:
+        yield active
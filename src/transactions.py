@@ -0,0 +1,112 @@
+import os
+
+from eth_account import Account
+from eth_utils import to_checksum_address
+
+from .abi import encode_constructor_args
+from .confirmations import confirmation_tracker
+
+DEFAULT_RECEIPT_TIMEOUT = 300
+DEFAULT_POLL_INTERVAL = 1.0
+GAS_LIMIT_MARGIN = 1.2 # Headroom over eth_estimateGas
+
+class TransactionError(Exception):
+    pass
+
+def deploy_data(artifact, args):
+    bytecode = artifact.get('bytecode', '')
+    if not bytecode or bytecode == '0x':
+        raise TransactionError(f"Artifact for {artifact.get('contractName')} has no bytecode (abstract contract or interface?)")
+    if not bytecode.startswith('0x'):
+        bytecode = '0x' + bytecode
+    return bytecode + encode_constructor_args(artifact.get('abi', []), args)
+
+def _private_key(network_details):
+    # Same source as hardhat.config.js: PRIVATE_KEY, unless the network configures its own key
+    return network_details.get('private_key') or os.environ.get('PRIVATE_KEY')
+
+def resolve_sender(client, network_details):
+    # Returns (address, private_key). Without a private key, the node's first unlocked account signs.
+    private_key = _private_key(network_details)
+    if private_key:
+        account = Account.from_key(private_key)
+        return account.address, private_key
+    sender = network_details.get('from')
+    if not sender:
+        accounts = client.call('eth_accounts')
+        if not accounts:
+            raise TransactionError("No private key configured and the node has no unlocked accounts")
+        sender = accounts[0]
+    return sender, None
+
+def fetch_deploy_context(client, sender, data):
+    # Chain id, gas price, next nonce and gas estimate in a single batched round trip
+    context = fetch_batch_deploy_context(client, sender, [data])
+    context['gas'] = context.pop('gas_limits')[0]
+    return context
+
+def fetch_batch_deploy_context(client, sender, datas):
+    # Same as fetch_deploy_context, with one gas estimate per deployment, still in one round trip
+    results = client.batch([
+        ('eth_chainId', []),
+        ('eth_gasPrice', []),
+        ('eth_getTransactionCount', [sender, 'pending']),
+    ] + [('eth_estimateGas', [{'from': sender, 'data': data}]) for data in datas])
+    chain_id, gas_price, nonce = results[:3]
+    return {
+        'chain_id': int(chain_id, 16),
+        'gas_price': int(gas_price, 16),
+        'nonce': int(nonce, 16),
+        'gas_limits': [int(int(estimate, 16) * GAS_LIMIT_MARGIN) for estimate in results[3:]],
+    }
+
+def send_deploy_transaction(client, sender, private_key, data, context, nonce=None, gas=None):
+    return send_transaction(client, sender, private_key, data, context, nonce=nonce, gas=gas)
+
+def send_transaction(client, sender, private_key, data, context, to=None, nonce=None, gas=None):
+    # A contract creation when to is None, otherwise a call to the contract at to
+    nonce = context['nonce'] if nonce is None else nonce
+    gas = context['gas'] if gas is None else gas
+    if private_key:
+        transaction = {
+            'nonce': nonce,
+            'gasPrice': context['gas_price'],
+            'gas': gas,
+            'value': 0,
+            'data': data,
+            'chainId': context['chain_id'],
+        }
+        if to is not None:
+            transaction['to'] = to_checksum_address(to)
+        signed = Account.sign_transaction(transaction, private_key)
+        return client.call('eth_sendRawTransaction', ['0x' + bytes(signed.raw_transaction).hex()])
+    transaction = {
+        'from': sender,
+        'data': data,
+        'nonce': hex(nonce),
+        'gas': hex(gas),
+        'gasPrice': hex(context['gas_price']),
+    }
+    if to is not None:
+        transaction['to'] = to
+    return client.call('eth_sendTransaction', [transaction])
+
+def estimate_gas(client, sender, data, to=None):
+    transaction = {'from': sender, 'data': data}
+    if to is not None:
+        transaction['to'] = to
+    return int(int(client.call('eth_estimateGas', [transaction]), 16) * GAS_LIMIT_MARGIN)
+
+def wait_for_receipt(client, tx_hash, timeout=DEFAULT_RECEIPT_TIMEOUT, poll_interval=DEFAULT_POLL_INTERVAL, confirmations=1):
+    receipt = wait_for_receipts(client, [tx_hash], timeout, poll_interval, confirmations).get(tx_hash)
+    if receipt is None:
+        raise TransactionError(f"Timed out waiting for receipt of {tx_hash}")
+    if receipt.get('status') == '0x0':
+        raise TransactionError(f"Transaction {tx_hash} reverted")
+    return receipt
+
+def wait_for_receipts(client, tx_hashes, timeout=DEFAULT_RECEIPT_TIMEOUT, poll_interval=DEFAULT_POLL_INTERVAL, confirmations=1):
+    # Waits on the endpoint's shared confirmation tracker, which polls the hashes of all waiting jobs in
+    # one batch per interval. Returns {tx_hash: receipt}; reverted receipts are included, hashes still
+    # pending at the deadline are not.
+    return confirmation_tracker(client).wait(tx_hashes, confirmations=confirmations, timeout=timeout, poll_interval=poll_interval)
@@ -0,0 +1,111 @@
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_RATE_LIMIT = 2.0 # Requests per second per explorer; a Hardhat verify makes several API calls
+DEFAULT_MAX_RETRIES = 6
+DEFAULT_BASE_DELAY = 5.0
+DEFAULT_MAX_DELAY = 120.0
+DEFAULT_MAX_WORKERS = 8
+
+# Explorer responses that mean "try again later" rather than "this will never verify"
+RETRYABLE_ERRORS = [
+    'rate limit',
+    'too many requests',
+    'not yet indexed',
+    'unable to locate contractcode',
+    'does not have bytecode',
+    'pending in queue',
+    'timeout',
+]
+
+def is_retryable(result):
+    if (result or {}).get('status') == 'success':
+        return False
+    error = str((result or {}).get('error', '')).lower()
+    return any(pattern in error for pattern in RETRYABLE_ERRORS)
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)
+
+class VerificationQueue:
+    # Runs verification submissions in the background: concurrent across explorers, rate limited per
+    # explorer, and retried with exponential backoff on transient explorer errors.
+
+    def __init__(self, submit, max_workers=DEFAULT_MAX_WORKERS, max_retries=DEFAULT_MAX_RETRIES,
+                 base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY, sleep=time.sleep):
+        self.submit = submit
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._buckets = {}
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, explorer, rate_limit):
+        with self._lock:
+            bucket = self._buckets.get(explorer)
+            if bucket is None:
+                bucket = TokenBucket(rate_limit, sleep=self.sleep)
+                self._buckets[explorer] = bucket
+            return bucket
+
+    def enqueue(self, job_name, params, explorer, rate_limit=DEFAULT_RATE_LIMIT):
+        bucket = self._bucket(explorer, rate_limit)
+        future = self._pool.submit(contextvars.copy_context().run, self._verify, params, bucket)
+        with self._lock:
+            self._futures[job_name] = future
+        return future
+
+    def _verify(self, params, bucket):
+        attempt = 0
+        while True:
+            bucket.acquire()
+            try:
+                result = self.submit(params)
+            except Exception as e:
+                result = {'status': 'failure', 'error': str(e)}
+            if not is_retryable(result) or attempt >= self.max_retries:
+                result = dict(result or {})
+                result['attempts'] = attempt + 1
+                return result
+            delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+            print(f"  [⏳] Verification of {params.get('contract')} on {params.get('network')} will be retried in {delay:.0f}s: {result.get('error')}")
+            self.sleep(delay)
+            attempt += 1
+
+    @property
+    def pending(self):
+        with self._lock:
+            return [job for job, future in self._futures.items() if not future.done()]
+
+    def wait(self):
+        # Barrier: blocks until every queued verification finished and returns {job_name: result}
+        with self._lock:
+            futures = dict(self._futures)
+        return {job_name: future.result() for job_name, future in futures.items()}
+
+    def close(self):
+        self._pool.shutdown(wait=True)
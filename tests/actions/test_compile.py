@@ -1,37 +1,178 @@
 import pytest
+import os
+import json
+import time
+import threading
 from unittest.mock import patch, MagicMock
 import subprocess
 
-from src.actions.compile import compile_contracts
+from src.actions.compile import compile_contracts, compute_cache_key
+from src.executor import ProcessInterrupted, StreamResult
 
-@patch('subprocess.run')
+@patch('src.actions.compile.run_streaming')
 def test_compile_contracts_success(mock_run):
-    mock_run.return_value = MagicMock(stdout="Compilation successful", stderr="", returncode=0)
+    mock_run.return_value = StreamResult(0, "Compilation successful", "", [])
     params = {'tool': 'hardhat'}
     result = compile_contracts(params)
     mock_run.assert_called_once_with(
         ["npx", "hardhat", "compile"],
         cwd="/Users/dw2022/web3-devops-toolkit/contracts",
-        capture_output=True,
-        text=True,
-        check=True
+        name='compile.subprocess'
     )
-    assert result == {'status': 'success'}
+    assert result == {'status': 'success', 'cache_hit': False}
 
-@patch('subprocess.run')
+@patch('src.actions.compile.run_streaming')
 def test_compile_contracts_failure(mock_run):
     mock_run.side_effect = subprocess.CalledProcessError(returncode=1, cmd="npx hardhat compile", stderr="Compilation failed")
     params = {'tool': 'hardhat'}
     result = compile_contracts(params)
     assert result == {'status': 'failure', 'error': 'Compilation failed'}
 
-@patch('subprocess.run', side_effect=FileNotFoundError)
+@patch('src.actions.compile.run_streaming', side_effect=FileNotFoundError)
 def test_compile_contracts_npx_not_found(mock_run):
     params = {'tool': 'hardhat'}
     result = compile_contracts(params)
     assert result == {'status': 'failure', 'error': 'npx/hardhat not found'}
 
+@patch('src.actions.compile.run_streaming', side_effect=ProcessInterrupted("Timed out: npx hardhat compile"))
+def test_compile_contracts_timeout(mock_run):
+    result = compile_contracts({'tool': 'hardhat'}, use_cache=False)
+    assert result == {'status': 'failure', 'error': 'Timed out: npx hardhat compile'}
+
 def test_compile_contracts_unsupported_tool():
     params = {'tool': 'foundry'}
     result = compile_contracts(params)
-    assert result == {'status': 'failure', 'error': f'Unsupported tool: foundry'}
\ No newline at end of file
+    assert result == {'status': 'failure', 'error': f'Unsupported tool: foundry'}
+
+@pytest.fixture
+def contracts_tree(tmp_path, monkeypatch):
+    contracts_dir = tmp_path / "contracts"
+    contracts_dir.mkdir()
+    (contracts_dir / "MyContract.sol").write_text("contract MyContract {}")
+    (contracts_dir / "hardhat.config.js").write_text('module.exports = { solidity: "0.8.20" };')
+    monkeypatch.setattr('src.actions.compile.CONTRACTS_DIR', str(contracts_dir))
+    monkeypatch.setenv('WEB3_DEVOPS_CACHE_DIR', str(tmp_path / "cache"))
+    return contracts_dir
+
+def _fake_hardhat_compile(contracts_dir):
+    def run(*args, **kwargs):
+        artifact_dir = contracts_dir.parent / "artifacts" / "MyContract.sol"
+        artifact_dir.mkdir(parents=True, exist_ok=True)
+        (artifact_dir / "MyContract.json").write_text('{"contractName": "MyContract"}')
+        return StreamResult(0, "Compiled 1 Solidity file", "", [])
+    return run
+
+def test_compute_cache_key_changes_with_sources_and_settings(contracts_tree):
+    key = compute_cache_key(str(contracts_tree))
+    assert key == compute_cache_key(str(contracts_tree))
+    (contracts_tree / "MyContract.sol").write_text("contract MyContract { uint x; }")
+    changed_source = compute_cache_key(str(contracts_tree))
+    assert changed_source != key
+    (contracts_tree / "hardhat.config.js").write_text('module.exports = { solidity: "0.8.24" };')
+    assert compute_cache_key(str(contracts_tree)) != changed_source
+
+def test_compute_cache_key_ignores_node_modules(contracts_tree):
+    key = compute_cache_key(str(contracts_tree))
+    (contracts_tree / "node_modules").mkdir()
+    (contracts_tree / "node_modules" / "Lib.sol").write_text("library Lib {}")
+    assert compute_cache_key(str(contracts_tree)) == key
+
+def test_compile_contracts_cache_hit_skips_hardhat(contracts_tree):
+    with patch('src.actions.compile.run_streaming', side_effect=_fake_hardhat_compile(contracts_tree)) as mock_run:
+        first = compile_contracts({'tool': 'hardhat'})
+        artifact = contracts_tree.parent / "artifacts" / "MyContract.sol" / "MyContract.json"
+        artifact.unlink()
+        second = compile_contracts({'tool': 'hardhat'})
+
+    assert mock_run.call_count == 1
+    assert first['cache_hit'] is False
+    assert second == {'status': 'success', 'cache_hit': True, 'cache_key': first['cache_key']}
+    assert artifact.read_text() == '{"contractName": "MyContract"}'
+
+def test_compile_contracts_cache_size_accepts_quoted_numbers(contracts_tree):
+    with patch('src.actions.compile.run_streaming', side_effect=_fake_hardhat_compile(contracts_tree)):
+        result = compile_contracts({'tool': 'hardhat', 'cache_max_size_mb': "0.5"})
+    assert result['status'] == 'success'
+
+@patch('src.actions.compile.run_streaming')
+def test_compile_contracts_invalid_cache_size(mock_run, contracts_tree):
+    result = compile_contracts({'tool': 'hardhat', 'cache_max_size_mb': "lots"})
+    mock_run.assert_not_called()
+    assert result == {'status': 'failure', 'error': "cache_max_size_mb must be a number, got 'lots'"}
+
+def test_compile_contracts_no_cache_always_compiles(contracts_tree):
+    with patch('src.actions.compile.run_streaming', side_effect=_fake_hardhat_compile(contracts_tree)) as mock_run:
+        compile_contracts({'tool': 'hardhat'}, use_cache=False)
+        result = compile_contracts({'tool': 'hardhat'}, use_cache=False)
+
+    assert mock_run.call_count == 2
+    assert result == {'status': 'success', 'cache_hit': False}
+
+def test_concurrent_compiles_of_one_tree_are_serialized(contracts_tree):
+    # Daemon runs share the artifacts directory; a restore must never interleave with another compile
+    active, overlaps = [], []
+    compile_tree = _fake_hardhat_compile(contracts_tree)
+    def slow_compile(*args, **kwargs):
+        active.append(1)
+        overlaps.append(len(active) > 1)
+        time.sleep(0.05)
+        result = compile_tree()
+        active.pop()
+        return result
+    with patch('src.actions.compile.run_streaming', side_effect=slow_compile):
+        threads = [threading.Thread(target=compile_contracts, args=({'tool': 'hardhat'}, False)) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert overlaps == [False, False, False]
+
+@patch('src.actions.compile.run_streaming')
+def test_compile_contracts_with_persistent_worker(mock_run):
+    workers = MagicMock()
+    result = compile_contracts({'tool': 'hardhat'}, use_cache=False, workers=workers)
+    mock_run.assert_not_called()
+    workers.get.return_value.call.assert_called_once_with('compile')
+    assert result == {'status': 'success', 'cache_hit': False}
+
+def _fake_shard_compile(*args, **kwargs):
+    # Writes an artifact per listed source into the shard's own artifacts directory
+    env = kwargs['env']
+    with open(env['HARDHAT_SHARD_SOURCES']) as f:
+        sources = json.load(f)
+    for source in sources:
+        artifact_dir = os.path.join(env['HARDHAT_ARTIFACTS_DIR'], source)
+        os.makedirs(artifact_dir, exist_ok=True)
+        name = os.path.splitext(os.path.basename(source))[0]
+        with open(os.path.join(artifact_dir, f"{name}.json"), 'w') as f:
+            json.dump({'contractName': name}, f)
+    return StreamResult(0, f"Compiled {len(sources)} Solidity files", "", [])
+
+def test_compile_contracts_in_parallel_shards(contracts_tree):
+    (contracts_tree / "Token.sol").write_text('import "./Math.sol"; contract Token {}')
+    (contracts_tree / "Math.sol").write_text('library Math {}')
+    stale = contracts_tree.parent / "artifacts" / "Removed.sol"
+    stale.mkdir(parents=True)
+    with patch('src.actions.compile.run_streaming', side_effect=_fake_shard_compile) as mock_run:
+        result = compile_contracts({'tool': 'hardhat', 'max_parallel': 4}, use_cache=False)
+
+    assert result == {'status': 'success', 'cache_hit': False, 'shards': 2}
+    shard_sources = sorted(sorted(json.load(open(call.kwargs['env']['HARDHAT_SHARD_SOURCES']))) for call in mock_run.call_args_list)
+    assert shard_sources == [['Math.sol', 'Token.sol'], ['MyContract.sol']]
+    artifacts = contracts_tree.parent / "artifacts"
+    assert sorted(os.listdir(artifacts)) == ['Math.sol', 'MyContract.sol', 'Token.sol']
+
+def test_compile_contracts_failed_shard_keeps_previous_artifacts(contracts_tree):
+    (contracts_tree / "Token.sol").write_text('contract Token {}')
+    previous = contracts_tree.parent / "artifacts" / "MyContract.sol"
+    previous.mkdir(parents=True)
+    def compile_shard(*args, **kwargs):
+        if 'Token.sol' in open(kwargs['env']['HARDHAT_SHARD_SOURCES']).read():
+            raise subprocess.CalledProcessError(1, args[0], stderr="ParserError")
+        return _fake_shard_compile(*args, **kwargs)
+    with patch('src.actions.compile.run_streaming', side_effect=compile_shard) as mock_run:
+        result = compile_contracts({'tool': 'hardhat', 'max_parallel': 2}, use_cache=False)
+
+    assert mock_run.call_count == 2
+    assert result == {'status': 'failure', 'error': 'ParserError'}
+    assert os.listdir(contracts_tree.parent / "artifacts") == ['MyContract.sol']
@@ -5,6 +5,8 @@ import subprocess
 from unittest.mock import patch, MagicMock, mock_open
 
 from src.actions.deploy import deploy_contract, _clean_env
+from src.executor import StreamResult, extract_events
+from src.hardhat_worker import HardhatWorkerError
 
 # Mock networks.json content
 MOCK_NETWORKS_CONTENT = {
@@ -14,28 +16,27 @@ MOCK_NETWORKS_CONTENT = {
   }
 }
 
-@patch('subprocess.run')
+@patch('src.actions.deploy.run_streaming')
 def test_deploy_contract_success(mock_run):
-    mock_run.return_value = MagicMock(stdout="MyContract deployed to 0x1234567890123456789012345678901234567890", stderr="", returncode=0)
+    mock_run.return_value = StreamResult(0, "", "", [{'type': 'deployed', 'contract': 'MyContract', 'address': '0x1234567890123456789012345678901234567890'}])
     params = {'network': 'localhost', 'contract': 'MyContract', 'args': ["Hello"]}
     deployed_contracts = {}
     result = deploy_contract(params, "/mock/pipeline/path/pipeline.yaml", deployed_contracts, networks_config=MOCK_NETWORKS_CONTENT)
 
     expected_env = _clean_env(os.environ.copy())
     expected_env["INITIAL_GREETING"] = "Hello"
+    expected_env["DEPLOY_WAIT"] = "0"
 
     mock_run.assert_called_once_with(
         ["npx", "hardhat", "run", "scripts/deploy.js", "--network", "localhost"],
         cwd="/Users/dw2022/web3-devops-toolkit/contracts",
-        capture_output=True,
-        text=True,
-        check=True,
-        env=expected_env
+        env=expected_env,
+        name='deploy.subprocess'
     )
     assert result == {'status': 'success', 'address': '0x1234567890123456789012345678901234567890'}
     assert deployed_contracts['MyContract'] == '0x1234567890123456789012345678901234567890'
 
-@patch('subprocess.run')
+@patch('src.actions.deploy.run_streaming')
 def test_deploy_contract_failure(mock_run):
     mock_run.side_effect = subprocess.CalledProcessError(returncode=1, cmd="npx hardhat run", stderr="Deployment failed")
     params = {'network': 'localhost', 'contract': 'MyContract'}
@@ -43,6 +44,30 @@ def test_deploy_contract_failure(mock_run):
     result = deploy_contract(params, "/mock/pipeline/path/pipeline.yaml", deployed_contracts, networks_config=MOCK_NETWORKS_CONTENT)
     assert result == {'status': 'failure', 'error': 'Deployment failed'}
 
+@patch('src.actions.deploy.run_streaming')
+def test_deploy_contract_reports_streamed_tx_hash_and_gas(mock_run):
+    lines = [
+        "Deployment transaction: 0x" + "ab" * 32,
+        "Gas used: 482113",
+        "MyContract deployed to 0x1234567890123456789012345678901234567890",
+    ]
+    mock_run.return_value = StreamResult(0, "\n".join(lines), "", [event for line in lines for event in extract_events(line)])
+    params = {'network': 'localhost', 'contract': 'MyContract'}
+    result = deploy_contract(params, "/mock/pipeline/path/pipeline.yaml", {}, networks_config=MOCK_NETWORKS_CONTENT)
+    assert result == {
+        'status': 'success',
+        'address': '0x1234567890123456789012345678901234567890',
+        'tx_hash': '0x' + 'ab' * 32,
+        'gas_used': 482113,
+    }
+
+@patch('src.actions.deploy.run_streaming')
+def test_deploy_contract_without_address_in_output(mock_run):
+    mock_run.return_value = StreamResult(0, "Nothing to see", "", [])
+    params = {'network': 'localhost', 'contract': 'MyContract'}
+    result = deploy_contract(params, "/mock/pipeline/path/pipeline.yaml", {}, networks_config=MOCK_NETWORKS_CONTENT)
+    assert result == {'status': 'failure', 'error': 'Could not extract address'}
+
 def test_deploy_contract_networks_file_not_found():
     params = {'network': 'localhost', 'contract': 'MyContract'}
     deployed_contracts = {}
@@ -60,4 +85,103 @@ def test_deploy_contract_rpc_url_not_configured():
     deployed_contracts = {}
     networks_config_missing_rpc = {"localhost": {}}
     result = deploy_contract(params, "/mock/pipeline/path/pipeline.yaml", deployed_contracts, networks_config=networks_config_missing_rpc)
-    assert result == {'status': 'failure', 'error': 'RPC URL not configured'}
\ No newline at end of file
+    assert result == {'status': 'failure', 'error': 'RPC URL not configured'}
+
+@patch('src.actions.deploy.wait_for_receipt', return_value={'gasUsed': '0x5208', 'blockNumber': '0x7'})
+@patch('src.actions.deploy.run_streaming')
+def test_deploy_contract_with_persistent_worker(mock_run, mock_wait):
+    workers = MagicMock()
+    workers.get.return_value.call.return_value = {'address': '0x1234567890123456789012345678901234567890', 'txHash': '0xabc'}
+    params = {'network': 'localhost', 'contract': 'MyContract', 'args': ["Hello"], 'confirmations': 3}
+    deployed_contracts = {}
+    result = deploy_contract(params, "/mock/pipeline/path/pipeline.yaml", deployed_contracts, networks_config=MOCK_NETWORKS_CONTENT, workers=workers)
+
+    mock_run.assert_not_called()
+    workers.get.assert_called_once_with('localhost')
+    # The worker only sends the transaction; it is confirmed on the runner's shared tracker
+    workers.get.return_value.call.assert_called_once_with('deploy', {'contract': 'MyContract', 'args': ["Hello"], 'wait': False})
+    assert mock_wait.call_args.args[1] == '0xabc'
+    assert mock_wait.call_args.kwargs['confirmations'] == 3
+    assert result == {
+        'status': 'success',
+        'address': '0x1234567890123456789012345678901234567890',
+        'tx_hash': '0xabc',
+        'gas_used': 21000,
+        'block_number': 7,
+    }
+    assert deployed_contracts['MyContract'] == '0x1234567890123456789012345678901234567890'
+
+def test_deploy_contract_with_persistent_worker_failure():
+    workers = MagicMock()
+    workers.get.return_value.call.side_effect = HardhatWorkerError("insufficient funds")
+    params = {'network': 'localhost', 'contract': 'MyContract'}
+    result = deploy_contract(params, "/mock/pipeline/path/pipeline.yaml", {}, networks_config=MOCK_NETWORKS_CONTENT, workers=workers)
+    assert result == {'status': 'failure', 'error': 'insufficient funds'}
+
+@pytest.fixture
+def artifacts_dir(tmp_path):
+    artifact_dir = tmp_path / "artifacts" / "MyContract.sol"
+    artifact_dir.mkdir(parents=True)
+    artifact = {
+        'contractName': 'MyContract',
+        'abi': [{'type': 'constructor', 'inputs': [{'name': '_greeting', 'type': 'string'}]}],
+        'bytecode': '0x6080',
+    }
+    (artifact_dir / "MyContract.json").write_text(json.dumps(artifact))
+    return str(tmp_path / "artifacts")
+
+@pytest.fixture
+def rpc_node():
+    from tests.fake_rpc import FakeRpcNode
+    with FakeRpcNode(receipt_delay_polls=1) as node:
+        yield node
+
+@patch('src.actions.deploy.run_streaming')
+def test_deploy_contract_native_engine(mock_run, rpc_node, artifacts_dir, monkeypatch):
+    monkeypatch.delenv('PRIVATE_KEY', raising=False)
+    params = {'network': 'localhost', 'contract': 'MyContract', 'args': ["Hello"], 'engine': 'native',
+              'artifacts_dir': artifacts_dir, 'poll_interval': 0.01}
+    deployed_contracts = {}
+    networks_config = {'localhost': {'rpc_url': rpc_node.url, 'chain_id': 31337}}
+    result = deploy_contract(params, "/mock/pipeline/path/pipeline.yaml", deployed_contracts, networks_config=networks_config)
+
+    mock_run.assert_not_called()
+    assert result['status'] == 'success'
+    assert result['address'] == rpc_node.transactions[result['tx_hash']]['contractAddress']
+    assert deployed_contracts['MyContract'] == result['address']
+    # Nonce, gas price, chain id and gas estimate go out in one batch
+    assert rpc_node.http_requests == 5  # eth_accounts, batch, send, two receipt polls
+    assert rpc_node.connections == 1
+    sent = [params for method, params in rpc_node.requests if method == 'eth_sendTransaction'][0][0]
+    assert sent['data'].startswith('0x6080' + '00' * 31 + '20')
+    assert sent['nonce'] == '0x0'
+
+def test_deploy_contract_native_engine_missing_artifact(rpc_node, tmp_path):
+    params = {'network': 'localhost', 'contract': 'Missing', 'engine': 'native', 'artifacts_dir': str(tmp_path)}
+    networks_config = {'localhost': {'rpc_url': rpc_node.url}}
+    result = deploy_contract(params, "/mock/pipeline/path/pipeline.yaml", {}, networks_config=networks_config)
+    assert result == {'status': 'failure', 'error': 'Artifact not found'}
+
+def test_deploy_contract_unsupported_engine():
+    params = {'network': 'localhost', 'contract': 'MyContract', 'engine': 'foundry'}
+    result = deploy_contract(params, "/mock/pipeline/path/pipeline.yaml", {}, networks_config=MOCK_NETWORKS_CONTENT)
+    assert result == {'status': 'failure', 'error': 'Unsupported engine: foundry'}
+
+# Hardhat/anvil's well-known first dev account
+DEV_PRIVATE_KEY = '0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80'
+
+def test_deploy_contract_native_engine_signs_with_private_key(rpc_node, artifacts_dir, monkeypatch):
+    monkeypatch.delenv('PRIVATE_KEY', raising=False)
+    params = {'network': 'localhost', 'contract': 'MyContract', 'args': ["Hello"], 'engine': 'native',
+              'artifacts_dir': artifacts_dir, 'poll_interval': 0.01}
+    networks_config = {'localhost': {'rpc_url': rpc_node.url, 'chain_id': 31337, 'private_key': DEV_PRIVATE_KEY}}
+    result = deploy_contract(params, "/mock/pipeline/path/pipeline.yaml", {}, networks_config=networks_config)
+
+    assert result['status'] == 'success'
+    assert 'eth_accounts' not in rpc_node.methods()
+    assert 'eth_sendTransaction' not in rpc_node.methods()
+    signed = rpc_node.raw_transactions[0]
+    assert signed['from'] == '0xf39fd6e51aad88f6f4ce6ab8827279cfffb92266'
+    assert signed['nonce'] == 0
+    assert signed['v'] in (31337 * 2 + 35, 31337 * 2 + 36) # EIP-155 replay protection
+    assert result['address'] == rpc_node.transactions[result['tx_hash']]['contractAddress']
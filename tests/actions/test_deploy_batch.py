@@ -0,0 +1,82 @@
+import json
+import pytest
+
+from src.actions.deploy_batch import deploy_batch
+from tests.fake_rpc import FakeRpcNode, RpcFault
+
+@pytest.fixture
+def artifacts_dir(tmp_path):
+    for name, inputs in [('Token', []), ('Greeter', [{'name': '_greeting', 'type': 'string'}])]:
+        artifact_dir = tmp_path / "artifacts" / f"{name}.sol"
+        artifact_dir.mkdir(parents=True)
+        artifact = {'contractName': name, 'abi': [{'type': 'constructor', 'inputs': inputs}], 'bytecode': '0x6080'}
+        (artifact_dir / f"{name}.json").write_text(json.dumps(artifact))
+    return str(tmp_path / "artifacts")
+
+@pytest.fixture
+def nodes():
+    with FakeRpcNode(chain_id=1, receipt_delay_polls=2) as first, FakeRpcNode(chain_id=2, receipt_delay_polls=2) as second:
+        yield {'alpha': first, 'beta': second}
+
+def _params(artifacts_dir, **overrides):
+    params = {
+        'contracts': ['Token', {'contract': 'Greeter', 'args': ['Hi']}],
+        'networks': ['alpha', 'beta'],
+        'artifacts_dir': artifacts_dir,
+        'poll_interval': 0.01,
+    }
+    params.update(overrides)
+    return params
+
+def test_deploy_batch_pipelines_nonces_and_batches_receipts(nodes, artifacts_dir, monkeypatch):
+    monkeypatch.delenv('PRIVATE_KEY', raising=False)
+    networks_config = {name: {'rpc_url': node.url} for name, node in nodes.items()}
+    deployed_contracts = {}
+    result = deploy_batch(_params(artifacts_dir), deployed_contracts, networks_config=networks_config)
+
+    assert result['status'] == 'success'
+    for name, node in nodes.items():
+        sends = [params[0] for method, params in node.requests if method == 'eth_sendTransaction']
+        assert [send['nonce'] for send in sends] == ['0x0', '0x1']
+        # Both deployments are sent before the first receipt poll
+        methods = node.methods()
+        assert methods.index('eth_getTransactionReceipt') > max(i for i, m in enumerate(methods) if m == 'eth_sendTransaction')
+        # One nonce lookup for the whole network, and receipts polled in batches
+        assert methods.count('eth_getTransactionCount') == 1
+        assert node.http_requests == 1 + 1 + 2 + 3  # eth_accounts, context batch, two sends, three receipt polls
+        assert set(result['addresses'][name]) == {'Token', 'Greeter'}
+        assert result['addresses'][name]['Token'] == node.transactions[result['tx_hashes'][name]['Token']]['contractAddress']
+    assert deployed_contracts['Greeter'] in result['addresses']['beta'].values()
+
+def test_deploy_batch_stops_submitting_after_a_send_fails(nodes, artifacts_dir, monkeypatch):
+    monkeypatch.delenv('PRIVATE_KEY', raising=False)
+
+    def reject(transaction):
+        raise RpcFault(-32000, 'insufficient funds')
+    nodes['beta'].handlers['eth_sendTransaction'] = reject
+
+    networks_config = {name: {'rpc_url': node.url} for name, node in nodes.items()}
+    result = deploy_batch(_params(artifacts_dir), {}, networks_config=networks_config)
+
+    assert result['status'] == 'failure'
+    assert set(result['addresses']['alpha']) == {'Token', 'Greeter'}
+    assert result['errors'] == {'beta': {'Token': 'insufficient funds', 'Greeter': 'Not submitted after Token failed'}}
+
+def test_deploy_batch_unknown_network(artifacts_dir):
+    result = deploy_batch(_params(artifacts_dir, networks=['missing']), {}, networks_config={})
+    assert result == {'status': 'failure', 'error': 'Network missing not found'}
+
+def test_deploy_batch_requires_contracts_and_networks():
+    result = deploy_batch({'contracts': [], 'networks': ['alpha']}, {}, networks_config={})
+    assert result == {'status': 'failure', 'error': 'No contracts or networks to deploy'}
+
+def test_deploy_batch_fails_over_to_a_backup_endpoint(nodes, artifacts_dir, monkeypatch):
+    monkeypatch.delenv('PRIVATE_KEY', raising=False)
+    with FakeRpcNode(chain_id=1) as primary:
+        primary_url = primary.url
+    networks_config = {'alpha': {'rpc_url': primary_url, 'rpc_urls': [nodes['alpha'].url], 'rpc_health_interval': 0}}
+    result = deploy_batch(_params(artifacts_dir, networks=['alpha']), {}, networks_config=networks_config)
+
+    assert result['status'] == 'success'
+    assert set(result['addresses']['alpha']) == {'Token', 'Greeter'}
+    assert nodes['alpha'].methods().count('eth_sendTransaction') == 2
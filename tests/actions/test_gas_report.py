@@ -0,0 +1,112 @@
+import json
+import pytest
+
+from src.abi import function_selector
+from src.actions.gas_report import compare_gas, gas_report
+from tests.fake_rpc import FakeRpcNode
+
+DEV_PRIVATE_KEY = '0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80'
+TRANSFER = '0x' + function_selector('transfer(address,uint256)')
+
+@pytest.fixture
+def artifacts_dir(tmp_path):
+    artifact_dir = tmp_path / "artifacts" / "Token.sol"
+    artifact_dir.mkdir(parents=True)
+    abi = [
+        {'type': 'constructor', 'inputs': [{'name': 'supply', 'type': 'uint256'}]},
+        {'type': 'function', 'name': 'transfer', 'inputs': [{'type': 'address'}, {'type': 'uint256'}]},
+        {'type': 'function', 'name': 'pause', 'inputs': []},
+    ]
+    (artifact_dir / "Token.json").write_text(json.dumps({'contractName': 'Token', 'abi': abi, 'bytecode': '0x6080'}))
+    return str(tmp_path / "artifacts")
+
+@pytest.fixture
+def node(monkeypatch):
+    monkeypatch.delenv('PRIVATE_KEY', raising=False)
+    with FakeRpcNode() as node:
+        yield node
+
+def _params(artifacts_dir, **overrides):
+    params = {
+        'network': 'dev',
+        'contracts': [{
+            'contract': 'Token',
+            'args': [1000],
+            'calls': [
+                {'function': 'transfer', 'inputs': [['0x' + '11' * 20, 1], ['0x' + '22' * 20, 2], ['0x' + '33' * 20, 3]]},
+                {'function': 'pause'},
+            ],
+        }],
+        'artifacts_dir': artifacts_dir,
+        'poll_interval': 0.01,
+    }
+    params.update(overrides)
+    return params
+
+def _run(node, artifacts_dir, state_dir, **overrides):
+    networks_config = {'dev': {'rpc_url': node.url, 'chain_id': 31337}}
+    return gas_report(_params(artifacts_dir, **overrides), str(state_dir / "pipelines" / "p.yaml"), networks_config, state_dir=str(state_dir))
+
+def test_first_run_reports_gas_and_creates_the_baseline(node, artifacts_dir, tmp_path):
+    node.call_gas[TRANSFER] = 50_000
+    result = _run(node, artifacts_dir, tmp_path)
+
+    assert result['status'] == 'success'
+    assert result['baseline_updated'] is True
+    token = result['report']['Token']
+    assert token['deployment'] == 21000 + 35 * 16 # The fake node charges 16 gas per character pair of the creation data
+    assert token['functions']['transfer'] == {'min': 50_000, 'median': 50_000, 'max': 50_000, 'calls': 3}
+    assert token['functions']['pause']['calls'] == 1
+    baseline = json.loads((tmp_path / "gas-baseline.json").read_text())
+    assert baseline['contracts']['Token']['functions']['transfer']['median'] == 50_000
+    # Each measurement is stored under the contract's creation code hash
+    stored = json.loads((tmp_path / "gas-reports" / f"{token['code_hash']}.json").read_text())
+    assert stored['contract'] == 'Token' and stored['args'] == [1000]
+
+def test_regression_past_the_threshold_fails(node, artifacts_dir, tmp_path):
+    node.call_gas[TRANSFER] = 50_000
+    _run(node, artifacts_dir, tmp_path)
+
+    node.call_gas[TRANSFER] = 51_000 # +2%, within the default 5%
+    assert _run(node, artifacts_dir, tmp_path)['status'] == 'success'
+
+    node.call_gas[TRANSFER] = 60_000
+    result = _run(node, artifacts_dir, tmp_path)
+    assert result['status'] == 'failure'
+    assert {(change['metric'], change['change_pct']) for change in result['regressions']} == {('transfer.median', 20.0), ('transfer.max', 20.0)}
+    assert 'baseline_updated' not in result
+
+    # Accepting the new figures rewrites the baseline
+    assert _run(node, artifacts_dir, tmp_path, update_baseline=True)['baseline_updated'] is True
+    assert _run(node, artifacts_dir, tmp_path)['status'] == 'success'
+
+def test_baseline_path_is_relative_to_the_project(node, artifacts_dir, tmp_path):
+    result = _run(node, artifacts_dir, tmp_path, baseline='gas/baseline.json', max_regression=1)
+    assert result['baseline'] == str(tmp_path / "gas" / "baseline.json")
+    assert (tmp_path / "gas" / "baseline.json").exists()
+
+def test_signed_calls(node, artifacts_dir, tmp_path):
+    node.call_gas[TRANSFER] = 40_000
+    networks_config = {'dev': {'rpc_url': node.url, 'chain_id': 31337, 'private_key': DEV_PRIVATE_KEY}}
+    result = gas_report(_params(artifacts_dir), str(tmp_path / "pipelines" / "p.yaml"), networks_config, state_dir=str(tmp_path))
+    assert result['status'] == 'success'
+    assert result['report']['Token']['functions']['transfer']['max'] == 40_000
+    assert 'eth_sendTransaction' not in node.methods()
+
+def test_refuses_live_networks(artifacts_dir, tmp_path):
+    networks_config = {'goerli': {'rpc_url': 'https://goerli.example', 'chain_id': 5}}
+    result = gas_report(_params(artifacts_dir, network='goerli'), str(tmp_path / "p.yaml"), networks_config, state_dir=str(tmp_path))
+    assert result == {'status': 'failure', 'error': 'Network goerli is not a local dev chain'}
+
+def test_invalid_calls_are_rejected(artifacts_dir, tmp_path):
+    params = _params(artifacts_dir, contracts=[{'contract': 'Token', 'calls': [{'function': 'transfer', 'inputs': 'oops'}]}])
+    result = gas_report(params, str(tmp_path / "p.yaml"), {}, state_dir=str(tmp_path))
+    assert result['status'] == 'failure'
+    assert "'inputs' must be a list" in result['error']
+
+def test_compare_gas_ignores_new_functions():
+    baseline = {'Token': {'deployment': 100_000, 'functions': {'transfer': {'median': 50_000, 'max': 50_000}}}}
+    report = {'Token': {'deployment': 90_000, 'functions': {'transfer': {'median': 50_000, 'max': 50_000}, 'mint': {'median': 1, 'max': 1}}}}
+    regressions, improvements = compare_gas(baseline, report)
+    assert regressions == []
+    assert improvements == [{'contract': 'Token', 'metric': 'deployment', 'baseline': 100_000, 'current': 90_000, 'change_pct': -10.0}]
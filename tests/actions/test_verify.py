@@ -5,6 +5,7 @@ import subprocess
 from unittest.mock import patch, MagicMock, mock_open
 
 from src.actions.verify import verify_contract, _clean_env
+from src.executor import StreamResult
 
 # Mock networks.json content
 MOCK_NETWORKS_CONTENT = {
@@ -15,9 +16,9 @@ MOCK_NETWORKS_CONTENT = {
   }
 }
 
-@patch('subprocess.run')
+@patch('src.actions.verify.run_streaming')
 def test_verify_contract_success_with_address_param(mock_run):
-    mock_run.return_value = MagicMock(stdout="Verification successful", stderr="", returncode=0)
+    mock_run.return_value = StreamResult(0, "Verification successful", "", [])
     params = {'network': 'localhost', 'contract': 'MyContract', 'address': '0xabcdef'}
     deployed_contracts = {}
     result = verify_contract(params, "/mock/pipeline/path/pipeline.yaml", deployed_contracts, networks_config=MOCK_NETWORKS_CONTENT)
@@ -28,16 +29,14 @@ def test_verify_contract_success_with_address_param(mock_run):
     mock_run.assert_called_once_with(
         ["npx", "hardhat", "verify", "--network", "localhost", "0xabcdef"],
         cwd="/Users/dw2022/web3-devops-toolkit/contracts",
-        capture_output=True,
-        text=True,
-        check=True,
-        env=expected_env
+        env=expected_env,
+        name='verify.subprocess'
     )
     assert result == {'status': 'success'}
 
-@patch('subprocess.run')
+@patch('src.actions.verify.run_streaming')
 def test_verify_contract_success_with_deployed_contracts(mock_run):
-    mock_run.return_value = MagicMock(stdout="Verification successful", stderr="", returncode=0)
+    mock_run.return_value = StreamResult(0, "Verification successful", "", [])
     params = {'network': 'localhost', 'contract': 'MyContract'}
     deployed_contracts = {'MyContract': '0xabcdef'}
     result = verify_contract(params, "/mock/pipeline/path/pipeline.yaml", deployed_contracts, networks_config=MOCK_NETWORKS_CONTENT)
@@ -48,14 +47,12 @@ def test_verify_contract_success_with_deployed_contracts(mock_run):
     mock_run.assert_called_once_with(
         ["npx", "hardhat", "verify", "--network", "localhost", "0xabcdef"],
         cwd="/Users/dw2022/web3-devops-toolkit/contracts",
-        capture_output=True,
-        text=True,
-        check=True,
-        env=expected_env
+        env=expected_env,
+        name='verify.subprocess'
     )
     assert result == {'status': 'success'}
 
-@patch('subprocess.run')
+@patch('src.actions.verify.run_streaming')
 def test_verify_contract_failure(mock_run):
     mock_run.side_effect = subprocess.CalledProcessError(returncode=1, cmd="npx hardhat verify", stderr="Verification failed")
     params = {'network': 'localhost', 'contract': 'MyContract', 'address': '0xabcdef'}
@@ -87,3 +84,15 @@ def test_verify_contract_no_address_provided():
     deployed_contracts = {}
     result = verify_contract(params, "/mock/pipeline/path/pipeline.yaml", deployed_contracts, networks_config=MOCK_NETWORKS_CONTENT)
     assert result == {'status': 'failure', 'error': 'No address to verify'}
+
+@patch('src.actions.verify.run_streaming')
+def test_verify_contract_with_persistent_worker(mock_run):
+    workers = MagicMock()
+    workers.get.return_value.call.return_value = {}
+    params = {'network': 'localhost', 'contract': 'MyContract', 'address': '0xabcdef'}
+    result = verify_contract(params, "/mock/pipeline/path/pipeline.yaml", {}, networks_config=MOCK_NETWORKS_CONTENT, workers=workers)
+
+    mock_run.assert_not_called()
+    workers.get.assert_called_once_with('localhost')
+    workers.get.return_value.call.assert_called_once_with('verify', {'address': '0xabcdef', 'apiKey': 'mock_etherscan_key'})
+    assert result == {'status': 'success'}
@@ -0,0 +1,220 @@
+import copy
+import json
+import time
+import hashlib
+import argparse
+import threading
+import rlp
+from eth_account import Account
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Minimal automining JSON-RPC node for tests: unlocked accounts, contract creation, receipts,
+# evm_snapshot/evm_revert.
+# Run standalone with `python -m tests.fake_rpc --port 8545`.
+
+DEFAULT_ACCOUNT = '0xf39fd6e51aad88f6f4ce6ab8827279cfffb92266'
+
+class FakeRpcNode:
+    def __init__(self, chain_id=31337, receipt_delay_polls=0, port=0, accounts=None, latency=0):
+        self.chain_id = chain_id
+        self.latency = latency # Seconds added to every HTTP request, to mimic a remote node
+        self.http_status = 200 # Set to e.g. 503 to mimic a failing provider
+        self.receipt_delay_polls = receipt_delay_polls
+        self.accounts = accounts or [DEFAULT_ACCOUNT]
+        self.nonces = {}
+        self.block_number = 0
+        self.transactions = {}
+        self.receipt_polls = {}
+        self.code = {}
+        self.call_gas = {} # 4-byte selector (0x...) -> gas used by calls to it, instead of the default
+        self.raw_transactions = []
+        self.snapshots = []
+        self.requests = [] # (method, params) in arrival order
+        self.http_requests = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+        self.handlers = {}
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def methods(self):
+        return [method for method, _ in self.requests]
+
+    def _handler_class(self):
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1' # keep-alive
+
+            def setup(self):
+                super().setup()
+                with node.lock:
+                    node.connections += 1
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                with node.lock:
+                    node.http_requests += 1
+                if node.latency:
+                    time.sleep(node.latency)
+                if node.http_status != 200:
+                    self.send_response(node.http_status)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                payload = json.loads(body)
+                if isinstance(payload, list):
+                    response = [node.handle(request) for request in payload]
+                else:
+                    response = node.handle(payload)
+                data = json.dumps(response).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def handle(self, request):
+        method, params = request.get('method'), request.get('params', [])
+        with self.lock:
+            self.requests.append((method, params))
+        handler = self.handlers.get(method) or getattr(self, 'rpc_' + method, None)
+        try:
+            if handler is None:
+                raise RpcFault(-32601, f'Method not found: {method}')
+            result = handler(*params)
+        except RpcFault as e:
+            return {'jsonrpc': '2.0', 'id': request.get('id'), 'error': {'code': e.code, 'message': str(e)}}
+        return {'jsonrpc': '2.0', 'id': request.get('id'), 'result': result}
+
+    def _mine(self, sender, data, nonce=None, to=None):
+        with self.lock:
+            sender = sender.lower()
+            expected = self.nonces.get(sender, 0)
+            nonce = expected if nonce is None else nonce
+            if nonce != expected:
+                raise RpcFault(-32000, f'nonce too high/low: expected {expected}, got {nonce}')
+            self.nonces[sender] = nonce + 1
+            self.block_number += 1
+            tx_hash = '0x' + hashlib.sha256(f'{sender}:{nonce}:{data}'.encode()).hexdigest()
+            if to is None:
+                address = '0x' + hashlib.sha256(f'{sender}:{nonce}'.encode()).hexdigest()[:40]
+                self.code[address] = data
+                gas_used = 21000 + len(data) // 2 * 16
+            else:
+                address = None
+                gas_used = self.call_gas.get(data[:10], 21000 + len(data) // 2 * 16)
+            self.transactions[tx_hash] = {
+                'transactionHash': tx_hash,
+                'blockNumber': hex(self.block_number),
+                'contractAddress': address,
+                'from': sender,
+                'to': to,
+                'gasUsed': hex(gas_used),
+                'status': '0x1',
+            }
+            return tx_hash
+
+    def rpc_eth_chainId(self):
+        return hex(self.chain_id)
+
+    def rpc_eth_gasPrice(self):
+        return hex(1_000_000_000)
+
+    def rpc_eth_accounts(self):
+        return list(self.accounts)
+
+    def rpc_eth_blockNumber(self):
+        return hex(self.block_number)
+
+    def rpc_eth_getTransactionCount(self, address, block='latest'):
+        return hex(self.nonces.get(address.lower(), 0))
+
+    def rpc_eth_estimateGas(self, transaction, *args):
+        return hex(100_000)
+
+    def rpc_eth_sendTransaction(self, transaction):
+        nonce = int(transaction['nonce'], 16) if 'nonce' in transaction else None
+        return self._mine(transaction['from'], transaction.get('data', '0x'), nonce, transaction.get('to'))
+
+    def rpc_eth_sendRawTransaction(self, raw):
+        # Legacy (EIP-155) transactions: [nonce, gasPrice, gas, to, value, data, v, r, s]
+        fields = rlp.decode(bytes.fromhex(raw[2:]))
+        sender = Account.recover_transaction(raw)
+        self.raw_transactions.append({'from': sender.lower(), 'nonce': int.from_bytes(fields[0], 'big'), 'v': int.from_bytes(fields[6], 'big')})
+        to = '0x' + fields[3].hex() if fields[3] else None
+        return self._mine(sender, '0x' + fields[5].hex(), int.from_bytes(fields[0], 'big'), to)
+
+    def rpc_eth_getTransactionReceipt(self, tx_hash):
+        with self.lock:
+            polls = self.receipt_polls.get(tx_hash, 0)
+            self.receipt_polls[tx_hash] = polls + 1
+            if polls < self.receipt_delay_polls:
+                return None
+            return self.transactions.get(tx_hash)
+
+    def rpc_eth_getCode(self, address, block='latest'):
+        return self.code.get(address.lower(), '0x')
+
+    def _state(self):
+        return copy.deepcopy((self.nonces, self.block_number, self.transactions, self.code))
+
+    def rpc_evm_snapshot(self):
+        with self.lock:
+            self.snapshots.append(self._state())
+            return hex(len(self.snapshots))
+
+    def rpc_evm_revert(self, snapshot_id):
+        # Like Hardhat and Anvil: reverting drops the snapshot and every later one
+        with self.lock:
+            index = int(snapshot_id, 16) - 1
+            if not 0 <= index < len(self.snapshots):
+                return False
+            self.nonces, self.block_number, self.transactions, self.code = self.snapshots[index]
+            del self.snapshots[index:]
+            return True
+
+class RpcFault(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake JSON-RPC node for tests")
+    parser.add_argument("--port", type=int, default=8545)
+    parser.add_argument("--chain-id", type=int, default=31337)
+    args = parser.parse_args()
+    node = FakeRpcNode(chain_id=args.chain_id, port=args.port)
+    print(f"Fake RPC node listening on {node.url}", flush=True)
+    node._server.serve_forever()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+import pytest
+
+from src.abi import encode_constructor_args, encode_function_call, encode_values, function_selector
+
+def _words(data):
+    return [data[i:i + 32].hex() for i in range(0, len(data), 32)]
+
+def test_encode_static_values():
+    encoded = encode_values(['uint256', 'bool', 'address'], [1, True, '0x' + '11' * 20])
+    assert _words(encoded) == [
+        '00' * 31 + '01',
+        '00' * 31 + '01',
+        '00' * 12 + '11' * 20,
+    ]
+
+def test_encode_negative_int():
+    assert encode_values(['int8'], [-1]).hex() == 'ff' * 32
+    with pytest.raises(ValueError):
+        encode_values(['int8'], [128])
+
+def test_encode_string_uses_offset_and_padding():
+    encoded = encode_values(['string', 'uint8'], ['Hello', 7])
+    assert _words(encoded) == [
+        '00' * 31 + '40',  # offset of the string data
+        '00' * 31 + '07',
+        '00' * 31 + '05',  # length
+        b'Hello'.hex() + '00' * 27,
+    ]
+
+def test_encode_dynamic_and_fixed_arrays():
+    encoded = encode_values(['uint256[2]', 'uint256[]'], [[1, 2], [3]])
+    assert _words(encoded) == [
+        '00' * 31 + '01',
+        '00' * 31 + '02',
+        '00' * 31 + '60',  # offset after the inlined fixed array and this word
+        '00' * 31 + '01',
+        '00' * 31 + '03',
+    ]
+
+def test_encode_constructor_args_from_abi():
+    abi = [
+        {'type': 'function', 'name': 'setGreeting', 'inputs': [{'type': 'string'}]},
+        {'type': 'constructor', 'inputs': [{'name': '_greeting', 'type': 'string'}]},
+    ]
+    assert encode_constructor_args(abi, ['Hi']) == encode_values(['string'], ['Hi']).hex()
+    assert encode_constructor_args([], []) == ''
+    with pytest.raises(ValueError, match="Expected 1 arguments"):
+        encode_constructor_args(abi, [])
+
+def test_encode_function_call():
+    abi = [
+        {'type': 'function', 'name': 'transfer', 'inputs': [{'type': 'address'}, {'type': 'uint256'}]},
+        {'type': 'function', 'name': 'mint', 'inputs': [{'type': 'uint256'}]},
+        {'type': 'function', 'name': 'mint', 'inputs': [{'type': 'address'}, {'type': 'uint256'}]},
+    ]
+    data = encode_function_call(abi, 'transfer', ['0x' + '11' * 20, 5])
+    assert data == '0xa9059cbb' + '00' * 12 + '11' * 20 + '00' * 31 + '05'
+    # Overloads are told apart by argument count, or by the full signature
+    assert encode_function_call(abi, 'mint', [1])[:10] == '0x' + function_selector('mint(uint256)')
+    assert encode_function_call(abi, 'mint(address,uint256)', ['0x' + '11' * 20, 1])[:10] == '0x' + function_selector('mint(address,uint256)')
+    with pytest.raises(ValueError, match="No function burn"):
+        encode_function_call(abi, 'burn', [])
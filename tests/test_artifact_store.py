@@ -0,0 +1,54 @@
+import pytest
+
+from src.artifact_store import ArtifactStore, ManifestScanner, blob_digest, materialize
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(str(tmp_path / "blobs"))
+
+def test_put_get_and_missing(store):
+    digest = store.put(b'{"abi": []}')
+    assert digest == blob_digest(b'{"abi": []}')
+    assert store.get(digest) == b'{"abi": []}'
+    assert store.put(b'{"abi": []}') == digest # Stored once
+    other = blob_digest(b'other')
+    assert store.missing([digest, other, other]) == [other]
+
+def test_put_rejects_mismatched_digest(store):
+    with pytest.raises(ValueError, match="does not match"):
+        store.put(b'data', blob_digest(b'something else'))
+    with pytest.raises(ValueError, match="Invalid blob digest"):
+        store.has('../../etc/passwd')
+
+def test_manifest_rehashes_only_changed_files(tmp_path):
+    root = tmp_path / "artifacts"
+    (root / "Token.sol").mkdir(parents=True)
+    (root / "Token.sol" / "Token.json").write_text('{"v": 1}')
+    scanner = ManifestScanner()
+    assert scanner.manifest(str(root)) == {'Token.sol/Token.json': blob_digest(b'{"v": 1}')}
+    (root / "Token.sol" / "Token.json").write_text('{"v": 22}')
+    assert scanner.manifest(str(root)) == {'Token.sol/Token.json': blob_digest(b'{"v": 22}')}
+    assert scanner.manifest(str(tmp_path / "missing")) == {}
+
+def test_materialize_fetches_only_changed_blobs_and_removes_extras(tmp_path, store):
+    source = {'Token.sol/Token.json': store.put(b'token'), 'Greeter.sol/Greeter.json': store.put(b'greeter')}
+    target = tmp_path / "target"
+    (target / "Greeter.sol").mkdir(parents=True)
+    (target / "Greeter.sol" / "Greeter.json").write_bytes(b'greeter')
+    (target / "Old.sol").mkdir()
+    (target / "Old.sol" / "Old.json").write_bytes(b'old')
+
+    fetched = []
+    def fetch(digest):
+        fetched.append(digest)
+        return store.get(digest)
+
+    assert materialize(source, str(target), fetch) == 1
+    assert fetched == [source['Token.sol/Token.json']]
+    assert (target / "Token.sol" / "Token.json").read_bytes() == b'token'
+    assert not (target / "Old.sol" / "Old.json").exists()
+    assert ManifestScanner().manifest(str(target)) == source
+
+def test_materialize_rejects_paths_outside_the_directory(tmp_path, store):
+    with pytest.raises(ValueError, match="escapes"):
+        materialize({'../evil.json': store.put(b'x')}, str(tmp_path / "target"), store.get, current={})
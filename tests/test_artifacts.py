@@ -0,0 +1,58 @@
+import os
+import json
+import pytest
+from unittest.mock import patch
+
+from src.artifacts import artifact_index, find_artifact_path, invalidate_artifacts, load_artifact
+
+def _write_artifact(artifacts_dir, source, name, bytecode='0x6080'):
+    directory = artifacts_dir / source
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{name}.json"
+    path.write_text(json.dumps({'contractName': name, 'abi': [], 'bytecode': bytecode}))
+    (directory / f"{name}.dbg.json").write_text('{"buildInfo": "../build-info/x.json"}')
+    return path
+
+@pytest.fixture
+def artifacts_dir(tmp_path):
+    artifacts_dir = tmp_path / "artifacts"
+    _write_artifact(artifacts_dir, "MyContract.sol", "MyContract")
+    _write_artifact(artifacts_dir, "lib/Tokens.sol", "Token")
+    _write_artifact(artifacts_dir, "lib/Tokens.sol", "MyContract") # Same name in another source
+    (artifacts_dir / "build-info").mkdir()
+    (artifacts_dir / "build-info" / "Token.json").write_text('{}')
+    return artifacts_dir
+
+def test_index_maps_contract_names_to_artifacts(artifacts_dir):
+    index = artifact_index(str(artifacts_dir))
+    assert index.names() == ['MyContract', 'Token']
+    entry = index.get('MyContract')
+    assert entry.path == str(artifacts_dir / "MyContract.sol" / "MyContract.json")
+    assert entry.bytecode == '0x6080'
+    assert len(entry.hash) == 64
+    assert find_artifact_path('Token', str(artifacts_dir)) == str(artifacts_dir / "lib" / "Tokens.sol" / "Token.json")
+
+def test_artifacts_are_parsed_once_until_they_change(artifacts_dir):
+    with patch('src.artifacts.json.loads', wraps=json.loads) as parse:
+        load_artifact('Token', str(artifacts_dir))
+        artifact = load_artifact('Token', str(artifacts_dir))
+        assert parse.call_count == 1
+        assert artifact['path'].endswith('Token.json')
+
+        path = _write_artifact(artifacts_dir, "lib/Tokens.sol", "Token", bytecode='0x60806040')
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert load_artifact('Token', str(artifacts_dir))['bytecode'] == '0x60806040'
+        assert parse.call_count == 2
+
+def test_new_contracts_are_found_without_invalidation(artifacts_dir):
+    artifact_index(str(artifacts_dir)).names()
+    _write_artifact(artifacts_dir, "Vault.sol", "Vault")
+    assert load_artifact('Vault', str(artifacts_dir))['contractName'] == 'Vault'
+
+def test_invalidate_drops_removed_contracts(artifacts_dir):
+    load_artifact('Token', str(artifacts_dir))
+    (artifacts_dir / "lib" / "Tokens.sol" / "Token.json").unlink()
+    invalidate_artifacts(str(artifacts_dir))
+    with pytest.raises(FileNotFoundError, match="No compiled artifact for Token"):
+        load_artifact('Token', str(artifacts_dir))
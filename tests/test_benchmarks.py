@@ -0,0 +1,54 @@
+import os
+import random
+
+import pytest
+
+from benchmarks.generate import dependency_lists, generate_pipeline, job_name
+from benchmarks.run import compare, default_scenarios, run_benchmarks
+from src.scheduler import build_job_graph
+
+@pytest.mark.parametrize('shape', ['chain', 'fanout', 'layered', 'random'])
+def test_dependency_lists_only_point_backwards(shape):
+    deps = dependency_lists(50, shape, random.Random(1))
+    assert deps[0] == []
+    assert all(dep < index for index in range(50) for dep in deps[index])
+    # Only the first layer of a layered pipeline starts without dependencies
+    roots = [index for index in range(50) if not deps[index]]
+    assert roots == (list(range(7)) if shape == 'layered' else [0])
+
+def test_generated_pipeline_builds_the_intended_graph():
+    pipeline = generate_pipeline(40, shape='chain', density=0.5, seed=3)
+    order, dependencies = build_job_graph(pipeline['jobs'])
+    assert order == [job_name(index) for index in range(40)]
+    # Referenced or listed in needs, every job waits for exactly its predecessor
+    assert all(dependencies[job_name(index)] == {job_name(index - 1)} for index in range(1, 40))
+    with_expressions = [job for job in pipeline['jobs'] if 'inputs' in job['with']]
+    assert 0 < len(with_expressions) < 40
+
+def test_density_zero_uses_only_needs():
+    pipeline = generate_pipeline(20, shape='random', density=0)
+    assert not any('inputs' in job['with'] for job in pipeline['jobs'])
+
+def test_generate_rejects_unknown_shape():
+    with pytest.raises(ValueError, match='Unknown shape'):
+        generate_pipeline(10, shape='star')
+
+def test_run_benchmarks_with_fake_hardhat_and_fake_rpc():
+    scenarios = default_scenarios(sizes=[5], io_sizes=[4], shapes=['layered'], max_parallel=2)
+    results = run_benchmarks(scenarios, hardhat_latency_ms=0, memory=False)
+
+    assert [(result['action'], result['jobs']) for result in results] == [('noop', 5), ('hardhat', 4), ('rpc', 4)]
+    for result in results:
+        assert result['failed_jobs'] == 0
+        assert result['load_s'] > 0 and result['run_s'] > 0 and result['jobs_per_s'] > 0
+    assert 'overhead_us_per_job' in results[0]
+    assert 'FAKE_HARDHAT_LATENCY_MS' not in os.environ # Environment restored afterwards
+
+def test_compare_flags_only_regressions_beyond_threshold():
+    scenario = {'action': 'noop', 'shape': 'chain', 'jobs': 10, 'density': 0.5, 'max_parallel': 8}
+    baseline = {'results': [dict(scenario, load_s=1.0, run_s=1.0, jobs_per_s=100.0, peak_memory_mb=2.0)]}
+    current = {'results': [dict(scenario, load_s=1.1, run_s=1.5, jobs_per_s=70.0, peak_memory_mb=1.0)]}
+
+    regressions = compare(baseline, current, threshold=0.2)
+
+    assert sorted(metric for _, metric, _, _, _ in regressions) == ['jobs_per_s', 'run_s']
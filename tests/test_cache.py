@@ -0,0 +1,45 @@
+import os
+import time
+
+from src.cache import DirectoryCache
+
+def _make_tree(path, size):
+    path.mkdir(parents=True, exist_ok=True)
+    (path / "artifact.json").write_bytes(b"x" * size)
+    return str(path)
+
+def test_directory_cache_store_and_restore(tmp_path):
+    cache = DirectoryCache(str(tmp_path / "cache"), max_bytes=10_000)
+    source = _make_tree(tmp_path / "artifacts", 100)
+
+    assert not cache.contains("abc")
+    assert cache.store("abc", source)
+    assert cache.contains("abc")
+
+    destination = tmp_path / "restored"
+    _make_tree(destination, 5)
+    (destination / "stale.json").write_text("old")
+    assert cache.restore("abc", str(destination))
+    assert (destination / "artifact.json").stat().st_size == 100
+    assert not (destination / "stale.json").exists()
+    assert sorted(os.listdir(tmp_path)) == ["artifacts", "cache", "restored"] # No staging directories left behind
+
+def test_directory_cache_restore_miss(tmp_path):
+    cache = DirectoryCache(str(tmp_path / "cache"), max_bytes=10_000)
+    assert cache.restore("missing", str(tmp_path / "restored")) is False
+    assert not (tmp_path / "cache").exists()
+
+def test_directory_cache_evicts_least_recently_used(tmp_path):
+    cache = DirectoryCache(str(tmp_path / "cache"), max_bytes=250)
+    cache.store("first", _make_tree(tmp_path / "a", 100))
+    cache.store("second", _make_tree(tmp_path / "b", 100))
+
+    # Make "first" the most recently used entry
+    old = time.time() - 60
+    os.utime(os.path.join(cache.root, "second", "last_used"), (old, old))
+    cache.restore("first", str(tmp_path / "restored"))
+
+    cache.store("third", _make_tree(tmp_path / "c", 100))
+    assert cache.contains("first")
+    assert not cache.contains("second")
+    assert cache.contains("third")
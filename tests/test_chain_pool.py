@@ -0,0 +1,133 @@
+import os
+import sys
+import json
+import pytest
+import threading
+
+from src.chain_pool import ChainLeases, ChainPoolError, ChainPools, chain_leases, lease_network
+from src.pipeline_runner import PipelineRunner
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SENDER = '0xf39fd6e51aad88f6f4ce6ab8827279cfffb92266'
+
+def _network(**overrides):
+    # Every node is a tests.fake_rpc process, which supports evm_snapshot/evm_revert like Anvil
+    details = {
+        'type': 'ephemeral',
+        'command': [sys.executable, '-m', 'tests.fake_rpc', '--port', '{port}', '--chain-id', '{chain_id}'],
+        'chain_id': 1337,
+        'pool_size': 1,
+        'startup_timeout': 30,
+    }
+    details.update(overrides)
+    return details
+
+@pytest.fixture
+def pools():
+    pools = ChainPools(cwd=ROOT)
+    yield pools
+    pools.close()
+
+def test_released_node_is_reverted_and_reused(pools):
+    pool = pools.pool('dev', _network())
+    node = pool.acquire()
+    node.client.call('eth_sendTransaction', [{'from': SENDER, 'data': '0x6080'}])
+    assert node.client.call('eth_blockNumber') == '0x1'
+    assert node.client.call('eth_chainId') == hex(1337)
+    pool.release(node)
+
+    again = pool.acquire()
+    assert again is node
+    assert again.client.call('eth_blockNumber') == '0x0'
+    assert again.client.call('eth_getTransactionCount', [SENDER]) == '0x0'
+    pool.release(again)
+
+def test_lease_waits_for_a_free_node(pools):
+    pool = pools.pool('dev', _network(lease_timeout=0.3))
+    node = pool.acquire()
+    with pytest.raises(ChainPoolError, match='became free'):
+        pool.acquire()
+    pool.release(node)
+
+def test_node_that_exits_fails_the_lease(pools):
+    pool = pools.pool('dev', _network(command=[sys.executable, '-c', 'raise SystemExit(3)']))
+    with pytest.raises(ChainPoolError, match='exited with code 3'):
+        pool.acquire()
+
+def test_lease_network_requires_a_pipeline_run(pools):
+    with pytest.raises(ChainPoolError, match='inside a pipeline run'):
+        lease_network('dev', _network())
+    with chain_leases(pools):
+        first = lease_network('dev', _network())
+        assert lease_network('dev', _network())['rpc_url'] == first['rpc_url'] # One node per scope
+
+class _BlockingPools:
+    # pool(network) hands out object() nodes; acquiring 'slow' blocks until the test lets it through
+    def __init__(self):
+        self.free = threading.Event()
+        self.acquired = []
+
+    def pool(self, network, details):
+        return self
+
+    def acquire(self):
+        node = object()
+        if threading.current_thread().name.startswith('slow'):
+            self.free.wait(5)
+        self.acquired.append(node)
+        return node
+
+    def release(self, node):
+        pass
+
+def test_waiting_for_one_network_does_not_block_others():
+    pools = _BlockingPools()
+    leases = ChainLeases(pools)
+    nodes = []
+    slow = [threading.Thread(target=lambda: nodes.append(leases.node('slow', {})), name=f'slow-{i}') for i in range(2)]
+    for thread in slow:
+        thread.start()
+    fast = threading.Thread(target=lambda: leases.node('fast', {}))
+    fast.start()
+    fast.join(2)
+    assert not fast.is_alive() # Not held up by the pending 'slow' lease
+    pools.free.set()
+    for thread in slow:
+        thread.join(5)
+    assert len(nodes) == 2 and nodes[0] is nodes[1] # One node per network, acquired once
+    assert len(pools.acquired) == 2
+
+def test_matrix_instances_deploy_to_separate_nodes(tmp_path, pools, monkeypatch):
+    monkeypatch.delenv('PRIVATE_KEY', raising=False)
+    artifact_dir = tmp_path / 'artifacts' / 'Token.sol'
+    artifact_dir.mkdir(parents=True)
+    (artifact_dir / 'Token.json').write_text(json.dumps({'contractName': 'Token', 'abi': [], 'bytecode': '0x6080'}))
+    (tmp_path / 'config').mkdir()
+    (tmp_path / 'config' / 'networks.json').write_text(json.dumps({'dev': _network(pool_size=2)}))
+    pipeline = tmp_path / 'pipelines' / 'pipeline.yaml'
+    pipeline.parent.mkdir()
+    pipeline.write_text(f"""
+name: Ephemeral
+jobs:
+  - name: Deploy
+    uses: actions/deploy@v1
+    strategy:
+      matrix:
+        attempt: [1, 2]
+    with:
+      network: dev
+      contract: Token
+      engine: native
+      artifacts_dir: {tmp_path / 'artifacts'}
+      poll_interval: 0.01
+""")
+
+    runner = PipelineRunner(str(pipeline), max_parallel=2, shared_chains=pools)
+    runner.run()
+
+    outputs = runner.job_outputs['Deploy']['instances']
+    assert [output['status'] for output in outputs.values()] == ['success', 'success']
+    # Both instances started from a clean chain: same sender, nonce 0, block 1
+    assert len({output['address'] for output in outputs.values()}) == 1
+    assert {output['block_number'] for output in outputs.values()} == {1}
+    assert len(pools.pool('dev', _network(pool_size=2))._nodes) == 2
@@ -0,0 +1,48 @@
+from src.compile_shards import compilation_units, import_graph, parse_source, plan_shards
+
+def _tree(root, files):
+    for path, text in files.items():
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_text(text)
+
+def test_parse_source_reads_every_import_form():
+    imports, pragma = parse_source('''
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.20;
+import "./A.sol";
+import './B.sol' as B;
+import * as C from "../C.sol";
+import {D, E as F} from "lib/D.sol";
+// import "./Commented.sol";
+/* import "./Block.sol"; */
+contract X { string s = "import \\"./InString.sol\\";"; }
+''')
+    assert imports == ['./A.sol', './B.sol', '../C.sol', 'lib/D.sol']
+    assert pragma == '^0.8.20'
+
+def test_units_are_connected_components_of_project_imports(tmp_path):
+    _tree(tmp_path, {
+        'token/Token.sol': 'import "./ERC20.sol"; import "@openzeppelin/contracts/access/Ownable.sol";',
+        'token/ERC20.sol': 'import "lib/Math.sol";',
+        'lib/Math.sol': 'library Math {}',
+        'vault/Vault.sol': 'import "@openzeppelin/contracts/access/Ownable.sol";',
+        'node_modules/x/Ignored.sol': 'import "../../vault/Vault.sol";',
+    })
+    files = import_graph(str(tmp_path))
+    assert sorted(files) == ['lib/Math.sol', 'token/ERC20.sol', 'token/Token.sol', 'vault/Vault.sol']
+    assert files['token/Token.sol'].imports == ['token/ERC20.sol'] # The library import does not join units
+    units = compilation_units(files)
+    assert sorted(unit.files for unit in units) == [['lib/Math.sol', 'token/ERC20.sol', 'token/Token.sol'], ['vault/Vault.sol']]
+
+def test_shards_balance_size_and_group_pragmas(tmp_path):
+    _tree(tmp_path, {
+        'Big.sol': 'pragma solidity ^0.8.0;' + ' ' * 1000,
+        'A.sol': 'pragma solidity ^0.8.0;' + ' ' * 300,
+        'B.sol': 'pragma solidity 0.7.6;' + ' ' * 300,
+        'C.sol': 'pragma solidity ^0.8.0;' + ' ' * 280,
+        'D.sol': 'pragma solidity 0.7.6;' + ' ' * 280,
+    })
+    shards = plan_shards(compilation_units(import_graph(str(tmp_path))), 3)
+    assert [sorted(shard.files) for shard in shards] == [['Big.sol'], ['A.sol', 'C.sol'], ['B.sol', 'D.sol']]
+    assert len(plan_shards(compilation_units(import_graph(str(tmp_path))), 10)) == 5
+    assert len({shard.key for shard in shards}) == 3
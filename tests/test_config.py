@@ -0,0 +1,54 @@
+import os
+import json
+import pytest
+from unittest.mock import patch
+
+from src.config import apply_env_overlay, clear_config_cache, env_prefix, load_networks_config, networks_config_path
+
+@pytest.fixture
+def networks_file(tmp_path):
+    clear_config_cache()
+    path = tmp_path / "networks.json"
+    path.write_text(json.dumps({"goerli": {"rpc_url": "https://goerli.example", "chain_id": 5}, "arbitrum-sepolia": {}}))
+    yield str(path)
+    clear_config_cache()
+
+def test_networks_config_path():
+    assert networks_config_path('/project/pipelines/deploy.yaml') == '/project/config/networks.json'
+
+def test_parses_once_while_the_file_is_unchanged(networks_file):
+    with patch('src.config.json.load', wraps=json.load) as parse:
+        first = load_networks_config(networks_file, environ={})
+        second = load_networks_config(networks_file, environ={})
+    assert first is second
+    assert parse.call_count == 1
+
+def test_reloads_when_the_file_changes(networks_file):
+    load_networks_config(networks_file, environ={})
+    with open(networks_file, 'w') as f:
+        json.dump({"goerli": {"rpc_url": "https://other.example", "chain_id": 5, "extra": True}}, f)
+    stat = os.stat(networks_file)
+    os.utime(networks_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert load_networks_config(networks_file, environ={})['goerli']['rpc_url'] == 'https://other.example'
+
+def test_env_overlay(networks_file):
+    environ = {'GOERLI_RPC_URL': 'https://private.example', 'ARBITRUM_SEPOLIA_CHAIN_ID': '421614'}
+    config = load_networks_config(networks_file, environ=environ)
+    assert config['goerli'] == {'rpc_url': 'https://private.example', 'chain_id': 5}
+    assert config['arbitrum-sepolia'] == {'chain_id': 421614}
+    # A changed environment is picked up without re-reading the file
+    with patch('src.config.json.load') as parse:
+        config = load_networks_config(networks_file, environ={})
+    parse.assert_not_called()
+    assert config['goerli']['rpc_url'] == 'https://goerli.example'
+
+def test_env_overlay_rejects_bad_numbers():
+    with pytest.raises(ValueError, match="GOERLI_CHAIN_ID"):
+        apply_env_overlay({'goerli': {}}, {'GOERLI_CHAIN_ID': 'five'})
+
+def test_env_prefix():
+    assert env_prefix('arbitrum-sepolia') == 'ARBITRUM_SEPOLIA'
+
+def test_missing_file(tmp_path):
+    with pytest.raises(FileNotFoundError, match="Network configuration file not found"):
+        load_networks_config(str(tmp_path / "missing.json"))
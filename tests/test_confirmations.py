@@ -0,0 +1,85 @@
+import time
+import threading
+import pytest
+
+from src.confirmations import ConfirmationTracker
+from src.rpc import JsonRpcClient, JsonRpcError
+from tests.fake_rpc import DEFAULT_ACCOUNT, FakeRpcNode
+
+def _send(node, client, data='0x6080'):
+    return client.call('eth_sendTransaction', [{'from': DEFAULT_ACCOUNT, 'data': data}])
+
+@pytest.fixture
+def node():
+    with FakeRpcNode(receipt_delay_polls=2) as node:
+        yield node
+
+def test_concurrent_waiters_share_one_poll_loop(node):
+    client = JsonRpcClient(node.url)
+    tx_hashes = [_send(node, client, data=f'0x60{index:02x}') for index in range(6)]
+    tracker = ConfirmationTracker(client)
+    results = {}
+    def wait(tx_hash):
+        results.update(tracker.wait([tx_hash], timeout=5, poll_interval=0.05))
+    threads = [threading.Thread(target=wait, args=(tx_hash,)) for tx_hash in tx_hashes]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert set(results) == set(tx_hashes)
+    assert all(receipt['status'] == '0x1' for receipt in results.values())
+    # Waiting separately, six jobs would need at least 3 polls each
+    assert tracker.polls < 6 * 3
+    receipt_requests = [method for method, _ in node.requests if method == 'eth_getTransactionReceipt']
+    assert len(receipt_requests) == 6 * 3 # Every hash is fetched only until its receipt shows up
+
+def test_waits_for_confirmation_depth(node):
+    node.receipt_delay_polls = 0
+    client = JsonRpcClient(node.url)
+    tx_hash = _send(node, client)
+    tracker = ConfirmationTracker(client)
+
+    def mine_later():
+        time.sleep(0.2)
+        _send(node, client, '0x01')
+        _send(node, client, '0x02')
+    threading.Thread(target=mine_later).start()
+    started = time.monotonic()
+    receipts = tracker.wait([tx_hash], confirmations=3, timeout=5, poll_interval=0.02)
+
+    assert time.monotonic() - started >= 0.2
+    assert receipts[tx_hash]['blockNumber'] == '0x1'
+    assert tracker.head >= 3
+    # Fetched once when mined and once more at depth 3, in case a reorg dropped it
+    assert node.receipt_polls[tx_hash] == 2
+
+def test_receipt_dropped_before_depth_is_not_confirmed(node):
+    fetches = []
+    def receipt(tx_hash):
+        fetches.append(tx_hash)
+        return {'transactionHash': tx_hash, 'blockNumber': '0x1', 'status': '0x1'} if len(fetches) == 1 else None
+    heads = iter(['0x1'])
+    node.handlers['eth_getTransactionReceipt'] = receipt
+    node.handlers['eth_blockNumber'] = lambda: next(heads, '0x5')
+    tracker = ConfirmationTracker(JsonRpcClient(node.url))
+
+    assert tracker.wait(['0x' + 'ab' * 32], confirmations=2, timeout=0.3, poll_interval=0.02) == {}
+    assert len(fetches) > 2 # Dropped by the recheck, then polled again like any pending hash
+
+def test_pending_hash_times_out_and_poll_loop_stops(node):
+    client = JsonRpcClient(node.url)
+    tracker = ConfirmationTracker(client)
+    assert tracker.wait(['0x' + '00' * 32], timeout=0.2, poll_interval=0.02) == {}
+    time.sleep(0.1)
+    assert tracker._thread is None
+
+def test_endpoint_failure_is_raised_to_waiters():
+    node = FakeRpcNode().start()
+    url = node.url
+    node.stop()
+    tracker = ConfirmationTracker(JsonRpcClient(url, timeout=1))
+    started = time.monotonic()
+    with pytest.raises(JsonRpcError):
+        tracker.wait(['0x' + '00' * 32], timeout=10, poll_interval=0.02)
+    assert time.monotonic() - started < 5
@@ -0,0 +1,163 @@
+import json
+import time
+import socket
+import threading
+import http.client
+import pytest
+
+from src.daemon import PipelineDaemon, RunLog, create_server
+
+ECHO_ACTION = """
+import time
+
+def run(params, context):
+    time.sleep(params.get('sleep', 0))
+    print(f"echo from {context.job_name}: {params['message']}")
+    return {'status': params.get('status', 'success'), 'message': params['message']}
+"""
+
+PIPELINE = """
+name: {name}
+jobs:
+  - name: {name} First
+    uses: test/echo@v1
+    with:
+      message: hello
+      sleep: 0.2
+  - name: {name} Second
+    uses: test/echo@v1
+    with:
+      message: ${{{{ jobs.{name} First.output.message }}}} again
+      status: {status}
+"""
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "config").mkdir()
+    (tmp_path / "config" / "networks.json").write_text("{}")
+    (tmp_path / "actions" / "test").mkdir(parents=True)
+    (tmp_path / "actions" / "test" / "echo@v1.py").write_text(ECHO_ACTION)
+    (tmp_path / "pipelines").mkdir()
+    for name, status in (('Alpha', 'success'), ('Beta', 'failure')):
+        (tmp_path / "pipelines" / f"{name.lower()}.yaml").write_text(PIPELINE.format(name=name, status=status))
+    return tmp_path
+
+@pytest.fixture
+def pipeline_daemon(project):
+    daemon = PipelineDaemon(max_runs=2, persistent_workers=False, state_dir=str(project / "state"))
+    yield daemon
+    daemon.close()
+
+def _wait(run, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not run.finished and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert run.finished
+
+def test_concurrent_runs_keep_separate_logs_and_outputs(pipeline_daemon, project):
+    alpha = pipeline_daemon.submit(str(project / "pipelines" / "alpha.yaml"))
+    beta = pipeline_daemon.submit(str(project / "pipelines" / "beta.yaml"))
+    _wait(alpha)
+    _wait(beta)
+
+    assert alpha.status == 'succeeded'
+    assert alpha.job_outputs['Alpha Second'] == {'status': 'success', 'message': 'hello again'}
+    assert beta.status == 'failed'
+    assert beta.error == "Failed jobs: Beta Second"
+    alpha_log = '\n'.join(alpha.log.read()[0])
+    assert "echo from Alpha First: hello" in alpha_log
+    assert "Beta" not in alpha_log
+    assert alpha.started_at < beta.finished_at and beta.started_at < alpha.finished_at
+
+def test_invalid_submissions_fail_immediately(pipeline_daemon, project):
+    with pytest.raises(FileNotFoundError):
+        pipeline_daemon.submit(str(project / "pipelines" / "missing.yaml"))
+    (project / "pipelines" / "bad.yaml").write_text("name: Bad\njobs:\n  - name: X\n    uses: test/missing@v1\n")
+    with pytest.raises(ValueError, match="unknown action"):
+        pipeline_daemon.submit(str(project / "pipelines" / "bad.yaml"))
+    assert pipeline_daemon.list() == []
+
+def test_run_log_offsets_and_wait():
+    log = RunLog(max_lines=3)
+    log.write("one\ntwo\nthr")
+    assert log.read() == (['one', 'two'], 2, False)
+    log.write("ee\nfour\nfive\n")
+    lines, offset, _ = log.read(1)
+    assert lines == ['three', 'four', 'five'] and offset == 5 # 'one' and 'two' were dropped
+    threading.Timer(0.1, log.close).start()
+    assert log.read(5, wait=5) == ([], 5, True)
+
+@pytest.fixture
+def server(pipeline_daemon):
+    server = create_server(pipeline_daemon, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def _request(server, method, path, body=None):
+    connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=10)
+    connection.request(method, path, body=json.dumps(body) if body is not None else None)
+    response = connection.getresponse()
+    data = response.read()
+    connection.close()
+    return response.status, data
+
+def test_http_api_submit_status_and_follow_log(server, project):
+    status, data = _request(server, 'POST', '/runs', {'pipeline': str(project / "pipelines" / "alpha.yaml")})
+    assert status == 202
+    run_id = json.loads(data)['id']
+
+    # Following the log returns once the run finished
+    status, data = _request(server, 'GET', f'/runs/{run_id}/log?follow=1')
+    assert status == 200
+    assert "echo from Alpha Second: hello again" in data.decode()
+    assert "--- Pipeline Finished ---" in data.decode()
+
+    status, data = _request(server, 'GET', f'/runs/{run_id}')
+    run = json.loads(data)
+    assert run['status'] == 'succeeded'
+    assert run['jobs']['Alpha First']['message'] == 'hello'
+    assert [listed['id'] for listed in json.loads(_request(server, 'GET', '/runs')[1])['runs']] == [run_id]
+    assert json.loads(_request(server, 'GET', '/health')[1]) == {'status': 'ok', 'running': 0, 'queued': 0}
+
+def test_http_api_errors(server, project):
+    assert _request(server, 'POST', '/runs', {})[0] == 400
+    assert _request(server, 'POST', '/runs', {'pipeline': str(project / "missing.yaml")})[0] == 404
+    status, data = _request(server, 'POST', '/runs', {'pipeline': str(project / "pipelines" / "alpha.yaml"), 'max_parallel': 0})
+    assert status == 400 and 'max_parallel' in json.loads(data)['error']
+    assert _request(server, 'POST', '/runs', {'pipeline': str(project / "pipelines" / "alpha.yaml"), 'max_parallel': [2]})[0] == 400
+    assert _request(server, 'POST', '/runs', {'pipeline': str(project / "pipelines" / "alpha.yaml"), 'force': 3})[0] == 400
+
+def test_http_api_unexpected_errors_are_500(server, project, monkeypatch):
+    def submit(*args, **kwargs):
+        raise RuntimeError("worker pool is gone")
+    monkeypatch.setattr(server.pipeline_daemon, 'submit', submit)
+    status, data = _request(server, 'POST', '/runs', {'pipeline': str(project / "pipelines" / "alpha.yaml")})
+    assert status == 500 and json.loads(data)['error'] == "RuntimeError: worker pool is gone"
+    assert _request(server, 'GET', '/runs/nope')[0] == 404
+
+def test_unix_socket(pipeline_daemon, project, tmp_path):
+    socket_path = str(tmp_path / "serve.sock")
+    server = create_server(pipeline_daemon, socket_path=socket_path)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(socket_path)
+        client.sendall(b"GET /health HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n")
+        response = b''
+        while chunk := client.recv(4096):
+            response += chunk
+        client.close()
+        assert response.startswith(b"HTTP/1.1 200")
+        assert b'"status": "ok"' in response
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_unix_socket_never_replaces_other_files(pipeline_daemon, tmp_path):
+    socket_path = tmp_path / "serve.sock"
+    socket_path.write_text("not a socket")
+    with pytest.raises(FileExistsError, match="not a socket"):
+        create_server(pipeline_daemon, socket_path=str(socket_path))
+    assert socket_path.read_text() == "not a socket"
@@ -0,0 +1,97 @@
+import os
+import sys
+import json
+import subprocess
+import pytest
+from unittest.mock import patch
+
+from src.actions.deploy import deploy_contract
+from src.actions.verify import verify_contract
+from src.deployments import DeploymentRegistry, creation_code_hash
+from tests.fake_rpc import FakeRpcNode
+
+@pytest.fixture
+def registry(tmp_path):
+    registry = DeploymentRegistry(str(tmp_path / 'state' / 'deployments.sqlite'))
+    yield registry
+    registry.close()
+
+@pytest.fixture
+def artifacts_dir(tmp_path):
+    artifact_dir = tmp_path / 'artifacts' / 'Token.sol'
+    artifact_dir.mkdir(parents=True)
+    artifact = {'contractName': 'Token', 'abi': [{'type': 'constructor', 'inputs': [{'name': 'supply', 'type': 'uint256'}]}], 'bytecode': '0x6080'}
+    (artifact_dir / 'Token.json').write_text(json.dumps(artifact))
+    return str(tmp_path / 'artifacts')
+
+def test_latest_deployment_per_network(registry, tmp_path):
+    registry.record('goerli', 'Token', '0xAAA', code_hash='h1', run_id='run-1')
+    registry.record('sepolia', 'Token', '0xBBB', code_hash='h1', run_id='run-1')
+    registry.record('goerli', 'Token', '0xCCC', code_hash='h2', run_id='run-2')
+    registry.record('goerli', 'Vault', '0xDDD', run_id='run-2')
+
+    latest = registry.latest_by_network('Token')
+    assert {network: row['address'] for network, row in latest.items()} == {'goerli': '0xccc', 'sepolia': '0xbbb'}
+    assert registry.latest('Token', 'goerli')['run_id'] == 'run-2'
+    assert registry.latest('Token', 'mainnet') is None
+    assert registry.find_code('h1', 'goerli')['address'] == '0xaaa'
+    assert registry.find_code('h1', 'mainnet') is None
+    assert [row['contract'] for row in registry.find_address('0xDdD')] == ['Vault']
+    assert [row['address'] for row in registry.history(network='goerli', limit=2)] == ['0xddd', '0xccc']
+
+    # Shared by later runs and other processes
+    reopened = DeploymentRegistry(registry.path)
+    assert reopened.latest('Vault', 'goerli')['address'] == '0xddd'
+    reopened.close()
+
+def test_code_hash_covers_constructor_args(artifacts_dir):
+    assert creation_code_hash('Token', [1], artifacts_dir) == creation_code_hash('Token', [1], artifacts_dir)
+    assert creation_code_hash('Token', [1], artifacts_dir) != creation_code_hash('Token', [2], artifacts_dir)
+    assert creation_code_hash('Missing', [], artifacts_dir) is None
+
+def test_deploy_records_and_reuses_identical_code(registry, artifacts_dir, monkeypatch):
+    monkeypatch.delenv('PRIVATE_KEY', raising=False)
+    params = {'network': 'localhost', 'contract': 'Token', 'args': [1000], 'engine': 'native',
+              'artifacts_dir': artifacts_dir, 'poll_interval': 0.01, 'reuse': True}
+    with FakeRpcNode() as node:
+        networks_config = {'localhost': {'rpc_url': node.url, 'chain_id': 31337}}
+        first = deploy_contract(params, '/p/pipelines/p.yaml', {}, networks_config=networks_config,
+                                deployments=registry, run_id='run-1', job_name='Deploy')
+        assert 'reused' not in first
+        record = registry.latest('Token', 'localhost')
+        assert (record['address'], record['tx_hash'], record['block_number'], record['chain_id'], record['job']) == (
+            first['address'].lower(), first['tx_hash'], 1, 31337, 'Deploy')
+
+        deployed = {}
+        second = deploy_contract(params, '/p/pipelines/p.yaml', deployed, networks_config=networks_config, deployments=registry)
+        assert second == {'status': 'success', 'address': record['address'], 'tx_hash': first['tx_hash'], 'reused': True}
+        assert deployed == {'Token': record['address']}
+        assert len(node.transactions) == 1
+
+        # Different constructor args are a different deployment
+        third = deploy_contract(dict(params, args=[5]), '/p/pipelines/p.yaml', {}, networks_config=networks_config, deployments=registry)
+        assert 'reused' not in third and len(node.transactions) == 2
+
+@patch('src.actions.verify.run_streaming')
+def test_verify_falls_back_to_the_registry(mock_run, registry):
+    registry.record('goerli', 'Token', '0xAAA')
+    registry.record('sepolia', 'Token', '0xBBB')
+    networks_config = {'sepolia': {'etherscan_api_key': 'key'}}
+    result = verify_contract({'network': 'sepolia', 'contract': 'Token'}, '/p/pipelines/p.yaml', {'Token': '0xAAA'},
+                             networks_config=networks_config, deployments=registry)
+    assert result == {'status': 'success'}
+    # The contract's address on sepolia, not the run's last deployment of it
+    assert mock_run.call_args[0][0][-1] == '0xbbb'
+
+def _loads_eth_account(module):
+    # A fresh interpreter, since this test process has long imported eth_account
+    code = f"import sys, {module}; print('eth_account' in sys.modules)"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True)
+    return result.stdout.strip() == 'True'
+
+def test_cli_import_does_not_load_eth_account():
+    # Signing is only needed once a deploy runs; plan, serve --help and deployments must not pay for it
+    assert not _loads_eth_account('src.pipeline_runner')
+    pytest.importorskip('dotenv')
+    assert not _loads_eth_account('src.cli')
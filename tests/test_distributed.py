@@ -0,0 +1,149 @@
+import threading
+import pytest
+
+from src.artifact_store import ArtifactStore
+from src.distributed import Coordinator, CoordinatorClient, CoordinatorError, Worker
+from src.pipeline_runner import PipelineRunner
+from src.registry import ActionContext
+
+BUILD_ACTION = """
+import os
+import json
+
+PARAMS = {'contract': (str, True), 'artifacts_dir': (str, False)}
+
+def run(params, context):
+    directory = os.path.join(params['artifacts_dir'], params['contract'] + '.sol')
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, params['contract'] + '.json'), 'w') as f:
+        json.dump({'contractName': params['contract'], 'bytecode': '0x6080'}, f)
+    print(f"built {params['contract']}")
+    return {'status': 'success'}
+"""
+
+READ_ACTION = """
+import os
+import json
+import time
+
+PARAMS = {'contract': (str, True), 'index': (int, True), 'artifacts_dir': (str, False)}
+
+def run(params, context):
+    time.sleep(0.2)
+    with open(os.path.join(params['artifacts_dir'], params['contract'] + '.sol', params['contract'] + '.json')) as f:
+        artifact = json.load(f)
+    address = '0x' + f"{params['index']:040x}"
+    context.deployments.record('remote', params['contract'], address, run_id=context.run_id, job=context.job_name)
+    context.deployed_contracts[params['contract']] = address
+    return {'status': 'success', 'bytecode': artifact['bytecode'], 'address': address}
+"""
+
+PIPELINE = """
+name: Distributed
+jobs:
+  - name: Build
+    uses: test/build@v1
+    with:
+      contract: Token
+  - name: Read
+    uses: test/read@v1
+    needs: Build
+    strategy:
+      matrix:
+        index: [1, 2, 3, 4]
+    with:
+      contract: Token
+      index: ${{ matrix.index }}
+"""
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "config").mkdir()
+    (tmp_path / "config" / "networks.json").write_text("{}")
+    (tmp_path / "actions" / "test").mkdir(parents=True)
+    (tmp_path / "actions" / "test" / "build@v1.py").write_text(BUILD_ACTION)
+    (tmp_path / "actions" / "test" / "read@v1.py").write_text(READ_ACTION)
+    (tmp_path / "pipelines").mkdir()
+    (tmp_path / "pipelines" / "release.yaml").write_text(PIPELINE)
+    return tmp_path
+
+@pytest.fixture
+def coordinator(tmp_path):
+    coordinator = Coordinator(port=0, store=ArtifactStore(str(tmp_path / "coordinator-blobs")), lease_timeout=2).start()
+    yield coordinator
+    coordinator.close()
+
+def _worker(coordinator, tmp_path, name):
+    return Worker(
+        coordinator.url, name=name, artifacts_dir=str(tmp_path / name / "artifacts"),
+        store=ArtifactStore(str(tmp_path / name / "blobs")), lease_wait=0.2
+    ).start()
+
+def test_workers_share_jobs_and_artifacts(project, coordinator, tmp_path):
+    workers = [_worker(coordinator, tmp_path, name) for name in ('alpha', 'beta')]
+    try:
+        runner = PipelineRunner(str(project / "pipelines" / "release.yaml"), max_parallel=4, coordinator=coordinator)
+        runner.run()
+    finally:
+        for worker in workers:
+            worker.stop()
+
+    reads = runner.job_outputs['Read']['instances']
+    assert all(output['status'] == 'success' and output['bytecode'] == '0x6080' for output in reads.values())
+    # The artifact built on one worker reached the other through the blob store
+    assert {coordinator.completed[name] for name in reads} == {'alpha', 'beta'}
+    for name in ('alpha', 'beta'):
+        assert (tmp_path / name / "artifacts" / "Token.sol" / "Token.json").exists()
+    assert list(coordinator.manifest) == ['Token.sol/Token.json']
+    # Deployments made on the workers land in the coordinator's registry and deployed_contracts
+    assert len(runner.deployments.history(contract='Token', network='remote')) == 4
+    assert runner.deployed_contracts['Token'] in {output['address'] for output in reads.values()}
+
+def test_job_fails_when_its_worker_stops_responding(coordinator, tmp_path):
+    client = CoordinatorClient(coordinator.url)
+    worker_id = client.json('POST', '/workers', {'name': 'flaky'})['worker_id']
+    context = ActionContext('Deploy', str(tmp_path / "pipeline.yaml"), {}, {})
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(output=coordinator.dispatch('test/read@v1', {}, context)))
+    thread.start()
+
+    job = client.json('POST', '/lease', {'worker_id': worker_id, 'wait': 5})
+    assert job['job'] == 'Deploy'
+    thread.join(10)
+    assert result['output'] == {'status': 'failure', 'error': "Worker 'flaky' stopped responding"}
+    with pytest.raises(CoordinatorError, match="HTTP 404"):
+        client.json('POST', f"/jobs/{job['id']}/result", {'worker_id': worker_id, 'output': {'status': 'success'}})
+
+def test_job_fails_when_no_worker_picks_it_up(tmp_path):
+    coordinator = Coordinator(port=0, store=ArtifactStore(str(tmp_path / "blobs")), worker_wait=0.2).start()
+    try:
+        context = ActionContext('Deploy', str(tmp_path / "pipeline.yaml"), {}, {})
+        assert coordinator.dispatch('test/read@v1', {}, context) == {'status': 'failure', 'error': "No worker picked up the job within 0.2s"}
+        # A job's own timeout applies when it is shorter
+        coordinator.worker_wait = None
+        assert coordinator.dispatch('test/read@v1', {}, context, timeout=0.1)['error'] == "No worker picked up the job within 0.1s"
+        assert coordinator.lease(coordinator.register('late', 1), wait=0) is None # Failed jobs leave the queue
+    finally:
+        coordinator.close()
+
+def test_result_must_upload_its_artifacts_first(coordinator, tmp_path):
+    client = CoordinatorClient(coordinator.url)
+    worker_id = client.json('POST', '/workers', {'name': 'w'})['worker_id']
+    context = ActionContext('Build', str(tmp_path / "pipeline.yaml"), {}, {})
+    thread = threading.Thread(target=coordinator.dispatch, args=('test/build@v1', {}, context))
+    thread.start()
+    job = client.json('POST', '/lease', {'worker_id': worker_id, 'wait': 5})
+    with pytest.raises(CoordinatorError, match="not uploaded"):
+        client.json('POST', f"/jobs/{job['id']}/result", {'worker_id': worker_id, 'artifacts': {'A.json': 'ab' * 32}})
+    client.json('POST', f"/jobs/{job['id']}/result", {'worker_id': worker_id, 'output': {'status': 'success'}})
+    thread.join(5)
+    assert not thread.is_alive()
+
+def test_cluster_token_is_required(tmp_path):
+    coordinator = Coordinator(port=0, store=ArtifactStore(str(tmp_path / "blobs")), token='s3cret').start()
+    try:
+        with pytest.raises(CoordinatorError, match="HTTP 401"):
+            CoordinatorClient(coordinator.url, token='').json('GET', '/health')
+        assert CoordinatorClient(coordinator.url, token='s3cret').json('GET', '/health')['status'] == 'ok'
+    finally:
+        coordinator.close()
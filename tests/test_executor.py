@@ -0,0 +1,73 @@
+import sys
+import time
+import threading
+import subprocess
+import pytest
+
+from src import executor
+from src.executor import ProcessInterrupted, extract_events, job_context, parse_timeout, run_streaming
+
+def _python(code):
+    return [sys.executable, '-u', '-c', code]
+
+def test_streams_lines_with_job_prefix_and_extracts_events(capsys):
+    code = (
+        "print('Compiling...');"
+        "print('Deployment transaction: 0x' + 'ab' * 32);"
+        "print('Gas used: 21000');"
+        "print('Token deployed to 0x' + '12' * 20)"
+    )
+    with job_context('Deploy Token'):
+        result = run_streaming(_python(code))
+
+    assert result.returncode == 0
+    assert result.first('deployed') == {'type': 'deployed', 'contract': 'Token', 'address': '0x' + '12' * 20}
+    assert result.first('transaction')['tx_hash'] == '0x' + 'ab' * 32
+    assert result.first('gas_used')['gas_used'] == 21000
+    assert "  [Deploy Token] Compiling..." in capsys.readouterr().out
+
+def test_keeps_only_the_tail_of_large_output(monkeypatch):
+    monkeypatch.setattr(executor, 'TAIL_LINES', 5)
+    result = run_streaming(_python("for i in range(1000): print(i)"), echo=False)
+    assert result.stdout.splitlines() == ['995', '996', '997', '998', '999']
+    assert result.stdout_bytes == sum(len(f"{i}\n") for i in range(1000))
+
+def test_non_zero_exit_raises_called_process_error():
+    code = "import sys; print('bad config', file=sys.stderr); sys.exit(3)"
+    with pytest.raises(subprocess.CalledProcessError) as excinfo:
+        run_streaming(_python(code), echo=False)
+    assert excinfo.value.returncode == 3
+    assert excinfo.value.stderr == 'bad config'
+
+def test_missing_executable_raises_file_not_found():
+    with pytest.raises(FileNotFoundError):
+        run_streaming(['definitely-not-a-real-binary-xyz'])
+
+def test_timeout_kills_the_process():
+    started = time.monotonic()
+    with pytest.raises(ProcessInterrupted, match="Timed out"):
+        run_streaming(_python("import time; print('started'); time.sleep(30)"), timeout=0.5, echo=False)
+    assert time.monotonic() - started < 10
+
+def test_job_timeout_and_cancel_event_apply_to_nested_calls():
+    with job_context('Slow', timeout=0.3):
+        with pytest.raises(ProcessInterrupted, match="Timed out"):
+            run_streaming(_python("import time; time.sleep(30)"), echo=False)
+
+    cancel = threading.Event()
+    threading.Timer(0.3, cancel.set).start()
+    with job_context('Cancelled', cancel_event=cancel):
+        with pytest.raises(ProcessInterrupted, match="Cancelled"):
+            run_streaming(_python("import time; time.sleep(30)"), echo=False)
+
+def test_extract_events_ignores_unrelated_lines():
+    assert extract_events("Compiled 3 Solidity files successfully") == []
+
+@pytest.mark.parametrize('minutes', [0, -1, 'ten', True])
+def test_parse_timeout_rejects_invalid_values(minutes):
+    with pytest.raises(ValueError, match="timeout-minutes"):
+        parse_timeout({'timeout-minutes': minutes}, 'Deploy')
+
+def test_parse_timeout_in_seconds():
+    assert parse_timeout({'timeout-minutes': 1.5}, 'Deploy') == 90
+    assert parse_timeout({}, 'Deploy') is None
@@ -0,0 +1,56 @@
+import pytest
+
+from src.expressions import (
+    Constant, ExpressionError, ResolveContext, compile_template, parse_expression
+)
+
+OUTPUTS = {
+    'Deploy to Localhost': {'status': 'success', 'address': '0xabc'},
+    'Deploy Suite': {'addresses': {'goerli': {'Token': '0x1'}}, 'list': ['a', 'b']},
+}
+
+def _context(**kwargs):
+    return ResolveContext(OUTPUTS, env=kwargs.get('env', {'VERSION': '1.2.0'}), matrix=kwargs.get('matrix'))
+
+def test_single_expression_keeps_raw_value():
+    template = compile_template('${{ jobs.Deploy Suite.output.addresses }}')
+    assert template.resolve(_context()) == {'goerli': {'Token': '0x1'}}
+
+def test_nested_output_path_and_list_index():
+    assert compile_template('${{ jobs.Deploy Suite.output.addresses.goerli.Token }}').resolve(_context()) == '0x1'
+    assert compile_template('${{ jobs.Deploy Suite.output.list.1 }}').resolve(_context()) == 'b'
+
+def test_interpolation_inside_larger_string():
+    template = compile_template('v${{ env.VERSION }} at ${{jobs.Deploy to Localhost.output.address}}!')
+    assert template.resolve(_context()) == 'v1.2.0 at 0xabc!'
+
+def test_walks_nested_params():
+    params = {
+        'network': 'localhost',
+        'args': ['${{ jobs.Deploy to Localhost.output.address }}', 42],
+        'options': {'target': '${{ matrix.network }}'},
+    }
+    template = compile_template(params)
+    assert template.resolve(_context(matrix={'network': 'goerli'})) == {
+        'network': 'localhost',
+        'args': ['0xabc', 42],
+        'options': {'target': 'goerli'},
+    }
+
+def test_constant_params_compile_to_constant():
+    params = {'network': 'localhost', 'args': ['Hello']}
+    template = compile_template(params)
+    assert isinstance(template, Constant)
+    assert template.resolve(_context()) is params
+
+def test_missing_values_resolve_to_none_with_warning(capsys):
+    assert compile_template('${{ jobs.Deploy to Localhost.output.missing }}').resolve(_context()) is None
+    assert compile_template('${{ env.MISSING }}').resolve(_context()) is None
+    assert compile_template('x-${{ env.MISSING }}').resolve(_context()) == 'x-'
+    assert "Could not resolve dynamic parameter" in capsys.readouterr().out
+
+def test_invalid_expressions_fail_at_compile_time():
+    with pytest.raises(ExpressionError, match="Unsupported expression"):
+        compile_template('${{ secrets.KEY }}')
+    with pytest.raises(ExpressionError, match="Invalid job reference"):
+        parse_expression('jobs.Deploy.address')
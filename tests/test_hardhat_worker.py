@@ -0,0 +1,94 @@
+import sys
+import textwrap
+import pytest
+
+from src.hardhat_worker import HardhatWorker, HardhatWorkerError, HardhatWorkerPool
+
+# Stand-in for scripts/worker.js that speaks the same newline-delimited JSON-RPC protocol
+FAKE_WORKER = textwrap.dedent("""
+    import json, sys
+
+    network = sys.argv[1]
+    deploys = 0
+
+    def reply(message):
+        message["jsonrpc"] = "2.0"
+        sys.stdout.write(json.dumps(message) + "\\n")
+        sys.stdout.flush()
+
+    print("Downloading compiler 0.8.20", flush=True)  # Hardhat output before the protocol starts
+    reply({"method": "ready", "params": {"network": network}})
+    for line in sys.stdin:
+        request = json.loads(line)
+        method = request["method"]
+        if method == "deploy":
+            deploys += 1
+            print("Compiled 1 Solidity file successfully", flush=True)
+            print("noise that is not a protocol message", file=sys.stderr)
+            reply({"id": request["id"], "result": {"address": "0x" + str(deploys).rjust(40, "0"), "network": network}})
+        elif method == "fail":
+            reply({"id": request["id"], "error": {"code": -32000, "message": "compilation error"}})
+        elif method == "shutdown":
+            reply({"id": request["id"], "result": {}})
+            break
+        else:
+            reply({"id": request["id"], "result": {"method": method}})
+""")
+
+@pytest.fixture
+def fake_worker_script(tmp_path):
+    script = tmp_path / "fake_worker.py"
+    script.write_text(FAKE_WORKER)
+    return str(script)
+
+def test_worker_handles_multiple_calls_in_one_process(fake_worker_script, tmp_path):
+    worker = HardhatWorker("localhost", cwd=str(tmp_path), command=[sys.executable, fake_worker_script, "localhost"])
+    try:
+        first = worker.call('deploy', {'contract': 'MyContract'})
+        process = worker._process
+        second = worker.call('deploy', {'contract': 'MyContract'})
+        assert worker._process is process
+    finally:
+        worker.close()
+
+    assert first == {'address': '0x' + '1'.rjust(40, '0'), 'network': 'localhost'}
+    assert second['address'] == '0x' + '2'.rjust(40, '0')
+    assert not worker.running
+
+def test_worker_skips_non_protocol_stdout_lines(fake_worker_script, tmp_path, capsys):
+    worker = HardhatWorker("localhost", cwd=str(tmp_path), command=[sys.executable, fake_worker_script, "localhost"])
+    try:
+        assert worker.call('deploy')['address'] == '0x' + '1'.rjust(40, '0')
+    finally:
+        worker.close()
+    output = capsys.readouterr().out
+    assert "[hardhat:localhost] Downloading compiler 0.8.20" in output
+    assert "[hardhat:localhost] Compiled 1 Solidity file successfully" in output
+
+def test_worker_default_command_skips_implicit_compile(tmp_path):
+    worker = HardhatWorker("localhost", cwd=str(tmp_path))
+    assert worker.command == ["npx", "hardhat", "run", "--no-compile", "scripts/worker.js", "--network", "localhost"]
+
+def test_worker_raises_on_error_response(fake_worker_script, tmp_path):
+    worker = HardhatWorker("hardhat", cwd=str(tmp_path), command=[sys.executable, fake_worker_script, "hardhat"])
+    try:
+        with pytest.raises(HardhatWorkerError, match="compilation error"):
+            worker.call('fail')
+        # The worker stays usable after an error response
+        assert worker.call('compile') == {'method': 'compile'}
+    finally:
+        worker.close()
+
+def test_worker_reports_unexpected_exit(tmp_path):
+    worker = HardhatWorker("localhost", cwd=str(tmp_path), command=[sys.executable, "-c", "pass"])
+    with pytest.raises(HardhatWorkerError, match="exited unexpectedly"):
+        worker.call('ping')
+
+def test_pool_keeps_one_worker_per_network(fake_worker_script, tmp_path):
+    pool = HardhatWorkerPool(cwd=str(tmp_path), env=None, command_factory=lambda network: [sys.executable, fake_worker_script, network])
+    with pool:
+        assert pool.get('localhost') is pool.get('localhost')
+        assert pool.get('goerli') is not pool.get('localhost')
+        assert pool.get('goerli').call('deploy')['network'] == 'goerli'
+        goerli = pool.get('goerli')
+    assert not goerli.running
@@ -0,0 +1,53 @@
+import pytest
+
+from src.matrix import aggregate_outputs, expand_matrix, instance_name, parse_strategy
+
+def test_expand_matrix_cartesian_product_in_axis_order():
+    combinations = expand_matrix({'network': ['goerli', 'sepolia'], 'contract': ['Token', 'Vault']})
+    assert combinations == [
+        {'network': 'goerli', 'contract': 'Token'},
+        {'network': 'goerli', 'contract': 'Vault'},
+        {'network': 'sepolia', 'contract': 'Token'},
+        {'network': 'sepolia', 'contract': 'Vault'},
+    ]
+
+def test_expand_matrix_include_and_exclude():
+    matrix = {
+        'network': ['goerli', 'sepolia'],
+        'exclude': [{'network': 'goerli'}],
+        'include': [{'network': 'sepolia', 'gas_price': 5}, {'network': 'localhost'}],
+    }
+    assert expand_matrix(matrix) == [{'network': 'sepolia', 'gas_price': 5}, {'network': 'localhost'}]
+
+def test_expand_matrix_rejects_empty_result():
+    with pytest.raises(ValueError, match="no combinations"):
+        expand_matrix({'network': ['goerli'], 'exclude': [{'network': 'goerli'}]})
+
+def test_instance_name():
+    assert instance_name('Deploy', {'network': 'goerli', 'contract': 'Token'}) == 'Deploy (network=goerli, contract=Token)'
+
+def test_aggregate_outputs_nested_by_axis_values():
+    instances = [
+        ({'network': 'goerli', 'contract': 'Token'}, {'status': 'success', 'address': '0x1'}),
+        ({'network': 'goerli', 'contract': 'Vault'}, {'status': 'success', 'address': '0x2'}),
+        ({'network': 'sepolia', 'contract': 'Token'}, {'status': 'failure', 'error': 'boom'}),
+    ]
+    assert aggregate_outputs(['network', 'contract'], instances) == {
+        'address': {'goerli': {'Token': '0x1', 'Vault': '0x2'}},
+        'error': {'sepolia': {'Token': 'boom'}},
+    }
+
+@pytest.mark.parametrize('strategy, message', [
+    ({'max-parallel': 2}, "needs a 'matrix'"),
+    ({'matrix': {'network': ['a']}, 'max-parallel': 0}, "max-parallel"),
+    ({'matrix': {'network': ['a']}, 'fail-fast': 'yes'}, "fail-fast"),
+])
+def test_parse_strategy_rejects_malformed_blocks(strategy, message):
+    with pytest.raises(ValueError, match=message):
+        parse_strategy({'strategy': strategy}, 'Deploy')
+
+def test_parse_strategy_defaults():
+    strategy = parse_strategy({'strategy': {'matrix': {'network': ['a']}}}, 'Deploy')
+    assert strategy.max_parallel is None
+    assert strategy.fail_fast is True
+    assert parse_strategy({}, 'Deploy') is None
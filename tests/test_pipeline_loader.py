@@ -0,0 +1,96 @@
+import os
+import pytest
+from unittest.mock import patch
+
+from src import pipeline_loader
+from src.pipeline_loader import clear_pipeline_cache, load_pipeline
+
+PIPELINE = """
+name: Main
+include: fragments/common.yaml
+jobs:
+  - name: Deploy
+    uses: actions/deploy@v1
+    needs: Compile
+    with:
+      network: localhost
+      contract: Token
+"""
+
+COMMON = """
+include: compile.yaml
+jobs:
+  - name: Lint
+    uses: acme/lint@v1
+"""
+
+COMPILE = """
+- name: Compile
+  uses: actions/compile@v1
+  with:
+    tool: hardhat
+"""
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / 'fragments').mkdir()
+    (tmp_path / 'pipeline.yaml').write_text(PIPELINE)
+    (tmp_path / 'fragments' / 'common.yaml').write_text(COMMON)
+    (tmp_path / 'fragments' / 'compile.yaml').write_text(COMPILE)
+    return tmp_path
+
+def _touch(path, content):
+    # Same size edits within one mtime tick would look unchanged to the stat check
+    path.write_text(content)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+def test_includes_are_expanded_before_the_files_own_jobs(project):
+    data = load_pipeline(str(project / 'pipeline.yaml'))
+    assert [job['name'] for job in data['jobs']] == ['Compile', 'Lint', 'Deploy']
+    assert 'include' not in data
+
+def test_parsed_pipeline_is_reused_until_a_file_changes(project):
+    path = str(project / 'pipeline.yaml')
+    first = load_pipeline(path)
+    first['jobs'].clear() # Callers get their own copy
+    with patch.object(pipeline_loader, '_parse') as parse:
+        assert len(load_pipeline(path)['jobs']) == 3
+    parse.assert_not_called()
+
+    _touch(project / 'fragments' / 'compile.yaml', COMPILE.replace('Compile', 'Build'))
+    assert [job['name'] for job in load_pipeline(path)['jobs']] == ['Build', 'Lint', 'Deploy']
+
+def test_disk_cache_serves_a_new_process(project):
+    path = str(project / 'pipeline.yaml')
+    load_pipeline(path)
+    clear_pipeline_cache()
+    with patch.object(pipeline_loader, '_parse') as parse:
+        assert [job['name'] for job in load_pipeline(path)['jobs']] == ['Compile', 'Lint', 'Deploy']
+    parse.assert_not_called()
+
+    # Included files are re-hashed on a disk hit
+    clear_pipeline_cache()
+    (project / 'fragments' / 'common.yaml').write_text(COMMON.replace('Lint', 'Check'))
+    assert [job['name'] for job in load_pipeline(path)['jobs']] == ['Compile', 'Check', 'Deploy']
+
+def test_corrupt_cache_entry_is_parsed_again(project):
+    path = str(project / 'pipeline.yaml')
+    load_pipeline(path)
+    clear_pipeline_cache()
+    cache_dir = os.path.join(os.environ['WEB3_DEVOPS_CACHE_DIR'], 'pipelines')
+    for filename in os.listdir(cache_dir):
+        with open(os.path.join(cache_dir, filename), 'wb') as f:
+            f.write(b'not a pickle')
+    assert len(load_pipeline(path)['jobs']) == 3
+
+def test_include_errors(project):
+    (project / 'fragments' / 'compile.yaml').write_text("include: common.yaml\n")
+    with pytest.raises(ValueError, match='Include cycle'):
+        load_pipeline(str(project / 'pipeline.yaml'))
+    (project / 'other.yaml').write_text("include: [missing.yaml]\njobs: []\n")
+    with pytest.raises(FileNotFoundError, match='missing.yaml'):
+        load_pipeline(str(project / 'other.yaml'))
+    (project / 'broken.yaml').write_text("jobs: [\n")
+    with pytest.raises(ValueError, match='Invalid YAML'):
+        load_pipeline(str(project / 'broken.yaml'))
@@ -1,10 +1,12 @@
 import pytest
 import os
+import time
 import yaml
 import json
 from unittest.mock import patch, mock_open
 
 from src.pipeline_runner import PipelineRunner
+from src.tracing import Tracer, set_tracer
 
 # Mock pipeline file content
 MOCK_PIPELINE_CONTENT = """
@@ -39,7 +41,9 @@ MOCK_NETWORKS_CONTENT = {
 
 @pytest.fixture
 def mock_pipeline_file(tmp_path):
-    pipeline_file = tmp_path / "test_pipeline.yaml"
+    # pipelines/ next to config/, where the runner looks for networks.json
+    (tmp_path / "pipelines").mkdir(exist_ok=True)
+    pipeline_file = tmp_path / "pipelines" / "test_pipeline.yaml"
     pipeline_file.write_text(MOCK_PIPELINE_CONTENT)
     return str(pipeline_file)
 
@@ -51,32 +55,24 @@ def mock_networks_file(tmp_path):
     networks_file.write_text(json.dumps(MOCK_NETWORKS_CONTENT))
     return str(networks_file)
 
-@patch('src.pipeline_runner.compile_contracts', return_value={'status': 'success'})
-@patch('src.pipeline_runner.deploy_contract', return_value={'status': 'success', 'address': '0x1234567890123456789012345678901234567890'})
-@patch('src.pipeline_runner.verify_contract', return_value={'status': 'success'})
+@patch('src.actions.compile.compile_contracts', return_value={'status': 'success'})
+@patch('src.actions.deploy.deploy_contract', return_value={'status': 'success', 'address': '0x1234567890123456789012345678901234567890'})
+@patch('src.actions.verify.verify_contract', return_value={'status': 'success'})
 def test_pipeline_runner_run_success(mock_verify, mock_deploy, mock_compile, mock_pipeline_file, mock_networks_file):
-    # Mock os.path.exists for networks.json
-    with patch('os.path.exists', side_effect=lambda path: True if "networks.json" in path or "test_pipeline.yaml" in path else False):
-        # Mock open for networks.json
-        with patch('builtins.open', new_callable=mock_open, read_data=json.dumps(MOCK_NETWORKS_CONTENT)) as mocked_open:
-            # Ensure the correct file is opened for networks.json
-            mocked_open.side_effect = lambda filename, *args, **kwargs: (
-                mock_open(read_data=MOCK_PIPELINE_CONTENT).return_value if "test_pipeline.yaml" in filename else
-                mock_open(read_data=json.dumps(MOCK_NETWORKS_CONTENT)).return_value
-            )
-            runner = PipelineRunner(mock_pipeline_file)
-            runner.run()
-
-            mock_compile.assert_called_once()
-            mock_deploy.assert_called_once()
-            mock_verify.assert_called_once()
-            assert runner.job_outputs['Test Deploy']['address'] == '0x1234567890123456789012345678901234567890'
+    runner = PipelineRunner(mock_pipeline_file)
+    runner.run()
+
+    mock_compile.assert_called_once()
+    mock_deploy.assert_called_once()
+    mock_verify.assert_called_once()
+    assert runner.job_outputs['Test Deploy']['address'] == '0x1234567890123456789012345678901234567890'
+    assert mock_verify.call_args[0][0]['address'] == '0x1234567890123456789012345678901234567890'
 
 def test_pipeline_runner_file_not_found():
     with pytest.raises(FileNotFoundError):
         PipelineRunner("/nonexistent/pipeline.yaml")
 
-@patch('src.pipeline_runner.deploy_contract', return_value={'status': 'failure'})
+@patch('src.actions.deploy.deploy_contract', return_value={'status': 'failure'})
 def test_pipeline_runner_dynamic_param_resolution_failure(mock_deploy, mock_pipeline_file, mock_networks_file):
     # Modify pipeline content to simulate a failed deploy that doesn't return an address
     failed_deploy_pipeline = """
@@ -94,15 +90,252 @@ jobs:
       contract: MyContract
       address: ${{ jobs.Test Deploy Failed.output.address }}
 """
-    with patch('os.path.exists', side_effect=lambda path: True if "networks.json" in path or "test_pipeline.yaml" in path else False):
-        with patch('builtins.open', new_callable=mock_open, read_data=json.dumps(MOCK_NETWORKS_CONTENT)) as mocked_open:
-            mocked_open.side_effect = lambda filename, *args, **kwargs: (
-                mock_open(read_data=failed_deploy_pipeline).return_value if "test_pipeline.yaml" in filename else
-                mock_open(read_data=json.dumps(MOCK_NETWORKS_CONTENT)).return_value
-            )
-            runner = PipelineRunner(mock_pipeline_file)
-            runner.run()
-            # Verify that the address for verification is None or not set due to failed deploy
-            assert runner.job_outputs['Test Deploy Failed']['status'] == 'failure'
-            # The verify action should have been called with address=None or similar
-            # (depending on how verify_contract handles None address)
+    with open(mock_pipeline_file, 'w') as f:
+        f.write(failed_deploy_pipeline)
+    runner = PipelineRunner(mock_pipeline_file)
+    runner.run()
+    # Verify that the address for verification is None or not set due to failed deploy
+    assert runner.job_outputs['Test Deploy Failed']['status'] == 'failure'
+    # The verify action should have been called with address=None or similar
+    # (depending on how verify_contract handles None address)
+
+PARALLEL_PIPELINE_CONTENT = """
+name: Parallel Pipeline
+jobs:
+  - name: Compile
+    uses: actions/compile@v1
+    with:
+      tool: hardhat
+  - name: Deploy A
+    uses: actions/deploy@v1
+    with:
+      network: localhost
+      contract: A
+  - name: Deploy B
+    uses: actions/deploy@v1
+    with:
+      network: localhost
+      contract: B
+  - name: Verify A
+    uses: actions/verify@v1
+    with:
+      network: localhost
+      contract: A
+      address: ${{ jobs.Deploy A.output.address }}
+"""
+
+@pytest.fixture
+def parallel_pipeline_file(tmp_path, mock_networks_file):
+    pipelines_dir = tmp_path / "pipelines"
+    pipelines_dir.mkdir()
+    pipeline_file = pipelines_dir / "parallel.yaml"
+    pipeline_file.write_text(PARALLEL_PIPELINE_CONTENT)
+    return str(pipeline_file)
+
+def _fake_deploy(params, *args, **kwargs):
+    time.sleep(0.05)
+    return {'status': 'success', 'address': f"0x{params['contract']}"}
+
+@patch('src.actions.compile.compile_contracts', return_value={'status': 'success'})
+@patch('src.actions.deploy.deploy_contract', side_effect=_fake_deploy)
+@patch('src.actions.verify.verify_contract', return_value={'status': 'success'})
+def test_pipeline_runner_parallel_run(mock_verify, mock_deploy, mock_compile, parallel_pipeline_file):
+    runner = PipelineRunner(parallel_pipeline_file, max_parallel=3)
+    runner.run()
+
+    mock_compile.assert_called_once()
+    assert mock_deploy.call_count == 2
+    # Verify saw the output of the deploy it references
+    verify_params = mock_verify.call_args[0][0]
+    assert verify_params['address'] == '0xA'
+    assert runner.job_outputs['Deploy B'] == {'status': 'success', 'address': '0xB'}
+
+@patch('src.actions.compile.compile_contracts', return_value={'status': 'success'})
+@patch('src.actions.deploy.deploy_contract', side_effect=RuntimeError("RPC exploded"))
+@patch('src.actions.verify.verify_contract', return_value={'status': 'success'})
+def test_pipeline_runner_parallel_run_propagates_job_errors(mock_verify, mock_deploy, mock_compile, parallel_pipeline_file):
+    runner = PipelineRunner(parallel_pipeline_file, max_parallel=3)
+    with pytest.raises(RuntimeError, match="RPC exploded"):
+        runner.run()
+    mock_verify.assert_not_called()
+
+@patch('src.actions.compile.compile_contracts', return_value={'status': 'success'})
+@patch('src.actions.verify.verify_contract', return_value={'status': 'success'})
+def test_pipeline_runner_resume_skips_unchanged_jobs(mock_verify, mock_compile, parallel_pipeline_file, tmp_path):
+    state_dir = str(tmp_path / "state")
+    failing_b = lambda params, *args, **kwargs: {'status': 'failure'} if params['contract'] == 'B' else _fake_deploy(params)
+    with patch('src.actions.deploy.deploy_contract', side_effect=failing_b):
+        first = PipelineRunner(parallel_pipeline_file, state_dir=state_dir)
+        first.run()
+    run_id = first.run_state.run_id
+
+    with patch('src.actions.deploy.deploy_contract', side_effect=_fake_deploy) as mock_deploy:
+        resumed = PipelineRunner(parallel_pipeline_file, state_dir=state_dir, resume_run_id=run_id, force_jobs=['Verify A'])
+        resumed.run()
+
+    # Only the failed deploy runs again; the successful one is replayed for ${{ }} resolution
+    assert [call[0][0]['contract'] for call in mock_deploy.call_args_list] == ['B']
+    assert mock_compile.call_count == 1
+    assert mock_verify.call_count == 2  # forced
+    assert mock_verify.call_args[0][0]['address'] == '0xA'
+    assert resumed.deployed_contracts == {'A': '0xA'}
+    assert resumed.job_outputs['Deploy B'] == {'status': 'success', 'address': '0xB'}
+
+def test_pipeline_runner_resume_unknown_run(parallel_pipeline_file, tmp_path):
+    with pytest.raises(FileNotFoundError, match="No recorded state"):
+        PipelineRunner(parallel_pipeline_file, state_dir=str(tmp_path / "state"), resume_run_id="missing")
+
+@patch('src.actions.compile.compile_contracts', return_value={'status': 'success'})
+@patch('src.actions.deploy.deploy_contract', side_effect=_fake_deploy)
+@patch('src.actions.verify.verify_contract', return_value={'status': 'success'})
+def test_pipeline_runner_async_verify_reports_at_the_end(mock_verify, mock_deploy, mock_compile, parallel_pipeline_file, capsys):
+    runner = PipelineRunner(parallel_pipeline_file, async_verify=True)
+    runner.run()
+
+    mock_verify.assert_called_once()
+    assert mock_verify.call_args[0][0]['address'] == '0xA'
+    assert runner.job_outputs['Verify A'] == {'status': 'success', 'attempts': 1}
+    output = capsys.readouterr().out
+    assert output.index("queued") < output.index("--- Verification Results ---") < output.index("--- Pipeline Finished ---")
+
+def test_pipeline_runner_rejects_unknown_job_reference_at_load(tmp_path):
+    pipeline_file = tmp_path / "bad.yaml"
+    pipeline_file.write_text("""
+name: Bad
+jobs:
+  - name: Verify
+    uses: actions/verify@v1
+    with:
+      address: ${{ jobs.Deploy.output.address }}
+""")
+    with pytest.raises(ValueError, match="unknown job"):
+        PipelineRunner(str(pipeline_file))
+
+MATRIX_PIPELINE_CONTENT = """
+name: Matrix Pipeline
+jobs:
+  - name: Compile
+    uses: actions/compile@v1
+  - name: Deploy All
+    uses: actions/deploy@v1
+    strategy:
+      matrix:
+        network: [localhost, goerli, sepolia]
+      max-parallel: 3
+      fail-fast: false
+    with:
+      network: ${{ matrix.network }}
+      contract: MyContract
+  - name: Verify Goerli
+    uses: actions/verify@v1
+    with:
+      network: goerli
+      address: ${{ jobs.Deploy All.output.address.goerli }}
+"""
+
+@pytest.fixture
+def matrix_pipeline_file(tmp_path, mock_networks_file):
+    pipelines_dir = tmp_path / "pipelines"
+    pipelines_dir.mkdir()
+    pipeline_file = pipelines_dir / "matrix.yaml"
+    pipeline_file.write_text(MATRIX_PIPELINE_CONTENT)
+    return str(pipeline_file)
+
+def _fake_network_deploy(params, *args, **kwargs):
+    time.sleep(0.05)
+    if params['network'] == 'sepolia':
+        return {'status': 'failure', 'error': 'out of gas'}
+    return {'status': 'success', 'address': f"0x{params['network']}"}
+
+@patch('src.actions.compile.compile_contracts', return_value={'status': 'success'})
+@patch('src.actions.deploy.deploy_contract', side_effect=_fake_network_deploy)
+@patch('src.actions.verify.verify_contract', return_value={'status': 'success'})
+def test_pipeline_runner_matrix_fan_out_and_fan_in(mock_verify, mock_deploy, mock_compile, matrix_pipeline_file):
+    runner = PipelineRunner(matrix_pipeline_file)
+    runner.run()
+
+    assert sorted(call[0][0]['network'] for call in mock_deploy.call_args_list) == ['goerli', 'localhost', 'sepolia']
+    aggregated = runner.job_outputs['Deploy All']
+    assert aggregated['status'] == 'failure'
+    assert aggregated['failed'] == ['Deploy All (network=sepolia)']
+    assert aggregated['address'] == {'localhost': '0xlocalhost', 'goerli': '0xgoerli'}
+    assert runner.job_outputs['Deploy All (network=goerli)']['address'] == '0xgoerli'
+    assert mock_verify.call_args[0][0]['address'] == '0xgoerli'
+
+@patch('src.actions.compile.compile_contracts', return_value={'status': 'success'})
+@patch('src.actions.deploy.deploy_contract', side_effect=_fake_network_deploy)
+@patch('src.actions.verify.verify_contract', return_value={'status': 'success'})
+def test_pipeline_runner_matrix_fail_fast_cancels_remaining_instances(mock_verify, mock_deploy, mock_compile, matrix_pipeline_file):
+    with open(matrix_pipeline_file, 'w') as f:
+        f.write(MATRIX_PIPELINE_CONTENT
+                .replace("[localhost, goerli, sepolia]", "[sepolia, goerli]")
+                .replace("max-parallel: 3", "max-parallel: 1")
+                .replace("fail-fast: false", "fail-fast: true"))
+    runner = PipelineRunner(matrix_pipeline_file)
+    runner.run()
+
+    assert mock_deploy.call_count == 1
+    assert runner.job_outputs['Deploy All (network=goerli)'] == {'status': 'cancelled'}
+    assert runner.job_outputs['Deploy All']['failed'] == ['Deploy All (network=sepolia)', 'Deploy All (network=goerli)']
+
+@patch('src.actions.compile.compile_contracts', return_value={'status': 'success'})
+@patch('src.actions.deploy.deploy_contract', side_effect=_fake_deploy)
+@patch('src.actions.verify.verify_contract', return_value={'status': 'success'})
+def test_pipeline_runner_records_trace_spans(mock_verify, mock_deploy, mock_compile, parallel_pipeline_file):
+    tracer = Tracer()
+    set_tracer(tracer)
+    try:
+        PipelineRunner(parallel_pipeline_file, max_parallel=3).run()
+    finally:
+        set_tracer(None)
+
+    names = [span.name for span in tracer.spans]
+    assert {'pipeline.load', 'networks.load', 'pipeline.compile', 'pipeline.run'} <= set(names)
+    run_span = next(span for span in tracer.spans if span.name == 'pipeline.run')
+    job_spans = {span.attributes['job']: span for span in tracer.spans if span.name == 'job'}
+    assert set(job_spans) == {'Compile', 'Deploy A', 'Deploy B', 'Verify A'}
+    assert all(span.parent_id == run_span.span_id for span in job_spans.values())
+    assert job_spans['Deploy B'].attributes['status'] == 'success'
+    assert names.count('params.resolve') == 4
+
+def test_pipeline_runner_rejects_invalid_timeout_at_load(tmp_path):
+    pipeline_file = tmp_path / "bad.yaml"
+    pipeline_file.write_text("""
+name: Bad
+jobs:
+  - name: Compile
+    uses: actions/compile@v1
+    timeout-minutes: soon
+""")
+    with pytest.raises(ValueError, match="timeout-minutes"):
+        PipelineRunner(str(pipeline_file))
+
+def test_pipeline_runner_rejects_unknown_action_at_load(tmp_path):
+    pipeline_file = tmp_path / "bad.yaml"
+    pipeline_file.write_text("""
+name: Bad
+jobs:
+  - name: Upgrade
+    uses: acme/upgrade@v1
+""")
+    with pytest.raises(ValueError, match="unknown action 'acme/upgrade@v1'"):
+        PipelineRunner(str(pipeline_file))
+
+def test_pipeline_runner_runs_plugin_actions(tmp_path, mock_networks_file):
+    plugin = tmp_path / "actions" / "acme" / "grant-role@v1.py"
+    plugin.parent.mkdir(parents=True)
+    plugin.write_text("def run(params, context):\n    return {'status': 'success', 'granted': params['role'] + ' to ' + context.job_name}\n")
+    pipelines_dir = tmp_path / "pipelines"
+    pipelines_dir.mkdir()
+    pipeline_file = pipelines_dir / "roles.yaml"
+    pipeline_file.write_text("""
+name: Roles
+jobs:
+  - name: Grant
+    uses: acme/grant-role@v1
+    with:
+      role: MINTER
+""")
+    runner = PipelineRunner(str(pipeline_file))
+    runner.run()
+    assert runner.job_outputs['Grant'] == {'status': 'success', 'granted': 'MINTER to Grant'}
@@ -0,0 +1,110 @@
+import pytest
+
+from src.pipeline_runner import PipelineRunner
+from src.planner import format_plan, plan_pipeline
+from src.run_state import RunStateStore
+
+NOOP_ACTION = """
+PARAMS = {'value': (str, False)}
+
+def run(params, context):
+    return {'status': 'success', 'value': params.get('value') or context.job_name}
+"""
+
+CACHED_ACTION = """
+def run(params, context):
+    return {'status': 'success', 'cache_hit': True}
+
+def cache_hit(params):
+    return True
+"""
+
+PIPELINE = """
+name: Release
+jobs:
+  - name: Short A
+    uses: test/noop@v1
+  - name: Short B
+    uses: test/noop@v1
+  - name: Build
+    uses: test/noop@v1
+  - name: Long
+    uses: test/noop@v1
+    with:
+      value: ${{ jobs.Build.output.value }}
+"""
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "config").mkdir()
+    (tmp_path / "config" / "networks.json").write_text("{}")
+    (tmp_path / "actions" / "test").mkdir(parents=True)
+    (tmp_path / "actions" / "test" / "noop@v1.py").write_text(NOOP_ACTION)
+    (tmp_path / "actions" / "test" / "cached@v1.py").write_text(CACHED_ACTION)
+    (tmp_path / "pipelines").mkdir()
+    (tmp_path / "pipelines" / "release.yaml").write_text(PIPELINE)
+    return tmp_path
+
+def _record_history(state_dir, durations, run_id='20260101-000000-history', outputs=None):
+    store = RunStateStore(str(state_dir), run_id)
+    for job, duration in durations.items():
+        store.record(job, 'fp', (outputs or {}).get(job, {'status': 'success'}), started_at=1000.0, finished_at=1000.0 + duration)
+
+def test_plan_predicts_wall_time_and_critical_path(project):
+    state_dir = project / ".pipeline-state"
+    _record_history(state_dir, {'Short A': 5, 'Short B': 5, 'Build': 10, 'Long': 30})
+    runner = PipelineRunner(str(project / "pipelines" / "release.yaml"), max_parallel=2, state_dir=str(state_dir))
+    plan = plan_pipeline(runner)
+
+    # Build heads the longest chain, so it starts first instead of waiting behind the short jobs
+    assert runner.job_priority == {'Short A': 5, 'Short B': 5, 'Build': 40, 'Long': 30}
+    starts = {entry['name']: entry['start'] for entry in plan['jobs']}
+    assert starts == {'Build': 0, 'Short A': 0, 'Short B': 5, 'Long': 10}
+    assert plan['wall_time'] == 40
+    assert plan['critical_path'] == ['Build', 'Long'] and plan['critical_path_length'] == 40
+    assert all(entry['status'] == 'run' for entry in plan['jobs'])
+    assert "Critical path (*): 40.0s - Build -> Long" in format_plan(plan)
+
+    # One job at a time keeps pipeline order
+    serial = plan_pipeline(PipelineRunner(str(project / "pipelines" / "release.yaml"), state_dir=str(state_dir)))
+    assert [entry['name'] for entry in serial['jobs']] == ['Short A', 'Short B', 'Build', 'Long']
+    assert serial['wall_time'] == 50
+
+def test_plan_reports_jobs_a_resume_would_skip(project):
+    state_dir = str(project / ".pipeline-state")
+    first = PipelineRunner(str(project / "pipelines" / "release.yaml"), state_dir=state_dir)
+    first.run()
+
+    runner = PipelineRunner(
+        str(project / "pipelines" / "release.yaml"), state_dir=state_dir,
+        resume_run_id=first.run_state.run_id, force_jobs=['Short B']
+    )
+    jobs = {entry['name']: entry for entry in plan_pipeline(runner)['jobs']}
+    assert jobs['Short A']['status'] == 'skip' and jobs['Short A']['estimate'] == 0
+    assert jobs['Short B']['status'] == 'run' # forced
+    # Long's params resolve with the output Build would replay, so its fingerprint is known
+    assert jobs['Long']['status'] == 'skip'
+
+    runner = PipelineRunner(str(project / "pipelines" / "release.yaml"), state_dir=state_dir,
+                            resume_run_id=first.run_state.run_id, force_jobs=['Build'])
+    jobs = {entry['name']: entry for entry in plan_pipeline(runner)['jobs']}
+    assert jobs['Long']['status'] == 'run'
+    assert jobs['Long']['reason'] == 'params use the output of Build'
+
+def test_plan_cache_hits_use_cached_durations(project):
+    (project / "pipelines" / "cached.yaml").write_text("name: Cached\njobs:\n  - name: Compile\n    uses: test/cached@v1\n")
+    state_dir = project / ".pipeline-state"
+    _record_history(state_dir, {'Compile': 60}, run_id='20260101-000000-cold')
+    _record_history(state_dir, {'Compile': 2}, run_id='20260102-000000-warm', outputs={'Compile': {'status': 'success', 'cache_hit': True}})
+
+    plan = plan_pipeline(PipelineRunner(str(project / "pipelines" / "cached.yaml"), state_dir=str(state_dir)))
+    assert plan['jobs'][0]['status'] == 'cache hit'
+    assert plan['jobs'][0]['estimate'] == 2
+    assert plan['without_history'] == []
+
+def test_plan_without_history(project):
+    plan = plan_pipeline(PipelineRunner(str(project / "pipelines" / "release.yaml"), max_parallel=4, state_dir=str(project / "state")))
+    assert plan['wall_time'] == 0
+    assert plan['critical_path'] == []
+    assert plan['without_history'] == ['Short A', 'Short B', 'Build', 'Long']
+    assert "No recorded duration for: Short A, Short B, Build, Long" in format_plan(plan)
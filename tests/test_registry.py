@@ -0,0 +1,82 @@
+import types
+import pytest
+from unittest.mock import patch
+
+from src.registry import ActionContext, ActionRegistry, default_plugin_dirs
+
+PLUGIN_SOURCE = """
+LOADED = True
+open(__file__ + '.imported', 'w').close()
+
+def run(params, context):
+    return {'status': 'success', 'role': params['role'], 'job': context.job_name}
+
+def fingerprint(params):
+    return 'roles-v2'
+"""
+
+@pytest.fixture
+def plugin_dir(tmp_path):
+    owner_dir = tmp_path / "actions" / "acme"
+    owner_dir.mkdir(parents=True)
+    (owner_dir / "grant-role@v1.py").write_text(PLUGIN_SOURCE)
+    (owner_dir / "README.md").write_text("not an action")
+    return tmp_path / "actions"
+
+def _context():
+    return ActionContext('Grant Minter', '/tmp/pipelines/p.yaml', {}, {})
+
+def test_builtin_actions_are_registered():
+    registry = ActionRegistry(use_entry_points=False)
+    assert registry.available() == ['actions/compile@v1', 'actions/deploy-batch@v1', 'actions/deploy@v1', 'actions/gas-report@v1', 'actions/verify@v1']
+
+def test_plugin_dir_actions_are_imported_on_first_use(plugin_dir):
+    registry = ActionRegistry([str(plugin_dir)], use_entry_points=False)
+    marker = plugin_dir / "acme" / "grant-role@v1.py.imported"
+    assert 'acme/grant-role@v1' in registry
+    assert not marker.exists()
+
+    action = registry.get('acme/grant-role@v1')
+    assert marker.exists()
+    assert action.run({'role': 'MINTER'}, _context()) == {'status': 'success', 'role': 'MINTER', 'job': 'Grant Minter'}
+    assert action.fingerprint({}) == 'roles-v2'
+    assert registry.get('acme/grant-role@v1') is action
+
+def test_entry_point_actions(monkeypatch):
+    module = types.ModuleType('acme_actions')
+    module.check_storage = lambda params, context: {'status': 'success'}
+    monkeypatch.setitem(__import__('sys').modules, 'acme_actions', module)
+    from importlib.metadata import EntryPoint
+    entry_point = EntryPoint(name='acme/storage-check@v2', value='acme_actions:check_storage', group='web3_devops_toolkit.actions')
+    with patch('src.registry.entry_points', return_value=[entry_point]):
+        registry = ActionRegistry()
+    action = registry.get('acme/storage-check@v2')
+    assert action.run({}, _context()) == {'status': 'success'}
+    assert action.fingerprint({}) is None
+
+def test_register_overrides_builtin():
+    registry = ActionRegistry(use_entry_points=False)
+    registry.register('actions/deploy@v1', lambda params, context: {'status': 'success', 'address': '0x1'})
+    assert registry.get('actions/deploy@v1').run({}, _context())['address'] == '0x1'
+
+def test_validate_rejects_unknown_and_missing_actions():
+    registry = ActionRegistry(use_entry_points=False)
+    with pytest.raises(ValueError, match="uses unknown action 'acme/upgrade@v1'"):
+        registry.validate([{'uses': 'acme/upgrade@v1'}], ['Upgrade'])
+    with pytest.raises(ValueError, match="expected <owner>/<name>@<version>"):
+        registry.validate([{'uses': 'upgrade'}], ['Upgrade'])
+    with pytest.raises(ValueError, match="has no 'uses'"):
+        registry.validate([{'name': 'Upgrade'}], ['Upgrade'])
+
+def test_plugin_without_run_fails_on_load(tmp_path):
+    owner_dir = tmp_path / "acme"
+    owner_dir.mkdir()
+    (owner_dir / "broken@v1.py").write_text("VALUE = 1\n")
+    registry = ActionRegistry([str(tmp_path)], use_entry_points=False)
+    with pytest.raises(ValueError, match="does not define run"):
+        registry.get('acme/broken@v1')
+
+def test_default_plugin_dirs(tmp_path, monkeypatch):
+    monkeypatch.setenv('WEB3_DEVOPS_ACTIONS_PATH', '/opt/actions')
+    dirs = default_plugin_dirs(str(tmp_path / "pipelines" / "p.yaml"))
+    assert dirs == [str(tmp_path / "actions"), '/opt/actions']
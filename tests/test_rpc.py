@@ -0,0 +1,49 @@
+import pytest
+
+from src.rpc import JsonRpcClient, JsonRpcError
+from tests.fake_rpc import FakeRpcNode
+
+@pytest.fixture
+def node():
+    with FakeRpcNode(chain_id=5) as node:
+        yield node
+
+def test_call_reuses_keep_alive_connection(node):
+    client = JsonRpcClient(node.url)
+    assert client.call('eth_chainId') == '0x5'
+    assert client.call('eth_blockNumber') == '0x0'
+    assert client.call('eth_accounts') == node.accounts
+    assert node.connections == 1
+    assert client.connections_opened == 1
+    client.close()
+
+def test_batch_returns_results_in_request_order(node):
+    client = JsonRpcClient(node.url)
+    chain_id, gas_price, nonce = client.batch([
+        ('eth_chainId', []),
+        ('eth_gasPrice', []),
+        ('eth_getTransactionCount', [node.accounts[0], 'pending']),
+    ])
+    assert (chain_id, gas_price, nonce) == ('0x5', hex(1_000_000_000), '0x0')
+    assert node.http_requests == 1
+    client.close()
+
+def test_error_response_raises(node):
+    client = JsonRpcClient(node.url)
+    with pytest.raises(JsonRpcError, match="Method not found") as excinfo:
+        client.call('eth_unknownMethod')
+    assert excinfo.value.code == -32601
+    with pytest.raises(JsonRpcError, match="Method not found"):
+        client.batch([('eth_chainId', []), ('eth_unknownMethod', [])])
+    client.close()
+
+def test_unreachable_endpoint_raises():
+    node = FakeRpcNode()
+    url = node.url
+    node.stop()
+    with pytest.raises(JsonRpcError, match="failed"):
+        JsonRpcClient(url, timeout=2).call('eth_chainId')
+
+def test_rejects_non_http_urls():
+    with pytest.raises(ValueError):
+        JsonRpcClient('ws://127.0.0.1:8546')
@@ -0,0 +1,117 @@
+import time
+import pytest
+
+from src.config import apply_env_overlay
+from src.rpc import JsonRpcError, close_clients, network_client, rpc_endpoints
+from src.rpc_pool import EndpointPool
+from tests.fake_rpc import FakeRpcNode
+
+@pytest.fixture
+def nodes():
+    with FakeRpcNode(chain_id=1) as first, FakeRpcNode(chain_id=2) as second:
+        yield first, second
+
+def _pool(nodes, **options):
+    options.setdefault('health_interval', 0)
+    return EndpointPool([node.url for node in nodes], **options)
+
+def test_routes_reads_to_the_fastest_endpoint(nodes):
+    slow, fast = nodes
+    slow.latency = 0.05
+    pool = _pool(nodes, hedge_after=5)
+    pool.check_health()
+    for _ in range(5):
+        assert pool.call('eth_chainId') == '0x2'
+    assert 'eth_chainId' not in slow.methods()
+    assert pool.stats()[0]['latency_ms'] > pool.stats()[1]['latency_ms']
+    pool.close()
+
+def test_fails_over_when_an_endpoint_is_down(nodes):
+    down, up = nodes
+    down.stop()
+    pool = _pool(nodes)
+    assert pool.call('eth_chainId') == '0x2'
+    assert pool.failovers == 1
+    assert [endpoint['healthy'] for endpoint in pool.stats()] == [False, True]
+    assert pool.call('eth_chainId') == '0x2' # Skipped during its cooldown
+    assert pool.failovers == 1
+    pool.close()
+
+def test_fails_over_on_provider_errors(nodes):
+    failing, healthy = nodes
+    failing.http_status = 503
+    pool = _pool(nodes)
+    assert pool.call('eth_blockNumber') == '0x0'
+    assert healthy.methods() == ['eth_blockNumber']
+    assert not pool.stats()[0]['healthy']
+    pool.close()
+
+def test_hedges_slow_reads(nodes):
+    slow, fast = nodes
+    slow.latency = 0.5
+    pool = _pool(nodes, hedge_after=0.05)
+    started = time.monotonic()
+    assert pool.call('eth_chainId') == '0x2'
+    assert time.monotonic() - started < 0.4
+    assert pool.hedges == 1
+    assert slow.http_requests == 1 and fast.http_requests == 1
+    pool.close()
+
+def test_writes_are_not_hedged(nodes):
+    slow, fast = nodes
+    slow.latency = 0.2
+    pool = _pool(nodes, hedge_after=0.01)
+    transaction = {'from': slow.accounts[0], 'data': '0x6080'}
+    assert pool.call('eth_sendTransaction', [transaction]).startswith('0x')
+    assert 'eth_sendTransaction' in slow.methods()
+    assert fast.http_requests == 0
+    assert pool.hedges == 0
+    pool.close()
+
+def test_writes_fail_over_only_when_not_delivered(nodes):
+    down, up = nodes
+    down.stop()
+    pool = _pool(nodes)
+    pool.call('eth_sendTransaction', [{'from': up.accounts[0], 'data': '0x6080'}])
+    assert up.methods() == ['eth_sendTransaction']
+    pool.close()
+
+def test_node_errors_are_not_retried(nodes):
+    first, second = nodes
+    pool = _pool(nodes, hedge_after=5)
+    with pytest.raises(JsonRpcError, match="Method not found") as excinfo:
+        pool.call('eth_unknownMethod')
+    assert excinfo.value.code == -32601
+    assert second.http_requests == 0
+    assert pool.stats()[0]['healthy']
+    pool.close()
+
+def test_all_endpoints_down_raises(nodes):
+    for node in nodes:
+        node.stop()
+    pool = _pool(nodes)
+    with pytest.raises(JsonRpcError, match="All RPC endpoints failed"):
+        pool.call('eth_chainId')
+    pool.close()
+
+def test_health_check_skips_lagging_endpoints(nodes):
+    behind, ahead = nodes
+    ahead.block_number = 20
+    pool = _pool(nodes, max_block_lag=5)
+    assert pool.check_health() == {behind.url: 0, ahead.url: 20}
+    assert [endpoint['healthy'] for endpoint in pool.stats()] == [False, True]
+    assert pool.call('eth_blockNumber') == hex(20)
+    pool.close()
+
+def test_network_client_shares_one_pool_per_endpoint_list(nodes):
+    details = {'rpc_url': nodes[0].url, 'rpc_urls': [nodes[1].url, nodes[0].url], 'rpc_health_interval': 0}
+    assert rpc_endpoints(details) == [nodes[0].url, nodes[1].url]
+    pool = network_client(details)
+    assert isinstance(pool, EndpointPool)
+    assert network_client(dict(details)) is pool
+    assert network_client({'rpc_url': nodes[0].url}).url == nodes[0].url
+    close_clients()
+
+def test_rpc_urls_env_override():
+    config = apply_env_overlay({'goerli': {}}, environ={'GOERLI_RPC_URLS': 'https://a.example, https://b.example'})
+    assert config['goerli']['rpc_urls'] == ['https://a.example', 'https://b.example']
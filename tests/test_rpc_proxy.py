@@ -0,0 +1,111 @@
+import json
+import pytest
+
+from src.pipeline_runner import PipelineRunner
+from src.rpc import JsonRpcClient, JsonRpcError, close_clients
+from src.rpc_proxy import CachingRpcProxy, RpcResponseCache, pin_params
+from tests.fake_rpc import FakeRpcNode
+
+ADDRESS = '0x' + '11' * 20
+
+@pytest.fixture
+def node():
+    with FakeRpcNode(chain_id=5) as node:
+        node.block_number = 100
+        node.code[ADDRESS] = '0x6080'
+        node.handlers['eth_getStorageAt'] = lambda address, slot, block: '0x' + '00' * 31 + '2a'
+        node.handlers['eth_getBlockByNumber'] = lambda block, full: {'number': block, 'hash': '0x' + 'ab' * 32}
+        yield node
+    close_clients()
+
+def _proxy(tmp_path, node, **cache_options):
+    proxy = CachingRpcProxy(cache=RpcResponseCache(str(tmp_path / "rpc-cache.sqlite"), **cache_options)).start()
+    url = proxy.add_network('goerli', {'rpc_url': node.url, 'chain_id': 5})
+    return proxy, JsonRpcClient(url)
+
+def test_reads_are_pinned_and_served_from_the_cache(node, tmp_path):
+    proxy, client = _proxy(tmp_path, node)
+    try:
+        assert client.call('eth_blockNumber') == hex(100)
+        node.block_number = 105 # The chain moves on; the dry run does not
+        assert client.call('eth_blockNumber') == hex(100)
+        for _ in range(3):
+            assert client.call('eth_getCode', [ADDRESS, 'latest']) == '0x6080'
+            assert client.call('eth_getStorageAt', [ADDRESS, '0x0']) == '0x' + '00' * 31 + '2a'
+        assert node.requests.count(('eth_getCode', [ADDRESS, hex(100)])) == 1
+        assert node.requests.count(('eth_getStorageAt', [ADDRESS, '0x0', hex(100)])) == 1
+        # A block after the pin is forwarded every time and never cached
+        client.call('eth_getBlockByNumber', [hex(103), False])
+        client.call('eth_getBlockByNumber', [hex(103), False])
+        assert node.methods().count('eth_getBlockByNumber') == 2
+        assert (proxy.hits, proxy.misses) == (4, 4)
+    finally:
+        proxy.close()
+
+def test_cache_and_pin_survive_restarts_offline(node, tmp_path):
+    proxy, client = _proxy(tmp_path, node)
+    client.call('eth_getCode', [ADDRESS])
+    client.call('eth_chainId')
+    client.call('eth_getBlockByNumber', ['latest', False])
+    proxy.close()
+
+    node.block_number = 200
+    node.http_status = 503 # Upstream unreachable
+    proxy, client = _proxy(tmp_path, node)
+    try:
+        assert client.call('eth_blockNumber') == hex(100)
+        assert client.call('eth_getCode', [ADDRESS, 'latest']) == '0x6080'
+        assert client.batch([('eth_getBlockByNumber', [hex(100), False]), ('eth_chainId', [])]) == [
+            {'number': hex(100), 'hash': '0x' + 'ab' * 32}, hex(5)
+        ]
+        assert proxy.misses == 0
+    finally:
+        proxy.close()
+
+def test_transactions_are_never_forwarded(node, tmp_path):
+    proxy, client = _proxy(tmp_path, node)
+    try:
+        with pytest.raises(JsonRpcError, match="not forwarded during a dry run"):
+            client.call('eth_sendRawTransaction', ['0x00'])
+        assert 'eth_sendRawTransaction' not in node.methods()
+    finally:
+        proxy.close()
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = RpcResponseCache(str(tmp_path / "cache.sqlite"), max_bytes=100)
+    cache.put('a', 'x' * 40)
+    cache.put('b', 'y' * 40)
+    assert cache.get('a') == 'x' * 40 # 'b' is now the least recently used
+    cache.put('c', 'z' * 40)
+    assert cache.get('b') is None
+    assert cache.get('a') == 'x' * 40 and cache.get('c') == 'z' * 40
+    assert cache.size <= 100
+    cache.close()
+
+def test_pin_params():
+    assert pin_params('eth_getBalance', [ADDRESS], 10) == [ADDRESS, '0xa']
+    assert pin_params('eth_call', [{}, {'blockNumber': 'latest'}], 10) == [{}, {'blockNumber': '0xa'}]
+    assert pin_params('eth_getLogs', [{'fromBlock': 'earliest'}], 10) == [{'fromBlock': '0x0', 'toBlock': '0xa'}]
+    assert pin_params('eth_getBlockByNumber', ['0xb', False], 10) is None
+
+def test_dry_run_forks_every_network(node, tmp_path):
+    (tmp_path / "config").mkdir()
+    (tmp_path / "config" / "networks.json").write_text(json.dumps({
+        'goerli': {'rpc_url': node.url, 'chain_id': 5, 'etherscan_api_key': 'key', 'dry_run': {'node': 'hardhat'}},
+        'devchain': {'type': 'ephemeral', 'pool_size': 1},
+    }))
+    (tmp_path / "pipelines").mkdir()
+    (tmp_path / "pipelines" / "release.yaml").write_text(
+        "name: Release\njobs:\n  - name: Verify\n    uses: actions/verify@v1\n    with:\n      network: goerli\n      contract: Token\n      address: '0x01'\n"
+    )
+    proxy = CachingRpcProxy(cache=RpcResponseCache(str(tmp_path / "rpc-cache.sqlite"))).start()
+    try:
+        runner = PipelineRunner(str(tmp_path / "pipelines" / "release.yaml"), rpc_proxy=proxy)
+        goerli = runner.networks_config['goerli']
+        assert goerli['type'] == 'ephemeral' and goerli['node'] == 'hardhat' and goerli['chain_id'] == 5
+        assert goerli['fork_url'] == f'{proxy.url}/goerli' and 'rpc_url' not in goerli
+        assert runner.networks_config['devchain'] == {'type': 'ephemeral', 'pool_size': 1}
+        runner.run()
+        assert runner.job_outputs['Verify'] == {'status': 'skipped', 'reason': 'dry run'}
+    finally:
+        proxy.close()
@@ -0,0 +1,55 @@
+import os
+import json
+
+from src.run_state import RunStateStore, job_fingerprint, job_history, new_run_id
+
+NETWORKS = {'localhost': {'rpc_url': 'http://127.0.0.1:8545'}, 'goerli': {'rpc_url': 'https://goerli'}}
+
+def test_record_and_load_keeps_last_record_per_job(tmp_path):
+    store = RunStateStore(str(tmp_path / "state"), "run-1")
+    assert not store.exists()
+    store.record("Deploy", "abc", {'status': 'failure', 'error': 'boom'}, started_at=1.0, finished_at=3.0)
+    store.record("Deploy", "abc", {'status': 'success', 'address': '0x1'}, started_at=4.0, finished_at=5.5)
+    store.record("Compile", "def", {'status': 'success'})
+
+    records = RunStateStore(str(tmp_path / "state"), "run-1").load()
+    assert records['Deploy']['output'] == {'status': 'success', 'address': '0x1'}
+    assert records['Deploy']['duration'] == 1.5
+    assert set(records) == {'Deploy', 'Compile'}
+
+def test_load_ignores_torn_lines(tmp_path):
+    store = RunStateStore(str(tmp_path), "run-2")
+    store.record("Compile", "def", {'status': 'success'})
+    with open(store.path, 'a') as f:
+        f.write('{"job": "Deploy", "fingerp')
+    assert list(store.load()) == ['Compile']
+
+def test_job_history_keeps_successful_executions_of_recent_runs(tmp_path):
+    for index, (status, duration) in enumerate([('success', 4.0), ('failure', 1.0), ('success', 6.0)]):
+        store = RunStateStore(str(tmp_path), f"run-{index}")
+        store.record("Deploy", "abc", {'status': status}, started_at=10.0, finished_at=10.0 + duration)
+        os.utime(store.path, (index, index))
+    (tmp_path / "trace.otel.jsonl").write_text('{"name": "job"}\n')
+    history = job_history(str(tmp_path))
+    assert [record['duration'] for record in history['Deploy']] == [6.0, 4.0]
+    assert [record['duration'] for record in job_history(str(tmp_path), runs=1)['Deploy']] == [6.0]
+    assert job_history(str(tmp_path / "missing")) == {}
+
+def test_fingerprint_tracks_params_network_and_artifacts(tmp_path):
+    artifacts_dir = tmp_path / "artifacts" / "MyContract.sol"
+    artifacts_dir.mkdir(parents=True)
+    artifact = artifacts_dir / "MyContract.json"
+    artifact.write_text(json.dumps({'bytecode': '0x60'}))
+    params = {'network': 'localhost', 'contract': 'MyContract', 'artifacts_dir': str(tmp_path / "artifacts")}
+
+    base = job_fingerprint('actions/deploy@v1', params, NETWORKS)
+    assert base == job_fingerprint('actions/deploy@v1', dict(params), NETWORKS)
+    assert base != job_fingerprint('actions/deploy@v1', dict(params, args=['Hi']), NETWORKS)
+    assert base != job_fingerprint('actions/deploy@v1', params, {'localhost': {'rpc_url': 'http://other'}})
+    # Settings of networks the job does not target are irrelevant
+    assert base == job_fingerprint('actions/deploy@v1', params, {'localhost': NETWORKS['localhost']})
+    artifact.write_text(json.dumps({'bytecode': '0x61'}))
+    assert base != job_fingerprint('actions/deploy@v1', params, NETWORKS)
+
+def test_new_run_ids_are_unique():
+    assert new_run_id() != new_run_id()
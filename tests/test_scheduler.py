@@ -0,0 +1,103 @@
+import threading
+import time
+import pytest
+
+from src.scheduler import build_job_graph, critical_path, find_job_references, run_job_graph, simulate_job_graph, tail_lengths
+
+def test_find_job_references_includes_nested_and_interpolated():
+    params = {
+        'address': '${{ jobs.Deploy to Localhost.output.address }}',
+        'network': 'localhost',
+        'args': ['${{ jobs.Token.output.address }}'],
+        'label': 'release-${{ env.VERSION }}-${{ jobs.Compile.output.cache_key }}',
+    }
+    assert find_job_references(params) == {'Deploy to Localhost', 'Token', 'Compile'}
+
+def test_build_job_graph_from_needs_and_references():
+    jobs = [
+        {'name': 'Compile', 'uses': 'actions/compile@v1'},
+        {'name': 'Deploy', 'uses': 'actions/deploy@v1', 'needs': 'Compile'},
+        {'name': 'Verify', 'uses': 'actions/verify@v1', 'with': {'address': '${{ jobs.Deploy.output.address }}'}},
+    ]
+    order, dependencies = build_job_graph(jobs)
+    assert order == ['Compile', 'Deploy', 'Verify']
+    assert dependencies == {'Compile': set(), 'Deploy': {'Compile'}, 'Verify': {'Compile', 'Deploy'}}
+
+def test_build_job_graph_deploy_waits_for_earlier_compile():
+    jobs = [
+        {'name': 'Compile', 'uses': 'actions/compile@v1'},
+        {'name': 'Deploy', 'uses': 'actions/deploy@v1'},
+        {'name': 'Verify', 'uses': 'actions/verify@v1', 'with': {'address': '0xabc'}},
+    ]
+    _, dependencies = build_job_graph(jobs)
+    assert dependencies == {'Compile': set(), 'Deploy': {'Compile'}, 'Verify': {'Compile'}}
+
+def test_build_job_graph_names_unnamed_jobs_by_position():
+    order, dependencies = build_job_graph([{'uses': 'actions/compile@v1'}, {'uses': 'actions/custom@v1'}])
+    assert order == ['Unnamed Job 1', 'Unnamed Job 2']
+    assert dependencies == {'Unnamed Job 1': set(), 'Unnamed Job 2': set()}
+
+def test_build_job_graph_unknown_dependency():
+    with pytest.raises(ValueError, match="unknown job"):
+        build_job_graph([{'name': 'Deploy', 'needs': ['Compile']}])
+
+def test_build_job_graph_duplicate_name():
+    with pytest.raises(ValueError, match="Duplicate job name"):
+        build_job_graph([{'name': 'Deploy'}, {'name': 'Deploy'}])
+
+def test_build_job_graph_cycle():
+    jobs = [{'name': 'A', 'needs': 'B'}, {'name': 'B', 'needs': 'A'}]
+    with pytest.raises(ValueError, match="cycle"):
+        build_job_graph(jobs)
+
+def test_run_job_graph_serial_keeps_pipeline_order():
+    order = ['A', 'B', 'C']
+    dependencies = {'A': set(), 'B': set(), 'C': {'A'}}
+    executed = []
+    run_job_graph(order, dependencies, executed.append, max_parallel=1)
+    assert executed == ['A', 'B', 'C']
+
+def test_run_job_graph_starts_longest_tail_first():
+    order = ['Lint', 'Build', 'Deploy']
+    dependencies = {'Lint': set(), 'Build': set(), 'Deploy': {'Build'}}
+    priority = tail_lengths(order, dependencies, {'Lint': 5, 'Build': 10, 'Deploy': 30})
+    assert priority == {'Lint': 5, 'Build': 40, 'Deploy': 30}
+    executed = []
+    run_job_graph(order, dependencies, executed.append, max_parallel=1, priority=priority)
+    assert executed == ['Build', 'Deploy', 'Lint']
+
+def test_critical_path_and_simulated_schedule():
+    order = ['A', 'B', 'C', 'D']
+    dependencies = {'A': set(), 'B': {'A'}, 'C': {'A'}, 'D': {'B', 'C'}}
+    durations = {'A': 1, 'B': 5, 'C': 2, 'D': 1}
+    assert critical_path(order, dependencies, durations) == (7, ['A', 'B', 'D'])
+    assert simulate_job_graph(order, dependencies, durations, max_parallel=2) == {'A': (0, 1), 'B': (1, 6), 'C': (1, 3), 'D': (6, 7)}
+    assert simulate_job_graph(order, dependencies, durations, max_parallel=1)['D'] == (8, 9)
+
+def test_run_job_graph_runs_independent_jobs_concurrently():
+    order = ['Compile', 'Deploy A', 'Deploy B', 'Deploy C']
+    dependencies = {'Compile': set(), 'Deploy A': {'Compile'}, 'Deploy B': {'Compile'}, 'Deploy C': {'Compile'}}
+    lock = threading.Lock()
+    active = {'now': 0, 'peak': 0}
+    finished = []
+
+    def execute(name):
+        with lock:
+            active['now'] += 1
+            active['peak'] = max(active['peak'], active['now'])
+        time.sleep(0.05)
+        with lock:
+            active['now'] -= 1
+            finished.append(name)
+
+    run_job_graph(order, dependencies, execute, max_parallel=2)
+    assert finished[0] == 'Compile'
+    assert sorted(finished[1:]) == ['Deploy A', 'Deploy B', 'Deploy C']
+    assert active['peak'] == 2
+
+def test_run_job_graph_propagates_errors():
+    def execute(name):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        run_job_graph(['A'], {'A': set()}, execute)
@@ -0,0 +1,58 @@
+import pytest
+
+from src.registry import ActionRegistry
+from src.schema import PipelineValidationError, validate_pipeline
+
+def _errors(data, registry=None):
+    with pytest.raises(PipelineValidationError) as excinfo:
+        validate_pipeline(data, registry or ActionRegistry(use_entry_points=False))
+    return excinfo.value.errors
+
+def test_valid_pipeline_returns_compiled_params():
+    compiled = validate_pipeline({'name': 'Ok', 'jobs': [
+        {'name': 'Deploy', 'uses': 'actions/deploy@v1', 'with': {'network': 'localhost', 'contract': 'Token', 'confirmations': 2}},
+        {'name': 'Verify', 'uses': 'actions/verify@v1', 'needs': 'Deploy',
+         'with': {'network': 'localhost', 'address': '${{ jobs.Deploy.output.address }}'}},
+    ]}, ActionRegistry(use_entry_points=False))
+    assert set(compiled) == {'Deploy', 'Verify'}
+
+def test_every_problem_is_reported_with_suggestions():
+    errors = _errors({'name': 'Bad', 'job': [], 'jobs': [
+        {'name': 'Deploy', 'uses': 'actions/deploy@v1', 'with': {'network': 'localhost', 'contrct': 'Token'}},
+        {'name': 'Verify', 'uses': 'actions/verfy@v1', 'need': 'Deploy'},
+        {'name': 'Check', 'uses': 'actions/verify@v1', 'needs': 'Deplo', 'with': {'network': 'localhost', 'address': '${{ jobs.Nope.output.address }}'}},
+    ]})
+    assert errors == [
+        "unknown top-level key 'job' (did you mean 'jobs'?)",
+        "jobs[0] (Deploy): unknown parameter 'contrct' for actions/deploy@v1 (did you mean 'contract'?)",
+        "jobs[0] (Deploy): missing required parameter 'contract' for actions/deploy@v1",
+        "jobs[1] (Verify): unknown key 'need' (did you mean 'needs'?)",
+        "jobs[1] (Verify): uses unknown action 'actions/verfy@v1' (did you mean 'actions/verify@v1'?)",
+        "jobs[2] (Check): references unknown job(s): Nope",
+        "jobs[2] (Check): needs unknown job 'Deplo' (did you mean 'Deploy'?)",
+    ]
+
+def test_param_types_are_checked_unless_resolved_at_run_time():
+    errors = _errors({'jobs': [
+        {'name': 'Deploy', 'uses': 'actions/deploy@v1',
+         'with': {'network': 'localhost', 'contract': 'Token', 'args': 'Hello', 'confirmations': True, 'poll_interval': '${{ matrix.interval }}'}},
+    ]})
+    assert errors == [
+        "jobs[0] (Deploy): parameter 'args' must be a list, got 'Hello'",
+        "jobs[0] (Deploy): parameter 'confirmations' must be an integer, got True",
+    ]
+
+def test_plugin_actions_declare_params(tmp_path):
+    plugin = tmp_path / 'acme' / 'grant-role@v1.py'
+    plugin.parent.mkdir()
+    plugin.write_text("PARAMS = {'role': (str, True)}\ndef run(params, context):\n    return {'status': 'success'}\n")
+    registry = ActionRegistry([str(tmp_path)], use_entry_points=False)
+    assert _errors({'jobs': [{'uses': 'acme/grant-role@v1', 'with': {'rol': 'MINTER'}}]}, registry) == [
+        "jobs[0]: unknown parameter 'rol' for acme/grant-role@v1 (did you mean 'role'?)",
+        "jobs[0]: missing required parameter 'role' for acme/grant-role@v1",
+    ]
+    registry.register('acme/free@v1', lambda params, context: None)
+    validate_pipeline({'jobs': [{'uses': 'acme/free@v1', 'with': {'anything': 1}}]}, registry)
+
+def test_compile_cache_size_may_be_quoted():
+    validate_pipeline({'jobs': [{'uses': 'actions/compile@v1', 'with': {'tool': 'hardhat', 'cache_max_size_mb': '0.5'}}]})
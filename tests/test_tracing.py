@@ -0,0 +1,84 @@
+import json
+import threading
+import pytest
+
+from src.rpc import JsonRpcClient
+from src.tracing import Tracer, set_tracer, span
+from tests.fake_rpc import FakeRpcNode
+
+@pytest.fixture
+def tracer():
+    tracer = Tracer()
+    set_tracer(tracer)
+    yield tracer
+    set_tracer(None)
+
+def _by_name(tracer):
+    return {span.name: span for span in tracer.spans}
+
+def test_span_is_a_no_op_without_tracer():
+    set_tracer(None)
+    with span('anything', size=1) as active:
+        active.set(more=2)
+
+def test_nested_spans_and_thread_fallback_parent(tracer):
+    with span('pipeline.run'):
+        with span('job', 'job', job='Compile') as job_span:
+            job_span.set(status='success')
+        thread_spans = []
+        def in_thread():
+            with span('thread job') as active:
+                thread_spans.append(active)
+        worker = threading.Thread(target=in_thread)
+        worker.start()
+        worker.join()
+
+    spans = _by_name(tracer)
+    root = spans['pipeline.run']
+    assert root.parent_id is None
+    assert spans['job'].parent_id == root.span_id
+    assert spans['job'].attributes == {'job': 'Compile', 'status': 'success'}
+    # Threads without a current span attach to the open root span
+    assert thread_spans[0].parent_id == root.span_id
+    assert thread_spans[0].thread_id != root.thread_id
+
+def test_error_is_recorded_and_reraised(tracer):
+    with pytest.raises(RuntimeError):
+        with span('job'):
+            raise RuntimeError("boom")
+    assert tracer.spans[0].error == "RuntimeError: boom"
+    assert tracer.otel_spans()[0]['status'] == {'code': 2, 'message': "RuntimeError: boom"}
+
+def test_export_writes_chrome_trace_and_otel_jsonl(tracer, tmp_path):
+    with span('pipeline.run'):
+        with span('compile.subprocess', 'subprocess', stdout_bytes=12):
+            pass
+    chrome_path, otel_path = tracer.export(str(tmp_path / 'trace.json'))
+    assert otel_path == str(tmp_path / 'trace.otel.jsonl')
+
+    with open(chrome_path) as f:
+        events = json.load(f)['traceEvents']
+    complete = [event for event in events if event['ph'] == 'X']
+    assert [event['name'] for event in complete] == ['pipeline.run', 'compile.subprocess']
+    assert complete[1]['cat'] == 'subprocess'
+    assert complete[1]['args'] == {'stdout_bytes': 12}
+    assert complete[0]['ts'] <= complete[1]['ts'] and complete[1]['dur'] <= complete[0]['dur']
+
+    with open(otel_path) as f:
+        records = [json.loads(line) for line in f]
+    assert [record['name'] for record in records] == ['pipeline.run', 'compile.subprocess']
+    assert records[1]['parentSpanId'] == records[0]['spanId']
+    assert records[0]['traceId'] == records[1]['traceId'] == tracer.trace_id
+    assert {'key': 'stdout_bytes', 'value': {'intValue': '12'}} in records[1]['attributes']
+    assert int(records[1]['endTimeUnixNano']) >= int(records[1]['startTimeUnixNano'])
+
+def test_rpc_calls_record_spans_with_sizes(tracer):
+    with FakeRpcNode(chain_id=5) as node:
+        client = JsonRpcClient(node.url)
+        client.call('eth_chainId')
+        client.batch([('eth_chainId', []), ('eth_gasPrice', [])])
+        client.close()
+    spans = _by_name(tracer)
+    assert spans['rpc eth_chainId'].category == 'rpc'
+    assert spans['rpc eth_chainId'].attributes['url'] == node.url
+    assert spans['rpc batch'].attributes['response_bytes'] > spans['rpc eth_chainId'].attributes['response_bytes']
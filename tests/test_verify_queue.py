@@ -0,0 +1,82 @@
+import threading
+import time
+
+from src.verify_queue import TokenBucket, VerificationQueue, is_retryable
+
+class FakeExplorer:
+    # Scripted explorer API: each network answers with its queued responses, then succeeds
+    def __init__(self, responses):
+        self.responses = {network: list(items) for network, items in responses.items()}
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def submit(self, params):
+        with self.lock:
+            self.calls.append((params['network'], time.monotonic()))
+            queued = self.responses.get(params['network'], [])
+            if queued:
+                return {'status': 'failure', 'error': queued.pop(0)}
+        return {'status': 'success'}
+
+def test_is_retryable():
+    assert is_retryable({'status': 'failure', 'error': 'Max rate limit reached'})
+    assert is_retryable({'status': 'failure', 'error': 'Address 0x1 does not have bytecode'})
+    assert not is_retryable({'status': 'failure', 'error': 'Bytecode mismatch'})
+    assert not is_retryable({'status': 'success'})
+
+def test_token_bucket_waits_for_refill():
+    now = [0.0]
+    slept = []
+
+    def sleep(seconds):
+        slept.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=2, capacity=1, clock=lambda: now[0], sleep=sleep)
+    bucket.acquire()
+    bucket.acquire()
+    assert slept == [0.5]
+
+def test_queue_retries_transient_errors_with_backoff():
+    explorer = FakeExplorer({'goerli': ['Max rate limit reached', 'Unable to locate ContractCode at 0x1']})
+    delays = []
+    queue = VerificationQueue(explorer.submit, base_delay=0.001, sleep=lambda s: delays.append(s))
+    queue.enqueue('Verify Goerli', {'network': 'goerli', 'contract': 'MyContract'}, 'etherscan-goerli', rate_limit=1000)
+    results = queue.wait()
+    queue.close()
+
+    assert results == {'Verify Goerli': {'status': 'success', 'attempts': 3}}
+    assert delays == [0.001, 0.002]
+
+def test_queue_does_not_retry_permanent_errors():
+    explorer = FakeExplorer({'goerli': ['Fail - Unable to verify', 'never reached']})
+    queue = VerificationQueue(explorer.submit, base_delay=0.001)
+    queue.enqueue('Verify', {'network': 'goerli'}, 'etherscan', rate_limit=1000)
+    assert queue.wait()['Verify'] == {'status': 'failure', 'error': 'Fail - Unable to verify', 'attempts': 1}
+    queue.close()
+
+def test_queue_gives_up_after_max_retries():
+    explorer = FakeExplorer({'goerli': ['rate limit'] * 10})
+    queue = VerificationQueue(explorer.submit, max_retries=2, base_delay=0.001)
+    queue.enqueue('Verify', {'network': 'goerli'}, 'etherscan', rate_limit=1000)
+    assert queue.wait()['Verify']['attempts'] == 3
+    queue.close()
+
+def test_queue_rate_limits_per_explorer_and_runs_explorers_concurrently():
+    explorer = FakeExplorer({})
+    queue = VerificationQueue(explorer.submit)
+    start = time.monotonic()
+    for i in range(5):
+        queue.enqueue(f'Verify A{i}', {'network': 'a'}, 'explorer-a', rate_limit=4)
+        queue.enqueue(f'Verify B{i}', {'network': 'b'}, 'explorer-b', rate_limit=4)
+    results = queue.wait()
+    queue.close()
+
+    assert all(result['status'] == 'success' for result in results.values())
+    for network in ('a', 'b'):
+        times = sorted(t for n, t in explorer.calls if n == network)
+        # Burst of four, then one token every 250ms
+        assert times[3] - times[0] < 0.1
+        assert times[4] - times[0] >= 0.2
+    # The two explorers do not wait on each other
+    assert time.monotonic() - start < 0.45